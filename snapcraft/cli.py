@@ -21,115 +21,182 @@ import contextlib
 import logging
 import os
 import sys
-from typing import Any, Dict
+from typing import Any, Dict, Type, cast
 
 import craft_cli
-import craft_store
 from craft_cli import ArgumentParsingError, EmitterMode, ProvideHelpException, emit
 
-import snapcraft
-import snapcraft_legacy
-from snapcraft import __version__, errors, store, utils
-from snapcraft.parts import plugins
-from snapcraft_legacy.cli import legacy
+from snapcraft import __version__, errors, utils
 
 from . import commands
 from .legacy_cli import _LIB_NAMES, _ORIGINAL_LIB_NAME_LOG_LEVEL, run_legacy
 
+
+class LazyCommand:
+    """A command whose implementation is only imported when needed.
+
+    The dispatcher only requires the command name to build its command
+    table. Instantiating the command or accessing any other attribute
+    (help messages, overview, visibility) imports the implementing class
+    from :mod:`snapcraft.commands`.
+
+    :param name: the command name, as used on the command line.
+    :param class_name: the name of the class implementing the command.
+    """
+
+    def __init__(self, name: str, class_name: str) -> None:
+        self.name = name
+        self.__name__ = class_name
+
+    def load(self) -> Type[craft_cli.BaseCommand]:
+        """Import and return the class implementing this command."""
+        return getattr(commands, self.__name__)
+
+    def __call__(self, config: Any) -> craft_cli.BaseCommand:
+        """Instantiate the command, as done by the dispatcher."""
+        return self.load()(config)
+
+    def __instancecheck__(self, instance: Any) -> bool:
+        """Check if instance is a command of this class, as done by the help.
+
+        The command class is only imported if instance is of a class with the
+        same name, so looking up the group of a command does not import the
+        commands of every group.
+        """
+        if not any(cls.__name__ == self.__name__ for cls in type(instance).__mro__):
+            return False
+        return isinstance(instance, self.load())
+
+    def __getattr__(self, attr: str) -> Any:
+        """Forward attributes not known to the descriptor to the command class."""
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        """Represent the descriptor with its command and class names."""
+        return f"{self.__class__.__name__}({self.name!r}, {self.__name__!r})"
+
+
+def _lazy_command(name: str, class_name: str) -> Type[craft_cli.BaseCommand]:
+    # the dispatcher expects command classes, which LazyCommand stands in for
+    return cast(Type[craft_cli.BaseCommand], LazyCommand(name, class_name))
+
+
+_PACK_COMMAND = _lazy_command("pack", "PackCommand")
+
 COMMAND_GROUPS = [
     craft_cli.CommandGroup(
         "Lifecycle",
         [
-            commands.CleanCommand,
-            commands.PullCommand,
-            commands.BuildCommand,
-            commands.StageCommand,
-            commands.PrimeCommand,
-            commands.PackCommand,
-            commands.RemoteBuildCommand,
-            commands.SnapCommand,  # hidden (legacy compatibility)
-            commands.PluginsCommand,
-            commands.ListPluginsCommand,
-            commands.TryCommand,
+            _lazy_command("clean", "CleanCommand"),
+            _lazy_command("pull", "PullCommand"),
+            _lazy_command("build", "BuildCommand"),
+            _lazy_command("stage", "StageCommand"),
+            _lazy_command("prime", "PrimeCommand"),
+            _PACK_COMMAND,
+            _lazy_command("remote-build", "RemoteBuildCommand"),
+            # hidden (legacy compatibility)
+            _lazy_command("snap", "SnapCommand"),
+            _lazy_command("plugins", "PluginsCommand"),
+            _lazy_command("list-plugins", "ListPluginsCommand"),
+            _lazy_command("try", "TryCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Extensions",
         [
-            commands.ListExtensionsCommand,
-            commands.ExtensionsCommand,  # hidden (alias to list-extensions)
-            commands.ExpandExtensionsCommand,
+            _lazy_command("list-extensions", "ListExtensionsCommand"),
+            # hidden (alias to list-extensions)
+            _lazy_command("extensions", "ExtensionsCommand"),
+            _lazy_command("expand-extensions", "ExpandExtensionsCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Account",
         [
-            commands.StoreLoginCommand,
-            commands.StoreExportLoginCommand,
-            commands.StoreLogoutCommand,
-            commands.StoreWhoAmICommand,
+            _lazy_command("login", "StoreLoginCommand"),
+            _lazy_command("export-login", "StoreExportLoginCommand"),
+            _lazy_command("logout", "StoreLogoutCommand"),
+            _lazy_command("whoami", "StoreWhoAmICommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Snap Names",
         [
-            commands.StoreRegisterCommand,
-            commands.StoreNamesCommand,
-            commands.StoreLegacyListRegisteredCommand,
-            commands.StoreLegacyListCommand,
-            commands.StoreLegacyMetricsCommand,
-            commands.StoreLegacyUploadMetadataCommand,
+            _lazy_command("register", "StoreRegisterCommand"),
+            _lazy_command("names", "StoreNamesCommand"),
+            _lazy_command("list-registered", "StoreLegacyListRegisteredCommand"),
+            _lazy_command("list", "StoreLegacyListCommand"),
+            _lazy_command("metrics", "StoreLegacyMetricsCommand"),
+            _lazy_command("upload-metadata", "StoreLegacyUploadMetadataCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Snap Release Management",
         [
-            commands.StoreReleaseCommand,
-            commands.StoreCloseCommand,
-            commands.StoreStatusCommand,
-            commands.StoreUploadCommand,
-            commands.StoreLegacyPushCommand,  # hidden (legacy for upload)
-            commands.StoreLegacyPromoteCommand,
-            commands.StoreListRevisionsCommand,
-            commands.StoreRevisionsCommand,  # hidden (alias to list-revisions)
+            _lazy_command("release", "StoreReleaseCommand"),
+            _lazy_command("close", "StoreCloseCommand"),
+            _lazy_command("status", "StoreStatusCommand"),
+            _lazy_command("upload", "StoreUploadCommand"),
+            # hidden (legacy for upload)
+            _lazy_command("push", "StoreLegacyPushCommand"),
+            _lazy_command("promote", "StoreLegacyPromoteCommand"),
+            _lazy_command("list-revisions", "StoreListRevisionsCommand"),
+            # hidden (alias to list-revisions)
+            _lazy_command("revisions", "StoreRevisionsCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Snap Tracks",
         [
-            commands.StoreListTracksCommand,
-            commands.StoreTracksCommand,  # hidden (alias to list-tracks)
-            commands.StoreLegacySetDefaultTrackCommand,
+            _lazy_command("list-tracks", "StoreListTracksCommand"),
+            # hidden (alias to list-tracks)
+            _lazy_command("tracks", "StoreTracksCommand"),
+            _lazy_command("set-default-track", "StoreLegacySetDefaultTrackCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Key Management",
         [
-            commands.StoreLegacyCreateKeyCommand,
-            commands.StoreLegacyRegisterKeyCommand,
-            commands.StoreLegacySignBuildCommand,
-            commands.StoreLegacyListKeysCommand,
+            _lazy_command("create-key", "StoreLegacyCreateKeyCommand"),
+            _lazy_command("register-key", "StoreLegacyRegisterKeyCommand"),
+            _lazy_command("sign-build", "StoreLegacySignBuildCommand"),
+            _lazy_command("list-keys", "StoreLegacyListKeysCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Validation Sets",
         [
-            commands.StoreEditValidationSetsCommand,
-            commands.StoreLegacyListValidationSetsCommand,
-            commands.StoreLegacyValidateCommand,
-            commands.StoreLegacyGatedCommand,
+            _lazy_command("edit-validation-sets", "StoreEditValidationSetsCommand"),
+            _lazy_command(
+                "list-validation-sets", "StoreLegacyListValidationSetsCommand"
+            ),
+            _lazy_command("validate", "StoreLegacyValidateCommand"),
+            _lazy_command("gated", "StoreLegacyGatedCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Other",
         [
-            commands.VersionCommand,
-            commands.LintCommand,
-            commands.InitCommand,
+            _lazy_command("version", "VersionCommand"),
+            _lazy_command("lint", "LintCommand"),
+            _lazy_command("init", "InitCommand"),
         ],
     ),
 ]
 
+# Commands that load a project or its parts, which need our own plugins.
+_PLUGIN_COMMANDS = frozenset(
+    [
+        command.name
+        for group in COMMAND_GROUPS
+        if group.name in ("Lifecycle", "Extensions")
+        for command in group.commands
+    ]
+    + ["lint"]
+)
+
 GLOBAL_ARGS = [
     craft_cli.GlobalArgument(
         "version", "flag", "-V", "--version", "Show the application version and exit"
@@ -181,6 +248,11 @@ def get_dispatcher() -> craft_cli.Dispatcher:
     """
     # Run the legacy implementation if inside a legacy managed environment.
     if os.getenv("SNAPCRAFT_BUILD_ENVIRONMENT") == "managed-host":
+        # pylint: disable=import-outside-toplevel
+        import snapcraft
+        import snapcraft_legacy
+        from snapcraft_legacy.cli import legacy
+
         snapcraft.ProjectOptions = snapcraft_legacy.ProjectOptions  # type: ignore
         legacy.legacy_run()
 
@@ -207,7 +279,7 @@ def get_dispatcher() -> craft_cli.Dispatcher:
         COMMAND_GROUPS,
         summary="Package, distribute, and update snaps for Linux and IoT",
         extra_global_args=GLOBAL_ARGS,
-        default_command=commands.PackCommand,
+        default_command=_PACK_COMMAND,
     )
 
 
@@ -223,7 +295,14 @@ def _run_dispatcher(
             )
             emit.set_mode(EmitterMode.DEBUG)
 
-        dispatcher.load_command(None)
+        command = dispatcher.load_command(None)
+        if command.name in _PLUGIN_COMMANDS:
+            # Register our own plugins
+            # pylint: disable-next=import-outside-toplevel
+            from snapcraft.parts import plugins
+
+            plugins.register()
+
         dispatcher.run()
     emit.ended_ok()
 
@@ -247,10 +326,7 @@ def run():  # noqa: C901
     retcode = 1
 
     try:
-        # Register our own plugins
         global_args = dispatcher.pre_parse_args(sys.argv[1:])
-        plugins.register()
-
         _run_dispatcher(dispatcher, global_args)
         retcode = 0
     except ArgumentParsingError as err:
@@ -274,27 +350,36 @@ def run():  # noqa: C901
     except KeyboardInterrupt as err:
         _emit_error(craft_cli.errors.CraftError("Interrupted."), cause=err)
         retcode = 1
-    except craft_store.errors.NoKeyringError as err:
-        _emit_error(
-            craft_cli.errors.CraftError(
-                f"craft-store error: {err}",
-                resolution=(
-                    "Ensure the keyring is working or "
-                    f"{store.constants.ENVIRONMENT_STORE_CREDENTIALS} "
-                    "is correctly exported into the environment"
-                ),
-                docs_url="https://snapcraft.io/docs/snapcraft-authentication",
-            )
-        )
-        retcode = 1
-    except craft_store.errors.CraftStoreError as err:
-        _emit_error(craft_cli.errors.CraftError(f"craft-store error: {err}"))
-        retcode = 1
     except errors.LinterError as err:
         emit.error(craft_cli.errors.CraftError(f"linter error: {err}"))
         retcode = err.exit_code
     except errors.SnapcraftError as err:
         _emit_error(err)
         retcode = 1
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        # craft-store is only imported by the commands that use it, so its
+        # errors cannot be raised if it is not imported yet
+        store_errors = sys.modules.get("craft_store.errors")
+        if store_errors is None or not isinstance(err, store_errors.CraftStoreError):
+            raise
+
+        if isinstance(err, store_errors.NoKeyringError):
+            # pylint: disable-next=import-outside-toplevel
+            from snapcraft.store.constants import ENVIRONMENT_STORE_CREDENTIALS
+
+            _emit_error(
+                craft_cli.errors.CraftError(
+                    f"craft-store error: {err}",
+                    resolution=(
+                        "Ensure the keyring is working or "
+                        f"{ENVIRONMENT_STORE_CREDENTIALS} "
+                        "is correctly exported into the environment"
+                    ),
+                    docs_url="https://snapcraft.io/docs/snapcraft-authentication",
+                )
+            )
+        else:
+            _emit_error(craft_cli.errors.CraftError(f"craft-store error: {err}"))
+        retcode = 1
 
     return retcode
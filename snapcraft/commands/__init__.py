@@ -14,63 +14,131 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-"""Snapcraft commands."""
+"""Snapcraft commands.
+
+Command classes are imported from their modules on first access, so that
+loading the command line does not import the dependencies of every command.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .account import (
+        StoreExportLoginCommand,
+        StoreLoginCommand,
+        StoreLogoutCommand,
+        StoreWhoAmICommand,
+    )
+    from .discovery import ListPluginsCommand, PluginsCommand
+    from .extensions import (
+        ExpandExtensionsCommand,
+        ExtensionsCommand,
+        ListExtensionsCommand,
+    )
+    from .init import InitCommand
+    from .legacy import (
+        StoreLegacyCreateKeyCommand,
+        StoreLegacyGatedCommand,
+        StoreLegacyListKeysCommand,
+        StoreLegacyListValidationSetsCommand,
+        StoreLegacyMetricsCommand,
+        StoreLegacyPromoteCommand,
+        StoreLegacyRegisterKeyCommand,
+        StoreLegacySetDefaultTrackCommand,
+        StoreLegacySignBuildCommand,
+        StoreLegacyUploadMetadataCommand,
+        StoreLegacyValidateCommand,
+    )
+    from .lifecycle import (
+        BuildCommand,
+        CleanCommand,
+        PackCommand,
+        PrimeCommand,
+        PullCommand,
+        SnapCommand,
+        StageCommand,
+        TryCommand,
+    )
+    from .lint import LintCommand
+    from .manage import StoreCloseCommand, StoreReleaseCommand
+    from .names import (
+        StoreLegacyListCommand,
+        StoreLegacyListRegisteredCommand,
+        StoreNamesCommand,
+        StoreRegisterCommand,
+    )
+    from .remote import RemoteBuildCommand
+    from .status import (
+        StoreListRevisionsCommand,
+        StoreListTracksCommand,
+        StoreRevisionsCommand,
+        StoreStatusCommand,
+        StoreTracksCommand,
+    )
+    from .upload import StoreLegacyPushCommand, StoreUploadCommand
+    from .validation_sets import StoreEditValidationSetsCommand
+    from .version import VersionCommand
+
+_COMMAND_MODULES = {
+    "BuildCommand": "lifecycle",
+    "CleanCommand": "lifecycle",
+    "ExpandExtensionsCommand": "extensions",
+    "ExtensionsCommand": "extensions",
+    "InitCommand": "init",
+    "LintCommand": "lint",
+    "ListExtensionsCommand": "extensions",
+    "ListPluginsCommand": "discovery",
+    "PackCommand": "lifecycle",
+    "PluginsCommand": "discovery",
+    "PrimeCommand": "lifecycle",
+    "PullCommand": "lifecycle",
+    "RemoteBuildCommand": "remote",
+    "SnapCommand": "lifecycle",
+    "StageCommand": "lifecycle",
+    "StoreCloseCommand": "manage",
+    "StoreEditValidationSetsCommand": "validation_sets",
+    "StoreExportLoginCommand": "account",
+    "StoreLegacyCreateKeyCommand": "legacy",
+    "StoreLegacyGatedCommand": "legacy",
+    "StoreLegacyListCommand": "names",
+    "StoreLegacyListKeysCommand": "legacy",
+    "StoreLegacyListRegisteredCommand": "names",
+    "StoreLegacyListValidationSetsCommand": "legacy",
+    "StoreLegacyMetricsCommand": "legacy",
+    "StoreLegacyPromoteCommand": "legacy",
+    "StoreLegacyPushCommand": "upload",
+    "StoreLegacyRegisterKeyCommand": "legacy",
+    "StoreLegacySetDefaultTrackCommand": "legacy",
+    "StoreLegacySignBuildCommand": "legacy",
+    "StoreLegacyUploadMetadataCommand": "legacy",
+    "StoreLegacyValidateCommand": "legacy",
+    "StoreListRevisionsCommand": "status",
+    "StoreListTracksCommand": "status",
+    "StoreLoginCommand": "account",
+    "StoreLogoutCommand": "account",
+    "StoreNamesCommand": "names",
+    "StoreRegisterCommand": "names",
+    "StoreReleaseCommand": "manage",
+    "StoreRevisionsCommand": "status",
+    "StoreStatusCommand": "status",
+    "StoreTracksCommand": "status",
+    "StoreUploadCommand": "upload",
+    "StoreWhoAmICommand": "account",
+    "TryCommand": "lifecycle",
+    "VersionCommand": "version",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import command classes from their modules when first accessed."""
+    try:
+        module_name = _COMMAND_MODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    return getattr(importlib.import_module(f".{module_name}", __name__), name)
 
-from .account import (
-    StoreExportLoginCommand,
-    StoreLoginCommand,
-    StoreLogoutCommand,
-    StoreWhoAmICommand,
-)
-from .discovery import ListPluginsCommand, PluginsCommand
-from .extensions import (
-    ExpandExtensionsCommand,
-    ExtensionsCommand,
-    ListExtensionsCommand,
-)
-from .init import InitCommand
-from .legacy import (
-    StoreLegacyCreateKeyCommand,
-    StoreLegacyGatedCommand,
-    StoreLegacyListKeysCommand,
-    StoreLegacyListValidationSetsCommand,
-    StoreLegacyMetricsCommand,
-    StoreLegacyPromoteCommand,
-    StoreLegacyRegisterKeyCommand,
-    StoreLegacySetDefaultTrackCommand,
-    StoreLegacySignBuildCommand,
-    StoreLegacyUploadMetadataCommand,
-    StoreLegacyValidateCommand,
-)
-from .lifecycle import (
-    BuildCommand,
-    CleanCommand,
-    PackCommand,
-    PrimeCommand,
-    PullCommand,
-    SnapCommand,
-    StageCommand,
-    TryCommand,
-)
-from .lint import LintCommand
-from .manage import StoreCloseCommand, StoreReleaseCommand
-from .names import (
-    StoreLegacyListCommand,
-    StoreLegacyListRegisteredCommand,
-    StoreNamesCommand,
-    StoreRegisterCommand,
-)
-from .remote import RemoteBuildCommand
-from .status import (
-    StoreListRevisionsCommand,
-    StoreListTracksCommand,
-    StoreRevisionsCommand,
-    StoreStatusCommand,
-    StoreTracksCommand,
-)
-from .upload import StoreLegacyPushCommand, StoreUploadCommand
-from .validation_sets import StoreEditValidationSetsCommand
-from .version import VersionCommand
 
 __all__ = [
     "BuildCommand",
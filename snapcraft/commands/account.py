@@ -30,6 +30,7 @@ from craft_cli.errors import ArgumentParsingError
 from overrides import overrides
 
 from snapcraft import store, utils
+from snapcraft.store import response_cache
 
 if TYPE_CHECKING:
     import argparse
@@ -109,6 +110,7 @@ class StoreLoginCommand(BaseCommand):
                 permanent=True,
             )
             store.LegacyUbuntuOne.store_credentials(config_content)
+            response_cache.clear(store.client.get_store_url())
         else:
             store.StoreClientCLI().login()
 
@@ -300,5 +302,5 @@ class StoreLogoutCommand(BaseCommand):
 
     @overrides
     def run(self, parsed_args):
-        store.StoreClientCLI().store_client.logout()
+        store.StoreClientCLI().logout()
         emit.message("Credentials cleared")
@@ -24,7 +24,7 @@ import tempfile
 import textwrap
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Dict, Iterator, Optional
 
 from craft_cli import BaseCommand, emit
 from craft_cli.errors import ArgumentParsingError
@@ -40,6 +40,14 @@ from snapcraft.utils import (
     get_managed_environment_home_path,
     is_managed_mode,
 )
+from snapcraft_legacy.internal import squashfs
+from snapcraft_legacy.internal.errors import (
+    SquashFSError,
+    SquashFSUnsupportedCompressionError,
+)
+
+# files read from the snap to configure the linters
+_METADATA_FILES = ("meta/snap.yaml", "snap/snapcraft.yaml")
 
 
 class LintCommand(BaseCommand):
@@ -51,8 +59,9 @@ class LintCommand(BaseCommand):
         """
         Lint an existing snap file.
 
-        The snap is installed and linted inside a build environment. If an assertion
-        file exists in the same directory as the snap file with the name
+        The snap is mounted read-only and linted inside a build environment. If the
+        snap cannot be mounted, it is installed in the instance instead. If an
+        assertion file exists in the same directory as the snap file with the name
         `<snap-name>.assert`, it will be used to install the snap in the instance.
         """
     )
@@ -209,54 +218,149 @@ class LintCommand(BaseCommand):
         :param snap_file: Path to snap file to lint.
         :param assert_file: Optional path to assertion file for the snap file.
         """
-        # unsquash, load snap.yaml, and optionally load snapcraft.yaml
-        with self._unsquash_snap(snap_file) as unsquashed_snap:
-            snap_metadata = snap_yaml.read(unsquashed_snap)
-            project = self._load_project(unsquashed_snap / "snap" / "snapcraft.yaml")
+        # load snap.yaml, and optionally load snapcraft.yaml
+        with self._extract_metadata(snap_file) as metadata_dir:
+            snap_metadata = snap_yaml.read(metadata_dir)
+            project = self._load_project(metadata_dir / "snap" / "snapcraft.yaml")
+
+        with self._mount_snap(snap_file, snap_metadata) as snap_mount_path:
+            if snap_mount_path:
+                snap_path = snap_mount_path
+            else:
+                snap_path = self._install_snap(snap_file, assert_file, snap_metadata)
 
-        snap_install_path = self._install_snap(snap_file, assert_file, snap_metadata)
+            lint_filters = self._load_lint_filters(project)
 
-        lint_filters = self._load_lint_filters(project)
+            # run the linters
+            durations: Dict[str, float] = {}
+            issues = linters.run_linters(
+                location=snap_path, lint=lint_filters, durations=durations
+            )
 
-        # run the linters
-        issues = linters.run_linters(location=snap_install_path, lint=lint_filters)
-        linters.report(issues, intermediate=True)
+        linters.report(issues, intermediate=True, durations=durations)
 
     @contextmanager
-    def _unsquash_snap(self, snap_file: Path) -> Iterator[Path]:
-        """Unsquash a snap file to a temporary directory.
+    def _extract_metadata(self, snap_file: Path) -> Iterator[Path]:
+        """Extract the metadata files of a snap file to a temporary directory.
 
-        :param snap_file: Snap package to extract.
+        The files are read directly from the squashfs image, the rest of the
+        payload is not extracted.
 
-        :yields: Path to the snap's unsquashed directory.
+        :param snap_file: Snap package to read.
 
-        :raises errors.SnapcraftError: If the snap fails to unsquash.
+        :yields: Path to a directory containing the snap's metadata files.
+
+        :raises errors.SnapcraftError: If the snap file cannot be read.
         """
         snap_file = snap_file.resolve()
 
-        with tempfile.TemporaryDirectory(prefix=str(snap_file.parent)) as temp_dir:
-            emit.progress(f"Unsquashing snap file {snap_file.name!r}.")
-
-            # unsquashfs [options] filesystem [directories or files to extract] options:
-            # -force: if file already exists then overwrite
-            # -dest <pathname>: unsquash to <pathname>
-            extract_command = [
-                "unsquashfs",
-                "-force",
-                "-dest",
-                temp_dir,
-                str(snap_file),
-            ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            emit.progress(f"Reading metadata from snap file {snap_file.name!r}.")
 
             try:
-                subprocess.run(extract_command, capture_output=True, check=True)
-            except subprocess.CalledProcessError as error:
+                with squashfs.SquashFSImage(str(snap_file)) as image:
+                    for name in _METADATA_FILES:
+                        if not image.exists(name):
+                            continue
+                        metadata_file = Path(temp_dir, name)
+                        metadata_file.parent.mkdir(parents=True, exist_ok=True)
+                        metadata_file.write_bytes(image.read_file(name))
+            except SquashFSUnsupportedCompressionError as error:
+                emit.debug(f"{error}, using unsquashfs")
+                self._unsquash_metadata(snap_file, Path(temp_dir))
+            except (SquashFSError, OSError) as error:
                 raise errors.SnapcraftError(
-                    f"could not unsquash snap file {snap_file.name!r}"
+                    f"could not read snap file {snap_file.name!r}"
                 ) from error
 
             yield Path(temp_dir)
 
+    def _unsquash_metadata(self, snap_file: Path, destination: Path) -> None:
+        """Extract the metadata files of a snap file with unsquashfs.
+
+        :param snap_file: Snap package to extract the files from.
+        :param destination: Directory to extract the files to.
+
+        :raises errors.SnapcraftError: If the snap fails to unsquash.
+        """
+        # unsquashfs [options] filesystem [directories or files to extract] options:
+        # -force: if file already exists then overwrite
+        # -dest <pathname>: unsquash to <pathname>
+        extract_command = [
+            "unsquashfs",
+            "-force",
+            "-dest",
+            str(destination),
+            str(snap_file),
+            *_METADATA_FILES,
+        ]
+
+        try:
+            subprocess.run(extract_command, capture_output=True, check=True)
+        except subprocess.CalledProcessError as error:
+            raise errors.SnapcraftError(
+                f"could not unsquash snap file {snap_file.name!r}"
+            ) from error
+
+    @contextmanager
+    def _mount_snap(
+        self, snap_file: Path, snap_metadata: snap_yaml.SnapMetadata
+    ) -> Iterator[Optional[Path]]:
+        """Mount a snap file read-only to a temporary directory.
+
+        Files are read from the squashfs image as the linters access them, so the
+        snap does not need to be extracted or installed. The kernel's squashfs
+        driver is tried first, then squashfuse for containers where mounting
+        block devices is not allowed.
+
+        :param snap_file: Snap package to mount.
+        :param snap_metadata: SnapMetadata from the snap file.
+
+        :yields: Path to the mounted snap or None if the snap cannot be mounted or
+        its base is not installed.
+        """
+        base = snap_metadata.base
+        if base and not Path("/snap", base, "current").exists():
+            emit.debug(f"Base {base!r} is not installed, not mounting snap file.")
+            yield None
+            return
+
+        snap_file = snap_file.resolve()
+
+        # Not a TemporaryDirectory, its cleanup would descend into the
+        # read-only mount if the snap file could not be unmounted.
+        mount_dir = tempfile.mkdtemp()
+        try:
+            emit.progress(f"Mounting snap file {snap_file.name!r}.")
+
+            for mount_command in (
+                ["mount", "-t", "squashfs", "-o", "ro,nodev", str(snap_file)],
+                ["squashfuse", "-o", "ro", str(snap_file)],
+            ):
+                try:
+                    subprocess.run(
+                        [*mount_command, mount_dir], capture_output=True, check=True
+                    )
+                except (OSError, subprocess.CalledProcessError):
+                    emit.debug(f"Could not mount snap file with {mount_command[0]!r}.")
+                else:
+                    break
+            else:
+                yield None
+                return
+
+            try:
+                yield Path(mount_dir)
+            finally:
+                _unmount_snap(mount_dir, fuse=mount_command[0] == "squashfuse")
+        finally:
+            if os.path.ismount(mount_dir):
+                emit.progress(
+                    f"Could not unmount snap file from {mount_dir!r}.", permanent=True
+                )
+            else:
+                os.rmdir(mount_dir)
+
     def _load_project(self, snapcraft_yaml_file: Path) -> Optional[projects.Project]:
         """Load a snapcraft Project from a snapcraft.yaml, if present.
 
@@ -379,3 +483,29 @@ class LintCommand(BaseCommand):
             )
 
         return lint_config
+
+
+def _unmount_snap(mount_dir: str, *, fuse: bool) -> None:
+    """Unmount a snap file mounted by `snapcraft lint`.
+
+    Unprivileged squashfuse mounts can only be unmounted with fusermount. A lazy
+    unmount is the last resort for a mount that is still busy.
+
+    :param mount_dir: Directory the snap file is mounted to.
+    :param fuse: Set if the snap file was mounted with squashfuse.
+    """
+    unmount_commands = [["umount"], ["umount", "-l"]]
+    if fuse:
+        unmount_commands = [["fusermount", "-u"], ["fusermount", "-u", "-z"]]
+
+    for unmount_command in unmount_commands:
+        try:
+            subprocess.run(
+                [*unmount_command, mount_dir], capture_output=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            emit.debug(
+                f"Could not unmount snap file with {shlex.join(unmount_command)!r}."
+            )
+        else:
+            return
@@ -42,7 +42,10 @@ class StoreStatusCommand(BaseCommand):
         """
         Show the status of a snap in the Snap Store.
         The name must be accessible from the requesting account by being
-        the owner or a collaborator of the snap."""
+        the owner or a collaborator of the snap.
+
+        The status is cached for a minute, use --refresh to check it with
+        the Snap Store right away."""
     )
 
     @overrides
@@ -68,11 +71,16 @@ class StoreStatusCommand(BaseCommand):
             nargs="?",
             help="Limit the status report to the requested tracks",
         )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Revalidate the information cached from the Snap Store",
+        )
 
     @overrides
     def run(self, parsed_args):
         snap_channel_map = store.StoreClientCLI().get_channel_map(
-            snap_name=parsed_args.name
+            snap_name=parsed_args.name, refresh=parsed_args.refresh
         )
 
         existing_architectures = snap_channel_map.get_existing_architectures()
@@ -386,11 +394,16 @@ class StoreListTracksCommand(BaseCommand):
             type=str,
             help="The snap name to request the information from on the Snap Store",
         )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Revalidate the information cached from the Snap Store",
+        )
 
     @overrides
     def run(self, parsed_args):
         snap_channel_map = store.StoreClientCLI().get_channel_map(
-            snap_name=parsed_args.name
+            snap_name=parsed_args.name, refresh=parsed_args.refresh
         )
 
         # Iterate over the entries, replace None with - for consistent presentation
@@ -446,11 +459,16 @@ class StoreListRevisionsCommand(BaseCommand):
             metavar="arch",
             help="architecture filter",
         )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Revalidate the information cached from the Snap Store",
+        )
 
     @overrides
     def run(self, parsed_args):
         releases = store.StoreClientCLI().list_revisions(
-            snap_name=parsed_args.snap_name
+            snap_name=parsed_args.snap_name, refresh=parsed_args.refresh
         )
 
         parsed_revisions = []
@@ -16,21 +16,40 @@
 
 """Snapcraft Store uploading related commands."""
 
+import concurrent.futures
+import dataclasses
+import os
 import pathlib
+import tempfile
 import textwrap
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, List, Optional, cast
 
+import craft_store
+import tabulate
 from craft_cli import BaseCommand, emit
 from craft_cli.errors import ArgumentParsingError
 from overrides import overrides
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
 
-from snapcraft import store, utils
+from snapcraft import errors, store, utils
+from snapcraft.store import chunked_upload
 from snapcraft_legacy._store import get_data_from_snap_file
+from snapcraft_legacy.file_utils import calculate_sha3_384
+from snapcraft_legacy.internal.cache import SnapCache
+from snapcraft_legacy.internal.deltas import XDelta3Generator
+from snapcraft_legacy.internal.deltas.errors import (
+    DeltaGenerationError,
+    DeltaGenerationTooBigError,
+)
+from snapcraft_legacy.internal.errors import SnapcraftError as SnapcraftLegacyError
+from snapcraft_legacy.internal.errors import ToolMissingError
 
 if TYPE_CHECKING:
     import argparse
 
+# Number of snap files uploaded concurrently.
+_MAX_CONCURRENT_UPLOADS = 4
+
 
 class StoreUploadCommand(BaseCommand):
     """Upload a snap to the Snap Store."""
@@ -46,18 +65,31 @@ class StoreUploadCommand(BaseCommand):
         This operation will block until the store finishes processing this <snap-
         file>.
 
+        Several <snap-file> can be given to upload them concurrently, the
+        channels passed with --release apply to each of them and a table with the
+        revision created for each <snap-file> is displayed at the end.
+
         If --release is used, the channel map will be displayed after the operation
         takes place.
+
+        Uploaded snaps are kept in the cache and, when a cached revision for the
+        same architecture exists, only a delta against it is uploaded if the delta
+        is small enough.
+
+        If SNAPCRAFT_STORE_CHUNKED_UPLOAD is set, the <snap-file> is uploaded in
+        concurrent chunks and an interrupted upload continues where it stopped
+        when the same <snap-file> is uploaded again.
         """
     )
 
     @overrides
     def fill_parser(self, parser: "argparse.ArgumentParser") -> None:
         parser.add_argument(
-            "snap_file",
+            "snap_files",
             metavar="snap-file",
             type=str,
-            help="Snap to upload",
+            nargs="+",
+            help="Snaps to upload",
         )
         parser.add_argument(
             "--release",
@@ -70,9 +102,10 @@ class StoreUploadCommand(BaseCommand):
 
     @overrides
     def run(self, parsed_args):
-        snap_file = pathlib.Path(parsed_args.snap_file)
-        if not snap_file.exists() or not snap_file.is_file():
-            raise ArgumentParsingError(f"{str(snap_file)!r} is not a valid file")
+        snap_files = [pathlib.Path(snap_file) for snap_file in parsed_args.snap_files]
+        for snap_file in snap_files:
+            if not snap_file.exists() or not snap_file.is_file():
+                raise ArgumentParsingError(f"{str(snap_file)!r} is not a valid file")
 
         channels: Optional[List[str]] = None
         if parsed_args.channels:
@@ -80,28 +113,315 @@ class StoreUploadCommand(BaseCommand):
 
         client = store.StoreClientCLI()
 
+        uploads = [_SnapUpload.from_file(snap_file) for snap_file in snap_files]
+        for snap_name in dict.fromkeys(upload.snap_name for upload in uploads):
+            client.verify_upload(snap_name=snap_name)
+
+        _push_snaps(client, uploads, channels=channels, use_deltas=True)
+        _wait_for_snaps(client, uploads)
+
+        # upload the full snaps for the deltas the store could not apply
+        retry_uploads = [
+            upload
+            for upload in uploads
+            if upload.delta
+            and isinstance(upload.error, errors.StoreDeltaApplicationError)
+        ]
+        if retry_uploads:
+            for upload in retry_uploads:
+                emit.progress(
+                    f"{upload.error}\nFalling back to uploading the full snap.",
+                    permanent=True,
+                )
+            _push_snaps(client, retry_uploads, channels=channels, use_deltas=False)
+            _wait_for_snaps(client, retry_uploads)
+
+        for upload in uploads:
+            if upload.error is None:
+                _cache_snap(upload)
+
+        if len(uploads) == 1:
+            (upload,) = uploads
+            if upload.error:
+                raise upload.error
+            message = f"Revision {upload.revision!r} created for {upload.snap_name!r}"
+            if channels:
+                message += f" and released to {utils.humanize_list(channels, 'and')}"
+            emit.message(message)
+            return
+
+        summary = [
+            {
+                "Snap file": upload.snap_file.name,
+                "Name": upload.snap_name,
+                "Architecture": upload.arch,
+                "Revision": upload.revision if upload.error is None else "failed",
+                "Released to": ", ".join(channels or [])
+                if upload.error is None
+                else "",
+            }
+            for upload in uploads
+        ]
+        emit.message(tabulate.tabulate(summary, headers="keys"))
+
+        failures = [
+            f"- {upload.snap_file.name}: {upload.error}"
+            for upload in uploads
+            if upload.error
+        ]
+        if failures:
+            raise errors.SnapcraftError(
+                f"Failed to upload {len(failures)} of {len(uploads)} snaps.",
+                details="\n".join(failures),
+            )
+
+
+@dataclasses.dataclass
+class _SnapUpload:
+    """A snap file to upload and the state of its upload."""
+
+    snap_file: pathlib.Path
+    snap_name: str
+    built_at: Optional[str]
+    arch: str
+    delta: bool = False
+    status_url: Optional[str] = None
+    revision: Optional[int] = None
+    error: Optional[Exception] = None
+
+    @classmethod
+    def from_file(cls, snap_file: pathlib.Path) -> "_SnapUpload":
+        """Read the snap metadata to upload snap_file."""
         snap_yaml = get_data_from_snap_file(snap_file)
-        snap_name = snap_yaml["name"]
-        built_at = snap_yaml.get("snapcraft-started-at")
+        return cls(
+            snap_file=snap_file,
+            snap_name=snap_yaml["name"],
+            built_at=snap_yaml.get("snapcraft-started-at"),
+            # XXX: add multiarch support later
+            arch=snap_yaml.get("architectures", ["all"])[0],
+        )
+
+
+def _push_snaps(
+    client: store.StoreClientCLI,
+    uploads: List[_SnapUpload],
+    *,
+    channels: Optional[List[str]],
+    use_deltas: bool,
+) -> None:
+    """Upload the snaps, or deltas of them, concurrently and notify the Snap Store.
+
+    Errors are recorded in each upload instead of being raised.
+    """
+    show_progress = len(uploads) == 1
 
-        client.verify_upload(snap_name=snap_name)
+    def push(upload: _SnapUpload) -> None:
+        upload.error = None
+        try:
+            upload.status_url = _push_snap(
+                client,
+                upload,
+                channels=channels,
+                use_deltas=use_deltas,
+                show_progress=show_progress,
+            )
+        # pylint: disable-next=broad-exception-caught
+        except Exception as error:  # noqa: BLE001
+            upload.error = error
 
-        upload_id = client.store_client.upload_file(
-            filepath=snap_file, monitor_callback=create_callback
+    max_workers = min(len(uploads), _MAX_CONCURRENT_UPLOADS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(push, uploads))
+
+
+def _push_snap(
+    client: store.StoreClientCLI,
+    upload: _SnapUpload,
+    *,
+    channels: Optional[List[str]],
+    use_deltas: bool,
+    show_progress: bool,
+) -> str:
+    """Upload a snap, or a delta of it, and notify the Snap Store.
+
+    :returns: The URL to poll for the processing status of the upload.
+    """
+    upload.delta = False
+    if use_deltas:
+        snap_cache = SnapCache(project_name=upload.snap_name)
+        source_snap = _get_delta_source(
+            client, snap_cache, snap_name=upload.snap_name, arch=upload.arch
         )
+        if source_snap:
+            try:
+                status_url = _push_delta(
+                    client,
+                    upload,
+                    source_snap=source_snap,
+                    channels=channels,
+                    show_progress=show_progress,
+                )
+                upload.delta = True
+                return status_url
+            except errors.StoreDeltaApplicationError as error:
+                emit.progress(
+                    f"{error}\nFalling back to uploading the full snap.",
+                    permanent=True,
+                )
+
+    if not show_progress:
+        emit.progress(f"Uploading {upload.snap_file.name!r}.")
+    upload_id = _upload_file(client, upload.snap_file, show_progress=show_progress)
+
+    return client.push_upload(
+        snap_name=upload.snap_name,
+        upload_id=upload_id,
+        built_at=upload.built_at,
+        channels=channels,
+        snap_file_size=upload.snap_file.stat().st_size,
+    )
 
-        revision = client.notify_upload(
-            snap_name=snap_name,
+
+def _wait_for_snaps(client: store.StoreClientCLI, uploads: List[_SnapUpload]) -> None:
+    """Wait for the Snap Store to process the uploads and record their revisions."""
+    pushed = [upload for upload in uploads if upload.error is None]
+    statuses = client.wait_for_uploads(
+        [cast(str, upload.status_url) for upload in pushed]
+    )
+    for upload in pushed:
+        status = statuses[cast(str, upload.status_url)]
+        if isinstance(status, Exception):
+            upload.error = status
+            continue
+
+        try:
+            upload.revision = client.get_upload_revision(status)
+        except errors.SnapcraftError as error:
+            upload.error = error
+
+
+def _upload_file(
+    client: store.StoreClientCLI, snap_file: pathlib.Path, *, show_progress: bool
+) -> str:
+    """Upload snap_file to storage, in chunks if enabled.
+
+    :returns: The upload id of the snap file.
+    """
+    if utils.strtobool(
+        os.getenv(store.constants.ENVIRONMENT_STORE_CHUNKED_UPLOAD, "n")
+    ):
+        try:
+            return chunked_upload.upload_file(
+                client.store_client.http_client,
+                storage_url=store.client.get_store_upload_url(),
+                filepath=snap_file,
+                show_progress=show_progress,
+            )
+        except chunked_upload.ChunkedUploadUnsupported:
+            emit.debug("Chunked uploads are not supported by the storage server")
+
+    return client.store_client.upload_file(
+        filepath=snap_file,
+        monitor_callback=create_callback if show_progress else None,
+    )
+
+
+def _get_delta_source(
+    client: store.StoreClientCLI,
+    snap_cache: SnapCache,
+    *,
+    snap_name: str,
+    arch: str,
+) -> Optional[str]:
+    """Find a cached revision of the snap to upload a delta against.
+
+    The most recent revision for arch that is in the local cache is used.
+
+    :returns: The path to the cached revision, or None if there is none.
+    """
+    if store.client.is_onprem() or not snap_cache.get(deb_arch=arch):
+        return None
+
+    try:
+        revisions = client.list_revisions(snap_name).revisions
+    except (craft_store.errors.CraftStoreError, errors.SnapcraftError) as error:
+        emit.debug(f"Cannot list revisions of {snap_name!r}: {error}")
+        return snap_cache.get(deb_arch=arch)
+
+    for revision in sorted(revisions, key=lambda r: r.revision, reverse=True):
+        if arch not in revision.architectures:
+            continue
+        source_snap = snap_cache.get(deb_arch=arch, snap_hash=revision.sha3_384)
+        if source_snap:
+            emit.debug(f"Found cached revision {revision.revision} for {arch!r}")
+            return source_snap
+
+    return None
+
+
+def _push_delta(
+    client: store.StoreClientCLI,
+    upload: _SnapUpload,
+    *,
+    source_snap: str,
+    channels: Optional[List[str]],
+    show_progress: bool,
+) -> str:
+    """Upload a delta between source_snap and the snap and notify the Snap Store.
+
+    :returns: The URL to poll for the processing status of the upload.
+
+    :raises errors.StoreDeltaApplicationError: If the delta cannot be generated
+        or is not small enough.
+    """
+    snap_file = upload.snap_file
+    with tempfile.TemporaryDirectory() as delta_dir:
+        emit.progress(f"Generating delta for {snap_file.name!r}.")
+        try:
+            delta_generator = XDelta3Generator(
+                source_path=source_snap, target_path=str(snap_file)
+            )
+            delta_file = pathlib.Path(delta_generator.make_delta(output_dir=delta_dir))
+        except (
+            DeltaGenerationError,
+            DeltaGenerationTooBigError,
+            ToolMissingError,
+        ) as error:
+            raise errors.StoreDeltaApplicationError(
+                f"Error generating delta: {error}"
+            ) from error
+
+        delta_hashes = {
+            "source_hash": pathlib.Path(source_snap).name,
+            "target_hash": calculate_sha3_384(str(snap_file)),
+            "delta_hash": calculate_sha3_384(str(delta_file)),
+        }
+        emit.debug(f"Uploading delta {delta_file.name!r} with {delta_hashes!r}")
+
+        upload_id = _upload_file(client, delta_file, show_progress=show_progress)
+
+        return client.push_upload(
+            snap_name=upload.snap_name,
             upload_id=upload_id,
-            built_at=built_at,
+            built_at=upload.built_at,
             channels=channels,
-            snap_file_size=snap_file.stat().st_size,
+            snap_file_size=delta_file.stat().st_size,
+            delta_format=delta_generator.delta_format,
+            delta_hashes=delta_hashes,
         )
 
-        message = f"Revision {revision!r} created for {snap_name!r}"
-        if channels:
-            message += f" and released to {utils.humanize_list(channels, 'and')}"
-        emit.message(message)
+
+def _cache_snap(upload: _SnapUpload) -> None:
+    """Keep the uploaded snap to generate deltas for the next upload."""
+    if store.client.is_onprem():
+        return
+
+    snap_cache = SnapCache(project_name=upload.snap_name)
+    try:
+        cached_snap = snap_cache.cache(snap_filename=str(upload.snap_file))
+        snap_cache.prune(deb_arch=upload.arch, keep_hash=pathlib.Path(cached_snap).name)
+    except (OSError, SnapcraftLegacyError) as error:
+        emit.debug(f"Cannot cache {str(upload.snap_file)!r}: {error}")
 
 
 def create_callback(encoder: MultipartEncoder):
@@ -0,0 +1,235 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent cache of attributes extracted from ELF files."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from craft_cli import emit
+from xdg import BaseDirectory  # type: ignore
+
+# Bump when the layout of the cached attributes changes.
+_CACHE_VERSION = 1
+
+# Entries are dropped this long after they were stored.
+_CACHE_EXPIRY_SECONDS = 30 * 24 * 60 * 60
+
+_CacheKey = Tuple[int, int, int, int]
+
+# Installed snap revisions are read-only, local revisions (x1, x2, ...) can
+# be reused by different installs and are not considered.
+_SNAP_REVISION_PATH = re.compile(r"^/snap/[^/]+/[0-9]+(/|$)")
+
+
+class ElfCache:
+    """A cache of ELF attributes, keyed by file identity.
+
+    A file is identified by its device, inode, size and modification time,
+    so a file that is rewritten or replaced is parsed again, while a file
+    hardlinked into a new location reuses the existing entry.
+
+    :param path: Path to the cache database.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS elf_attributes ("
+            "dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, "
+            "stored_at REAL, attributes TEXT, "
+            "PRIMARY KEY (dev, ino, size, mtime_ns))"
+        )
+        self._db.execute(
+            "DELETE FROM elf_attributes WHERE stored_at < ?",
+            (time.time() - _CACHE_EXPIRY_SECONDS,),
+        )
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _get_key(path: Path) -> _CacheKey:
+        stat = os.stat(path)
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Obtain the cached attributes for path.
+
+        :param path: The ELF file to look up.
+
+        :returns: The cached attributes, or None if not cached.
+        """
+        try:
+            key = self._get_key(path)
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT attributes FROM elf_attributes "
+                    "WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                    key,
+                ).fetchone()
+        except (OSError, sqlite3.Error) as error:
+            emit.debug(f"ELF cache lookup failed for {str(path)!r}: {error}")
+            return None
+
+        if row is None:
+            emit.debug(f"ELF cache miss: {str(path)!r}")
+            return None
+
+        emit.debug(f"ELF cache hit: {str(path)!r}")
+        return json.loads(row[0])
+
+    def put(self, path: Path, attributes: Dict[str, Any]) -> None:
+        """Store the attributes for path.
+
+        :param path: The ELF file the attributes were extracted from.
+        :param attributes: The attributes to store.
+        """
+        try:
+            key = self._get_key(path)
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO elf_attributes VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, time.time(), json.dumps(attributes)),
+                )
+        except (OSError, sqlite3.Error) as error:
+            emit.debug(f"ELF cache update failed for {str(path)!r}: {error}")
+
+
+_cache_path: Optional[Path] = None
+_cache: Optional[ElfCache] = None
+_cache_lock = threading.Lock()
+_cache_path_override: Optional[Path] = None
+
+
+def get_elf_cache_path() -> Path:
+    """Obtain the location of the ELF attribute cache."""
+    if _cache_path_override is not None:
+        return _cache_path_override
+
+    return (
+        Path(BaseDirectory.xdg_cache_home, "snapcraft")
+        / f"elf-attributes-v{_CACHE_VERSION}.db"
+    )
+
+
+def set_elf_cache_path(path: Path) -> None:
+    """Use the ELF attribute cache at path, instead of the current user's.
+
+    Worker processes use the cache of the process that started them.
+
+    :param path: The cache location, as returned by :func:`get_elf_cache_path`.
+    """
+    global _cache_path_override  # pylint: disable=global-statement
+
+    _cache_path_override = path
+
+
+def get_elf_cache() -> Optional[ElfCache]:
+    """Obtain the ELF attribute cache for the current user.
+
+    :returns: The cache, or None if it cannot be used.
+    """
+    global _cache_path, _cache  # pylint: disable=global-statement
+
+    path = get_elf_cache_path()
+
+    with _cache_lock:
+        if path != _cache_path:
+            if _cache is not None:
+                _cache.close()
+            _cache_path = path
+            try:
+                _cache = ElfCache(path)
+            except (OSError, sqlite3.Error) as error:
+                emit.debug(f"Cannot use ELF cache {str(path)!r}: {error}")
+                _cache = None
+
+        return _cache
+
+
+def _get_soname_index_path(root: Path) -> Optional[Path]:
+    """Obtain the location of a persisted soname index for root.
+
+    :returns: The index path, or None if root is not in an installed snap.
+    """
+    real_root = os.path.realpath(root)
+    if not _SNAP_REVISION_PATH.match(real_root):
+        return None
+
+    digest = hashlib.sha256(real_root.encode()).hexdigest()
+    return (
+        Path(BaseDirectory.xdg_cache_home, "snapcraft")
+        / f"soname-index-v{_CACHE_VERSION}"
+        / f"{digest}.json"
+    )
+
+
+def read_soname_index(root: Path) -> Optional[Dict[str, List[str]]]:
+    """Read the persisted soname index for root.
+
+    :param root: The indexed search path.
+
+    :returns: A dictionary mapping file names to paths relative to root, or
+        None if there is no persisted index.
+    """
+    index_path = _get_soname_index_path(root)
+    if index_path is None or not index_path.exists():
+        return None
+
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as error:
+        emit.debug(f"Cannot read soname index {str(index_path)!r}: {error}")
+        return None
+
+    emit.debug(f"Using soname index {str(index_path)!r} for {str(root)!r}")
+    return index
+
+
+def write_soname_index(root: Path, index: Dict[str, List[str]]) -> None:
+    """Persist the soname index for root, if root is in an installed snap.
+
+    :param root: The indexed search path.
+    :param index: A dictionary mapping file names to paths relative to root.
+    """
+    index_path = _get_soname_index_path(root)
+    if index_path is None:
+        return
+
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(index), encoding="utf-8")
+        temp_path.replace(index_path)
+    except OSError as error:
+        emit.debug(f"Cannot write soname index {str(index_path)!r}: {error}")
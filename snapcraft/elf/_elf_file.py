@@ -17,23 +17,29 @@
 """Helpers to parse and handle ELF binary files."""
 
 import contextlib
+import functools
+import glob
 import os
 import re
 import subprocess
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, cast
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, cast
 
 from craft_cli import emit
+from elftools.common.exceptions import ELFError
 from elftools.construct import ConstructError
 from elftools.elf import constants, dynamic, elffile, gnuversions, sections, segments
 from pkg_resources import parse_version
 
 from snapcraft import utils
 
-from . import errors
+from . import _elf_cache, errors
 
 _ElfArchitectureTuple = Tuple[str, str, str]
 _SonameCacheDict = Dict[Tuple[_ElfArchitectureTuple, str], Path]
+_SonameIndex = Dict[str, List[Path]]
+_NativeResolverKey = Tuple[Tuple[str, ...], str]
 
 _DEBUG_INFO = ".debug_info"
 _DYNAMIC = ".dynamic"
@@ -41,6 +47,14 @@ _GNU_VERSION_D = ".gnu.version_d"
 _GNU_VERSION_R = ".gnu.version_r"
 _INTERP = ".interp"
 
+_LD_SO_CONF = "/etc/ld.so.conf"
+
+# Engines that can be used to resolve the libraries an ELF file depends on.
+# "ldd" runs the host tools, "native" walks the dynamic sections in-process
+# and "compare" runs both and reports any differences (using ldd's result).
+_RESOLVER_ENGINES = ("ldd", "native", "compare")
+_DEFAULT_RESOLVER_ENGINE = "ldd"
+
 
 class _NeededLibrary:
     """Represents an ELF library version."""
@@ -59,6 +73,8 @@ class SonameCache:
 
     def __init__(self):
         self._soname_paths: _SonameCacheDict = {}
+        self._soname_indexes: Dict[Path, _SonameIndex] = {}
+        self._native_resolvers: Dict[_NativeResolverKey, "_NativeResolver"] = {}
 
     def __getitem__(self, key):
         """Obtain cached item."""
@@ -94,6 +110,66 @@ class SonameCache:
                 new_soname_paths[key] = value
 
         self._soname_paths = new_soname_paths
+        self._soname_indexes = {
+            path: index
+            for path, index in self._soname_indexes.items()
+            if str(path).startswith(root)
+        }
+        self._native_resolvers = {}
+
+    def get_soname_index(self, root: Path) -> _SonameIndex:
+        """Obtain the index of files under root, keyed by file name.
+
+        The index is built once per root by walking the tree. Indexes of
+        installed snap revisions are read-only and kept on disk across runs.
+
+        :param root: The search path to index.
+
+        :returns: A dictionary mapping file names to their paths, in the order
+            they are found when walking root.
+        """
+        if root in self._soname_indexes:
+            return self._soname_indexes[root]
+
+        relative_index = _elf_cache.read_soname_index(root)
+        if relative_index is None:
+            emit.debug(f"Indexing sonames in {str(root)!r}")
+            relative_index = {}
+            for dirpath, _, files in os.walk(root):
+                relative_dir = os.path.relpath(dirpath, root)
+                for file_name in files:
+                    relative_index.setdefault(file_name, []).append(
+                        os.path.normpath(os.path.join(relative_dir, file_name))
+                    )
+            _elf_cache.write_soname_index(root, relative_index)
+
+        index = {
+            name: [root / path for path in paths]
+            for name, paths in relative_index.items()
+        }
+        self._soname_indexes[root] = index
+        return index
+
+    def get_native_resolver(
+        self, *, ld_library_paths: List[str], arch_triplet: str
+    ) -> "_NativeResolver":
+        """Obtain the native resolver for the given library search paths.
+
+        The resolver is shared by the ELF files resolved with this cache, so
+        the libraries they have in common are only parsed once.
+
+        :param ld_library_paths: Paths to use as LD_LIBRARY_PATH.
+        :param arch_triplet: Architecture triplet of the platform.
+
+        :returns: The native resolver for these search paths.
+        """
+        key = (tuple(ld_library_paths), arch_triplet)
+        if key not in self._native_resolvers:
+            self._native_resolvers[key] = _NativeResolver(
+                ld_library_paths=ld_library_paths, arch_triplet=arch_triplet
+            )
+
+        return self._native_resolvers[key]
 
 
 class _Library:
@@ -172,11 +248,9 @@ class _Library:
             return self.soname_path
 
         for path in valid_search_paths:
-            for root, _, files in os.walk(path):
-                if self.soname not in files:
-                    continue
-
-                file_path = Path(root, self.soname.lstrip("/"))
+            for file_path in self.soname_cache.get_soname_index(path).get(
+                self.soname, []
+            ):
                 if self._is_valid_elf(file_path):
                     self._update_soname_cache(file_path)
                     return file_path
@@ -202,6 +276,8 @@ class ElfFile:
         self.soname = ""
         self.versions: Set[str] = set()
         self.needed: Dict[str, _NeededLibrary] = {}
+        self.rpath: List[str] = []
+        self.runpath: List[str] = []
         self.execstack_set = False
         self.is_dynamic = True
         self.build_id = ""
@@ -212,6 +288,13 @@ class ElfFile:
         # String of elf enum type, e.g. "ET_DYN", "ET_EXEC", etc.
         self.elf_type: str = "ET_NONE"
 
+        elf_cache = _elf_cache.get_elf_cache()
+        if elf_cache is not None:
+            attributes = elf_cache.get(path)
+            if attributes is not None:
+                self._load_attributes(attributes)
+                return
+
         try:
             emit.debug(f"Extracting ELF attributes: {str(path)!r}")
             self._extract_attributes()
@@ -219,6 +302,9 @@ class ElfFile:
             emit.debug(f"Extracting ELF attributes exception: {str(exception)}")
             raise errors.CorruptedElfFile(path, exception)
 
+        if elf_cache is not None:
+            elf_cache.put(path, self._dump_attributes())
+
     @classmethod
     def is_elf(cls, path: Path) -> bool:
         """Determine whether the given file is an ELF file.
@@ -232,7 +318,7 @@ class ElfFile:
         with path.open("rb") as bin_file:
             return bin_file.read(4) == b"\x7fELF"
 
-    # pylint: disable=too-many-branches
+    # pylint: disable=too-many-branches,too-many-locals
 
     def _extract_attributes(self) -> None:  # noqa: C901
         with self.path.open("rb") as file:
@@ -266,6 +352,14 @@ class ElfFile:
                         self.soname = (
                             tag.soname  # pyright: ignore[reportGeneralTypeIssues]
                         )
+                    elif tag.entry.d_tag == "DT_RPATH":
+                        rpath = tag.rpath  # pyright: ignore[reportGeneralTypeIssues]
+                        self.rpath.extend(p for p in rpath.split(":") if p)
+                    elif tag.entry.d_tag == "DT_RUNPATH":
+                        runpath = (
+                            tag.runpath  # pyright: ignore[reportGeneralTypeIssues]
+                        )
+                        self.runpath.extend(p for p in runpath.split(":") if p)
 
             for segment in elf_file.iter_segments():
                 if segment["p_type"] == "PT_GNU_STACK":
@@ -316,7 +410,47 @@ class ElfFile:
 
             self.elf_type = elf_file.header["e_type"]
 
-    # pylint: enable=too-many-branches
+    # pylint: enable=too-many-branches,too-many-locals
+
+    def _dump_attributes(self) -> Dict[str, Any]:
+        """Obtain the extracted attributes in a serializable form."""
+        return {
+            "arch_tuple": self.arch_tuple,
+            "interp": self.interp,
+            "soname": self.soname,
+            "versions": sorted(self.versions),
+            "needed": {
+                name: sorted(library.versions) for name, library in self.needed.items()
+            },
+            "rpath": self.rpath,
+            "runpath": self.runpath,
+            "execstack_set": self.execstack_set,
+            "is_dynamic": self.is_dynamic,
+            "build_id": self.build_id,
+            "has_debug_info": self.has_debug_info,
+            "elf_type": self.elf_type,
+        }
+
+    def _load_attributes(self, attributes: Dict[str, Any]) -> None:
+        """Set the attributes previously obtained with _dump_attributes."""
+        if attributes["arch_tuple"] is not None:
+            self.arch_tuple = cast(
+                _ElfArchitectureTuple, tuple(attributes["arch_tuple"])
+            )
+        self.interp = attributes["interp"]
+        self.soname = attributes["soname"]
+        self.versions = set(attributes["versions"])
+        for name, versions in attributes["needed"].items():
+            self.needed[name] = _NeededLibrary(name=name)
+            for version in versions:
+                self.needed[name].add_version(version)
+        self.rpath = attributes["rpath"]
+        self.runpath = attributes["runpath"]
+        self.execstack_set = attributes["execstack_set"]
+        self.is_dynamic = attributes["is_dynamic"]
+        self.build_id = attributes["build_id"]
+        self.has_debug_info = attributes["has_debug_info"]
+        self.elf_type = attributes["elf_type"]
 
     def is_linker_compatible(self, *, linker_version: str) -> bool:
         """Determine if the linker will work given the required glibc version."""
@@ -383,8 +517,11 @@ class ElfFile:
                 utils.get_common_ld_library_paths(path, arch_triplet)
             )
 
-        libraries = _determine_libraries(
-            path=self.path, ld_library_paths=ld_library_paths, arch_triplet=arch_triplet
+        libraries = _resolve_libraries(
+            elf_file=self,
+            ld_library_paths=ld_library_paths,
+            arch_triplet=arch_triplet,
+            soname_cache=soname_cache,
         )
         for soname, soname_path in libraries.items():
             if self.arch_tuple is None:
@@ -409,6 +546,238 @@ class ElfFile:
         return dependencies
 
 
+def _get_resolver_engine() -> str:
+    """Obtain the library resolver engine to use.
+
+    The engine can be selected by setting the environment variable
+    ``SNAPCRAFT_ELF_RESOLVER`` to one of ``ldd``, ``native`` or ``compare``.
+    """
+    engine = os.getenv("SNAPCRAFT_ELF_RESOLVER", _DEFAULT_RESOLVER_ENGINE).strip()
+    if engine not in _RESOLVER_ENGINES:
+        emit.debug(f"Invalid SNAPCRAFT_ELF_RESOLVER {engine!r}")
+        return _DEFAULT_RESOLVER_ENGINE
+
+    return engine
+
+
+def _resolve_libraries(
+    *,
+    elf_file: "ElfFile",
+    ld_library_paths: List[str],
+    arch_triplet: str,
+    soname_cache: SonameCache,
+) -> Dict[str, str]:
+    engine = _get_resolver_engine()
+    if engine == "ldd":
+        return _determine_libraries(
+            path=elf_file.path,
+            ld_library_paths=ld_library_paths,
+            arch_triplet=arch_triplet,
+        )
+
+    try:
+        resolver = soname_cache.get_native_resolver(
+            ld_library_paths=ld_library_paths, arch_triplet=arch_triplet
+        )
+        libraries = resolver.resolve(elf_file)
+    except (errors.CorruptedElfFile, OSError, RuntimeError) as error:
+        # Fall back to ldd if the dynamic sections cannot be followed.
+        emit.debug(f"Native library resolution failed: {str(error)}")
+        return _determine_libraries(
+            path=elf_file.path,
+            ld_library_paths=ld_library_paths,
+            arch_triplet=arch_triplet,
+        )
+
+    if engine == "compare":
+        ldd_libraries = _determine_libraries(
+            path=elf_file.path,
+            ld_library_paths=ld_library_paths,
+            arch_triplet=arch_triplet,
+        )
+        _report_resolver_differences(elf_file.path, libraries, ldd_libraries)
+        return ldd_libraries
+
+    return libraries
+
+
+def _report_resolver_differences(
+    path: Path, native: Dict[str, str], ldd: Dict[str, str]
+) -> None:
+    """Warn about libraries resolved differently by the native resolver and ldd."""
+    for soname in sorted(native.keys() | ldd.keys()):
+        native_path = native.get(soname, "<unlisted>")
+        ldd_path = ldd.get(soname, "<unlisted>")
+        if native_path != ldd_path:
+            emit.progress(
+                f"Library resolution mismatch for {str(path)!r}: {soname!r} "
+                f"resolved to {native_path!r} (native) and {ldd_path!r} (ldd)",
+                permanent=True,
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_ld_so_conf_paths(conf_path: str = _LD_SO_CONF) -> Tuple[str, ...]:
+    """Obtain the library directories listed in ld.so.conf and its includes.
+
+    :param conf_path: The ld.so configuration file to read.
+
+    :returns: A tuple of library directories, in configuration order.
+    """
+    paths: List[str] = []
+
+    try:
+        lines = Path(conf_path).read_text(encoding="utf-8").splitlines()
+    except (OSError, UnicodeDecodeError):
+        return ()
+
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+
+        if line.startswith("include "):
+            pattern = line[len("include ") :].strip()
+            if not os.path.isabs(pattern):
+                pattern = os.path.join(os.path.dirname(conf_path), pattern)
+            for include_path in sorted(glob.glob(pattern)):
+                paths.extend(_get_ld_so_conf_paths(include_path))
+        elif line.startswith("/"):
+            paths.append(line)
+
+    return tuple(paths)
+
+
+class _NativeResolver:
+    """Resolve library dependencies by following ELF dynamic sections.
+
+    This emulates the search performed by the dynamic linker (and thus ldd)
+    without spawning processes: DT_RPATH of the loading chain, LD_LIBRARY_PATH,
+    DT_RUNPATH, the ld.so.conf directories and the default system paths, with
+    ``$ORIGIN`` and ``$LIB`` expanded. Candidates for a different architecture
+    are skipped, as the dynamic linker would do.
+
+    :param ld_library_paths: Paths to use as LD_LIBRARY_PATH.
+    :param arch_triplet: Architecture triplet of the platform.
+    """
+
+    def __init__(self, *, ld_library_paths: List[str], arch_triplet: str) -> None:
+        self._ld_library_paths = ld_library_paths
+        self._arch_triplet = arch_triplet
+        self._elf_files: Dict[str, Optional[ElfFile]] = {}
+
+    def resolve(self, elf_file: "ElfFile") -> Dict[str, str]:
+        """Determine the libraries elf_file transitively depends on.
+
+        :param elf_file: The ELF file to resolve.
+
+        :returns: Dictionary of dependencies, mapping library name to path,
+            or to the library name itself if it could not be found.
+        """
+        if elf_file.arch_tuple is None:
+            raise RuntimeError("failed to parse architecture")
+
+        system_paths = self._get_system_paths(elf_file.arch_tuple)
+        libraries: Dict[str, str] = {}
+        # Queue of (elf file, origin, DT_RPATH entries inherited from the loaders).
+        queue: Deque[Tuple[ElfFile, str, List[str]]] = deque()
+        origin = os.path.dirname(os.path.realpath(elf_file.path))
+        queue.append((elf_file, origin, []))
+
+        while queue:
+            current, origin, loader_rpath = queue.popleft()
+            # DT_RUNPATH disables DT_RPATH for the dependencies of the object
+            # itself only, the DT_RPATH of its loaders still applies to theirs.
+            if current.runpath:
+                rpath: List[str] = []
+                children_rpath = loader_rpath
+            else:
+                rpath = self._expand(current.rpath, origin) + loader_rpath
+                children_rpath = rpath
+            runpath = self._expand(current.runpath, origin)
+
+            for soname in current.needed:
+                if soname in libraries or _is_dynamic_linker(soname):
+                    continue
+
+                library = self._find(
+                    soname,
+                    elf_file.arch_tuple,
+                    [*rpath, *self._ld_library_paths, *runpath, *system_paths],
+                )
+                if library is None:
+                    libraries[soname] = soname
+                    continue
+
+                libraries[soname] = os.path.abspath(library.path)
+                queue.append(
+                    (library, os.path.dirname(str(library.path)), children_rpath)
+                )
+
+        return libraries
+
+    def _get_system_paths(self, arch_tuple: _ElfArchitectureTuple) -> List[str]:
+        paths = [
+            *_get_ld_so_conf_paths(),
+            f"/lib/{self._arch_triplet}",
+            f"/usr/lib/{self._arch_triplet}",
+        ]
+        if arch_tuple[0] == "ELFCLASS64":
+            paths.extend(["/lib64", "/usr/lib64"])
+        paths.extend(["/lib", "/usr/lib"])
+
+        return paths
+
+    def _expand(self, paths: List[str], origin: str) -> List[str]:
+        expanded: List[str] = []
+        for path in paths:
+            path = path.replace("${ORIGIN}", origin).replace("$ORIGIN", origin)
+            path = path.replace("${LIB}", f"lib/{self._arch_triplet}")
+            path = path.replace("$LIB", f"lib/{self._arch_triplet}")
+            # The dynamic linker ignores entries with unknown substitutions.
+            if "$" not in path:
+                expanded.append(path)
+
+        return expanded
+
+    def _find(
+        self, soname: str, arch_tuple: _ElfArchitectureTuple, search_paths: List[str]
+    ) -> Optional["ElfFile"]:
+        if "/" in soname:
+            candidates = [soname]
+        else:
+            candidates = [os.path.join(p, soname) for p in search_paths]
+
+        for candidate in candidates:
+            library = self._load(candidate)
+            if library is not None and library.arch_tuple == arch_tuple:
+                return library
+
+        return None
+
+    def _load(self, path: str) -> Optional["ElfFile"]:
+        if path in self._elf_files:
+            return self._elf_files[path]
+
+        library: Optional[ElfFile] = None
+        if ElfFile.is_elf(Path(path)):
+            with contextlib.suppress(ELFError, errors.CorruptedElfFile):
+                library = ElfFile(path=Path(path))
+
+        self._elf_files[path] = library
+        return library
+
+
+def _is_dynamic_linker(soname: str) -> bool:
+    """Determine if soname refers to the dynamic linker.
+
+    The dynamic linker is already loaded and ldd does not list it as a
+    resolved library.
+    """
+    name = os.path.basename(soname)
+    return name.startswith(("ld-linux", "ld64.so", "ld.so"))
+
+
 def _get_host_libc_path(arch_triplet) -> Path:
     return Path("/lib") / arch_triplet / "libc.so.6"
 
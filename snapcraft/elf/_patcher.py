@@ -21,8 +21,9 @@ import os
 import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Set
+from typing import Iterable, List, Set, Tuple
 
 from craft_cli import emit
 
@@ -59,6 +60,52 @@ class Patcher:
 
         :raises PatcherError: if the ELF file cannot be patched.
         """
+        patchelf_args = self._get_patchelf_args(elf_file)
+
+        # no patchelf_args means there is nothing to do.
+        if not patchelf_args:
+            return
+
+        self._run_patchelf(patchelf_args=patchelf_args, elf_file_path=elf_file.path)
+
+    def patch_files(self, *, elf_files: Iterable[ElfFile]) -> None:
+        """Patch a set of ELF files with the Patcher instance configuration.
+
+        Files that are already patched are left untouched, the remaining ones
+        are patched concurrently, limited by the number of parallel build jobs.
+
+        :param elf_files: the ELF files to patch.
+
+        :raises PatcherError: if an ELF file cannot be patched.
+        """
+        jobs: List[Tuple[List[str], Path]] = []
+        for elf_file in elf_files:
+            try:
+                relative_path = elf_file.path.relative_to(self._root_path)
+            except ValueError:
+                relative_path = elf_file.path
+            emit.progress(f"Patch ELF file: {str(relative_path)!r}")
+
+            patchelf_args = self._get_patchelf_args(elf_file)
+            if patchelf_args:
+                jobs.append((patchelf_args, elf_file.path))
+
+        if not jobs:
+            return
+
+        workers = min(len(jobs), utils.get_parallel_build_count())
+        emit.debug(f"Patching {len(jobs)} ELF files with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    self._run_patchelf, patchelf_args=args, elf_file_path=path
+                )
+                for args, path in jobs
+            ]
+            for future in futures:
+                future.result()
+
+    def _get_patchelf_args(self, elf_file: ElfFile) -> List[str]:
         patchelf_args = []
         if elf_file.interp and elf_file.interp != self._dynamic_linker:
             patchelf_args.extend(["--set-interpreter", self._dynamic_linker])
@@ -85,21 +132,22 @@ class Patcher:
                 formatted_rpath = ":".join(proposed_rpath)
                 patchelf_args.extend(["--force-rpath", "--set-rpath", formatted_rpath])
 
-        # no patchelf_args means there is nothing to do.
-        if not patchelf_args:
-            return
-
-        self._run_patchelf(patchelf_args=patchelf_args, elf_file_path=elf_file.path)
+        return patchelf_args
 
     def _run_patchelf(self, *, patchelf_args: List[str], elf_file_path: Path) -> None:
-        # Run patchelf on a copy of the primed file and replace it
-        # after it is successful. This allows us to break the potential
-        # hard link created when migrating the file across the steps of
-        # the part.
-        with tempfile.NamedTemporaryFile() as temp_file:
-            shutil.copy2(elf_file_path, temp_file.name)
-
-            cmd = [self._patchelf_cmd] + patchelf_args + [temp_file.name]
+        # Run patchelf on a copy of the primed file and move it over the
+        # original after it is successful. This allows us to break the
+        # potential hard link created when migrating the file across the
+        # steps of the part. The copy is made next to the original so that
+        # it can be renamed into place instead of copied back.
+        temp_fd, temp_name = tempfile.mkstemp(
+            prefix=f".{elf_file_path.name}.", dir=elf_file_path.parent
+        )
+        os.close(temp_fd)
+        try:
+            shutil.copy2(elf_file_path, temp_name)
+
+            cmd = [self._patchelf_cmd] + patchelf_args + [temp_name]
             try:
                 emit.debug(f"executing: {' '.join(cmd)}")
                 subprocess.check_call(cmd)
@@ -111,17 +159,19 @@ class Patcher:
                     elf_file_path, cmd=call_error.cmd, code=call_error.returncode
                 ) from call_error
 
-            # We unlink to break the potential hard link
-            os.unlink(elf_file_path)
-            shutil.copy2(temp_file.name, elf_file_path)
+            # Replacing the file breaks the potential hard link
+            os.replace(temp_name, elf_file_path)
+        finally:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
 
-    @functools.lru_cache(maxsize=1024)  # noqa: B019 Possible memory leaks in lru_cache
     def get_current_rpath(self, elf_file: ElfFile) -> List[str]:
-        """Obtain the current rpath from the ELF file dynamic section."""
-        output = subprocess.check_output(
-            [self._patchelf_cmd, "--print-rpath", str(elf_file.path)]
-        )
-        return [x for x in output.decode().strip().split(":") if x]
+        """Obtain the current rpath from the ELF file dynamic section.
+
+        As with ``patchelf --print-rpath``, DT_RUNPATH takes precedence
+        over DT_RPATH.
+        """
+        return list(elf_file.runpath or elf_file.rpath)
 
     @functools.lru_cache(maxsize=1024)  # noqa: B019 Possible memory leaks in lru_cache
     def get_proposed_rpath(self, elf_file: ElfFile) -> List[str]:
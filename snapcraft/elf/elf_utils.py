@@ -17,16 +17,23 @@
 """Helpers to handle ELF files."""
 
 import functools
+import multiprocessing
 import os
 import platform
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Set
+from typing import Iterable, List, Optional, Set, Union
 
-from craft_cli import emit
+from craft_cli import EmitterMode, emit
 from elftools.common.exceptions import ELFError
 
-from . import ElfFile, errors
+from snapcraft import utils
+
+from . import ElfFile, _elf_cache, errors
+
+# Minimum number of files to scan before spreading the work over a process pool.
+_PARALLEL_SCAN_THRESHOLD = 64
 
 
 @functools.lru_cache(maxsize=1)
@@ -53,11 +60,14 @@ def get_elf_files(root_path: Path) -> List[ElfFile]:
 def get_elf_files_from_list(root: Path, file_list: Iterable[str]) -> List[ElfFile]:
     """Return a list of ELF files from file_list prepended with root.
 
+    Large lists are scanned on a pool of worker processes, its size limited
+    by the number of parallel build jobs.
+
     :param str root: the root directory from where the file_list is generated.
     :param file_list: a list of file in root.
     :returns: a list of ElfFile objects.
     """
-    elf_files: Set[ElfFile] = set()
+    paths: List[Path] = []
 
     for part_file in file_list:
         # Filter out object (*.o) files-- we only care about binaries.
@@ -70,27 +80,73 @@ def get_elf_files_from_list(root: Path, file_list: Iterable[str]) -> List[ElfFil
             emit.debug(f"Skipped link {path!r} while finding dependencies")
             continue
 
-        # Ignore if file does not have ELF header.
-        if not ElfFile.is_elf(path):
-            continue
+        paths.append(path)
 
-        try:
-            elf_file = ElfFile(path=path)
-        except ELFError:
-            # Ignore invalid ELF files.
-            continue
-        except errors.CorruptedElfFile as exception:
+    workers = utils.get_parallel_build_count()
+    if workers > 1 and len(paths) >= _PARALLEL_SCAN_THRESHOLD:
+        results = _scan_elf_files_parallel(paths, workers)
+    else:
+        results = [_scan_elf_file(path) for path in paths]
+
+    elf_files: Set[ElfFile] = set()
+
+    for result in results:
+        if isinstance(result, str):
             # Log if the ELF file seems corrupted
-            emit.message(str(exception))
+            emit.message(result)
             continue
 
         # If ELF has dynamic symbols, add it.
-        if elf_file.needed:
-            elf_files.add(elf_file)
+        if result is not None and result.needed:
+            elf_files.add(result)
 
     return sorted(elf_files, key=lambda x: x.path)
 
 
+def _scan_elf_file(path: Path) -> Union[ElfFile, str, None]:
+    """Parse path if it is an ELF file.
+
+    :returns: The parsed ELF file, None if path is not a valid ELF file, or the
+        error message if the ELF file is corrupted.
+    """
+    # Ignore if file does not have ELF header.
+    if not ElfFile.is_elf(path):
+        return None
+
+    try:
+        return ElfFile(path=path)
+    except ELFError:
+        # Ignore invalid ELF files.
+        return None
+    except errors.CorruptedElfFile as exception:
+        return str(exception)
+
+
+def _init_scan_worker(elf_cache_path: Path) -> None:
+    """Set up a process to scan ELF files.
+
+    Worker processes do not inherit the emitter, so set up a quiet one, nor
+    any change to the cache location, so use the one given by the parent.
+    """
+    emit.init(EmitterMode.QUIET, "snapcraft", "", log_filepath=Path(os.devnull))
+    _elf_cache.set_elf_cache_path(elf_cache_path)
+
+
+def _scan_elf_files_parallel(
+    paths: List[Path], workers: int
+) -> List[Union[ElfFile, str, None]]:
+    emit.debug(f"Scanning {len(paths)} files for ELF binaries with {workers} workers")
+    chunksize = max(1, len(paths) // (workers * 4))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_scan_worker,
+        initargs=(_elf_cache.get_elf_cache_path(),),
+    ) as executor:
+        return list(executor.map(_scan_elf_file, paths, chunksize=chunksize))
+
+
 @dataclass(frozen=True)
 class _ArchConfig:
     arch_triplet: str
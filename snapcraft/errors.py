@@ -140,6 +140,10 @@ class MaintenanceBase(SnapcraftError):
         )
 
 
+class StoreDeltaApplicationError(SnapcraftError):
+    """Error raised when a delta cannot be generated or applied by the Snap Store."""
+
+
 class StoreCredentialsUnauthorizedError(SnapcraftError):
     """Error raised for 401 responses from the Snap Store."""
 
@@ -22,8 +22,6 @@ from typing import Dict, Optional
 from craft_cli import emit
 
 import snapcraft
-import snapcraft_legacy
-from snapcraft_legacy.cli import legacy
 
 _LIB_NAMES = ("craft_parts", "craft_providers", "craft_store")
 _ORIGINAL_LIB_NAME_LOG_LEVEL: Dict[str, int] = {}
@@ -36,6 +34,10 @@ def run_legacy(err: Optional[Exception] = None):
         logger = logging.getLogger(lib_name)
         logger.setLevel(_ORIGINAL_LIB_NAME_LOG_LEVEL[lib_name])
 
+    # The legacy implementation is only imported when it is needed
+    import snapcraft_legacy  # pylint: disable=import-outside-toplevel
+    from snapcraft_legacy.cli import legacy  # pylint: disable=import-outside-toplevel
+
     snapcraft.ProjectOptions = snapcraft_legacy.ProjectOptions  # type: ignore
 
     # Legacy does not use craft-cli
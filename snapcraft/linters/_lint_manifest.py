@@ -0,0 +1,247 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Manifest of the last lint run on a payload, used for incremental linting."""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pydantic
+from craft_cli import emit
+from xdg import BaseDirectory  # type: ignore
+
+# Bump when the layout of the manifest changes.
+_MANIFEST_VERSION = 1
+
+# Manifests of locations not linted for this many seconds are removed.
+_MAX_MANIFEST_AGE = 30 * 24 * 60 * 60
+
+# Only this many of the most recently written manifests are kept.
+_MAX_MANIFESTS = 32
+
+# File size, modification time and content digest.
+FileState = Tuple[int, int, str]
+
+
+class LintManifest(pydantic.BaseModel):
+    """The state of a payload and the issues found when it was last linted.
+
+    :ivar fingerprint: Digest of the inputs that affect all files, such as
+        the snap metadata and the lint configuration.
+    :ivar files: The state of each file in the payload, by relative path.
+    :ivar dependencies: The resolved dependencies of each ELF file in the
+        payload, by relative path.
+    :ivar issues: The issues found in each ELF file in the payload, by
+        relative path.
+    """
+
+    fingerprint: str
+    files: Dict[str, FileState]
+    dependencies: Dict[str, List[str]]
+    issues: Dict[str, List[Dict[str, Any]]]
+
+    def get_changed_files(self, files: Dict[str, FileState]) -> Set[str]:
+        """Obtain the files added, removed or modified since the manifest.
+
+        :param files: The current state of the payload files.
+
+        :returns: The set of relative paths to changed files.
+        """
+        changed = set(self.files) ^ set(files)
+        for name, state in files.items():
+            previous = self.files.get(name)
+            if previous is not None and previous[2] != state[2]:
+                changed.add(name)
+
+        return changed
+
+    def get_unchanged_elf_files(
+        self, root_path: Path, files: Dict[str, FileState]
+    ) -> Dict[str, Set[Path]]:
+        """Obtain the ELF files that do not need to be linted again.
+
+        An ELF file must be linted again if it changed, if any of its resolved
+        dependencies in the payload changed, or, when files were added or
+        removed, if it depends on libraries outside of the payload that may
+        now resolve differently.
+
+        :param root_path: The root of the payload.
+        :param files: The current state of the payload files.
+
+        :returns: The resolved dependencies of unchanged ELF files, by
+            relative path.
+        """
+        changed = self.get_changed_files(files)
+        files_added_or_removed = set(self.files) != set(files)
+        roots = {root_path.absolute(), root_path.resolve()}
+
+        unchanged: Dict[str, Set[Path]] = {}
+        for name, dependencies in self.dependencies.items():
+            if name in changed:
+                continue
+
+            for dependency in dependencies:
+                relative_path = _get_relative_path(Path(dependency), roots)
+                if relative_path is None:
+                    if files_added_or_removed:
+                        break
+                elif relative_path in changed:
+                    break
+            else:
+                unchanged[name] = {Path(d) for d in dependencies}
+
+        return unchanged
+
+
+def _get_relative_path(path: Path, roots: Set[Path]) -> Optional[str]:
+    for root in roots:
+        try:
+            return str(path.relative_to(root))
+        except ValueError:
+            continue
+
+    return None
+
+
+def get_file_states(
+    root_path: Path, previous: Optional[Dict[str, FileState]] = None
+) -> Dict[str, FileState]:
+    """Obtain the state of all files in a payload.
+
+    The content digest of a file whose size and modification time did not
+    change since the previous state is reused instead of computed again.
+
+    :param root_path: The root of the payload.
+    :param previous: The previous state of the payload files.
+
+    :returns: The state of each file, by relative path.
+    """
+    previous = previous or {}
+    files: Dict[str, FileState] = {}
+
+    for root, directories, file_names in os.walk(root_path):
+        # symlinks to directories are listed as directories but not followed
+        names = file_names + [d for d in directories if os.path.islink(Path(root, d))]
+        for name in names:
+            path = Path(root, name)
+            relative_path = str(path.relative_to(root_path))
+            try:
+                files[relative_path] = _get_file_state(
+                    path, previous.get(relative_path)
+                )
+            except OSError as error:
+                emit.debug(f"Cannot obtain state of {str(path)!r}: {error}")
+
+    return files
+
+
+def _get_file_state(path: Path, previous: Optional[FileState]) -> FileState:
+    stat = os.lstat(path)
+
+    if path.is_symlink():
+        return (0, 0, f"symlink:{os.readlink(path)}")
+
+    if previous and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+        return previous
+
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+
+
+def get_fingerprint(**inputs: Any) -> str:
+    """Compute the digest of the inputs that affect all files in a lint run.
+
+    :param inputs: JSON serializable values identifying the lint run.
+
+    :returns: The digest of the inputs.
+    """
+    data = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _get_manifest_path(root_path: Path) -> Path:
+    digest = hashlib.sha256(os.path.realpath(root_path).encode()).hexdigest()
+    return (
+        Path(BaseDirectory.xdg_cache_home, "snapcraft")
+        / f"lint-manifest-v{_MANIFEST_VERSION}"
+        / f"{digest}.json"
+    )
+
+
+def read_manifest(root_path: Path) -> Optional[LintManifest]:
+    """Read the manifest of the last lint run on a payload.
+
+    :param root_path: The root of the payload.
+
+    :returns: The manifest, or None if the payload was not linted before.
+    """
+    manifest_path = _get_manifest_path(root_path)
+    if not manifest_path.exists():
+        return None
+
+    try:
+        return LintManifest.parse_file(manifest_path)
+    except (OSError, ValueError) as error:
+        emit.debug(f"Cannot read lint manifest {str(manifest_path)!r}: {error}")
+        return None
+
+
+def write_manifest(root_path: Path, manifest: LintManifest) -> None:
+    """Write the manifest of a lint run on a payload.
+
+    :param root_path: The root of the payload.
+    :param manifest: The manifest to write.
+    """
+    manifest_path = _get_manifest_path(root_path)
+
+    try:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(manifest.json(), encoding="utf-8")
+        temp_path.replace(manifest_path)
+    except OSError as error:
+        emit.debug(f"Cannot write lint manifest {str(manifest_path)!r}: {error}")
+
+    _evict_manifests(manifest_path)
+
+
+def _evict_manifests(manifest_path: Path) -> None:
+    """Remove old manifests, keeping manifest_path and the most recent ones."""
+    now = time.time()
+    manifests: List[Tuple[float, Path]] = []
+    for path in manifest_path.parent.glob("*.json"):
+        try:
+            manifests.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+
+    manifests.sort(reverse=True)
+    for index, (mtime, path) in enumerate(manifests):
+        if path == manifest_path:
+            continue
+        if index >= _MAX_MANIFESTS or now - mtime > _MAX_MANIFEST_AGE:
+            try:
+                path.unlink()
+            except OSError as error:
+                emit.debug(f"Cannot remove lint manifest {str(path)!r}: {error}")
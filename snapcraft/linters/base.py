@@ -19,14 +19,16 @@
 import abc
 import enum
 import fnmatch
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import TYPE_CHECKING, List, Literal, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Set, Union
 
 import pydantic
 from craft_cli import emit
 
 from snapcraft import projects
-from snapcraft.elf import ElfFile
+from snapcraft.elf import ElfFile, SonameCache, elf_utils
 
 if TYPE_CHECKING:
     from snapcraft.meta.snap_yaml import SnapMetadata
@@ -81,21 +83,166 @@ class LinterIssue(pydantic.BaseModel):
         alias_generator = lambda s: s.replace("_", "-")  # noqa: E731
 
 
+class LinterContext:
+    """Analysis of the snap payload shared by the linters in a run.
+
+    The payload is analyzed on demand and each result is computed only once,
+    regardless of how many linters use it. The context can be shared by
+    linters running concurrently.
+
+    :param root_path: The root of the snap payload.
+    :param snap_metadata: The snap metadata.
+    """
+
+    def __init__(self, root_path: Path, snap_metadata: "SnapMetadata") -> None:
+        self.root_path = root_path
+        self._snap_metadata = snap_metadata
+        self._soname_cache = SonameCache()
+        self._elf_files: Optional[List[ElfFile]] = None
+        self._content_dirs: Optional[List[Path]] = None
+        self._dependencies: Dict[Path, Set[Path]] = {}
+        self._pending_dependencies: Dict[Path, "Future[Set[Path]]"] = {}
+        self._unchanged: Set[Path] = set()
+        # Guards the shared state, not the analysis: dependencies of different
+        # files are resolved concurrently, and once for every file.
+        self._lock = threading.RLock()
+
+    @property
+    def base_path(self) -> Optional[Path]:
+        """The installed base snap path, or None if the snap has no base."""
+        base = self._snap_metadata.base
+        if not base or base == "bare":
+            return None
+
+        return Path(f"/snap/{base}/current")
+
+    @property
+    def elf_files(self) -> List[ElfFile]:
+        """The ELF files with dynamic dependencies in the payload."""
+        with self._lock:
+            if self._elf_files is None:
+                self._elf_files = elf_utils.get_elf_files(self.root_path)
+
+            return self._elf_files
+
+    @property
+    def content_dirs(self) -> List[Path]:
+        """The content directories provided by installed content snaps."""
+        with self._lock:
+            if self._content_dirs is None:
+                self._content_dirs = (
+                    self._snap_metadata.get_provider_content_directories()
+                )
+
+            return self._content_dirs
+
+    @property
+    def dependencies(self) -> Dict[Path, Set[Path]]:
+        """The dependencies resolved so far, by ELF file path."""
+        with self._lock:
+            return dict(self._dependencies)
+
+    def set_unchanged(self, dependencies: Dict[Path, Set[Path]]) -> None:
+        """Mark ELF files as unchanged since they were last linted.
+
+        Unchanged files are not checked again and their dependencies are
+        not resolved again.
+
+        :param dependencies: The previously resolved dependencies of the
+            unchanged files, by ELF file path.
+        """
+        with self._lock:
+            self._dependencies.update(dependencies)
+            self._unchanged.update(dependencies)
+
+    def needs_check(self, elf_file: ElfFile) -> bool:
+        """Whether an ELF file must be checked by the linters.
+
+        :param elf_file: The ELF file to verify.
+        """
+        return elf_file.path not in self._unchanged
+
+    def get_dependencies(self, elf_file: ElfFile) -> Set[Path]:
+        """Obtain the resolved library dependencies of an ELF file.
+
+        Dependencies are loaded into the ELF file on first use. Linters asking
+        for the same file at the same time wait for a single resolution.
+
+        :param elf_file: The ELF file to obtain dependencies for.
+
+        :returns: The set of paths to dependencies not in the base snap.
+        """
+        with self._lock:
+            if elf_file.path in self._dependencies:
+                return self._dependencies[elf_file.path]
+
+            future = self._pending_dependencies.get(elf_file.path)
+            is_resolver = future is None
+            if future is None:
+                future = Future()
+                self._pending_dependencies[elf_file.path] = future
+
+        if not is_resolver:
+            return future.result()
+
+        try:
+            dependencies = elf_file.load_dependencies(
+                root_path=self.root_path.absolute(),
+                base_path=self.base_path,
+                content_dirs=self.content_dirs,
+                arch_triplet=elf_utils.get_arch_triplet(),
+                soname_cache=self._soname_cache,
+            )
+        except BaseException as error:
+            with self._lock:
+                del self._pending_dependencies[elf_file.path]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            self._dependencies[elf_file.path] = dependencies
+            del self._pending_dependencies[elf_file.path]
+        future.set_result(dependencies)
+        return dependencies
+
+    def get_relative_path(self, path: Path) -> Path:
+        """Obtain the path of a payload file relative to the payload root.
+
+        :param path: The path to a file in the payload.
+
+        :returns: The relative path, or path itself if it is not in the payload.
+        """
+        try:
+            return path.relative_to(self.root_path)
+        except ValueError:
+            return path
+
+
 class Linter(abc.ABC):
     """Base class for linters.
 
+    Linters that only read the payload through the context and keep no state
+    outside of the linter instance should set ``parallel_safe`` so they can
+    run concurrently with other linters.
+
     :param project: The snap project information.
+    :param context: The payload analysis shared with other linters. If not
+        set, the linter analyzes the payload in the current directory on its own.
     """
 
+    parallel_safe: bool = False
+
     def __init__(
         self,
         name: str,
         snap_metadata: "SnapMetadata",
         lint: Optional[projects.Lint],
+        context: Optional[LinterContext] = None,
     ):
         self._name = name
         self._snap_metadata = snap_metadata
         self._lint = lint or projects.Lint(ignore=[])
+        self._context = context or LinterContext(Path(), snap_metadata)
 
     @abc.abstractmethod
     def run(self) -> List[LinterIssue]:
@@ -126,6 +273,9 @@ class Linter(abc.ABC):
         else:
             path = filepath
 
+        # Patterns are relative to the payload root.
+        path = self._context.get_relative_path(path)
+
         for pattern in ignored_files:
             if fnmatch.fnmatch(str(path), pattern):
                 emit.debug(
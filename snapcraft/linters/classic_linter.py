@@ -21,7 +21,7 @@ from typing import List
 
 from overrides import overrides
 
-from snapcraft.elf import ElfFile, Patcher, SonameCache, elf_utils, errors
+from snapcraft.elf import ElfFile, Patcher, elf_utils, errors
 
 from .base import Linter, LinterIssue, LinterResult
 
@@ -31,12 +31,14 @@ _HELP_URL = "https://snapcraft.io/docs/linters-classic"
 class ClassicLinter(Linter):
     """Linter for classic snaps."""
 
+    parallel_safe = True
+
     @overrides
     def run(self) -> List[LinterIssue]:
         if not self._snap_metadata.base or self._snap_metadata.base == "bare":
             return []
 
-        current_path = Path()
+        current_path = self._context.root_path
         installed_snap_path = Path(f"/snap/{self._snap_metadata.name}/current")
         installed_base_path = Path(f"/snap/{self._snap_metadata.base}/current")
 
@@ -73,23 +75,18 @@ class ClassicLinter(Linter):
             return []
 
         issues = [issue]
-        elf_files = elf_utils.get_elf_files(current_path)
         patcher = Patcher(dynamic_linker=linker, root_path=current_path.absolute())
-        soname_cache = SonameCache()
-        arch_triplet = elf_utils.get_arch_triplet()
 
-        for elf_file in elf_files:
+        for elf_file in self._context.elf_files:
             # Skip linting files listed in the ignore list.
             if self._is_file_ignored(elf_file):
                 continue
 
-            elf_file.load_dependencies(
-                root_path=current_path.absolute(),
-                base_path=installed_base_path,
-                content_dirs=self._snap_metadata.get_provider_content_directories(),
-                arch_triplet=arch_triplet,
-                soname_cache=soname_cache,
-            )
+            # Issues for unchanged files are reused from the previous run.
+            if not self._context.needs_check(elf_file):
+                continue
+
+            self._context.get_dependencies(elf_file)
 
             self._check_elf_interpreter(elf_file, linker=linker, issues=issues)
             self._check_elf_rpath(elf_file, patcher=patcher, issues=issues)
@@ -104,7 +101,7 @@ class ClassicLinter(Linter):
             issue = LinterIssue(
                 name=self._name,
                 result=LinterResult.WARNING,
-                filename=str(elf_file.path),
+                filename=str(self._context.get_relative_path(elf_file.path)),
                 text=f"ELF interpreter should be set to {linker!r}.",
                 url=_HELP_URL,
             )
@@ -126,7 +123,7 @@ class ClassicLinter(Linter):
             issue = LinterIssue(
                 name=self._name,
                 result=LinterResult.WARNING,
-                filename=str(elf_file.path),
+                filename=str(self._context.get_relative_path(elf_file.path)),
                 text=f"ELF rpath should be set to {formatted_rpath!r}.",
                 url=_HELP_URL,
             )
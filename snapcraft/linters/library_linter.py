@@ -21,7 +21,7 @@ from typing import List, Set
 from craft_cli import emit
 from overrides import overrides
 
-from snapcraft.elf import ElfFile, SonameCache, elf_utils
+from snapcraft.elf import ElfFile, elf_utils
 from snapcraft.elf import errors as elf_errors
 
 from .base import Linter, LinterIssue, LinterResult
@@ -30,6 +30,8 @@ from .base import Linter, LinterIssue, LinterResult
 class LibraryLinter(Linter):
     """Linter for dynamic library availability in snap."""
 
+    parallel_safe = True
+
     @staticmethod
     def get_categories() -> List[str]:
         """Get the specific sub-categories that can be filtered against."""
@@ -40,39 +42,27 @@ class LibraryLinter(Linter):
         if self._snap_metadata.type not in ("app", None):
             return []
 
-        current_path = Path()
-        if self._snap_metadata.base and self._snap_metadata.base != "bare":
-            installed_base_path = Path(f"/snap/{self._snap_metadata.base}/current")
-        else:
-            installed_base_path = None
+        current_path = self._context.root_path
+        installed_base_path = self._context.base_path
 
         issues: List[LinterIssue] = []
-        elf_files = elf_utils.get_elf_files(current_path)
-        soname_cache = SonameCache()
         all_libraries: Set[Path] = set()
         used_libraries: Set[Path] = set()
 
-        for elf_file in elf_files:
+        for elf_file in self._context.elf_files:
             # Skip linting files listed in the ignore list for the main "library"
             # filter.
             if self._is_file_ignored(elf_file):
                 continue
 
-            arch_triplet = elf_utils.get_arch_triplet()
-            content_dirs = self._snap_metadata.get_provider_content_directories()
+            content_dirs = self._context.content_dirs
 
             # if the elf file is a library, add it to the list of all libraries
             if elf_file.soname and self._is_library_path(elf_file.path):
                 # resolve symlinks to libraries
                 all_libraries.add(elf_file.path.resolve())
 
-            dependencies = elf_file.load_dependencies(
-                root_path=current_path.absolute(),
-                base_path=installed_base_path,
-                content_dirs=content_dirs,
-                arch_triplet=arch_triplet,
-                soname_cache=soname_cache,
-            )
+            dependencies = self._context.get_dependencies(elf_file)
 
             # collect paths to local libraries used by the elf file
             for dependency in dependencies:
@@ -84,8 +74,11 @@ class LibraryLinter(Linter):
                     used_libraries.add(dependency.resolve())
 
             # Check whether all dependencies are satisfied, *if* the missing-library
-            # category is not filtered out for the elf file's path.
-            if not self._is_file_ignored(elf_file, "missing-library"):
+            # category is not filtered out for the elf file's path. Issues for
+            # unchanged files are reused from the previous run.
+            if self._context.needs_check(elf_file) and not self._is_file_ignored(
+                elf_file, "missing-library"
+            ):
                 search_paths = [current_path.absolute(), *content_dirs]
                 if installed_base_path:
                     search_paths.append(installed_base_path)
@@ -135,7 +128,7 @@ class LibraryLinter(Linter):
                 issue = LinterIssue(
                     name=self._name,
                     result=LinterResult.WARNING,
-                    filename=str(elf_file.path),
+                    filename=str(self._context.get_relative_path(elf_file.path)),
                     text=f"missing dependency {dependency.name!r}.",
                     url="https://snapcraft.io/docs/linters-library",
                 )
@@ -158,9 +151,11 @@ class LibraryLinter(Linter):
         for library_path in sorted(unused_libraries):
             try:
                 # Resolving symlinks to a library will change the path from relative
-                # to absolute. To make it relative again, remove the current directory
+                # to absolute. To make it relative again, remove the payload root
                 # prefix from the path.
-                resolved_library_path = library_path.resolve().relative_to(Path.cwd())
+                resolved_library_path = library_path.resolve().relative_to(
+                    self._context.root_path.resolve()
+                )
             except ValueError:
                 # A ValueError is not expected because these libraries should be within
                 # the current directory, but check anyways
@@ -171,13 +166,13 @@ class LibraryLinter(Linter):
             if self._is_file_ignored(resolved_library_path, "unused-library"):
                 continue
 
-            library = ElfFile(path=resolved_library_path)
+            library = ElfFile(path=self._context.root_path / resolved_library_path)
 
             issue = LinterIssue(
                 name=self._name,
                 result=LinterResult.WARNING,
                 filename=library.soname,
-                text=f"unused library {str(library.path)!r}.",
+                text=f"unused library {str(resolved_library_path)!r}.",
                 url="https://snapcraft.io/docs/linters-library",
             )
             issues.append(issue)
@@ -16,20 +16,25 @@
 
 """Snapcraft linting execution and reporting."""
 
+import concurrent.futures
 import enum
 import fnmatch
 import json
 import os
+import time
 from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 from craft_cli import emit
 
-from snapcraft import projects
+import snapcraft
+from snapcraft import projects, utils
+from snapcraft.elf import elf_utils
 from snapcraft.meta import snap_yaml
 
-from .base import Linter, LinterIssue, LinterResult
+from . import _lint_manifest
+from .base import Linter, LinterContext, LinterIssue, LinterResult
 from .classic_linter import ClassicLinter
 from .library_linter import LibraryLinter
 
@@ -60,7 +65,11 @@ _lint_reports: Dict[LinterResult, str] = {
 
 
 def report(
-    issues: List[LinterIssue], *, json_output: bool = False, intermediate: bool = False
+    issues: List[LinterIssue],
+    *,
+    json_output: bool = False,
+    intermediate: bool = False,
+    durations: Optional[Dict[str, float]] = None,
 ) -> LinterStatus:
     """Display the linter report in textual or json formats.
 
@@ -68,6 +77,9 @@ def report(
     :param json_output: Display issues in json format.
     :param intermediate: Set if the linter output are is not the main
         outcome of the command execution.
+    :param durations: The wall time in seconds taken by each linter. If set,
+        the json output is an object with the list of issues under ``issues``
+        and the timings under ``timings``.
     """
     if intermediate:
         display = partial(emit.progress, permanent=True)
@@ -87,7 +99,12 @@ def report(
             issues_by_result.setdefault(issue.result, []).append(issue)
 
     if json_output:
-        display(json.dumps([x.dict(exclude_none=True) for x in issues]))
+        entries: List[Dict[str, Any]] = [x.dict(exclude_none=True) for x in issues]
+        if durations is None:
+            display(json.dumps(entries))
+        else:
+            timings = {name: round(duration, 3) for name, duration in durations.items()}
+            display(json.dumps({"issues": entries, "timings": timings}))
     else:
         # show issues by result
         for result, header in _lint_reports.items():
@@ -96,6 +113,11 @@ def report(
                 for issue in issues_by_result[result]:
                     display(f"- {issue!s}")
 
+        if durations:
+            emit.verbose("Linter timings:")
+            for name, duration in durations.items():
+                emit.verbose(f"- {name}: {duration:.3f}s")
+
     return status
 
 
@@ -111,41 +133,201 @@ def _update_status(status: LinterStatus, result: LinterResult) -> LinterStatus:
     return status
 
 
-def run_linters(location: Path, *, lint: Optional[projects.Lint]) -> List[LinterIssue]:
+def run_linters(
+    location: Path,
+    *,
+    lint: Optional[projects.Lint],
+    durations: Optional[Dict[str, float]] = None,
+    incremental: bool = False,
+) -> List[LinterIssue]:
     """Run all the defined linters.
 
+    Linters declared as parallel-safe run concurrently, the others run one
+    after another once those are done.
+
+    When incremental, a manifest of each run is kept, so that ELF files that
+    did not change since the previous run on the same location are not checked
+    again and their previous issues are reported instead. This is only worth
+    it for locations linted repeatedly, such as the prime directory, as every
+    file in the location is hashed.
+
     :param location: The root of the snap payload subtree to run linters on.
     :param lint: The linter configuration defined for this project.
+    :param durations: If set, filled with the wall time in seconds taken by
+        each linter that was run.
+    :param incremental: Whether to reuse the results of the previous run on
+        the same location.
     :return: A list of linter issues.
     """
+    emit.progress("Reading snap metadata...")
+    snap_metadata = snap_yaml.read(location)
+
+    # Analysis of the payload shared by all linters.
+    context = LinterContext(location, snap_metadata)
+
+    linters: Dict[str, Linter] = {}
+    for name, linter_class in LINTERS.items():
+        if lint and lint.all_ignored(name):
+            continue
+
+        categories = linter_class.get_categories()
+
+        if lint and categories and all(lint.all_ignored(c) for c in categories):
+            continue
+
+        linters[name] = linter_class(
+            name=name, lint=lint, snap_metadata=snap_metadata, context=context
+        )
+
+    files: Dict[str, _lint_manifest.FileState] = {}
+    fingerprint = ""
+    reused_issues: List[LinterIssue] = []
+    if incremental:
+        emit.progress("Checking for changes since the last lint...")
+        previous = _lint_manifest.read_manifest(location)
+        files = _lint_manifest.get_file_states(
+            location, previous.files if previous else None
+        )
+        fingerprint = _get_fingerprint(context, files=files, linters=linters, lint=lint)
+        reused_issues = _reuse_unchanged(context, previous, files, fingerprint)
+
+    emit.progress("Running linters...")
+    results = _execute_linters(linters)
+
+    # Keep the order in which linters are defined, regardless of the order
+    # in which they finished.
     all_issues: List[LinterIssue] = []
-    previous_dir = os.getcwd()
-    try:
-        os.chdir(location)
+    for name, (issues, duration) in results.items():
+        all_issues += issues
+        all_issues += [issue for issue in reused_issues if issue.name == name]
+        if durations is not None:
+            durations[name] = duration
 
-        emit.progress("Reading snap metadata...")
-        snap_metadata = snap_yaml.read(Path())
+    if incremental:
+        _write_manifest(context, files, fingerprint, all_issues)
 
-        emit.progress("Running linters...")
-        for name, linter_class in LINTERS.items():
-            if lint and lint.all_ignored(name):
-                continue
+    _ignore_matching_filenames(all_issues, lint=lint)
 
-            categories = linter_class.get_categories()
+    return all_issues
 
-            if lint and categories and all(lint.all_ignored(c) for c in categories):
-                continue
 
-            linter = linter_class(name=name, lint=lint, snap_metadata=snap_metadata)
-            emit.progress(f"Running linter: {name}")
-            issues = linter.run()
-            all_issues += issues
-    finally:
-        os.chdir(previous_dir)
+def _execute_linters(
+    linters: Dict[str, Linter]
+) -> Dict[str, Tuple[List[LinterIssue], float]]:
+    """Run parallel-safe linters concurrently, then the remaining linters.
 
-    _ignore_matching_filenames(all_issues, lint=lint)
+    :returns: The issues found and the wall time of each linter, in the
+        order in which linters are defined.
+    """
+    results: Dict[str, Tuple[List[LinterIssue], float]] = {}
+
+    parallel = [name for name, linter in linters.items() if linter.parallel_safe]
+    if len(parallel) > 1:
+        max_workers = min(len(parallel), utils.get_parallel_build_count())
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                name: executor.submit(_run_linter, name, linters[name])
+                for name in parallel
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
+
+    for name, linter in linters.items():
+        if name not in results:
+            results[name] = _run_linter(name, linter)
+
+    return {name: results[name] for name in linters}
+
+
+def _get_fingerprint(
+    context: LinterContext,
+    *,
+    files: Dict[str, _lint_manifest.FileState],
+    linters: Dict[str, Linter],
+    lint: Optional[projects.Lint],
+) -> str:
+    """Compute the digest of the inputs that affect all files in a lint run."""
+    snap_yaml_state = files.get(str(Path("meta", "snap.yaml")))
+    base_path = context.base_path
+
+    return _lint_manifest.get_fingerprint(
+        snapcraft_version=snapcraft.__version__,
+        snap_yaml=snap_yaml_state[2] if snap_yaml_state else None,
+        linters=list(linters),
+        lint=lint.dict() if lint else None,
+        base=os.path.realpath(base_path) if base_path else None,
+        content_dirs=[os.path.realpath(d) for d in context.content_dirs],
+        arch_triplet=elf_utils.get_arch_triplet(),
+        resolver=os.environ.get("SNAPCRAFT_ELF_RESOLVER"),
+    )
+
+
+def _reuse_unchanged(
+    context: LinterContext,
+    previous: Optional[_lint_manifest.LintManifest],
+    files: Dict[str, _lint_manifest.FileState],
+    fingerprint: str,
+) -> List[LinterIssue]:
+    """Mark ELF files unchanged since the previous run in the linter context.
+
+    :returns: The issues previously found in the unchanged files.
+    """
+    if previous is None or previous.fingerprint != fingerprint:
+        return []
 
-    return all_issues
+    unchanged = previous.get_unchanged_elf_files(context.root_path, files)
+    emit.debug(f"Reusing lint results for {len(unchanged)} unchanged ELF files")
+
+    context.set_unchanged(
+        {context.root_path / name: deps for name, deps in unchanged.items()}
+    )
+
+    issues: List[LinterIssue] = []
+    for name in unchanged:
+        issues += [LinterIssue(**issue) for issue in previous.issues.get(name, [])]
+
+    return issues
+
+
+def _write_manifest(
+    context: LinterContext,
+    files: Dict[str, _lint_manifest.FileState],
+    fingerprint: str,
+    issues: List[LinterIssue],
+) -> None:
+    """Record the state of the payload and the issues found in each ELF file."""
+    dependencies: Dict[str, List[str]] = {}
+    for path, deps in context.dependencies.items():
+        name = str(context.get_relative_path(path))
+        dependencies[name] = sorted(str(d) for d in deps)
+
+    issues_by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for issue in issues:
+        if issue.filename in dependencies:
+            issues_by_file.setdefault(issue.filename, []).append(
+                issue.dict(by_alias=True, exclude_none=True, exclude={"type"})
+            )
+
+    manifest = _lint_manifest.LintManifest(
+        fingerprint=fingerprint,
+        files=files,
+        dependencies=dependencies,
+        issues=issues_by_file,
+    )
+    _lint_manifest.write_manifest(context.root_path, manifest)
+
+
+def _run_linter(name: str, linter: Linter) -> Tuple[List[LinterIssue], float]:
+    """Run a single linter.
+
+    :returns: A tuple containing the issues found and the linter wall time.
+    """
+    emit.progress(f"Running linter: {name}")
+    start_time = time.monotonic()
+    issues = linter.run()
+    duration = time.monotonic() - start_time
+    emit.debug(f"Linter {name!r} finished in {duration:.3f}s")
+    return issues, duration
 
 
 def _ignore_matching_filenames(
@@ -17,15 +17,19 @@
 """Parts lifecycle preparation and execution."""
 
 import copy
+import functools
 import os
 import shutil
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 import craft_parts
+import tabulate
 from craft_cli import emit
 from craft_parts import ProjectInfo, Step, StepInfo, callbacks
 from craft_providers import Executor
@@ -200,27 +204,158 @@ def run(command_name: str, parsed_args: "argparse.Namespace") -> None:
     callbacks.register_pre_step(_set_step_environment)
     callbacks.register_post_step(_patch_elf, step_list=[Step.PRIME])
 
-    build_count = utils.get_parallel_build_count()
+    run_build_plan_entry = functools.partial(
+        _run_build_plan_entry,
+        command_name,
+        yaml_data=yaml_data,
+        assets_dir=snap_project.assets_dir,
+        start_time=start_time,
+        parallel_build_count=utils.get_parallel_build_count(),
+        parsed_args=parsed_args,
+    )
+    parallel_builds = _get_parallel_builds()
+
+    if parallel_builds > 1 and len(build_plan) > 1:
+        if _can_run_build_plan_concurrently(command_name, parsed_args):
+            _run_build_plan_concurrently(
+                run_build_plan_entry,
+                build_plan=build_plan,
+                max_workers=parallel_builds,
+            )
+            return
 
-    for build_on, build_for in build_plan:
-        emit.verbose(f"Running on {build_on} for {build_for}")
-        yaml_data_for_arch = apply_yaml(yaml_data, build_on, build_for)
-        parse_info = extract_parse_info(yaml_data_for_arch)
-        _expand_environment(
-            yaml_data_for_arch,
-            parallel_build_count=build_count,
-            target_arch=build_for,
+        emit.progress(
+            "Running build plan entries one at a time: concurrent builds are "
+            "only supported in managed build instances without interaction.",
+            permanent=True,
         )
-        project = Project.unmarshal(yaml_data_for_arch)
 
-        _run_command(
-            command_name,
-            project=project,
-            parse_info=parse_info,
-            parallel_build_count=build_count,
-            assets_dir=snap_project.assets_dir,
-            start_time=start_time,
-            parsed_args=parsed_args,
+    for build_on, build_for in build_plan:
+        run_build_plan_entry(build_on=build_on, build_for=build_for)
+
+
+def _get_parallel_builds() -> int:
+    """Obtain the number of build plan entries to run at the same time.
+
+    The entries run one at a time unless the environment variable
+    ``SNAPCRAFT_PARALLEL_BUILDS`` is set to a larger number.
+    """
+    parallel_builds_env = os.environ.get("SNAPCRAFT_PARALLEL_BUILDS", "")
+    try:
+        return max(int(parallel_builds_env), 1)
+    except ValueError:
+        if parallel_builds_env:
+            emit.debug(f"Invalid SNAPCRAFT_PARALLEL_BUILDS {parallel_builds_env!r}")
+        return 1
+
+
+def _run_build_plan_entry(
+    command_name: str,
+    *,
+    build_on: str,
+    build_for: str,
+    yaml_data: Dict[str, Any],
+    assets_dir: Path,
+    start_time: datetime,
+    parallel_build_count: int,
+    parsed_args: "argparse.Namespace",
+    concurrent: bool = False,
+) -> None:
+    emit.verbose(f"Running on {build_on} for {build_for}")
+    yaml_data_for_arch = apply_yaml(yaml_data, build_on, build_for)
+    parse_info = extract_parse_info(yaml_data_for_arch)
+    _expand_environment(
+        yaml_data_for_arch,
+        parallel_build_count=parallel_build_count,
+        target_arch=build_for,
+    )
+    project = Project.unmarshal(yaml_data_for_arch)
+
+    _run_command(
+        command_name,
+        project=project,
+        parse_info=parse_info,
+        parallel_build_count=parallel_build_count,
+        assets_dir=assets_dir,
+        start_time=start_time,
+        parsed_args=parsed_args,
+        concurrent=concurrent,
+    )
+
+
+def _can_run_build_plan_concurrently(
+    command_name: str, parsed_args: "argparse.Namespace"
+) -> bool:
+    """Check if build plan entries can run at the same time.
+
+    Each entry runs in its own build instance, with its own work directory,
+    unless building in the host. Entries that may need a terminal, or that
+    expose their prime directory in the project, must run one at a time.
+    """
+    return not (
+        utils.is_managed_mode()
+        or parsed_args.destructive_mode
+        or os.getenv("SNAPCRAFT_BUILD_ENVIRONMENT") == "host"
+        or command_name in ("clean", "try")
+        or parsed_args.debug
+        or getattr(parsed_args, "shell", False)
+        or getattr(parsed_args, "shell_after", False)
+    )
+
+
+def _run_build_plan_concurrently(
+    run_build_plan_entry: Callable[..., None],
+    *,
+    build_plan: List[Tuple[str, str]],
+    max_workers: int,
+) -> None:
+    """Run build plan entries at the same time, in separate build instances.
+
+    :param run_build_plan_entry: Function to run an entry, called with the
+        build_on, build_for and concurrent keyword arguments.
+
+    :raises SnapcraftError: if any of the entries failed, after all of them
+        finished.
+    """
+
+    def run_entry(build_on: str, build_for: str) -> Tuple[float, Optional[str]]:
+        entry_start = time.monotonic()
+        try:
+            run_build_plan_entry(
+                build_on=build_on, build_for=build_for, concurrent=True
+            )
+        # pylint: disable-next=broad-exception-caught
+        except Exception as err:  # noqa: BLE001
+            return time.monotonic() - entry_start, str(err)
+        return time.monotonic() - entry_start, None
+
+    emit.progress(
+        f"Running {len(build_plan)} build plan entries, "
+        f"up to {max_workers} at a time..."
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda entry: run_entry(*entry), build_plan))
+
+    summary = [
+        {
+            "Build on": build_on,
+            "Build for": build_for,
+            "Duration": f"{duration:.1f}s",
+            "Result": "failed" if error else "succeeded",
+        }
+        for (build_on, build_for), (duration, error) in zip(build_plan, results)
+    ]
+    emit.message(tabulate.tabulate(summary, headers="keys"))
+
+    failures = [
+        f"- build on {build_on} for {build_for}: {error}"
+        for (build_on, build_for), (_, error) in zip(build_plan, results)
+        if error
+    ]
+    if failures:
+        raise errors.SnapcraftError(
+            f"Failed to run {len(failures)} of {len(build_plan)} build plan entries.",
+            details="\n".join(failures),
         )
 
 
@@ -233,6 +368,7 @@ def _run_command(
     start_time: datetime,
     parallel_build_count: int,
     parsed_args: "argparse.Namespace",
+    concurrent: bool = False,
 ) -> None:
     managed_mode = utils.is_managed_mode()
     part_names = getattr(parsed_args, "parts", None)
@@ -259,7 +395,7 @@ def _run_command(
         if command_name == "clean" and not part_names:
             _clean_provider(project, parsed_args)
         else:
-            _run_in_provider(project, command_name, parsed_args)
+            _run_in_provider(project, command_name, parsed_args, concurrent=concurrent)
         return
 
     if managed_mode:
@@ -362,8 +498,14 @@ def _run_lifecycle_and_pack(
         )
 
     if command_name in ("pack", "snap"):
-        issues = linters.run_linters(lifecycle.prime_dir, lint=project.lint)
-        status = linters.report(issues, intermediate=True)
+        durations: Dict[str, float] = {}
+        issues = linters.run_linters(
+            lifecycle.prime_dir,
+            lint=project.lint,
+            durations=durations,
+            incremental=True,
+        )
+        status = linters.report(issues, intermediate=True, durations=durations)
 
         # In case of linter errors, stop execution and return the error code.
         if status in (LinterStatus.ERRORS, LinterStatus.FATAL):
@@ -478,9 +620,18 @@ def _clean_provider(project: Project, parsed_args: "argparse.Namespace") -> None
 
 # pylint: disable-next=too-many-branches, too-many-statements
 def _run_in_provider(
-    project: Project, command_name: str, parsed_args: "argparse.Namespace"
+    project: Project,
+    command_name: str,
+    parsed_args: "argparse.Namespace",
+    *,
+    concurrent: bool = False,
 ) -> None:
-    """Pack image in provider instance."""
+    """Pack image in provider instance.
+
+    :param concurrent: Whether other instances are running at the same time,
+        in which case the output of the instance is streamed through the
+        emitter instead of taking over the terminal.
+    """
     emit.debug("Checking build provider availability")
     provider_name = "lxd" if parsed_args.use_lxd else None
     provider = providers.get_provider(provider_name)
@@ -566,11 +717,19 @@ def _run_in_provider(
                 host_project_path=project_path,
                 bind_ssh=parsed_args.bind_ssh,
             )
-            with emit.pause():
-                if command_name == "try":
-                    _expose_prime(project_path, instance)
-                # run snapcraft inside the instance
-                instance.execute_run(cmd, check=True, cwd=output_dir)
+            if concurrent:
+                with emit.open_stream(
+                    f"[{project.get_build_on()} -> {project.get_build_for()}]"
+                ) as stream:
+                    instance.execute_run(
+                        cmd, check=True, cwd=output_dir, stdout=stream, stderr=stream
+                    )
+            else:
+                with emit.pause():
+                    if command_name == "try":
+                        _expose_prime(project_path, instance)
+                    # run snapcraft inside the instance
+                    instance.execute_run(cmd, check=True, cwd=output_dir)
         except subprocess.CalledProcessError as err:
             raise errors.SnapcraftError(
                 f"Failed to execute {command_name} in instance.",
@@ -687,9 +846,7 @@ def _patch_elf(step_info: StepInfo) -> bool:
             soname_cache=soname_cache,
         )
 
-        relative_path = elf_file.path.relative_to(step_info.prime_dir)
-        emit.progress(f"Patch ELF file: {str(relative_path)!r}")
-        patcher.patch(elf_file=elf_file)
+    patcher.patch_files(elf_files=elf_files)
 
     return True
 
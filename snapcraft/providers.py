@@ -228,6 +228,7 @@ def get_command_environment(
         "SNAPCRAFT_BUILD_INFO",
         "SNAPCRAFT_IMAGE_INFO",
         "SNAPCRAFT_MAX_PARALLEL_BUILD_COUNT",
+        "SNAPCRAFT_ELF_RESOLVER",
     ]:
         if env_key in os.environ:
             env[env_key] = os.environ[env_key]
@@ -0,0 +1,403 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Resumable upload of snap files to storage in concurrent chunks.
+
+An upload session is created on the storage server, every chunk is sent to
+the session with its own request and the session is finished to obtain the
+upload id used to notify the Snap Store. The session is recorded in a
+journal keyed by the SHA3-384 digest of the file, so an interrupted upload
+of the same file continues with the chunks the server has not received.
+
+Chunked uploads are only used when enabled with SNAPCRAFT_STORE_CHUNKED_UPLOAD,
+the upload falls back to a single request if the server does not support
+them. The storage server is expected to provide these endpoints, all of them
+replying with JSON:
+
+- ``POST <storage>/unscanned-upload/chunked/`` with the ``name``, ``size``,
+  ``sha3_384`` digest and ``chunk_size`` of the file creates a session and
+  replies with its ``session_url``. A 404 or 405 reply means chunked uploads
+  are not supported.
+- ``PUT <session_url><index>`` with the bytes of the chunk at that index
+  stores it. Sending a chunk again replaces it.
+- ``GET <session_url>`` replies with the indices of the received ``chunks``.
+  An error or a malformed reply means the session cannot be resumed.
+- ``POST <session_url>finish`` assembles the file once all the chunks are
+  received and replies with ``successful`` and the ``upload_id``.
+"""
+
+import concurrent.futures
+import contextlib
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Set, Tuple
+
+import craft_store
+import pydantic
+import requests
+from craft_cli import emit
+from xdg import BaseDirectory  # type: ignore
+
+from snapcraft import errors
+
+# Bump when the layout of the journal changes.
+_JOURNAL_VERSION = 1
+
+CHUNK_SIZE = 8 * 1024 * 1024
+"""Size of each uploaded chunk, in bytes."""
+
+WORKERS = 4
+"""Number of chunks uploaded concurrently."""
+
+_CHUNK_RETRIES = 5
+_RETRY_DELAY = 1.0
+_RETRY_MAX_DELAY = 30.0
+_REQUEST_TIMEOUT = 60
+_RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class ChunkedUploadUnsupported(Exception):
+    """The storage server does not support chunked uploads."""
+
+
+class UploadJournal(pydantic.BaseModel):
+    """The upload session of a file, used to resume an interrupted upload.
+
+    :ivar storage_url: The storage server the session belongs to.
+    :ivar session_url: The URL of the upload session.
+    :ivar size: The size of the uploaded file.
+    :ivar chunk_size: The size of each chunk.
+    """
+
+    storage_url: str
+    session_url: str
+    size: int
+    chunk_size: int
+
+
+def upload_file(
+    http_client: craft_store.HTTPClient,
+    *,
+    storage_url: str,
+    filepath: Path,
+    chunk_size: int = CHUNK_SIZE,
+    workers: int = WORKERS,
+    show_progress: bool = True,
+) -> str:
+    """Upload a file to storage in chunks, resuming a previous upload.
+
+    :param http_client: The client used to reach the storage server.
+    :param storage_url: The base URL of the storage server.
+    :param filepath: The file to upload.
+    :param chunk_size: The size of each chunk.
+    :param workers: The number of chunks to upload concurrently.
+    :param show_progress: Whether to show a progress bar for the upload.
+
+    :returns: The upload id of the file.
+
+    :raises ChunkedUploadUnsupported: If the server does not support chunked
+        uploads.
+    :raises errors.SnapcraftError: If a chunk cannot be uploaded, the upload
+        can be resumed by uploading the same file again.
+    """
+    size = filepath.stat().st_size
+    chunks = (size + chunk_size - 1) // chunk_size
+    journal_path, journal, received = _start_session(
+        http_client,
+        storage_url=storage_url,
+        filepath=filepath,
+        size=size,
+        chunk_size=chunk_size,
+    )
+
+    pending = [index for index in range(chunks) if index not in received]
+    emit.debug(
+        f"Uploading {len(pending)} of {chunks} chunks to {journal.session_url!r}"
+    )
+
+    with _progress_bar(size, show_progress=show_progress) as advance:
+        advance(size - sum(_chunk_length(i, size, chunk_size) for i in pending))
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        _upload_chunk,
+                        http_client,
+                        session_url=journal.session_url,
+                        filepath=filepath,
+                        index=index,
+                        offset=index * chunk_size,
+                        length=_chunk_length(index, size, chunk_size),
+                    ): index
+                    for index in pending
+                }
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
+                        index = futures[future]
+                        advance(_chunk_length(index, size, chunk_size))
+                except BaseException:
+                    # do not wait for the queued chunks when giving up
+                    for waiting in futures:
+                        waiting.cancel()
+                    raise
+        except (craft_store.errors.CraftStoreError, OSError) as error:
+            raise errors.SnapcraftError(
+                f"Failed to upload {str(filepath)!r}: {error}",
+                resolution="Run the command again to resume the upload.",
+            ) from error
+
+    upload_id = _finish_session(http_client, journal.session_url)
+    _remove_journal(journal_path)
+
+    return upload_id
+
+
+def _start_session(
+    http_client: craft_store.HTTPClient,
+    *,
+    storage_url: str,
+    filepath: Path,
+    size: int,
+    chunk_size: int,
+) -> Tuple[Path, UploadJournal, Set[int]]:
+    """Resume the journaled upload session of a file, or create a new one.
+
+    :returns: The path to the journal, the journal of the session and the
+        chunks the server already received.
+    """
+    digest = _get_digest(filepath)
+    journal_path = _get_journal_path(digest)
+
+    journal = _read_journal(journal_path)
+    received: Optional[Set[int]] = None
+    if (
+        journal is not None
+        and journal.storage_url == storage_url
+        and journal.size == size
+        and journal.chunk_size == chunk_size
+    ):
+        received = _get_received_chunks(http_client, journal.session_url)
+
+    if journal is None or received is None:
+        journal = UploadJournal(
+            storage_url=storage_url,
+            session_url=_create_session(
+                http_client,
+                storage_url=storage_url,
+                name=filepath.name,
+                size=size,
+                digest=digest,
+                chunk_size=chunk_size,
+            ),
+            size=size,
+            chunk_size=chunk_size,
+        )
+        _write_journal(journal_path, journal)
+        return journal_path, journal, set()
+
+    emit.progress(f"Resuming upload of {filepath.name!r}.", permanent=True)
+    return journal_path, journal, received
+
+
+@contextlib.contextmanager
+def _progress_bar(size: int, *, show_progress: bool) -> Iterator[Callable[[int], None]]:
+    """Yield a function to advance the upload progress by a number of bytes."""
+    if not show_progress:
+        yield lambda _: None
+        return
+
+    with emit.progress_bar("Uploading...", size, delta=True) as progress:
+        yield progress.advance
+
+
+def _chunk_length(index: int, size: int, chunk_size: int) -> int:
+    return min(chunk_size, size - index * chunk_size)
+
+
+def _get_digest(filepath: Path) -> str:
+    """Compute the SHA3-384 digest identifying the file in the journal."""
+    digest = hashlib.sha3_384()
+    with filepath.open("rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _create_session(
+    http_client: craft_store.HTTPClient,
+    *,
+    storage_url: str,
+    name: str,
+    size: int,
+    digest: str,
+    chunk_size: int,
+) -> str:
+    """Create an upload session on the storage server.
+
+    :returns: The URL of the session.
+    """
+    try:
+        response = http_client.request(
+            "POST",
+            storage_url + "/unscanned-upload/chunked/",
+            headers={"Accept": "application/json"},
+            json={
+                "name": name,
+                "size": size,
+                "sha3_384": digest,
+                "chunk_size": chunk_size,
+            },
+            timeout=_REQUEST_TIMEOUT,
+        )
+    except craft_store.errors.StoreServerError as store_error:
+        if store_error.response.status_code in (404, 405):
+            raise ChunkedUploadUnsupported() from store_error
+        raise
+
+    session_url = response.json()["session_url"]
+    if not session_url.endswith("/"):
+        session_url += "/"
+    emit.debug(f"Created upload session {session_url!r}")
+    return session_url
+
+
+def _get_received_chunks(
+    http_client: craft_store.HTTPClient, session_url: str
+) -> Optional[Set[int]]:
+    """Obtain the chunks received by the server for an upload session.
+
+    :returns: The indices of the received chunks, or None if the session
+        cannot be resumed.
+    """
+    try:
+        response = http_client.request(
+            "GET",
+            session_url,
+            headers={"Accept": "application/json"},
+            timeout=_REQUEST_TIMEOUT,
+        )
+    except (craft_store.errors.CraftStoreError, requests.RequestException) as error:
+        emit.debug(f"Cannot resume upload session {session_url!r}: {error}")
+        return None
+
+    try:
+        return {int(index) for index in response.json()["chunks"]}
+    except (KeyError, TypeError, ValueError) as error:
+        emit.debug(f"Cannot resume upload session {session_url!r}: {error!r}")
+        return None
+
+
+def _upload_chunk(
+    http_client: craft_store.HTTPClient,
+    *,
+    session_url: str,
+    filepath: Path,
+    index: int,
+    offset: int,
+    length: int,
+) -> None:
+    """Upload a chunk of the file, retrying transient failures with backoff."""
+    with filepath.open("rb") as file:
+        file.seek(offset)
+        data = file.read(length)
+
+    for attempt in range(_CHUNK_RETRIES + 1):
+        try:
+            http_client.request(
+                "PUT",
+                f"{session_url}{index}",
+                headers={"Content-Type": "application/octet-stream"},
+                data=data,
+                timeout=_REQUEST_TIMEOUT,
+            )
+            return
+        except craft_store.errors.StoreServerError as store_error:
+            if (
+                store_error.response.status_code not in _RETRY_STATUS_CODES
+                or attempt == _CHUNK_RETRIES
+            ):
+                raise
+            error: Exception = store_error
+        except (craft_store.errors.NetworkError, requests.RequestException) as network:
+            if attempt == _CHUNK_RETRIES:
+                if isinstance(network, requests.RequestException):
+                    raise craft_store.errors.NetworkError(network) from network
+                raise
+            error = network
+
+        delay = min(_RETRY_DELAY * 2**attempt, _RETRY_MAX_DELAY)
+        emit.debug(f"Retrying chunk {index} in {delay:.1f}s: {error}")
+        time.sleep(delay)
+
+
+def _finish_session(http_client: craft_store.HTTPClient, session_url: str) -> str:
+    """Finish an upload session once all chunks are received.
+
+    :returns: The upload id of the file.
+    """
+    response = http_client.request(
+        "POST",
+        session_url + "finish",
+        headers={"Accept": "application/json"},
+        timeout=_REQUEST_TIMEOUT,
+    )
+
+    result = response.json()
+    if not result["successful"]:
+        raise errors.SnapcraftError(f"Server error while pushing file: {result}")
+
+    return result["upload_id"]
+
+
+def _get_journal_path(digest: str) -> Path:
+    return (
+        Path(BaseDirectory.xdg_cache_home, "snapcraft")
+        / f"upload-journal-v{_JOURNAL_VERSION}"
+        / f"{digest}.json"
+    )
+
+
+def _read_journal(journal_path: Path) -> Optional[UploadJournal]:
+    if not journal_path.exists():
+        return None
+
+    try:
+        return UploadJournal.parse_file(journal_path)
+    except (OSError, ValueError) as error:
+        emit.debug(f"Cannot read upload journal {str(journal_path)!r}: {error}")
+        return None
+
+
+def _write_journal(journal_path: Path, journal: UploadJournal) -> None:
+    try:
+        journal_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = journal_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(journal.json(), encoding="utf-8")
+        temp_path.replace(journal_path)
+    except OSError as error:
+        emit.debug(f"Cannot write upload journal {str(journal_path)!r}: {error}")
+
+
+def _remove_journal(journal_path: Path) -> None:
+    try:
+        journal_path.unlink()
+    except OSError as error:
+        emit.debug(f"Cannot remove upload journal {str(journal_path)!r}: {error}")
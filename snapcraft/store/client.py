@@ -18,9 +18,8 @@
 
 import os
 import platform
-import time
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, cast
 
 import craft_store
 import requests
@@ -28,15 +27,16 @@ from craft_cli import emit
 from overrides import overrides
 
 from snapcraft import __version__, errors, utils
+from snapcraft_legacy.storeapi.errors import StoreStatusTimeoutError
+from snapcraft_legacy.storeapi.poller import StatusPoller
 from snapcraft_legacy.storeapi.v2.releases import Releases as Revisions
 
-from . import channel_map, constants
+from . import channel_map, constants, response_cache
 from ._legacy_account import LegacyUbuntuOne
 from .onprem_client import ON_PREM_ENDPOINTS, OnPremClient
 
 _TESTING_ENV_PREFIXES = ["TRAVIS", "AUTOPKGTEST_TMP"]
 
-_POLL_DELAY = 1
 _HUMAN_STATUS = {
     "being_processed": "processing",
     "ready_to_release": "ready to release!",
@@ -240,8 +240,15 @@ class LegacyStoreClientCLI:
                 **kwargs,
             )
 
+        # Responses cached for another account must not be used.
+        response_cache.clear(self._base_url)
         return credentials
 
+    def logout(self) -> None:
+        """Clear the credentials stored for the Snap Store."""
+        self.store_client.logout()
+        response_cache.clear(self._base_url)
+
     def request(self, *args, **kwargs) -> requests.Response:
         """Request using the BaseClient and wrap responses that require action.
 
@@ -262,7 +269,7 @@ class LegacyStoreClientCLI:
                             f"{constants.ENVIRONMENT_STORE_CREDENTIALS}."
                         ),
                     ) from store_error
-                self.store_client.logout()
+                self.logout()
                 # Make it a manual process to login again as these older credentials
                 # might be part of some CI/CD workflow.
                 if isinstance(self.store_client, LegacyUbuntuOne):
@@ -309,17 +316,26 @@ class LegacyStoreClientCLI:
             json=data,
         )
 
-    def get_channel_map(self, *, snap_name: str) -> channel_map.ChannelMap:
-        """Return the channel map for snap_name."""
-        response = self.request(
-            "GET",
+    def get_channel_map(
+        self, *, snap_name: str, refresh: bool = False
+    ) -> channel_map.ChannelMap:
+        """Return the channel map for snap_name.
+
+        :param snap_name: the name of the snap to query.
+        :param refresh: revalidate a recently cached channel map.
+        """
+        payload = response_cache.get_json(
+            self.request,
             self._base_url + f"/api/v2/snaps/{snap_name}/channel-map",
+            snap_name=snap_name,
+            kind="channel-map",
             headers={
                 "Accept": "application/json",
             },
+            refresh=refresh,
         )
 
-        return channel_map.ChannelMap.unmarshal(response.json())
+        return channel_map.ChannelMap.unmarshal(payload)
 
     def get_account_info(
         self,
@@ -381,6 +397,7 @@ class LegacyStoreClientCLI:
             self._base_url + "/dev/api/snap-release/",
             json=data,
         )
+        response_cache.invalidate(self._base_url, snap_name=snap_name)
 
     def close(self, snap_name: str, channel: str) -> None:
         """Close channel for snap_id.
@@ -405,6 +422,7 @@ class LegacyStoreClientCLI:
             self._base_url + f"/dev/api/snaps/{snap_id}/close",
             json={"channels": [channel]},
         )
+        response_cache.invalidate(self._base_url, snap_name=snap_name)
 
     def verify_upload(
         self,
@@ -433,15 +451,56 @@ class LegacyStoreClientCLI:
         snap_file_size: int,
         built_at: Optional[str],
         channels: Optional[Sequence[str]],
+        delta_format: Optional[str] = None,
+        delta_hashes: Optional[Dict[str, str]] = None,
     ) -> int:
-        """Notify an upload to the Snap Store.
+        """Notify an upload to the Snap Store and wait for it to be processed.
 
         :param snap_name: name of the snap
         :param upload_id: the upload_id to register with the Snap Store
-        :param snap_file_size: the file size of the uploaded snap
+        :param snap_file_size: the file size of the uploaded snap or delta
         :param built_at: the build timestamp for this build
         :param channels: the channels to release to after being accepted into the Snap Store
+        :param delta_format: the format of the uploaded delta, if a delta was uploaded
+        :param delta_hashes: the sha3-384 of the delta as ``delta_hash``, of the
+            revision it applies to as ``source_hash`` and of the resulting snap as
+            ``target_hash``
         :returns: the snap's processed revision
+
+        :raises errors.StoreDeltaApplicationError: if the Snap Store cannot apply
+            the uploaded delta.
+        """
+        status_url = self.push_upload(
+            snap_name=snap_name,
+            upload_id=upload_id,
+            snap_file_size=snap_file_size,
+            built_at=built_at,
+            channels=channels,
+            delta_format=delta_format,
+            delta_hashes=delta_hashes,
+        )
+        status = self.wait_for_uploads([status_url])[status_url]
+        if isinstance(status, Exception):
+            raise status
+
+        return self.get_upload_revision(status)
+
+    def push_upload(
+        self,
+        *,
+        snap_name: str,
+        upload_id: str,
+        snap_file_size: int,
+        built_at: Optional[str],
+        channels: Optional[Sequence[str]],
+        delta_format: Optional[str] = None,
+        delta_hashes: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Notify an upload to the Snap Store without waiting for it to be processed.
+
+        The parameters are the same as for :meth:`notify_upload`.
+
+        :returns: the URL to poll for the processing status of the upload
         """
         data = {
             "name": snap_name,
@@ -454,6 +513,9 @@ class LegacyStoreClientCLI:
             data["built_at"] = built_at
         if channels is not None:
             data["channels"] = channels
+        if delta_format is not None:
+            data["delta_format"] = delta_format
+            data.update(delta_hashes or {})
 
         response = self.request(
             "POST",
@@ -463,44 +525,104 @@ class LegacyStoreClientCLI:
                 "Accept": "application/json",
             },
         )
+        response_cache.invalidate(self._base_url, snap_name=snap_name)
+
+        return response.json()["status_details_url"]
+
+    def wait_for_uploads(
+        self, status_urls: Sequence[str]
+    ) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Wait for the Snap Store to process uploads.
+
+        The statuses of all the uploads are polled in a single loop, waiting
+        longer between polls the longer the uploads take to be processed.
+        An error polling the status of an upload stops polling that upload
+        only.
+
+        :param status_urls: the URLs returned by :meth:`push_upload`
+        :returns: the final status of each upload, or the error polling it,
+            by status URL
+        """
+        failed: Dict[str, Any] = {}
+        poll_errors: Dict[str, Exception] = {}
+
+        def get_status(status_url: str) -> Dict[str, Any]:
+            try:
+                return self.request("GET", status_url).json()
+            except (
+                craft_store.errors.CraftStoreError,
+                errors.SnapcraftError,
+                ValueError,
+            ) as error:
+                poll_errors[status_url] = error
+                return failed
+
+        poller = StatusPoller(
+            get_status,
+            is_processed=lambda status: (
+                status is failed or self._is_upload_processed(status)
+            ),
+        )
+        try:
+            statuses = poller.poll(status_urls)
+        except StoreStatusTimeoutError as timeout_error:
+            raise errors.SnapcraftError(
+                str(timeout_error),
+                resolution=(
+                    "Check the status of the upload with 'snapcraft list-revisions'."
+                ),
+            ) from timeout_error
+
+        return {url: poll_errors.get(url, status) for url, status in statuses.items()}
+
+    def _is_upload_processed(self, status: Dict[str, Any]) -> bool:
+        human_status = _HUMAN_STATUS.get(status["code"], status["code"])
+        emit.progress(f"Status: {human_status}")
+
+        return status.get("processed", False)
 
-        status_url = response.json()["status_details_url"]
-        while True:
-            response = self.request("GET", status_url)
-            status = response.json()
-            human_status = _HUMAN_STATUS.get(status["code"], status["code"])
-            emit.progress(f"Status: {human_status}")
-
-            if status.get("processed", False):
-                if status.get("errors"):
-                    error_messages = [
-                        e["message"] for e in status["errors"] if "message" in e
-                    ]
-                    error_string = "\n".join([f"- {e}" for e in error_messages])
-                    raise errors.SnapcraftError(
-                        f"Issues while processing snap:\n{error_string}"
-                    )
-                break
-
-            time.sleep(_POLL_DELAY)
+    def get_upload_revision(self, status: Dict[str, Any]) -> int:
+        """Obtain the revision created by a processed upload.
+
+        :param status: the final status of the upload
+        :returns: the snap's processed revision
+
+        :raises errors.StoreDeltaApplicationError: if the Snap Store cannot apply
+            the uploaded delta.
+        :raises errors.SnapcraftError: if the upload was not accepted.
+        """
+        if status.get("errors"):
+            error_messages = [e["message"] for e in status["errors"] if "message" in e]
+            error_string = "\n".join([f"- {e}" for e in error_messages])
+            if status["code"] == "processing_upload_delta_error":
+                raise errors.StoreDeltaApplicationError(
+                    f"Issues while processing delta:\n{error_string}"
+                )
+            raise errors.SnapcraftError(
+                f"Issues while processing snap:\n{error_string}"
+            )
 
         return status["revision"]
 
-    def list_revisions(self, snap_name: str) -> Revisions:
+    def list_revisions(self, snap_name: str, *, refresh: bool = False) -> Revisions:
         """Return a list of available revisions for snap_name.
 
         :param snap_name: the name of the snap to query.
+        :param refresh: revalidate recently cached revisions.
         """
-        response = self.request(
-            "GET",
+        payload = response_cache.get_json(
+            self.request,
             f"{self._base_url}/api/v2/snaps/{snap_name}/releases",
+            snap_name=snap_name,
+            kind="revisions",
             headers={
                 "Content-Type": "application/json",
                 "Accept": "application/json",
             },
+            refresh=refresh,
         )
 
-        return Revisions.unmarshal(response.json())
+        return Revisions.unmarshal(payload)
 
 
 class OnPremStoreClientCLI(LegacyStoreClientCLI):
@@ -519,7 +641,7 @@ class OnPremStoreClientCLI(LegacyStoreClientCLI):
         emit.debug(f"Skipping verification for {snap_name!r}")
 
     @overrides
-    def notify_upload(
+    def push_upload(
         self,
         *,
         snap_name: str,
@@ -527,9 +649,13 @@ class OnPremStoreClientCLI(LegacyStoreClientCLI):
         snap_file_size: int,
         built_at: Optional[str],
         channels: Optional[Sequence[str]],
-    ) -> int:
+        delta_format: Optional[str] = None,
+        delta_hashes: Optional[Dict[str, str]] = None,
+    ) -> str:
         if channels:
             raise errors.SnapcraftError("Releasing during currently unsupported")
+        if delta_format:
+            raise errors.StoreDeltaApplicationError("Deltas are not supported")
         emit.debug(
             f"Ignoring snap_file_size of {snap_file_size!r} and "
             f"built_at {built_at!r}"
@@ -544,25 +670,28 @@ class OnPremStoreClientCLI(LegacyStoreClientCLI):
         revision_response = self.store_client.notify_revision(
             name=snap_name, revision_request=revision_request
         )
+        response_cache.invalidate(self._base_url, snap_name=snap_name)
 
-        status_url = self._base_url + revision_response.status_url
-        while True:
-            response = self.request("GET", status_url)
-            # human_status = _HUMAN_STATUS.get(status["code"], status["code"])
-            emit.progress(f"Status checked: {response}")
-
-            (revision,) = response.json()["revisions"]
-            status = revision["status"]
-
-            if status == "approved":
-                return revision["revision"]
-            if status == "rejected":
-                # TODO: grab more that the first error
-                error = revision["errors"][0]
-                raise errors.SnapcraftError(
-                    f"Error uploading snap: {error['code']}", details=error["message"]
-                )
-            time.sleep(_POLL_DELAY)
+        return self._base_url + revision_response.status_url
+
+    @overrides
+    def _is_upload_processed(self, status: Dict[str, Any]) -> bool:
+        emit.progress(f"Status checked: {status}")
+
+        (revision,) = status["revisions"]
+        return revision["status"] in ("approved", "rejected")
+
+    @overrides
+    def get_upload_revision(self, status: Dict[str, Any]) -> int:
+        (revision,) = status["revisions"]
+        if revision["status"] == "rejected":
+            # TODO: grab more that the first error
+            error = revision["errors"][0]
+            raise errors.SnapcraftError(
+                f"Error uploading snap: {error['code']}", details=error["message"]
+            )
+
+        return revision["revision"]
 
     @overrides
     def release(
@@ -585,40 +714,49 @@ class OnPremStoreClientCLI(LegacyStoreClientCLI):
             ),
             json=payload,
         )
+        response_cache.invalidate(self._base_url, snap_name=snap_name)
 
     @overrides
     def close(self, snap_name: str, channel) -> None:
         self.release(snap_name=snap_name, revision=None, channels=[channel])
 
     @overrides
-    def get_channel_map(self, *, snap_name: str) -> channel_map.ChannelMap:
-        response = self.request(
-            "GET",
+    def get_channel_map(
+        self, *, snap_name: str, refresh: bool = False
+    ) -> channel_map.ChannelMap:
+        payload = response_cache.get_json(
+            self.request,
             self._base_url
             + self.store_client._endpoints.get_releases_endpoint(  # pylint: disable=protected-access
                 snap_name
             ),
+            snap_name=snap_name,
+            kind="channel-map",
+            refresh=refresh,
         )
 
         return channel_map.ChannelMap.from_list_releases(
             cast(
                 craft_store.models.SnapListReleasesModel,
-                craft_store.models.SnapListReleasesModel.unmarshal(response.json()),
+                craft_store.models.SnapListReleasesModel.unmarshal(payload),
             )
         )
 
     @overrides
-    def list_revisions(self, snap_name: str) -> Revisions:
-        response = self.request(
-            "GET",
+    def list_revisions(self, snap_name: str, *, refresh: bool = False) -> Revisions:
+        payload = response_cache.get_json(
+            self.request,
             f"{self._base_url}/v1/snap/{snap_name}/revisions",
+            snap_name=snap_name,
+            kind="revisions",
             headers={
                 "Content-Type": "application/json",
                 "Accept": "application/json",
             },
+            refresh=refresh,
         )
 
-        return Revisions.unmarshal(response.json())
+        return Revisions.unmarshal(payload)
 
 
 # We have two stores with a rather different implementation.
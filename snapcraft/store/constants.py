@@ -33,6 +33,9 @@ ENVIRONMENT_ADMIN_MACAROON: Final[str] = "SNAPCRAFT_ADMIN_MACAROON"
 
 This value holds a valid path to a file with the macaroon contents."""
 
+ENVIRONMENT_STORE_CHUNKED_UPLOAD: Final[str] = "SNAPCRAFT_STORE_CHUNKED_UPLOAD"
+"""Environment variable used to upload snaps in resumable concurrent chunks."""
+
 STORE_URL: Final[str] = "https://dashboard.snapcraft.io"
 """Default store backend URL."""
 
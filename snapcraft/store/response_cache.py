@@ -0,0 +1,202 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""On-disk cache of Snap Store responses about a snap.
+
+Responses are kept per store, account and snap. A cached response is used
+without a request for a short time, after that it is revalidated with a
+conditional request using its ETag and Last-Modified headers so an unchanged
+payload is not downloaded again.
+
+Credentials stored in the system are not read to tell accounts apart, the
+responses for a store are cleared instead when logging in or out of it.
+Exported credentials are told apart by their fingerprint.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import pydantic
+import requests
+from craft_cli import emit
+from xdg import BaseDirectory  # type: ignore
+
+from . import constants
+
+# Bump when the layout of the cache changes.
+_CACHE_VERSION = 2
+
+TTL = 60.0
+"""Seconds a cached response is used without revalidating it."""
+
+
+class CachedResponse(pydantic.BaseModel):
+    """A response from the Snap Store and the headers to revalidate it.
+
+    :ivar url: The requested URL.
+    :ivar etag: The ETag header of the response.
+    :ivar last_modified: The Last-Modified header of the response.
+    :ivar validated_at: When the response was last validated, in seconds
+        since the epoch.
+    :ivar payload: The JSON payload of the response.
+    """
+
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    validated_at: float
+    payload: Dict[str, Any]
+
+
+def get_json(
+    request: Callable[..., requests.Response],
+    url: str,
+    *,
+    snap_name: str,
+    kind: str,
+    headers: Optional[Dict[str, str]] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """Get the JSON payload at url, using the cached response if still valid.
+
+    :param request: The function used to send the request.
+    :param url: The URL to get.
+    :param snap_name: The snap the response is about.
+    :param kind: The name the response is cached with.
+    :param headers: Headers to send with the request.
+    :param refresh: Revalidate the cached response even if it is recent.
+
+    :returns: The JSON payload of the response.
+    """
+    cache_path = _get_cache_path(url, snap_name=snap_name, kind=kind)
+    cached = _read_cache(cache_path)
+    if cached is not None and cached.url != url:
+        cached = None
+
+    if (
+        cached is not None
+        and not refresh
+        and 0 <= time.time() - cached.validated_at < TTL
+    ):
+        emit.debug(f"Using cached {kind} for {snap_name!r}")
+        return cached.payload
+
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if cached.etag:
+            request_headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            request_headers["If-Modified-Since"] = cached.last_modified
+
+    response = request("GET", url, headers=request_headers)
+
+    if cached is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+        emit.debug(f"Cached {kind} for {snap_name!r} is up to date")
+        cached.validated_at = time.time()
+        _write_cache(cache_path, cached)
+        return cached.payload
+
+    payload = response.json()
+    _write_cache(
+        cache_path,
+        CachedResponse(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            validated_at=time.time(),
+            payload=payload,
+        ),
+    )
+    return payload
+
+
+def invalidate(base_url: str, *, snap_name: str) -> None:
+    """Remove the cached responses about snap_name from the store at base_url.
+
+    The responses cached for every account are removed.
+    """
+    for cache_dir in _get_store_dir(base_url).glob(f"*/{snap_name}"):
+        _remove(cache_dir)
+
+
+def clear(base_url: str) -> None:
+    """Remove all the cached responses from the store at base_url."""
+    _remove(_get_store_dir(base_url))
+
+
+def _remove(cache_dir: Path) -> None:
+    try:
+        shutil.rmtree(cache_dir)
+    except FileNotFoundError:
+        pass
+    except OSError as error:
+        emit.debug(f"Cannot remove store cache {str(cache_dir)!r}: {error}")
+
+
+def _get_account() -> str:
+    """Obtain the name responses for the credentials in use are cached with."""
+    credentials = os.getenv(constants.ENVIRONMENT_STORE_CREDENTIALS)
+    if not credentials:
+        return "stored"
+
+    return "exported-" + hashlib.sha256(credentials.encode()).hexdigest()[:16]
+
+
+def _get_store_dir(url: str) -> Path:
+    return (
+        Path(BaseDirectory.xdg_cache_home, "snapcraft")
+        / f"store-v{_CACHE_VERSION}"
+        / urlparse(url).netloc
+    )
+
+
+def _get_cache_dir(url: str, *, snap_name: str) -> Path:
+    return _get_store_dir(url) / _get_account() / snap_name
+
+
+def _get_cache_path(url: str, *, snap_name: str, kind: str) -> Path:
+    return _get_cache_dir(url, snap_name=snap_name) / f"{kind}.json"
+
+
+def _read_cache(cache_path: Path) -> Optional[CachedResponse]:
+    if not cache_path.exists():
+        return None
+
+    try:
+        return CachedResponse.parse_file(cache_path)
+    except (OSError, ValueError) as error:
+        emit.debug(f"Cannot read store cache {str(cache_path)!r}: {error}")
+        return None
+
+
+def _write_cache(cache_path: Path, cached: CachedResponse) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # uploads can look up revisions from several threads
+        temp_path = cache_path.with_suffix(
+            f".{os.getpid()}-{threading.get_ident()}.tmp"
+        )
+        temp_path.write_text(cached.json(), encoding="utf-8")
+        temp_path.replace(cache_path)
+    except OSError as error:
+        emit.debug(f"Cannot write store cache {str(cache_path)!r}: {error}")
@@ -28,7 +28,6 @@ from pathlib import Path
 from typing import Iterable, List, Optional
 
 from craft_cli import emit
-from craft_parts.sources.git_source import GitSource
 
 from snapcraft import errors
 
@@ -446,6 +445,9 @@ def process_version(version: Optional[str]) -> str:
     new_version = version
     if version == "git":
         emit.progress("Determining the version from the project repo (version: git).")
+        # pylint: disable-next=import-outside-toplevel
+        from craft_parts.sources.git_source import GitSource
+
         new_version = GitSource.generate_version()
 
     if new_version != version:
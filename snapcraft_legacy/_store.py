@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import contextlib
+import io
 import json
 import logging
 import operator
@@ -25,7 +26,7 @@ import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
 from subprocess import Popen
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from typing import IO, TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 from urllib.parse import urljoin
 
 import craft_store
@@ -37,9 +38,12 @@ from snapcraft_legacy import storeapi, yaml_utils
 # Ideally we would move stuff into more logical components
 from snapcraft_legacy.cli import echo
 from snapcraft_legacy.file_utils import get_host_tool_path, get_snap_tool_path
+from snapcraft_legacy.internal import squashfs
 from snapcraft_legacy.internal.errors import (
     SnapcraftEnvironmentError,
     SnapDataExtractionError,
+    SquashFSError,
+    SquashFSUnsupportedCompressionError,
 )
 from snapcraft_legacy.storeapi.constants import DEFAULT_SERIES
 from snapcraft_legacy.storeapi.metrics import MetricsFilter, MetricsResults
@@ -51,61 +55,88 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def _unsquashfs(snap_path: str, path: str, destination: str) -> None:
+    unsquashfs_path = get_snap_tool_path("unsquashfs")
+    try:
+        output = subprocess.check_output(
+            [
+                unsquashfs_path,
+                "-d",
+                destination,
+                snap_path,
+                "-e",
+                # cygwin unsquashfs on windows uses unix paths.
+                Path(path).as_posix(),
+            ]
+        )
+    except subprocess.CalledProcessError:
+        raise SnapDataExtractionError(os.path.basename(snap_path))
+    logger.debug("Output extracting %s from snap: %s", path, output)
+
+
 def get_data_from_snap_file(snap_path):
+    try:
+        with squashfs.SquashFSImage(snap_path) as snap:
+            snap_yaml = snap.read_file("meta/snap.yaml").decode()
+    except SquashFSUnsupportedCompressionError as error:
+        logger.debug("%s, using unsquashfs", error)
+    except (SquashFSError, OSError) as error:
+        raise SnapDataExtractionError(os.path.basename(snap_path)) from error
+    else:
+        return yaml_utils.load(snap_yaml)
+
     with tempfile.TemporaryDirectory() as temp_dir:
-        unsquashfs_path = get_snap_tool_path("unsquashfs")
-        try:
-            output = subprocess.check_output(
-                [
-                    unsquashfs_path,
-                    "-d",
-                    os.path.join(temp_dir, "squashfs-root"),
-                    snap_path,
-                    "-e",
-                    # cygwin unsquashfs on windows uses unix paths.
-                    Path("meta", "snap.yaml").as_posix(),
-                ]
-            )
-        except subprocess.CalledProcessError:
-            raise SnapDataExtractionError(os.path.basename(snap_path))
-        logger.debug(output)
-        with open(
-            os.path.join(temp_dir, "squashfs-root", "meta", "snap.yaml")
-        ) as yaml_file:
+        squashfs_root = os.path.join(temp_dir, "squashfs-root")
+        _unsquashfs(snap_path, os.path.join("meta", "snap.yaml"), squashfs_root)
+        with open(os.path.join(squashfs_root, "meta", "snap.yaml")) as yaml_file:
             snap_yaml = yaml_utils.load(yaml_file)
     return snap_yaml
 
 
+def _read_icon_from_snap_file(snap_path) -> Optional[IO[bytes]]:
+    icon_paths = ["meta/gui/icon.{}".format(extension) for extension in ("png", "svg")]
+    icon_data = None
+    try:
+        with squashfs.SquashFSImage(snap_path) as snap:
+            icon_path = next((p for p in icon_paths if snap.exists(p)), None)
+            if icon_path is not None:
+                icon_data = snap.read_file(icon_path)
+    except SquashFSUnsupportedCompressionError as error:
+        logger.debug("%s, using unsquashfs", error)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            squashfs_root = os.path.join(temp_dir, "squashfs-root")
+            _unsquashfs(snap_path, "meta/gui", squashfs_root)
+            icon_path = next(
+                (
+                    p
+                    for p in icon_paths
+                    if os.path.exists(os.path.join(squashfs_root, p))
+                ),
+                None,
+            )
+            if icon_path is not None:
+                with open(os.path.join(squashfs_root, icon_path), "rb") as icon_file:
+                    icon_data = icon_file.read()
+    except (SquashFSError, OSError) as error:
+        raise SnapDataExtractionError(os.path.basename(snap_path)) from error
+
+    if icon_data is None:
+        return None
+
+    icon = io.BytesIO(icon_data)
+    # the name is used as the file name when uploading the icon
+    icon.name = icon_path  # type: ignore
+    return icon
+
+
 @contextlib.contextmanager
 def _get_icon_from_snap_file(snap_path):
-    icon_file = None
-    with tempfile.TemporaryDirectory() as temp_dir:
-        unsquashfs_path = get_snap_tool_path("unsquashfs")
-        try:
-            output = subprocess.check_output(
-                [
-                    unsquashfs_path,
-                    "-d",
-                    os.path.join(temp_dir, "squashfs-root"),
-                    snap_path,
-                    "-e",
-                    "meta/gui",
-                ]
-            )
-        except subprocess.CalledProcessError:
-            raise SnapDataExtractionError(os.path.basename(snap_path))
-        logger.debug("Output extracting icon from snap: %s", output)
-        for extension in ("png", "svg"):
-            icon_name = "icon.{}".format(extension)
-            icon_path = os.path.join(temp_dir, "squashfs-root", "meta/gui", icon_name)
-            if os.path.exists(icon_path):
-                icon_file = open(icon_path, "rb")
-                break
-        try:
-            yield icon_file
-        finally:
-            if icon_file is not None:
-                icon_file.close()
+    icon_file = _read_icon_from_snap_file(snap_path)
+    try:
+        yield icon_file
+    finally:
+        if icon_file is not None:
+            icon_file.close()
 
 
 def _get_url_from_error(error: storeapi.errors.StoreAccountInformationError) -> str:
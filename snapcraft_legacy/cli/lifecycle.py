@@ -35,6 +35,7 @@ from snapcraft_legacy.internal import (
     indicators,
     lifecycle,
     project_loader,
+    repo,
     steps,
 )
 from snapcraft_legacy.internal.errors import SnapcraftEnvironmentError
@@ -472,5 +473,30 @@ def clean(ctx, parts, unprime, **kwargs):
                 lifecycle.clean(project, parts, steps.PRIME)
 
 
+@lifecyclecli.command("prune-cache")
+@click.option(
+    "--all",
+    "prune_all",
+    is_flag=True,
+    help="Remove all unpacked stage packages instead of only the least recently used.",
+)
+def prune_cache(prune_all):
+    """Remove unpacked stage packages from the cache.
+
+    The cache size in MiB can be set with SNAPCRAFT_STAGE_PACKAGES_CACHE_SIZE.
+
+    \b
+    Examples:
+        snapcraft prune-cache
+        snapcraft prune-cache --all
+    """
+    removed_size = repo.Repo.prune_stage_packages_cache(
+        max_size=0 if prune_all else None
+    )
+    echo.info(
+        f"Removed {removed_size / 1024 / 1024:.1f} MiB of unpacked stage packages."
+    )
+
+
 if __name__ == "__main__":
     lifecyclecli.main()
@@ -29,8 +29,15 @@ from typing import Callable, Generator, List, Optional, Pattern, Set
 
 from snapcraft_legacy.internal import common, errors
 
+if sys.platform == "linux":
+    import fcntl
+
 logger = logging.getLogger(__name__)
 
+# ioctl to share the data blocks of a file (reflink) on file systems that
+# support it, from linux/fs.h.
+_FICLONE = 0x40049409
+
 
 def replace_in_file(
     directory: str, file_pattern: Pattern, search_pattern: Pattern, replacement: str
@@ -155,7 +162,8 @@ def copy(source: str, destination: str, *, follow_symlinks: bool = False) -> Non
         os.unlink(destination)
 
     try:
-        shutil.copy2(source, destination, follow_symlinks=follow_symlinks)
+        if not _clone(source, destination, follow_symlinks=follow_symlinks):
+            shutil.copy2(source, destination, follow_symlinks=follow_symlinks)
     except FileNotFoundError:
         raise errors.SnapcraftCopyFileNotFoundError(source)
     uid = os.stat(source, follow_symlinks=follow_symlinks).st_uid
@@ -170,6 +178,36 @@ def copy(source: str, destination: str, *, follow_symlinks: bool = False) -> Non
         )
 
 
+def _clone(source: str, destination: str, *, follow_symlinks: bool) -> bool:
+    """Copy a regular file as a reflink, sharing its data blocks.
+
+    :returns: False if the file is not a regular file or the file system does
+              not support reflinks, in which case destination is not created.
+    """
+    if sys.platform != "linux":
+        return False
+
+    if not stat.S_ISREG(os.stat(source, follow_symlinks=follow_symlinks).st_mode):
+        return False
+
+    with open(source, "rb") as source_file:
+        try:
+            destination_fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except OSError:
+            return False
+
+        try:
+            fcntl.ioctl(destination_fd, _FICLONE, source_file.fileno())
+        except OSError:
+            os.close(destination_fd)
+            os.unlink(destination)
+            return False
+        os.close(destination_fd)
+
+    shutil.copystat(source, destination, follow_symlinks=follow_symlinks)
+    return True
+
+
 def link_or_copy_tree(
     source_tree: str,
     destination_tree: str,
@@ -22,6 +22,8 @@ import tempfile
 from pathlib import Path
 
 from snapcraft_legacy import file_utils, yaml_utils
+from snapcraft_legacy.internal import squashfs
+from snapcraft_legacy.internal.errors import SquashFSUnsupportedCompressionError
 
 from ._cache import SnapcraftProjectCache
 
@@ -41,6 +43,19 @@ class SnapCache(SnapcraftProjectCache):
         return snap_cache_root
 
     def _get_snap_deb_arch(self, snap_filename):
+        try:
+            with squashfs.SquashFSImage(snap_filename) as snap:
+                snap_yaml = yaml_utils.load(snap.read_file("meta/snap.yaml").decode())
+        except SquashFSUnsupportedCompressionError as error:
+            logger.debug("%s, using unsquashfs", error)
+            snap_yaml = self._unsquash_snap_yaml(snap_filename)
+        # XXX: add multiarch support later
+        try:
+            return snap_yaml["architectures"][0]
+        except KeyError:
+            return "all"
+
+    def _unsquash_snap_yaml(self, snap_filename):
         with tempfile.TemporaryDirectory() as temp_dir:
             unsquashfs_path = file_utils.get_snap_tool_path("unsquashfs")
             output = subprocess.check_output(
@@ -58,12 +73,7 @@ class SnapCache(SnapcraftProjectCache):
             with open(
                 os.path.join(temp_dir, "squashfs-root", "meta", "snap.yaml")
             ) as yaml_file:
-                snap_yaml = yaml_utils.load(yaml_file)
-        # XXX: add multiarch support later
-        try:
-            return snap_yaml["architectures"][0]
-        except KeyError:
-            return "all"
+                return yaml_utils.load(yaml_file)
 
     def _get_snap_cache_path(self, snap_filename):
         snap_hash = file_utils.calculate_sha3_384(snap_filename)
@@ -25,10 +25,11 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import urllib
-from contextlib import suppress
+from contextlib import contextmanager, suppress
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 
 from snaphelpers import SnapConfigOptions, SnapCtlError
 
@@ -60,6 +61,74 @@ def assemble_env():
 
 run_number: int = 0
 
+# How long to wait for the output of a step once it is done, before leaving
+# it to background processes that still hold the pipe.
+_PREFIXED_OUTPUT_TIMEOUT = 5.0
+
+_step_output = threading.local()
+
+
+class _PrefixedPipe:
+    """A pipe copying each line written to it to stdout, after a prefix."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, prefix: str) -> None:
+        self._prefix = prefix
+        read_fd, self._write_fd = os.pipe()
+        self._thread = threading.Thread(
+            target=self._copy, args=(os.fdopen(read_fd, "rb"),), daemon=True
+        )
+        self._thread.start()
+
+    def fileno(self) -> int:
+        return self._write_fd
+
+    def _copy(self, reader) -> None:
+        with reader:
+            for line in reader:
+                text = line.decode(sys.getfilesystemencoding(), "replace")
+                if not text.endswith("\n"):
+                    text += "\n"
+                with self._lock:
+                    sys.stdout.write(self._prefix + text)
+                    sys.stdout.flush()
+
+    def close(self) -> None:
+        os.close(self._write_fd)
+        self._thread.join(_PREFIXED_OUTPUT_TIMEOUT)
+
+
+@contextmanager
+def prefixed_output(prefix: str) -> Iterator[None]:
+    """Prefix each line of output of the commands run by this thread.
+
+    Both stdout and stderr of the commands are sent to stdout, so that
+    the output of parts built in parallel can be told apart.
+    """
+    pipe = _PrefixedPipe(prefix)
+    _step_output.pipe = pipe
+    try:
+        yield
+    finally:
+        _step_output.pipe = None
+        pipe.close()
+
+
+def get_output_kwargs(*, stdout: bool = True) -> Dict[str, Any]:
+    """Return the subprocess output arguments for commands run by this thread.
+
+    They are empty unless the thread is within prefixed_output().
+
+    :param stdout: Also redirect stdout, unset if it is captured.
+    """
+    pipe = getattr(_step_output, "pipe", None)
+    if pipe is None:
+        return {}
+    if stdout:
+        return {"stdout": pipe.fileno(), "stderr": subprocess.STDOUT}
+    return {"stderr": pipe.fileno()}
+
 
 def _run(cmd: List[str], runner: Callable, **kwargs):
     global run_number
@@ -128,11 +197,13 @@ def _run(cmd: List[str], runner: Callable, **kwargs):
 
 
 def run(cmd: List[str], **kwargs) -> None:
-    _run(cmd, subprocess.check_call, **kwargs)
+    _run(cmd, subprocess.check_call, **{**get_output_kwargs(), **kwargs})
 
 
 def run_output(cmd: List[str], **kwargs) -> str:
-    output = _run(cmd, subprocess.check_output, **kwargs)
+    output = _run(
+        cmd, subprocess.check_output, **{**get_output_kwargs(stdout=False), **kwargs}
+    )
     try:
         return output.decode(sys.getfilesystemencoding()).strip()
     except UnicodeEncodeError:
@@ -730,6 +730,20 @@ class SnapDataExtractionError(SnapcraftError):
         super().__init__(snap=snap)
 
 
+class SquashFSError(SnapcraftError):
+    fmt = "Cannot read squashfs image {path!r}: {message}."
+
+    def __init__(self, *, path: str, message: str) -> None:
+        super().__init__(path=path, message=message)
+
+
+class SquashFSUnsupportedCompressionError(SquashFSError):
+    def __init__(self, *, path: str, compression: int) -> None:
+        super().__init__(
+            path=path, message=f"unsupported compression (id {compression})"
+        )
+
+
 class ProjectNotFoundError(SnapcraftReportableError):
     fmt = "Failed to find project files."
 
@@ -14,7 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import concurrent.futures
+import distutils.util
 import logging
+import os
+import threading
 from typing import List, Optional, Sequence, Set
 
 from snapcraft_legacy import config, storeapi
@@ -36,6 +40,10 @@ from ._status_cache import StatusCache
 
 logger = logging.getLogger(__name__)
 
+# Steps that can run for independent parts at the same time, as they only
+# write to the part directories.
+_PARALLEL_STEPS = [steps.PULL, steps.BUILD]
+
 
 def _get_required_grade(*, base: Optional[str], arch: str) -> str:
     # Some types of snap do not require a base.
@@ -169,6 +177,26 @@ def _replace_in_part(part):
     return part
 
 
+class _PartLogFilter(logging.Filter):
+    """Prefix the messages logged while running a part step with its name."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._local = threading.local()
+
+    def set_part_name(self, part_name: Optional[str]) -> None:
+        self._local.part_name = part_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        part_name = getattr(self._local, "part_name", None)
+        # Records are filtered once per handler.
+        if part_name is not None and not hasattr(record, "part_name"):
+            record.part_name = part_name
+            record.msg = f"[{part_name}] {record.getMessage()}"
+            record.args = ()
+        return True
+
+
 class _Executor:
     def __init__(self, project_config):
         self.config = project_config
@@ -177,6 +205,14 @@ class _Executor:
         self.steps_were_run = False
 
         self._cache = StatusCache(project_config)
+        self._parallel = distutils.util.strtobool(
+            os.environ.get("SNAPCRAFT_PARALLEL_PARTS", "n")
+        )
+        # Preparing a step fetches stage packages and snaps, which must not
+        # happen for several parts at the same time.
+        self._prepare_lock = threading.RLock()
+        # Dependencies are run in the thread preparing the part that needs them.
+        self._dependencies = threading.local()
 
     def run(self, step: steps.Step, part_names=None):
         if part_names:
@@ -195,11 +231,86 @@ class _Executor:
                     # XXX check only for collisions on the parts that have
                     # already been built --elopio - 20170713
                     pluginhandler.check_for_collisions(self.config.all_parts)
+                if (
+                    self._parallel
+                    and current_step in _PARALLEL_STEPS
+                    and not self._get_dependencies_depth()
+                ):
+                    self._handle_step_in_waves(
+                        part_names, parts, step, current_step, cli_config
+                    )
+                    continue
                 for part in parts:
                     self._handle_step(part_names, part, step, current_step, cli_config)
 
         self._create_meta(step, processed_part_names)
 
+    def _handle_step_in_waves(
+        self,
+        requested_part_names: Sequence[str],
+        parts: Sequence[pluginhandler.PluginHandler],
+        requested_step: steps.Step,
+        current_step: steps.Step,
+        cli_config,
+    ) -> None:
+        """Handle a step at once for parts that do not depend on each other."""
+        log_filter = _PartLogFilter()
+        handlers = list(logging.getLogger().handlers)
+        for handler in handlers:
+            handler.addFilter(log_filter)
+
+        def handle_step(part: pluginhandler.PluginHandler) -> None:
+            log_filter.set_part_name(part.name)
+            try:
+                with common.prefixed_output(f"[{part.name}] "):
+                    self._handle_step(
+                        requested_part_names,
+                        part,
+                        requested_step,
+                        current_step,
+                        cli_config,
+                    )
+            finally:
+                log_filter.set_part_name(None)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.project.parallel_build_count
+            ) as executor:
+                for wave in self.parts_config.get_waves(parts):
+                    # Stage the dependencies of the whole wave before any of its
+                    # parts runs the step, the stage directory is shared.
+                    for part in wave:
+                        if self._is_step_run_requested(
+                            requested_part_names, part, requested_step, current_step
+                        ):
+                            log_filter.set_part_name(part.name)
+                            try:
+                                self._handle_part_dependencies(
+                                    step=current_step, part=part
+                                )
+                            finally:
+                                log_filter.set_part_name(None)
+                    futures = [executor.submit(handle_step, part) for part in wave]
+                    for future in futures:
+                        future.result()
+        finally:
+            for handler in handlers:
+                handler.removeFilter(log_filter)
+
+    def _is_step_run_requested(
+        self,
+        requested_part_names: Sequence[str],
+        part: pluginhandler.PluginHandler,
+        requested_step: steps.Step,
+        current_step: steps.Step,
+    ) -> bool:
+        return self._cache.should_step_run(part, current_step) or bool(
+            requested_part_names
+            and current_step == requested_step
+            and part.name in requested_part_names
+        )
+
     def _handle_step(
         self,
         requested_part_names: Sequence[str],
@@ -324,18 +435,29 @@ class _Executor:
                     part.name, prerequisite_step.name, " ".join(dependency_names)
                 )
             )
-            self.run(prerequisite_step, dependency_names)
+            depth = self._get_dependencies_depth()
+            self._dependencies.depth = depth + 1
+            try:
+                self.run(prerequisite_step, dependency_names)
+            finally:
+                self._dependencies.depth = depth
+
+    def _get_dependencies_depth(self) -> int:
+        return getattr(self._dependencies, "depth", 0)
 
     def _prepare_step(self, *, step: steps.Step, part: pluginhandler.PluginHandler):
-        common.reset_env()
+        with self._prepare_lock:
+            common.reset_env()
 
-        self._handle_part_dependencies(step=step, part=part)
+            self._handle_part_dependencies(step=step, part=part)
 
-        # Run the preparation function for this step (if implemented)
-        preparation_function = getattr(part, "prepare_{}".format(step.name), None)
-        if preparation_function:
-            notify_part_progress(part, "Preparing to {}".format(step.name), debug=True)
-            preparation_function()
+            # Run the preparation function for this step (if implemented)
+            preparation_function = getattr(part, "prepare_{}".format(step.name), None)
+            if preparation_function:
+                notify_part_progress(
+                    part, "Preparing to {}".format(step.name), debug=True
+                )
+                preparation_function()
 
         part = _replace_in_part(part)
 
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import collections
+import concurrent.futures
 import contextlib
 import copy
 import filecmp
@@ -23,6 +24,7 @@ import logging
 import os
 import pathlib
 import shutil
+import stat
 import subprocess
 import sys
 from glob import iglob
@@ -45,6 +47,7 @@ from snapcraft_legacy.internal.mangling import clear_execstack
 from ._build_attributes import BuildAttributes
 from ._dependencies import MissingDependencyResolver
 from ._dirty_report import Dependency, DirtyReport  # noqa
+from ._file_digests import FileDigests
 from ._metadata_extraction import extract_metadata
 from ._outdated_report import OutdatedReport
 from ._part_environment import get_snapcraft_part_environment
@@ -461,18 +464,27 @@ class PluginHandler:
                 self.part_install_dir, clean_target=False, keep_snap=True
             )
 
-    def _fetch_stage_packages(self):
+    def _fetch_stage_packages(self) -> bool:
+        """Fetch stage packages, unpacking them as they are fetched.
+
+        :returns: True if stage packages were fetched and unpacked.
+        """
         stage_packages = self._grammar_processor.get_stage_packages()
-        if stage_packages:
-            try:
-                self.stage_packages = self._stage_packages_repo.fetch_stage_packages(
-                    package_names=stage_packages,
-                    base=self._project._get_build_base(),
-                    stage_packages_path=self.stage_packages_path,
-                    target_arch=self._project._get_stage_packages_target_arch(),
-                )
-            except repo.errors.PackageNotFoundError as e:
-                raise errors.StagePackageDownloadError(self.name, e.message)
+        if not stage_packages:
+            return False
+
+        try:
+            self.stage_packages = self._stage_packages_repo.fetch_stage_packages(
+                package_names=stage_packages,
+                base=self._project._get_build_base(),
+                stage_packages_path=self.stage_packages_path,
+                target_arch=self._project._get_stage_packages_target_arch(),
+                install_path=pathlib.Path(self.part_install_dir),
+            )
+        except repo.errors.PackageNotFoundError as e:
+            raise errors.StagePackageDownloadError(self.name, e.message)
+
+        return True
 
     def _unpack_stage_packages(self):
         # We do this regardless, if there is no package in stage_packages_path
@@ -485,11 +497,13 @@ class PluginHandler:
     def prepare_pull(self, force=False):
         self.makedirs()
 
+        unpacked_stage_packages = False
         if not common.is_offline():
-            self._fetch_stage_packages()
+            unpacked_stage_packages = self._fetch_stage_packages()
             self._fetch_stage_snaps()
 
-        self._unpack_stage_packages()
+        if not unpacked_stage_packages:
+            self._unpack_stage_packages()
         self._unpack_stage_snaps()
 
     def pull(self, force=False):
@@ -676,7 +690,10 @@ class PluginHandler:
 
         try:
             subprocess.run(
-                [build_script_path], check=True, cwd=self.part_build_work_dir
+                [build_script_path],
+                check=True,
+                cwd=self.part_build_work_dir,
+                **common.get_output_kwargs(),
             )
         except subprocess.CalledProcessError as process_error:
             raise errors.SnapcraftPluginBuildError(
@@ -1196,8 +1213,9 @@ def _migratable_filesets(fileset, srcdir):
 
     # Chop files, including whole trees if any dirs are mentioned.
     snap_files = include_files - exclude_files
-    for exclude_dir in exclude_dirs:
-        snap_files = set([x for x in snap_files if not x.startswith(exclude_dir + "/")])
+    if exclude_dirs:
+        exclude_dirs = set(exclude_dirs)
+        snap_files = {x for x in snap_files if not _is_in_dirs(x, exclude_dirs)}
 
     # Separate dirs from files.
     snap_dirs = set(
@@ -1212,28 +1230,64 @@ def _migratable_filesets(fileset, srcdir):
     # Remove snap_dirs from snap_files.
     snap_files = snap_files - snap_dirs
 
+    resolver = _PathResolver(srcdir)
+
     # Include (resolved) parent directories for each selected file.
+    resolved_snap_files = set()
+    parent_dirs: Set[str] = set()
     for snap_file in snap_files:
-        snap_file = file_utils.get_resolved_relative_path(snap_file, srcdir)
+        snap_file = resolver.get_resolved_relative_path(snap_file)
+        resolved_snap_files.add(snap_file)
         dirname = os.path.dirname(snap_file)
-        while dirname:
-            snap_dirs.add(dirname)
+        # All the parents of a directory seen before were already added.
+        while dirname and dirname not in parent_dirs:
+            parent_dirs.add(dirname)
             dirname = os.path.dirname(dirname)
+    snap_dirs |= parent_dirs
 
-    # Resolve parent paths for dirs and files.
+    # Resolve parent paths for dirs.
     resolved_snap_dirs = set()
     for snap_dir in snap_dirs:
-        snap_dir = file_utils.get_resolved_relative_path(snap_dir, srcdir)
+        snap_dir = resolver.get_resolved_relative_path(snap_dir)
         resolved_snap_dirs.add(snap_dir)
 
-    resolved_snap_files = set()
-    for snap_file in snap_files:
-        snap_file = file_utils.get_resolved_relative_path(snap_file, srcdir)
-        resolved_snap_files.add(snap_file)
-
     return resolved_snap_files, resolved_snap_dirs
 
 
+def _is_in_dirs(path: str, dirs: Set[str]) -> bool:
+    """Check if path is inside any of dirs, as startswith(dir + "/") does."""
+    index = path.find("/")
+    while index != -1:
+        if path[:index] in dirs:
+            return True
+        index = path.find("/", index + 1)
+
+    return False
+
+
+class _PathResolver:
+    """Resolve relative paths as file_utils.get_resolved_relative_path.
+
+    The parent directories are only resolved once, as many paths share them.
+    """
+
+    def __init__(self, base_directory: str) -> None:
+        self._base_directory = base_directory
+        self._resolved_parents: Dict[str, str] = {}
+
+    def get_resolved_relative_path(self, relative_path: str) -> str:
+        parent_relpath, filename = os.path.split(relative_path)
+        parent_abspath = self._resolved_parents.get(parent_relpath)
+        if parent_abspath is None:
+            parent_abspath = os.path.realpath(
+                os.path.join(self._base_directory, parent_relpath)
+            )
+            self._resolved_parents[parent_relpath] = parent_abspath
+
+        filename_abspath = os.path.join(parent_abspath, filename)
+        return os.path.relpath(filename_abspath, self._base_directory)
+
+
 def _migrate_files(
     snap_files,
     snap_dirs,
@@ -1249,27 +1303,46 @@ def _migrate_files(
 
         snapcraft_legacy.file_utils.create_similar_directory(src, dst)
 
-    for snap_file in sorted(snap_files):
-        src = os.path.join(srcdir, snap_file)
-        dst = os.path.join(dstdir, snap_file)
+    # Each file is migrated independently, with its parent directory already
+    # in place, so files are linked or copied concurrently.
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = [
+            executor.submit(
+                _migrate_file,
+                os.path.join(srcdir, snap_file),
+                os.path.join(dstdir, snap_file),
+                missing_ok=missing_ok,
+                follow_symlinks=follow_symlinks,
+                fixup_func=fixup_func,
+            )
+            for snap_file in sorted(snap_files)
+        ]
+        for future in futures:
+            future.result()
+
 
-        if missing_ok and not os.path.exists(src):
-            continue
+def _migrate_file(src, dst, *, missing_ok, follow_symlinks, fixup_func):
+    if missing_ok and not os.path.exists(src):
+        return
 
+    try:
+        dst_mode = os.lstat(dst).st_mode
+    except OSError:
+        pass
+    else:
         # If the file is already here and it's a symlink, leave it alone.
-        if os.path.islink(dst):
-            continue
+        if stat.S_ISLNK(dst_mode):
+            return
 
         # Otherwise, remove and re-link it.
-        if os.path.exists(dst):
-            os.remove(dst)
+        os.remove(dst)
 
-        if src.endswith(".pc"):
-            shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
-        else:
-            file_utils.link_or_copy(src, dst, follow_symlinks=follow_symlinks)
+    if src.endswith(".pc"):
+        shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+    else:
+        file_utils.link_or_copy(src, dst, follow_symlinks=follow_symlinks)
 
-        fixup_func(dst)
+    fixup_func(dst)
 
 
 def _organize_filesets(part_name, fileset, base_dir, overwrite):
@@ -1375,10 +1448,9 @@ def _generate_include_set(directory, includes):
     for include in includes:
         if "*" in include:
             pattern = os.path.join(directory, include)
-            matches = iglob(pattern, recursive=True)
-            include_files |= set(matches)
+            include_files.update(iglob(pattern, recursive=True))
         else:
-            include_files |= set([os.path.join(directory, include)])
+            include_files.add(os.path.join(directory, include))
 
     include_dirs = [
         x for x in include_files if os.path.isdir(x) and not os.path.islink(x)
@@ -1386,19 +1458,49 @@ def _generate_include_set(directory, includes):
     include_files = set([os.path.relpath(x, directory) for x in include_files])
 
     # Expand includeFiles, so that an exclude like '*/*.so' will still match
-    # files from an include like 'lib'
+    # files from an include like 'lib'. Nested included directories are only
+    # walked once, unless reached through '..', which may follow a symlink.
+    walk_dirs: Dict[str, str] = {}
+    walk_roots = []
     for include_dir in include_dirs:
+        if ".." in include_dir[len(directory) :].split(os.sep):
+            walk_roots.append(include_dir)
+        else:
+            walk_dirs.setdefault(os.path.relpath(include_dir, directory), include_dir)
+    walk_roots.extend(
+        x
+        for relative_dir, x in walk_dirs.items()
+        if not _is_walked(directory, relative_dir, walk_dirs)
+    )
+    for include_dir in walk_roots:
         for root, dirs, files in os.walk(include_dir):
-            include_files |= set(
-                [os.path.relpath(os.path.join(root, d), directory) for d in dirs]
+            include_files.update(
+                os.path.relpath(os.path.join(root, x), directory) for x in dirs
             )
-            include_files |= set(
-                [os.path.relpath(os.path.join(root, f), directory) for f in files]
+            include_files.update(
+                os.path.relpath(os.path.join(root, x), directory) for x in files
             )
 
     return include_files
 
 
+def _is_walked(directory: str, relative_dir: str, walk_dirs: Dict[str, str]) -> bool:
+    """Check if walking a parent directory in walk_dirs reaches relative_dir.
+
+    os.walk does not follow symlinks, so relative_dir is only reached if no
+    directory between the parent and relative_dir is a symlink.
+    """
+    parent = os.path.dirname(relative_dir)
+    while parent:
+        if os.path.islink(os.path.join(directory, parent)):
+            return False
+        if parent in walk_dirs:
+            return True
+        parent = os.path.dirname(parent)
+
+    return False
+
+
 def _generate_exclude_set(directory, excludes):
     exclude_files = set()
 
@@ -1421,8 +1523,20 @@ def _validate_relative_paths(files):
             raise errors.PluginError('path "{}" must be relative'.format(d))
 
 
-def _file_collides(file_this, file_other):
+def _file_collides(
+    part: "PluginHandler", other_part: "PluginHandler", f: str, digests: FileDigests
+) -> bool:
+    file_this = os.path.join(part.part_install_dir, f)
+    file_other = os.path.join(other_part.part_install_dir, f)
+
     if not file_this.endswith(".pc"):
+        if os.path.getsize(file_this) != os.path.getsize(file_other):
+            return True
+
+        if digests.get_digest(part, f) == digests.get_digest(other_part, f):
+            return False
+
+        # Digests may be outdated, only trust them for identical files.
         return not filecmp.cmp(file_this, file_other, shallow=False)
 
     pc_file_1 = open(file_this)
@@ -1443,40 +1557,48 @@ def _file_collides(file_this, file_other):
     return False
 
 
-def check_for_collisions(parts):
+def check_for_collisions(parts: Sequence["PluginHandler"]) -> None:
     """Raises a SnapcraftPartConflictError if conflicts are found."""
-    parts_files = {}
-    for part in parts:
-        # Gather our own files up
-        part_files, part_directories = part.migratable_fileset_for(steps.STAGE)
-        part_contents = part_files | part_directories
-
-        # Scan previous parts for collisions
-        for other_part_name in parts_files:
-            common = part_contents & parts_files[other_part_name]["files"]
-            conflict_files = []
-            for f in common:
-                this = os.path.join(part.part_install_dir, f)
-                other = os.path.join(parts_files[other_part_name]["installdir"], f)
-
-                if _paths_collide(this, other):
-                    conflict_files.append(f)
-
-            if conflict_files:
-                raise errors.SnapcraftPartConflictError(
-                    other_part_name=other_part_name,
-                    part_name=part.name,
-                    conflict_files=conflict_files,
-                )
+    digests = FileDigests()
+    # The parts providing each path, in order.
+    paths_parts: Dict[str, List["PluginHandler"]] = collections.defaultdict(list)
+    try:
+        for part in parts:
+            # Gather our own files up
+            part_files, part_directories = part.migratable_fileset_for(steps.STAGE)
+            part_contents = part_files | part_directories
+
+            # Look up previous parts providing the same paths for collisions
+            conflicts: Dict[str, List[str]] = collections.defaultdict(list)
+            for f in part_contents:
+                for other_part in paths_parts[f]:
+                    if _paths_collide(part, other_part, f, digests):
+                        conflicts[other_part.name].append(f)
+
+                # And add our files to the index
+                paths_parts[f].append(part)
+
+            # Report the conflicts with the first previous part that has any
+            for other_part in parts:
+                if other_part is part:
+                    break
+
+                if other_part.name in conflicts:
+                    raise errors.SnapcraftPartConflictError(
+                        other_part_name=other_part.name,
+                        part_name=part.name,
+                        conflict_files=conflicts[other_part.name],
+                    )
+    finally:
+        digests.save()
 
-        # And add our files to the list
-        parts_files[part.name] = {
-            "files": part_contents,
-            "installdir": part.part_install_dir,
-        }
 
+def _paths_collide(
+    part: "PluginHandler", other_part: "PluginHandler", f: str, digests: FileDigests
+) -> bool:
+    path1 = os.path.join(part.part_install_dir, f)
+    path2 = os.path.join(other_part.part_install_dir, f)
 
-def _paths_collide(path1: str, path2: str) -> bool:
     if not (os.path.lexists(path1) and os.path.lexists(path2)):
         return False
 
@@ -1499,7 +1621,9 @@ def _paths_collide(path1: str, path2: str) -> bool:
 
     # Paths collide if neither path is a directory, and the files have
     # different contents
-    elif not (path1_is_dir and path2_is_dir) and _file_collides(path1, path2):
+    elif not (path1_is_dir and path2_is_dir) and _file_collides(
+        part, other_part, f, digests
+    ):
         return True
 
     # Otherwise, paths do not conflict
@@ -0,0 +1,94 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_DIGESTS_FILE_NAME = "file-digests.json"
+
+
+class FileDigests:
+    """Content digests of the files installed by parts.
+
+    The digests computed for a part are saved in its part directory and
+    reused in later runs for files whose size, modification time and inode
+    did not change. The change time is not used, as linking the files into
+    the stage and prime directories changes it.
+    """
+
+    def __init__(self) -> None:
+        self._saved: Dict[str, Dict[str, List[Any]]] = {}
+        self._used: Dict[str, Dict[str, List[Any]]] = {}
+
+    def get_digest(self, part, relative_path: str) -> str:
+        """Obtain the digest of a file installed by part.
+
+        :param part: The part that installed the file.
+        :param relative_path: The path of the file in the part install dir.
+
+        :returns: The SHA256 digest of the file contents.
+        """
+        used = self._used.setdefault(part.part_dir, {})
+        saved = self._get_saved(part.part_dir)
+        stat = os.stat(os.path.join(part.part_install_dir, relative_path))
+        key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+        entry = used.get(relative_path) or saved.get(relative_path)
+        if entry is None or entry[:-1] != key:
+            digest = hashlib.sha256()
+            with open(os.path.join(part.part_install_dir, relative_path), "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            entry = key + [digest.hexdigest()]
+
+        used[relative_path] = entry
+        return entry[-1]
+
+    def save(self) -> None:
+        """Save the digests used, for each part, to its part directory."""
+        for part_dir, used in self._used.items():
+            if used == self._saved.get(part_dir):
+                continue
+
+            digests_path = os.path.join(part_dir, _DIGESTS_FILE_NAME)
+            try:
+                with open(digests_path, "w") as digests_file:
+                    json.dump(used, digests_file)
+            except OSError as error:
+                logger.debug(f"Cannot save file digests to {digests_path!r}: {error}")
+
+    def _get_saved(self, part_dir: str) -> Dict[str, List[Any]]:
+        saved = self._saved.get(part_dir)
+        if saved is not None:
+            return saved
+
+        digests_path = os.path.join(part_dir, _DIGESTS_FILE_NAME)
+        try:
+            with open(digests_path) as digests_file:
+                saved = json.load(digests_file)
+        except (OSError, ValueError):
+            saved = None
+
+        if not isinstance(saved, dict):
+            saved = {}
+
+        self._saved[part_dir] = saved
+        return saved
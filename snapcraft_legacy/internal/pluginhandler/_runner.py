@@ -163,7 +163,10 @@ class Runner:
                 script_file.seek(0)
 
                 process = subprocess.Popen(
-                    [self._shell], stdin=script_file, cwd=workdir
+                    [self._shell],
+                    stdin=script_file,
+                    cwd=workdir,
+                    **common.get_output_kwargs(),
                 )
 
             status = None
@@ -14,9 +14,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import heapq
 import logging
 from os import path
-from typing import Set
+from typing import Dict, List, Sequence, Set
 
 import snapcraft_legacy
 from snapcraft_legacy.internal import elf, pluginhandler, repo
@@ -75,35 +76,64 @@ class PartsConfig:
                 part.deps.append(dep)
 
     def _sort_parts(self):
-        """Performs an inneficient but easy to follow sorting of parts."""
-        sorted_parts = []
-
+        """Sort parts so that parts come after the parts they depend on."""
         # We want to process parts in a consistent order between runs. The
-        # simplest way to do this is to sort them by name.
-        self.all_parts = sorted(
-            self.all_parts, key=lambda part: part.name, reverse=True
-        )
-
-        while self.all_parts:
-            top_part = None
-            for part in self.all_parts:
-                mentioned = False
-                for other in self.all_parts:
-                    if part in other.deps:
-                        mentioned = True
-                        break
-                if not mentioned:
-                    top_part = part
-                    break
-            if not top_part:
-                raise errors.SnapcraftLogicError(
-                    "circular dependency chain found in parts definition"
-                )
-            sorted_parts = [top_part] + sorted_parts
-            self.all_parts.remove(top_part)
+        # simplest way to do this is to sort them by name. Parts are picked
+        # from the end, in reverse name order, among those that no part left
+        # to pick depends on.
+        parts = sorted(self.all_parts, key=lambda part: part.name, reverse=True)
+        positions = {part.name: position for position, part in enumerate(parts)}
+
+        dependents_count = {part.name: 0 for part in parts}
+        for part in parts:
+            for dep in set(part.deps):
+                dependents_count[dep.name] += 1
+
+        candidates = [
+            positions[part.name] for part in parts if not dependents_count[part.name]
+        ]
+        heapq.heapify(candidates)
 
+        sorted_parts = []
+        while candidates:
+            top_part = parts[heapq.heappop(candidates)]
+            sorted_parts.append(top_part)
+            for dep in set(top_part.deps):
+                dependents_count[dep.name] -= 1
+                if not dependents_count[dep.name]:
+                    heapq.heappush(candidates, positions[dep.name])
+
+        if len(sorted_parts) != len(parts):
+            raise errors.SnapcraftLogicError(
+                "circular dependency chain found in parts definition"
+            )
+
+        sorted_parts.reverse()
         return sorted_parts
 
+    def get_waves(
+        self, parts: Sequence[pluginhandler.PluginHandler]
+    ) -> List[List[pluginhandler.PluginHandler]]:
+        """Group parts in waves of parts that do not depend on each other.
+
+        Parts in a wave only depend on parts in earlier waves, and keep their
+        order within the wave.
+        """
+        depths: Dict[str, int] = {}
+        for part in self.all_parts:
+            depths[part.name] = max(
+                (depths[dep.name] + 1 for dep in part.deps), default=0
+            )
+
+        waves: List[List[pluginhandler.PluginHandler]] = []
+        for part in parts:
+            depth = depths[part.name]
+            while len(waves) <= depth:
+                waves.append([])
+            waves[depth].append(part)
+
+        return [wave for wave in waves if wave]
+
     def get_dependencies(
         self, part_name: str, *, recursive: bool = False
     ) -> Set[pluginhandler.PluginHandler]:
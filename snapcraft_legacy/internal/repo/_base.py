@@ -173,8 +173,13 @@ class BaseRepo:
         base: str,
         stage_packages_path: pathlib.Path,
         target_arch: str,
+        install_path: Optional[pathlib.Path] = None,
     ) -> List[str]:
-        """Fetch stage packages to stage_packages_path."""
+        """Fetch stage packages to stage_packages_path.
+
+        If install_path is set, packages are also unpacked to install_path as
+        they are fetched, as done by unpack_stage_packages.
+        """
         raise errors.NoNativeBackendError()
 
     @classmethod
@@ -184,6 +189,16 @@ class BaseRepo:
         """Unpack stage packages to install_path."""
         raise errors.NoNativeBackendError()
 
+    @classmethod
+    def prune_stage_packages_cache(cls, *, max_size: Optional[int] = None) -> int:
+        """Remove the least recently used unpacked stage packages from the cache.
+
+        :param max_size: The size in bytes to prune the cache to, instead of
+            the configured cache size.
+        :returns: The number of bytes removed.
+        """
+        raise errors.NoNativeBackendError()
+
     @classmethod
     def install_gpg_key(cls, *, key_id: str, key: str) -> bool:
         """Install trusted GPG key."""
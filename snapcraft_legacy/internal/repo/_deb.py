@@ -14,24 +14,28 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import concurrent.futures
 import fileinput
 import functools
 import logging
 import os
 import pathlib
 import re
+import shutil
 import subprocess
 import sys
 import tempfile
-from typing import Dict, List, Optional, Sequence, Set, Tuple  # noqa: F401
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple  # noqa: F401
 
 from xdg import BaseDirectory
 
 from snapcraft_legacy import file_utils
 from snapcraft_legacy.internal.indicators import is_dumb_terminal
+from snapcraft_legacy.project._project_options import ProjectOptions
 
-from . import errors
+from . import _deb_unpacker, _dpkg_index, errors
 from ._base import BaseRepo, get_pkg_name_parts
+from ._stage_packages_cache import StagePackagesCache
 from .deb_package import DebPackage
 
 if sys.platform == "linux":
@@ -40,12 +44,22 @@ if sys.platform == "linux":
 
 logger = logging.getLogger(__name__)
 
-_DEB_CACHE_DIR: pathlib.Path = pathlib.Path(
-    BaseDirectory.save_cache_path("snapcraft", "download")
-)
-_STAGE_CACHE_DIR: pathlib.Path = pathlib.Path(
-    BaseDirectory.save_cache_path("snapcraft", "stage-packages")
+
+def _save_cache_path(*resource: str) -> pathlib.Path:
+    # Unlike BaseDirectory.save_cache_path, do not fail if the directory is
+    # created meanwhile, snapcraftctl may be imported by parts run in parallel.
+    path = pathlib.Path(BaseDirectory.xdg_cache_home, *resource)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+_DEB_CACHE_DIR: pathlib.Path = _save_cache_path("snapcraft", "download")
+_STAGE_CACHE_DIR: pathlib.Path = _save_cache_path("snapcraft", "stage-packages")
+_UNPACKED_CACHE_DIR: pathlib.Path = _save_cache_path(
+    "snapcraft", "unpacked-stage-packages"
 )
+# Default size in MiB of the unpacked stage packages cache.
+_UNPACKED_CACHE_DEFAULT_SIZE = 2048
 
 _HASHSUM_MISMATCH_PATTERN = re.compile(r"(E:Failed to fetch.+Hash Sum mismatch)+")
 _DEFAULT_FILTERED_STAGE_PACKAGES: List[str] = [
@@ -207,8 +221,21 @@ IGNORE_FILTERS: Dict[str, Set[str]] = {
 }
 
 
-@functools.lru_cache(maxsize=256)
 def _run_dpkg_query_search(file_path: pathlib.Path) -> str:
+    index = _dpkg_index.get_index()
+    if index is None:
+        return _run_dpkg_query_search_command(file_path)
+
+    package_name = index.get_package_for_file(file_path.as_posix())
+    if package_name is None:
+        logger.debug(f"Error finding package for {file_path}: not in dpkg database")
+        raise errors.FileProviderNotFound(file_path=file_path)
+
+    return package_name
+
+
+@functools.lru_cache(maxsize=256)
+def _run_dpkg_query_search_command(file_path: pathlib.Path) -> str:
     try:
         output = (
             subprocess.check_output(
@@ -230,8 +257,17 @@ def _run_dpkg_query_search(file_path: pathlib.Path) -> str:
     return provides_output.split(":")[0]
 
 
-@functools.lru_cache(maxsize=256)
 def _run_dpkg_query_list_files(package_name: str) -> Set[str]:
+    index = _dpkg_index.get_index()
+    files = None if index is None else index.get_package_files(package_name)
+    if files is None:
+        return _run_dpkg_query_list_files_command(package_name)
+
+    return {i for i in files if ("lib" in i and os.path.isfile(i))}
+
+
+@functools.lru_cache(maxsize=256)
+def _run_dpkg_query_list_files_command(package_name: str) -> Set[str]:
     output = (
         subprocess.check_output(["dpkg", "-L", package_name])
         .decode(sys.getfilesystemencoding())
@@ -258,6 +294,136 @@ def _get_filtered_stage_package_names(
     )
 
 
+def _get_environment_int(name: str, default: int) -> int:
+    value = os.environ.get(name, str(default))
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Invalid {name} {value!r}, using {default}.")
+        return default
+
+
+def _get_unpacked_cache() -> StagePackagesCache:
+    """Obtain the unpacked stage packages cache.
+
+    The cache size in MiB is set with SNAPCRAFT_STAGE_PACKAGES_CACHE_SIZE,
+    a size of 0 disables the cache.
+    """
+    max_size = _get_environment_int(
+        "SNAPCRAFT_STAGE_PACKAGES_CACHE_SIZE", _UNPACKED_CACHE_DEFAULT_SIZE
+    )
+    return StagePackagesCache(_UNPACKED_CACHE_DIR, max_size=max_size * 1024 * 1024)
+
+
+def _get_download_connections() -> Optional[int]:
+    """Obtain the maximum number of hosts to download stage packages from.
+
+    Set with SNAPCRAFT_STAGE_PACKAGES_DOWNLOAD_CONNECTIONS, apt's default
+    is used if unset.
+    """
+    if "SNAPCRAFT_STAGE_PACKAGES_DOWNLOAD_CONNECTIONS" not in os.environ:
+        return None
+
+    return max(
+        1, _get_environment_int("SNAPCRAFT_STAGE_PACKAGES_DOWNLOAD_CONNECTIONS", 1)
+    )
+
+
+class _StagePackagesUnpacker:
+    """Unpack stage packages concurrently, as they are submitted.
+
+    Each package is unpacked into a staging directory of its own, and the
+    staging directories are merged into install_path in the order of the
+    package paths once all of them are unpacked, so packages shipping the
+    same path are installed as if they were unpacked one after the other.
+
+    :param install_path: The directory to unpack packages into.
+    :param install: Function to unpack a package into a directory, using
+        the given cache, returning the cache entry used.
+    :param normalize: Function to normalize install_path once all packages
+        are unpacked.
+    """
+
+    def __init__(
+        self,
+        install_path: pathlib.Path,
+        *,
+        install: Callable[
+            [pathlib.Path, pathlib.Path, StagePackagesCache], Optional[pathlib.Path]
+        ],
+        normalize: Callable[[str], None],
+    ) -> None:
+        self._install_path = install_path
+        self._install = install
+        self._normalize = normalize
+        self._cache = _get_unpacked_cache()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=ProjectOptions().parallel_build_count
+        )
+        self._futures: Dict[pathlib.Path, concurrent.futures.Future] = {}
+        # Staging directories are created next to install_path, so they can
+        # be moved into it.
+        install_path.mkdir(parents=True, exist_ok=True)
+        self._staging_path = pathlib.Path(
+            tempfile.mkdtemp(prefix=".stage-packages-", dir=install_path.parent)
+        )
+
+    def __enter__(self) -> "_StagePackagesUnpacker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._executor.shutdown(wait=True)
+        shutil.rmtree(self._staging_path, ignore_errors=True)
+
+    def submit(self, pkg_path: pathlib.Path) -> None:
+        """Start unpacking a package, unless already submitted."""
+        if pkg_path in self._futures:
+            return
+
+        package_staging_path = self._staging_path / str(len(self._futures))
+        package_staging_path.mkdir()
+        self._futures[pkg_path] = self._executor.submit(
+            self._install, pkg_path, package_staging_path, self._cache
+        )
+
+    def finish(self) -> None:
+        """Wait for all packages to be unpacked and normalize install_path."""
+        if not self._futures:
+            return
+
+        used_entries = [future.result() for future in self._futures.values()]
+
+        for index, pkg_path in sorted(
+            enumerate(self._futures), key=lambda item: item[1]
+        ):
+            try:
+                _merge_tree(self._staging_path / str(index), self._install_path)
+            except OSError as error:
+                logger.debug(f"Cannot install {str(pkg_path)!r}: {error}")
+                raise errors.UnpackError(pkg_path) from error
+
+        self._normalize(str(self._install_path))
+
+        self._cache.prune(keep=[entry for entry in used_entries if entry])
+
+
+def _merge_tree(source: pathlib.Path, destination: pathlib.Path) -> None:
+    """Move the contents of source into destination, replacing existing files.
+
+    Directories already in destination are merged into, as when unpacking a
+    package over the contents of another one.
+    """
+    destination.mkdir(exist_ok=True)
+    for path in source.iterdir():
+        target = destination / path.name
+        if path.is_dir() and not path.is_symlink() and os.path.lexists(target):
+            if not target.is_symlink():
+                shutil.copymode(path, target)
+            _merge_tree(path, target)
+        else:
+            os.replace(path, target)
+
+
 def get_packages_in_base(*, base: str) -> List[DebPackage]:
     # We do not want to break what we already have.
     if base == "core18":
@@ -477,11 +643,10 @@ class Ubuntu(BaseRepo):
         stage_packages_path: pathlib.Path,
         target_arch: str,
         packages_filters: Set[str] = set(),
+        install_path: Optional[pathlib.Path] = None,
     ) -> List[str]:
         logger.debug(f"Requested stage-packages: {sorted(package_names)!r}")
 
-        installed: Set[str] = set()
-
         package_list = [DebPackage.from_unparsed(name) for name in package_names]
         filtered_names = _get_filtered_stage_package_names(
             base=base, package_list=package_list
@@ -490,40 +655,129 @@ class Ubuntu(BaseRepo):
         filtered_names.update(packages_filters)
 
         stage_packages_path.mkdir(exist_ok=True)
+
+        if install_path is None:
+            return cls._fetch_stage_packages(
+                package_names=package_names,
+                filtered_names=filtered_names,
+                stage_packages_path=stage_packages_path,
+                target_arch=target_arch,
+                fetched_callback=None,
+            )
+
+        # Unpack each package as soon as it is fetched, while the remaining
+        # ones are still downloading.
+        with _StagePackagesUnpacker(
+            install_path, install=cls._install_stage_package, normalize=cls.normalize
+        ) as unpacker:
+            installed = cls._fetch_stage_packages(
+                package_names=package_names,
+                filtered_names=filtered_names,
+                stage_packages_path=stage_packages_path,
+                target_arch=target_arch,
+                fetched_callback=unpacker.submit,
+            )
+            # Packages left from a previous fetch are unpacked too.
+            for pkg_path in sorted(stage_packages_path.glob("*.deb")):
+                unpacker.submit(pkg_path)
+            unpacker.finish()
+
+        return installed
+
+    @classmethod
+    def _fetch_stage_packages(
+        cls,
+        *,
+        package_names: List[str],
+        filtered_names: Set[str],
+        stage_packages_path: pathlib.Path,
+        target_arch: str,
+        fetched_callback: Optional[Callable[[pathlib.Path], None]],
+    ) -> List[str]:
+        def link_archive(archive: Tuple[str, str, pathlib.Path]) -> None:
+            pkg_name, _, dl_path = archive
+            logger.debug(f"Extracting stage package: {pkg_name}")
+            pkg_path = stage_packages_path / dl_path.name
+            file_utils.link_or_copy(str(dl_path), str(pkg_path))
+            if fetched_callback is not None:
+                fetched_callback(pkg_path)
+
         with AptCache(
             stage_cache=_STAGE_CACHE_DIR, stage_cache_arch=target_arch
         ) as apt_cache:
             apt_cache.mark_packages(set(package_names))
             apt_cache.unmark_packages(filtered_names)
-            for pkg_name, pkg_version, dl_path in apt_cache.fetch_archives(
-                _DEB_CACHE_DIR
-            ):
-                logger.debug(f"Extracting stage package: {pkg_name}")
-                installed.add(f"{pkg_name}={pkg_version}")
-                file_utils.link_or_copy(
-                    str(dl_path), str(stage_packages_path / dl_path.name)
-                )
+            archives = apt_cache.fetch_archives(
+                _DEB_CACHE_DIR,
+                max_connections=_get_download_connections(),
+                fetched_callback=link_archive,
+            )
 
-        return sorted(installed)
+        return sorted(
+            {f"{pkg_name}={pkg_version}" for pkg_name, pkg_version, _ in archives}
+        )
 
     @classmethod
     def unpack_stage_packages(
         cls, *, stage_packages_path: pathlib.Path, install_path: pathlib.Path
     ) -> None:
-        pkg_path = None
-
-        for pkg_path in stage_packages_path.glob("*.deb"):
-            with tempfile.TemporaryDirectory(suffix="deb-extract") as extract_dir:
-                # Extract deb package.
-                cls._extract_deb(pkg_path, extract_dir)
-                # Mark source of files.
-                marked_name = cls._extract_deb_name_version(pkg_path)
-                cls._mark_origin_stage_package(extract_dir, marked_name)
-                # Stage files to install_dir.
-                file_utils.link_or_copy_tree(extract_dir, install_path.as_posix())
-
-        if pkg_path:
-            cls.normalize(str(install_path))
+        with _StagePackagesUnpacker(
+            install_path, install=cls._install_stage_package, normalize=cls.normalize
+        ) as unpacker:
+            for pkg_path in sorted(stage_packages_path.glob("*.deb")):
+                unpacker.submit(pkg_path)
+            unpacker.finish()
+
+    @classmethod
+    def prune_stage_packages_cache(cls, *, max_size: Optional[int] = None) -> int:
+        return _get_unpacked_cache().prune(max_size=max_size)
+
+    @classmethod
+    def _install_stage_package(
+        cls,
+        pkg_path: pathlib.Path,
+        install_path: pathlib.Path,
+        cache: StagePackagesCache,
+    ) -> Optional[pathlib.Path]:
+        if cache.max_size == 0:
+            cls._unpack_stage_package(pkg_path, install_path)
+            return None
+
+        # Link the unpacked package from the cache, unpacking it there first
+        # if needed.
+        return cache.install(
+            pkg_path,
+            install_path,
+            unpack=cls._unpack_stage_package,
+            normalize=cls._normalize_cached_package,
+        )
+
+    @classmethod
+    def _normalize_cached_package(cls, unpackdir: pathlib.Path) -> None:
+        # Only normalize what does not depend on the install directory or
+        # on the other packages unpacked into it.
+        cls._remove_useless_files(str(unpackdir))
+        cls._fix_shebangs(str(unpackdir))
+
+    @classmethod
+    def _unpack_stage_package(
+        cls, pkg_path: pathlib.Path, install_path: pathlib.Path
+    ) -> None:
+        try:
+            # Stream files straight into install_path, marking their source.
+            _deb_unpacker.unpack_deb(pkg_path, install_path)
+            return
+        except _deb_unpacker.UnsupportedDebError as error:
+            logger.debug(f"Using dpkg-deb to unpack {str(pkg_path)!r}: {error}")
+
+        with tempfile.TemporaryDirectory(suffix="deb-extract") as extract_dir:
+            # Extract deb package.
+            cls._extract_deb(pkg_path, extract_dir)
+            # Mark source of files.
+            marked_name = cls._extract_deb_name_version(pkg_path)
+            cls._mark_origin_stage_package(extract_dir, marked_name)
+            # Stage files to install_dir.
+            file_utils.link_or_copy_tree(extract_dir, install_path.as_posix())
 
     @classmethod
     def build_package_is_valid(cls, package_name) -> bool:
@@ -0,0 +1,233 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unpack deb packages without dpkg-deb or intermediate directories."""
+
+import logging
+import os
+import pathlib
+import shutil
+import tarfile
+import threading
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from snapcraft_legacy.internal import xattrs
+
+from . import errors
+
+logger = logging.getLogger(__name__)
+
+_AR_MAGIC = b"!<arch>\n"
+_AR_HEADER_SIZE = 60
+
+# Compressions readable by the tarfile module, by member name suffix.
+_TAR_SUFFIXES = ("", ".gz", ".xz", ".bz2")
+
+
+class UnsupportedDebError(Exception):
+    """The deb package uses a format that cannot be unpacked natively."""
+
+
+class _MemberReader:
+    """A file-like reader limited to a single member of an ar archive."""
+
+    def __init__(self, archive: BinaryIO, size: int) -> None:
+        self._archive = archive
+        self._remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._archive.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def skip(self) -> None:
+        while self.read(1024 * 1024):
+            pass
+
+
+def _iter_ar_members(archive: BinaryIO) -> Iterator[Tuple[str, _MemberReader]]:
+    """Iterate over the members of an ar archive, in archive order.
+
+    Each member must be consumed before the next one is requested.
+    """
+    if archive.read(len(_AR_MAGIC)) != _AR_MAGIC:
+        raise ValueError("not an ar archive")
+
+    while True:
+        header = archive.read(_AR_HEADER_SIZE)
+        if not header:
+            return
+
+        if len(header) != _AR_HEADER_SIZE or header[58:60] != b"`\n":
+            raise ValueError("truncated ar member header")
+
+        name = header[0:16].decode().strip().rstrip("/")
+        size = int(header[48:58].decode().strip())
+
+        reader = _MemberReader(archive, size)
+        yield name, reader
+        reader.skip()
+
+        # Members are aligned to an even offset.
+        if size % 2:
+            archive.read(1)
+
+
+def _open_tar(name: str, reader: _MemberReader) -> tarfile.TarFile:
+    """Open a tar member of a deb package as a stream."""
+    for suffix in _TAR_SUFFIXES:
+        if name.endswith(f".tar{suffix}"):
+            return tarfile.open(fileobj=reader, mode="r|*")  # type: ignore
+
+    raise UnsupportedDebError(f"unsupported member {name!r}")
+
+
+def _read_control(tar: tarfile.TarFile) -> Dict[str, str]:
+    """Read the fields of the control file in a control tarball."""
+    for member in tar:
+        if os.path.normpath(member.name) != "control":
+            continue
+
+        control_file = tar.extractfile(member)
+        if control_file is None:
+            break
+
+        fields: Dict[str, str] = {}
+        for line in control_file.read().decode().splitlines():
+            if line and not line[0].isspace() and ":" in line:
+                key, value = line.split(":", 1)
+                fields[key] = value.strip()
+        return fields
+
+    raise ValueError("control file not found")
+
+
+def get_temporary_path(path: pathlib.Path) -> pathlib.Path:
+    """Obtain a path to create path atomically from, unique per thread."""
+    return path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}")
+
+
+def _extract_member(
+    tar: tarfile.TarFile,
+    member: tarfile.TarInfo,
+    *,
+    install_path: pathlib.Path,
+    stage_package: str,
+) -> None:
+    """Write a data tarball member into install_path.
+
+    Files are created under a temporary name and moved into place, so a
+    path already in install_path is never seen partially written.
+    """
+    name = os.path.normpath(member.name)
+    if name == ".":
+        return
+
+    if os.path.isabs(name) or name == ".." or name.startswith("../"):
+        raise ValueError(f"member {member.name!r} is outside of the package")
+
+    destination = install_path / name
+
+    if member.isdir():
+        destination.mkdir(parents=True, exist_ok=True)
+        if not destination.is_symlink():
+            os.chmod(destination, member.mode)
+        return
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = get_temporary_path(destination)
+
+    try:
+        if member.isreg():
+            source = tar.extractfile(member)
+            with open(
+                os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600),
+                "wb",
+            ) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)  # type: ignore
+            os.chmod(temporary_path, member.mode)
+            os.utime(temporary_path, (member.mtime, member.mtime))
+            # Mark source of files.
+            xattrs.write_origin_stage_package(str(temporary_path), stage_package)
+        elif member.issym():
+            os.symlink(member.linkname, temporary_path)
+            os.utime(
+                temporary_path, (member.mtime, member.mtime), follow_symlinks=False
+            )
+        elif member.islnk():
+            os.link(
+                install_path / os.path.normpath(member.linkname),
+                temporary_path,
+                follow_symlinks=False,
+            )
+        else:
+            logger.debug(
+                f"Skipping {member.name!r} in {stage_package!r}: unsupported type"
+            )
+            return
+
+        os.replace(temporary_path, destination)
+    finally:
+        if os.path.lexists(temporary_path):
+            os.unlink(temporary_path)
+
+
+def unpack_deb(deb_path: pathlib.Path, install_path: pathlib.Path) -> str:
+    """Unpack a deb package into install_path, marking the origin of files.
+
+    The package is read as a stream and written directly into install_path,
+    without extracting it to an intermediate directory.
+
+    :param deb_path: The deb package to unpack.
+    :param install_path: The directory to unpack the package contents into.
+
+    :returns: The package name and version, as `<package-name>=<version>`.
+
+    :raises UnsupportedDebError: If the package uses a compression that
+        cannot be read natively.
+    :raises errors.UnpackError: If the package cannot be unpacked.
+    """
+    stage_package: Optional[str] = None
+
+    try:
+        with deb_path.open("rb") as archive:
+            for name, reader in _iter_ar_members(archive):
+                if name.startswith("control.tar"):
+                    with _open_tar(name, reader) as tar:
+                        control = _read_control(tar)
+                    stage_package = f"{control['Package']}={control['Version']}"
+                elif name.startswith("data.tar"):
+                    if stage_package is None:
+                        raise ValueError("data member found before control member")
+
+                    with _open_tar(name, reader) as tar:
+                        for member in tar:
+                            _extract_member(
+                                tar,
+                                member,
+                                install_path=install_path,
+                                stage_package=stage_package,
+                            )
+                    return stage_package
+    except (OSError, ValueError, KeyError, tarfile.TarError) as error:
+        logger.debug(f"Cannot unpack {str(deb_path)!r}: {error}")
+        raise errors.UnpackError(deb_path) from error
+
+    logger.debug(f"Cannot unpack {str(deb_path)!r}: data member not found")
+    raise errors.UnpackError(deb_path)
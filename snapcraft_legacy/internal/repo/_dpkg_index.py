@@ -0,0 +1,88 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Index of the files installed by dpkg, read from its database."""
+
+import logging
+import os
+import pathlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DPKG_INFO_PATH = pathlib.Path("/var/lib/dpkg/info")
+
+_index_lock = threading.Lock()
+_index: Optional[Tuple[int, "DpkgIndex"]] = None
+
+
+class DpkgIndex:
+    """The files installed by each package and the package owning each file.
+
+    The index is built from the `<package>.list` files in the dpkg database,
+    which is what `dpkg-query -S` and `dpkg -L` read, without running a
+    process for each query.
+
+    :param info_path: The dpkg database info directory.
+    """
+
+    def __init__(self, info_path: pathlib.Path) -> None:
+        self._packages: Dict[str, List[str]] = {}
+        self._owners: Dict[str, str] = {}
+
+        for list_path in sorted(info_path.glob("*.list")):
+            # Multi-arch packages are listed as <name>:<arch>.
+            package_name = list_path.stem.split(":")[0]
+            files = [
+                os.fsdecode(line)
+                for line in list_path.read_bytes().splitlines()
+                if line and line != b"/."
+            ]
+            self._packages.setdefault(package_name, []).extend(files)
+            for file_path in files:
+                self._owners.setdefault(file_path, package_name)
+
+    def get_package_for_file(self, file_path: str) -> Optional[str]:
+        """Obtain the name of the package that installed file_path, if any."""
+        return self._owners.get(file_path)
+
+    def get_package_files(self, package_name: str) -> Optional[List[str]]:
+        """Obtain the files installed by a package, if installed."""
+        return self._packages.get(package_name)
+
+
+def get_index() -> Optional[DpkgIndex]:
+    """Obtain the index of the dpkg database.
+
+    The index is built once and only rebuilt when packages are installed or
+    removed, which changes the info directory.
+
+    :returns: The index, or None if the dpkg database cannot be read.
+    """
+    global _index
+
+    with _index_lock:
+        try:
+            mtime = _DPKG_INFO_PATH.stat().st_mtime_ns
+            if _index is None or _index[0] != mtime:
+                _index = (mtime, DpkgIndex(_DPKG_INFO_PATH))
+        except OSError as error:
+            logger.debug(f"Cannot read dpkg database {str(_DPKG_INFO_PATH)!r}: {error}")
+            _index = None
+            return None
+
+        return _index[1]
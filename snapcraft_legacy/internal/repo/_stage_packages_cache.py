@@ -0,0 +1,347 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Cache of unpacked stage packages, shared by all parts."""
+
+import errno
+import functools
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ._deb_unpacker import get_temporary_path
+
+logger = logging.getLogger(__name__)
+
+# Files rewritten in place when the install directory is normalized, which
+# must not be hardlinked from the cache.
+_REWRITTEN_FILES = re.compile(r"(\.pc|^usr/bin/(xml2|xslt)-config)$")
+
+# Leftovers of interrupted unpacks are removed after this long.
+_STALE_TEMPORARY_SECONDS = 24 * 60 * 60
+
+UnpackFunction = Callable[[pathlib.Path, pathlib.Path], None]
+
+
+class StagePackagesCache:
+    """A cache of unpacked stage package trees.
+
+    Each package is unpacked and normalized once, into an entry keyed by
+    the package name, version and architecture, and then hardlinked into
+    the install directory of every part that stages it. Entries record the
+    digest of the package they were unpacked from and the size, modification
+    time and digest of their files, so entries for a different package
+    build or modified through a hardlink are unpacked again.
+
+    Hardlinked files share their contents with the cache entry and with the
+    install directories of other parts: a file written in place, rather
+    than replaced, in one install directory is modified in all of them.
+    Such an entry is detected and unpacked again when it is next used, but
+    install directories linked before are not repaired. Files known to be
+    rewritten when normalizing install directories are copied instead, and
+    the cache can be disabled by setting its size to 0.
+
+    :param path: The cache directory.
+    :param max_size: The size in bytes the cache is pruned to.
+    """
+
+    def __init__(self, path: pathlib.Path, *, max_size: int) -> None:
+        self._path = path
+        self.max_size = max_size
+
+    def install(
+        self,
+        deb_path: pathlib.Path,
+        install_path: pathlib.Path,
+        *,
+        unpack: UnpackFunction,
+        normalize: Callable[[pathlib.Path], None],
+    ) -> Optional[pathlib.Path]:
+        """Install the contents of a package from the cache.
+
+        :param deb_path: The package to install.
+        :param install_path: The directory to install the package contents to.
+        :param unpack: Function to unpack the package into a directory.
+        :param normalize: Function to normalize the package contents in the
+            cache, which must not depend on the location of the contents.
+
+        :returns: The cache entry used, or None if the package was unpacked
+            directly into install_path.
+        """
+        entry_path = self._get_entry_path(deb_path)
+        if entry_path is None:
+            unpack(deb_path, install_path)
+            return None
+
+        try:
+            digest = _get_digest(deb_path)
+            for _ in range(2):
+                manifest = self._read_manifest(entry_path, digest)
+                if manifest is None:
+                    self._add(
+                        entry_path, deb_path, digest, unpack=unpack, normalize=normalize
+                    )
+                    manifest = self._read_manifest(entry_path, digest)
+
+                if manifest is not None and self._link_tree(
+                    entry_path / "tree", install_path, manifest["files"]
+                ):
+                    os.utime(entry_path / "manifest.json")
+                    return entry_path
+
+                logger.debug(f"Cached {entry_path.name!r} is invalid, unpacking again")
+                _remove(entry_path)
+        except OSError as error:
+            logger.debug(f"Cannot use cached {entry_path.name!r}: {error}")
+
+        unpack(deb_path, install_path)
+        return None
+
+    def prune(
+        self,
+        *,
+        max_size: Optional[int] = None,
+        keep: Iterable[pathlib.Path] = (),
+    ) -> int:
+        """Remove the least recently used entries exceeding the cache size.
+
+        :param max_size: The size in bytes to prune the cache to, instead of
+            the cache maximum size.
+        :param keep: Entries that must not be removed.
+
+        :returns: The number of bytes removed.
+        """
+        if max_size is None:
+            max_size = self.max_size
+
+        entries = self._list_entries()
+        keep = set(keep)
+        total_size = sum(entry["size"] for entry in entries)
+        removed_size = 0
+        for entry in sorted(entries, key=lambda e: e["last_used"]):
+            if total_size - removed_size <= max_size:
+                break
+
+            if entry["path"] in keep:
+                continue
+
+            logger.debug(f"Removing {entry['path'].name!r} from stage packages cache")
+            _remove(entry["path"])
+            removed_size += entry["size"]
+
+        return removed_size
+
+    def _list_entries(self) -> List[Dict[str, Any]]:
+        """List the cache entries, removing stale and incomplete ones."""
+        if not self._path.is_dir():
+            return []
+
+        entries: List[Dict[str, Any]] = []
+        for entry_path in self._path.iterdir():
+            if entry_path.name.startswith("."):
+                if time.time() - entry_path.lstat().st_mtime > _STALE_TEMPORARY_SECONDS:
+                    _remove(entry_path)
+                continue
+
+            manifest_path = entry_path / "manifest.json"
+            try:
+                manifest = json.loads(manifest_path.read_text())
+                last_used = manifest_path.stat().st_mtime
+            except (OSError, ValueError):
+                _remove(entry_path)
+                continue
+
+            entries.append(
+                {"path": entry_path, "size": manifest["size"], "last_used": last_used}
+            )
+
+        return entries
+
+    def _get_entry_path(self, deb_path: pathlib.Path) -> Optional[pathlib.Path]:
+        """Obtain the entry for a package, from its name_version_arch.deb name."""
+        parts = deb_path.stem.split("_")
+        if len(parts) != 3 or not all(parts) or deb_path.suffix != ".deb":
+            return None
+
+        return self._path / deb_path.stem
+
+    @staticmethod
+    def _read_manifest(
+        entry_path: pathlib.Path, digest: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            manifest = json.loads((entry_path / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("digest") != digest:
+            return None
+
+        return manifest
+
+    def _add(
+        self,
+        entry_path: pathlib.Path,
+        deb_path: pathlib.Path,
+        digest: str,
+        *,
+        unpack: UnpackFunction,
+        normalize: Callable[[pathlib.Path], None],
+    ) -> None:
+        """Unpack a package into a new cache entry."""
+        temporary_path = get_temporary_path(entry_path)
+        _remove(temporary_path)
+        tree_path = temporary_path / "tree"
+        tree_path.mkdir(parents=True)
+
+        try:
+            unpack(deb_path, tree_path)
+            normalize(tree_path)
+
+            manifest: Dict[str, Any] = {"digest": digest, "size": 0, "files": {}}
+            for root, _, files in os.walk(tree_path):
+                for name in files:
+                    path = pathlib.Path(root, name)
+                    stat = path.lstat()
+                    manifest["size"] += stat.st_size
+                    if not path.is_symlink():
+                        relative_path = str(path.relative_to(tree_path))
+                        manifest["files"][relative_path] = [
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            _get_digest(path),
+                        ]
+
+            (temporary_path / "manifest.json").write_text(json.dumps(manifest))
+
+            _remove(entry_path)
+            try:
+                temporary_path.rename(entry_path)
+            except OSError as error:
+                # Another build added the same package first.
+                if error.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+        finally:
+            _remove(temporary_path)
+
+    @staticmethod
+    def _link_tree(
+        tree_path: pathlib.Path,
+        install_path: pathlib.Path,
+        files: Dict[str, List[int]],
+    ) -> bool:
+        """Hardlink an entry tree into install_path.
+
+        :returns: False if a file in the entry was modified since it was added,
+            files may have been linked already.
+        """
+        for root, directories, file_names in os.walk(tree_path):
+            relative_root = pathlib.Path(root).relative_to(tree_path)
+            (install_path / relative_root).mkdir(parents=True, exist_ok=True)
+
+            for name in directories + file_names:
+                path = pathlib.Path(root, name)
+                relative_path = relative_root / name
+                destination = install_path / relative_path
+
+                if path.is_symlink():
+                    _replace(
+                        destination, functools.partial(os.symlink, os.readlink(path))
+                    )
+                elif path.is_dir():
+                    destination.mkdir(exist_ok=True)
+                    if not destination.is_symlink():
+                        shutil.copymode(path, destination)
+                else:
+                    if not _is_unmodified(path, files.get(str(relative_path))):
+                        return False
+
+                    if _REWRITTEN_FILES.search(str(relative_path)):
+                        _replace(destination, functools.partial(shutil.copy2, path))
+                    else:
+                        _replace(destination, functools.partial(_link_or_copy, path))
+
+        return True
+
+
+def _is_unmodified(path: pathlib.Path, recorded: Optional[List[Any]]) -> bool:
+    """Check if a file in an entry matches its recorded size, mtime and digest.
+
+    The digest is checked even if the size and modification time match, as
+    they can be preserved when writing a file in place (e.g. with cp -p).
+    """
+    if recorded is None or len(recorded) != 3:
+        return False
+
+    stat = path.stat()
+    if [stat.st_size, stat.st_mtime_ns] != recorded[:2]:
+        return False
+
+    return _get_digest(path) == recorded[2]
+
+
+def _link_or_copy(source: pathlib.Path, destination: pathlib.Path) -> None:
+    try:
+        os.link(source, destination)
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+        shutil.copy2(source, destination)
+
+
+def _replace(destination: pathlib.Path, create: Callable[[pathlib.Path], Any]) -> None:
+    """Create destination atomically, replacing any existing file."""
+    temporary_path = get_temporary_path(destination)
+    try:
+        create(temporary_path)
+        os.replace(temporary_path, destination)
+    finally:
+        if os.path.lexists(temporary_path):
+            os.unlink(temporary_path)
+
+
+def _remove(path: pathlib.Path) -> None:
+    """Remove an entry, making it disappear from the cache atomically."""
+    if not os.path.lexists(path):
+        return
+
+    removed_path = path.with_name(
+        f".removed-{path.name}-{os.getpid()}-{threading.get_ident()}"
+    )
+    try:
+        path.rename(removed_path)
+    except OSError:
+        removed_path = path
+
+    if removed_path.is_dir() and not removed_path.is_symlink():
+        shutil.rmtree(removed_path, ignore_errors=True)
+    else:
+        removed_path.unlink()
+
+
+def _get_digest(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as package:
+        for chunk in iter(lambda: package.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
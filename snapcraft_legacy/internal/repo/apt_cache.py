@@ -14,13 +14,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import logging
 import os
 import re
 import shutil
-from contextlib import ContextDecorator
+from contextlib import ContextDecorator, contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 import apt
 
@@ -34,6 +35,43 @@ logger = logging.getLogger(__name__)
 
 _HASHSUM_MISMATCH_PATTERN = re.compile(r"(E:Failed to fetch.+Hash Sum mismatch)+")
 
+# A fetched archive, as (<package-name>, <package-version>, <dl-path>).
+FetchedArchive = Tuple[str, str, Path]
+
+
+def _is_fetched(dl_path: Path, version: apt.package.Version) -> bool:
+    """Check if an archive was already fetched, as apt's fetch_binary does."""
+    if not dl_path.exists() or dl_path.stat().st_size != version.size:
+        return False
+
+    if not version.sha256:
+        return True
+
+    digest = hashlib.sha256()
+    with dl_path.open("rb") as archive:
+        for chunk in iter(lambda: archive.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest() == version.sha256
+
+
+@contextmanager
+def _apt_config(settings: Dict[str, str]) -> Iterator[None]:
+    """Set apt configuration options, restoring their values on exit."""
+    config = apt.apt_pkg.config
+    previous = {
+        key: config.find(key) if config.exists(key) else None for key in settings
+    }
+    try:
+        for key, value in settings.items():
+            config.set(key, value)
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                config.clear(key)
+            else:
+                config.set(key, value)
+
 
 class AptCache(ContextDecorator):
     """Transient cache for use with stage-packages, or read-only host-mode for build-packages."""
@@ -205,20 +243,127 @@ class AptCache(ContextDecorator):
                 package_version = self.cache[package_name].installed.version  # type: ignore
         return package_version
 
-    def fetch_archives(self, download_path: Path) -> List[Tuple[str, str, Path]]:
-        """Fetches archives, list of (<package-name>, <package-version>, <dl-path>)."""
-        downloaded = list()
-        for package in self.cache.get_changes():
-            try:
-                dl_path = package.candidate.fetch_binary(str(download_path))  # type: ignore
-            except apt.package.FetchError as e:
-                raise errors.PackageFetchError(str(e))
+    def fetch_archives(
+        self,
+        download_path: Path,
+        *,
+        max_connections: Optional[int] = None,
+        fetched_callback: Optional[Callable[[FetchedArchive], None]] = None,
+    ) -> List[FetchedArchive]:
+        """Fetches archives, list of (<package-name>, <package-version>, <dl-path>).
+
+        All archives are queued in a single apt fetcher, which downloads
+        from the different hosts concurrently and pipelines the requests
+        to each host.
+
+        :param download_path: The directory to fetch archives to.
+        :param max_connections: The maximum number of hosts to download
+            from concurrently, apt's default if None.
+        :param fetched_callback: Function called with each archive as soon
+            as it is fetched and its hash is verified, while the remaining
+            archives are still being fetched.
+        """
+        allow_unauthenticated = apt.apt_pkg.config.find_b(
+            "APT::Get::AllowUnauthenticated", False
+        )
 
-            if package.candidate is None:
+        fetched: List[FetchedArchive] = []
+        pending: Dict[str, Tuple[FetchedArchive, apt.package.Version]] = {}
+        for package in self.cache.get_changes():
+            version = package.candidate
+            if version is None:
                 raise errors.PackageNotFoundError(package.name)
 
-            downloaded.append((package.name, package.candidate.version, Path(dl_path)))
-        return downloaded
+            dl_path = download_path / os.path.basename(version.filename)
+            archive = (package.name, version.version, dl_path)
+            if _is_fetched(dl_path, version):
+                logger.debug(f"Ignoring already existing file: {str(dl_path)!r}")
+                fetched.append(archive)
+                if fetched_callback is not None:
+                    fetched_callback(archive)
+            elif not allow_unauthenticated and not (
+                version.sha256 and any(o.trusted for o in version.origins)
+            ):
+                raise errors.PackageFetchError(
+                    f"The package {package.name!r} is not from a trusted source."
+                )
+            elif not version.uri:
+                raise errors.PackageFetchError(
+                    f"There is no URI for package {package.name!r}."
+                )
+            else:
+                pending[str(dl_path)] = (archive, version)
+
+        if pending:
+            fetched.extend(
+                self._fetch_pending(
+                    pending,
+                    max_connections=max_connections,
+                    fetched_callback=fetched_callback,
+                )
+            )
+
+        return fetched
+
+    def _fetch_pending(
+        self,
+        pending: Dict[str, Tuple[FetchedArchive, apt.package.Version]],
+        *,
+        max_connections: Optional[int],
+        fetched_callback: Optional[Callable[[FetchedArchive], None]],
+    ) -> List[FetchedArchive]:
+        progress = apt.progress.text.AcquireProgress()
+        if is_dumb_terminal():
+            # Make output more suitable for logging.
+            progress.pulse = lambda owner: True
+            progress._width = 0
+
+        # Exceptions raised from progress callbacks are not propagated by
+        # apt, keep the first one to raise it once fetching ends.
+        callback_errors: List[Exception] = []
+        text_done = progress.done
+
+        def done(item: apt.apt_pkg.AcquireItemDesc) -> None:
+            text_done(item)
+            if fetched_callback is None or callback_errors:
+                return
+
+            try:
+                fetched_callback(pending[item.owner.destfile][0])
+            except Exception as error:  # pylint: disable=broad-except
+                callback_errors.append(error)
+
+        progress.done = done
+
+        settings: Dict[str, str] = {}
+        if max_connections is not None:
+            settings["Acquire::Queue-Mode"] = "host"
+            settings["Acquire::QueueHost::Limit"] = str(max_connections)
+
+        # The queue options are read when the items are queued and fetched.
+        with _apt_config(settings):
+            acquire = apt.apt_pkg.Acquire(progress)
+            items = [
+                apt.apt_pkg.AcquireFile(
+                    acquire,
+                    version.uri,
+                    f"SHA256:{version.sha256}" if version.sha256 else "",
+                    version.size,
+                    archive[2].name,
+                    destfile=destfile,
+                )
+                for destfile, (archive, version) in pending.items()
+            ]
+            acquire.run()
+
+        for item in items:
+            if item.status != item.STAT_DONE:
+                raise errors.PackageFetchError(item.error_text)
+
+        if callback_errors:
+            raise callback_errors[0]
+
+        return [archive for archive, _ in pending.values()]
 
     def get_installed_packages(self) -> Dict[str, str]:
         installed: Dict[str, str] = dict()
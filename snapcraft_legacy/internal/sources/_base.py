@@ -87,15 +87,17 @@ class Base:
         raise errors.SourceUpdateUnsupportedError(self)
 
     def _run(self, command, **kwargs):
+        output_kwargs = snapcraft_legacy.internal.common.get_output_kwargs()
         try:
-            subprocess.check_call(command, **kwargs)
+            subprocess.check_call(command, **{**output_kwargs, **kwargs})
         except subprocess.CalledProcessError as e:
             raise errors.SnapcraftPullError(command, e.returncode)
 
     def _run_output(self, command, **kwargs):
+        output_kwargs = snapcraft_legacy.internal.common.get_output_kwargs(stdout=False)
         try:
             return (
-                subprocess.check_output(command, **kwargs)
+                subprocess.check_output(command, **{**output_kwargs, **kwargs})
                 .decode(sys.getfilesystemencoding())
                 .strip()
             )
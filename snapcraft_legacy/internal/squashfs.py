@@ -0,0 +1,499 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Read files from SquashFS images, such as snaps, without extracting them.
+
+Only what is needed to locate and read the requested files is decompressed:
+the superblock, the inode and directory metadata along the path and the data
+blocks and fragment of the files read.
+
+See https://dr-emann.github.io/squashfs/ for a description of the format.
+"""
+
+import lzma
+import posixpath
+import stat
+import struct
+import zlib
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from snapcraft_legacy.internal import errors
+
+_MAGIC = 0x73717368
+_SUPERBLOCK = struct.Struct("<IIIIIHHHHHHQQQQQQQQ")
+
+# Compressors, as identified in the superblock.
+_GZIP = 1
+_LZMA = 2
+_LZO = 3
+_XZ = 4
+_LZ4 = 5
+_ZSTD = 6
+
+_METADATA_BLOCK_SIZE = 8192
+_METADATA_HEADER = struct.Struct("<H")
+_METADATA_UNCOMPRESSED = 0x8000
+_DATA_UNCOMPRESSED = 0x1000000
+_DATA_SIZE_MASK = 0xFFFFFF
+_NO_FRAGMENT = 0xFFFFFFFF
+_FRAGMENTS_PER_BLOCK = 512
+
+# Inode types.
+_DIRECTORY = 1
+_FILE = 2
+_SYMLINK = 3
+_EXTENDED_DIRECTORY = 8
+_EXTENDED_FILE = 9
+_EXTENDED_SYMLINK = 10
+
+_FILE_TYPES = {
+    _DIRECTORY: stat.S_IFDIR,
+    _FILE: stat.S_IFREG,
+    _SYMLINK: stat.S_IFLNK,
+    4: stat.S_IFBLK,
+    5: stat.S_IFCHR,
+    6: stat.S_IFIFO,
+    7: stat.S_IFSOCK,
+}
+
+_INODE_HEADER = struct.Struct("<HHHHII")
+_DIRECTORY_INODE = struct.Struct("<IIHHI")
+_EXTENDED_DIRECTORY_INODE = struct.Struct("<IIIIHHI")
+_FILE_INODE = struct.Struct("<IIII")
+_EXTENDED_FILE_INODE = struct.Struct("<QQQIIII")
+_SYMLINK_INODE = struct.Struct("<II")
+_DIRECTORY_HEADER = struct.Struct("<III")
+_DIRECTORY_ENTRY = struct.Struct("<HhHH")
+_FRAGMENT_ENTRY = struct.Struct("<QII")
+_POINTER = struct.Struct("<Q")
+
+# The same limit as the kernel's, to stop on symlink loops.
+_MAX_SYMLINKS = 40
+
+
+class _Superblock(NamedTuple):
+    magic: int
+    inode_count: int
+    modification_time: int
+    block_size: int
+    fragment_count: int
+    compression: int
+    block_log: int
+    flags: int
+    id_count: int
+    version_major: int
+    version_minor: int
+    root_inode: int
+    bytes_used: int
+    id_table_start: int
+    xattr_table_start: int
+    inode_table_start: int
+    directory_table_start: int
+    fragment_table_start: int
+    export_table_start: int
+
+
+class _Directory(NamedTuple):
+    mode: int
+    block: int
+    offset: int
+    size: int
+
+
+class _File(NamedTuple):
+    mode: int
+    blocks_start: int
+    size: int
+    fragment: int
+    fragment_offset: int
+    block_sizes: Tuple[int, ...]
+
+
+class _Symlink(NamedTuple):
+    mode: int
+    target: str
+
+
+class _Other(NamedTuple):
+    mode: int
+
+
+_Inode = Union[_Directory, _File, _Symlink, _Other]
+
+
+_Decompressor = Tuple[Callable[[bytes], bytes], Tuple[Type[Exception], ...]]
+
+
+def _get_decompressor(compression: int, block_size: int) -> Optional[_Decompressor]:
+    """Return the function to decompress data and the errors it raises."""
+    if compression == _GZIP:
+        return zlib.decompress, (zlib.error,)
+    if compression == _XZ:
+        return lzma.decompress, (lzma.LZMAError,)
+    if compression == _LZMA:
+        return (
+            lambda data: lzma.decompress(data, format=lzma.FORMAT_ALONE),
+            (lzma.LZMAError,),
+        )
+    if compression == _LZO:
+        try:
+            import lzo  # type: ignore
+        except ImportError:
+            pass
+        else:
+            buffer_size = max(block_size, _METADATA_BLOCK_SIZE)
+            return lambda data: lzo.decompress(data, False, buffer_size), (lzo.error,)
+    if compression == _ZSTD:
+        try:
+            import zstandard  # type: ignore
+        except ImportError:
+            pass
+        else:
+            return (
+                lambda data: zstandard.ZstdDecompressor()
+                .decompressobj()
+                .decompress(data),
+                (zstandard.ZstdError,),
+            )
+
+    return None
+
+
+def _split(path: str) -> List[str]:
+    return [c for c in path.split("/") if c and c != "."]
+
+
+class _MetadataReader:
+    """Read consecutive bytes from metadata blocks, across block boundaries."""
+
+    def __init__(self, image: "SquashFSImage", block: int, offset: int) -> None:
+        self._image = image
+        self._block = block
+        self._offset = offset
+
+    def read(self, size: int) -> bytes:
+        chunks = []
+        while size > 0:
+            data, next_block = self._image._read_metadata_block(self._block)
+            chunk = data[self._offset : self._offset + size]
+            if not chunk:
+                raise self._image._error("truncated metadata")
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._offset += len(chunk)
+            if self._offset == len(data):
+                self._block = next_block
+                self._offset = 0
+
+        return b"".join(chunks)
+
+    def unpack(self, fmt: struct.Struct) -> Tuple:
+        return fmt.unpack(self.read(fmt.size))
+
+
+class SquashFSImage:
+    """A read-only SquashFS 4.0 image.
+
+    Paths are relative to the root of the image, e.g. ``meta/snap.yaml``.
+    Symbolic links are followed within the image.
+
+    :param str path: path to the SquashFS image.
+    :raises SquashFSError: if the file is not a supported SquashFS image.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: BinaryIO = open(path, "rb")
+        self._metadata_blocks: Dict[int, Tuple[bytes, int]] = {}
+        self._fragments: Dict[int, bytes] = {}
+        try:
+            self._superblock = self._read_superblock()
+        except Exception:
+            self.close()
+            raise
+
+        decompressor = _get_decompressor(
+            self._superblock.compression, self._superblock.block_size
+        )
+        if decompressor is None:
+            self.close()
+            raise errors.SquashFSUnsupportedCompressionError(
+                path=path, compression=self._superblock.compression
+            )
+        self._decompress, self._decompress_errors = decompressor
+
+    def __enter__(self) -> "SquashFSImage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def read_file(self, path: str) -> bytes:
+        """Return the contents of the file at path.
+
+        :raises FileNotFoundError: if path does not exist in the image.
+        :raises IsADirectoryError: if path is a directory.
+        """
+        inode = self._lookup(path)
+        if isinstance(inode, _Directory):
+            raise IsADirectoryError(path)
+        if not isinstance(inode, _File):
+            raise self._error(f"{path!r} is not a regular file")
+        return self._read_data(inode)
+
+    def listdir(self, path: str = "") -> List[str]:
+        """Return the names of the entries in the directory at path.
+
+        :raises FileNotFoundError: if path does not exist in the image.
+        :raises NotADirectoryError: if path is not a directory.
+        """
+        inode = self._lookup(path)
+        if not isinstance(inode, _Directory):
+            raise NotADirectoryError(path)
+        return list(self._read_directory(inode))
+
+    def exists(self, path: str) -> bool:
+        """Return whether path exists in the image."""
+        try:
+            self._lookup(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        return True
+
+    def _error(self, message: str) -> errors.SquashFSError:
+        return errors.SquashFSError(path=self.path, message=message)
+
+    def _read(self, position: int, size: int) -> bytes:
+        self._file.seek(position)
+        data = self._file.read(size)
+        if len(data) != size:
+            raise self._error("unexpected end of file")
+        return data
+
+    def _read_superblock(self) -> _Superblock:
+        data = self._file.read(_SUPERBLOCK.size)
+        if len(data) != _SUPERBLOCK.size:
+            raise self._error("not a squashfs image")
+
+        superblock = _Superblock(*_SUPERBLOCK.unpack(data))
+        if superblock.magic != _MAGIC:
+            raise self._error("not a squashfs image")
+        if (superblock.version_major, superblock.version_minor) != (4, 0):
+            raise self._error(
+                "unsupported version "
+                f"{superblock.version_major}.{superblock.version_minor}"
+            )
+        return superblock
+
+    def _read_metadata_block(self, position: int) -> Tuple[bytes, int]:
+        """Return the data of the metadata block and the position of the next."""
+        try:
+            return self._metadata_blocks[position]
+        except KeyError:
+            pass
+
+        (header,) = _METADATA_HEADER.unpack(self._read(position, _METADATA_HEADER.size))
+        size = header & ~_METADATA_UNCOMPRESSED
+        data = self._read(position + _METADATA_HEADER.size, size)
+        if not header & _METADATA_UNCOMPRESSED:
+            data = self._decompress_data(data)
+
+        block = data, position + _METADATA_HEADER.size + size
+        self._metadata_blocks[position] = block
+        return block
+
+    def _decompress_data(self, data: bytes) -> bytes:
+        try:
+            return self._decompress(data)
+        except self._decompress_errors as error:
+            raise self._error(f"cannot decompress data ({error})") from error
+
+    def _read_inode(self, reference: int) -> _Inode:
+        reader = _MetadataReader(
+            self,
+            self._superblock.inode_table_start + (reference >> 16),
+            reference & 0xFFFF,
+        )
+        inode_type, permissions, *_ = reader.unpack(_INODE_HEADER)
+        if not 1 <= inode_type <= 14:
+            raise self._error(f"unknown inode type {inode_type}")
+        # extended inode types follow the basic ones, in the same order
+        mode = _FILE_TYPES[(inode_type - 1) % 7 + 1] | permissions
+
+        if inode_type == _DIRECTORY:
+            block, _, size, offset, _ = reader.unpack(_DIRECTORY_INODE)
+            return _Directory(mode, block, offset, size)
+        if inode_type == _EXTENDED_DIRECTORY:
+            _, size, block, _, _, offset, _ = reader.unpack(_EXTENDED_DIRECTORY_INODE)
+            return _Directory(mode, block, offset, size)
+
+        if inode_type in (_FILE, _EXTENDED_FILE):
+            if inode_type == _FILE:
+                blocks_start, fragment, fragment_offset, size = reader.unpack(
+                    _FILE_INODE
+                )
+            else:
+                (
+                    blocks_start,
+                    size,
+                    _,
+                    _,
+                    fragment,
+                    fragment_offset,
+                    _,
+                ) = reader.unpack(_EXTENDED_FILE_INODE)
+
+            block_count, tail = divmod(size, self._superblock.block_size)
+            if tail and fragment == _NO_FRAGMENT:
+                block_count += 1
+            block_sizes = struct.unpack(
+                f"<{block_count}I", reader.read(4 * block_count)
+            )
+            return _File(
+                mode, blocks_start, size, fragment, fragment_offset, block_sizes
+            )
+
+        if inode_type in (_SYMLINK, _EXTENDED_SYMLINK):
+            _, target_size = reader.unpack(_SYMLINK_INODE)
+            target = reader.read(target_size).decode("utf-8", "surrogateescape")
+            return _Symlink(mode, target)
+
+        return _Other(mode)
+
+    def _read_directory(self, directory: _Directory) -> Dict[str, int]:
+        """Return a mapping of entry names to inode references."""
+        reader = _MetadataReader(
+            self,
+            self._superblock.directory_table_start + directory.block,
+            directory.offset,
+        )
+        # the size accounts for the implicit "." and ".." entries
+        remaining = directory.size - 3
+        entries = {}
+        while remaining > 0:
+            count, inode_block, _ = reader.unpack(_DIRECTORY_HEADER)
+            remaining -= _DIRECTORY_HEADER.size
+            for _ in range(count + 1):
+                offset, _, _, name_size = reader.unpack(_DIRECTORY_ENTRY)
+                name = reader.read(name_size + 1).decode("utf-8", "surrogateescape")
+                remaining -= _DIRECTORY_ENTRY.size + name_size + 1
+                entries[name] = (inode_block << 16) | offset
+
+        return entries
+
+    def _lookup(self, path: str) -> _Inode:
+        components = _split(path)
+        parents: List[_Directory] = []
+        inode = self._read_inode(self._superblock.root_inode)
+        symlinks = 0
+
+        while components:
+            name = components.pop(0)
+            if not isinstance(inode, _Directory):
+                raise NotADirectoryError(path)
+            if name == "..":
+                if parents:
+                    inode = parents.pop()
+                continue
+
+            try:
+                reference = self._read_directory(inode)[name]
+            except KeyError:
+                raise FileNotFoundError(path) from None
+
+            parents.append(inode)
+            inode = self._read_inode(reference)
+
+            if isinstance(inode, _Symlink):
+                symlinks += 1
+                if symlinks > _MAX_SYMLINKS:
+                    raise self._error(f"too many levels of symbolic links in {path!r}")
+                components[:0] = _split(inode.target)
+                if posixpath.isabs(inode.target):
+                    parents.clear()
+                    inode = self._read_inode(self._superblock.root_inode)
+                else:
+                    inode = parents.pop()
+
+        return inode
+
+    def _read_data(self, inode: _File) -> bytes:
+        block_size = self._superblock.block_size
+        chunks = []
+        position = inode.blocks_start
+        for index, block in enumerate(inode.block_sizes):
+            size = block & _DATA_SIZE_MASK
+            if size == 0:
+                # a sparse block
+                chunks.append(bytes(min(block_size, inode.size - index * block_size)))
+                continue
+
+            data = self._read(position, size)
+            if not block & _DATA_UNCOMPRESSED:
+                data = self._decompress_data(data)
+            chunks.append(data)
+            position += size
+
+        if inode.fragment != _NO_FRAGMENT:
+            tail = inode.size - len(inode.block_sizes) * block_size
+            fragment = self._read_fragment(inode.fragment)
+            chunks.append(
+                fragment[inode.fragment_offset : inode.fragment_offset + tail]
+            )
+
+        data = b"".join(chunks)
+        if len(data) != inode.size:
+            raise self._error("file data does not match its size")
+        return data
+
+    def _read_fragment(self, index: int) -> bytes:
+        try:
+            return self._fragments[index]
+        except KeyError:
+            pass
+
+        if index >= self._superblock.fragment_count:
+            raise self._error(f"invalid fragment {index}")
+
+        block, offset = divmod(index, _FRAGMENTS_PER_BLOCK)
+        (position,) = _POINTER.unpack(
+            self._read(
+                self._superblock.fragment_table_start + block * _POINTER.size,
+                _POINTER.size,
+            )
+        )
+        reader = _MetadataReader(self, position, offset * _FRAGMENT_ENTRY.size)
+        start, size, _ = reader.unpack(_FRAGMENT_ENTRY)
+
+        data = self._read(start, size & _DATA_SIZE_MASK)
+        if not size & _DATA_UNCOMPRESSED:
+            data = self._decompress_data(data)
+
+        self._fragments[index] = data
+        return data
@@ -7,6 +7,7 @@ import requests
 from progressbar import AnimatedMarker, ProgressBar, UnknownLength
 
 from . import constants, errors
+from .poller import StatusPoller
 
 
 class StatusTracker:
@@ -27,6 +28,7 @@ class StatusTracker:
 
     def __init__(self, status_details_url):
         self.__status_details_url = status_details_url
+        self.__connection_errors_allowed = 10
 
     def track(self):
         queue = Queue()
@@ -68,20 +70,26 @@ class StatusTracker:
             return self.__messages.get("being_processed")
 
     def _update_status(self, queue):
-        for content in self._get_status():
+        def is_processed(content):
             queue.put(content)
-            if content["processed"]:
-                break
-            sleep(constants.SCAN_STATUS_POLL_DELAY)
-
-    def _get_status(self):
-        connection_errors_allowed = 10
-        while True:
-            try:
-                content = requests.get(self.__status_details_url).json()
-            except (requests.ConnectionError, requests.HTTPError) as e:
-                if not connection_errors_allowed:
-                    yield e
-                content = {"processed": False, "code": "being_processed"}
-                connection_errors_allowed -= 1
-            yield content
+            return content.get("processed", False)
+
+        poller = StatusPoller(
+            self._get_status,
+            is_processed=is_processed,
+            initial_delay=constants.SCAN_STATUS_POLL_DELAY,
+        )
+        try:
+            poller.poll([self.__status_details_url])
+        except Exception as e:
+            # raised from track in the main thread
+            queue.put(e)
+
+    def _get_status(self, status_details_url):
+        try:
+            return requests.get(status_details_url).json()
+        except (requests.ConnectionError, requests.HTTPError):
+            if not self.__connection_errors_allowed:
+                raise
+            self.__connection_errors_allowed -= 1
+            return {"processed": False, "code": "being_processed"}
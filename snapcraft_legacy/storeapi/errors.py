@@ -648,6 +648,17 @@ class StoreDeltaApplicationError(StoreError):
         super().__init__(message=message)
 
 
+class StoreStatusTimeoutError(StoreError):
+
+    fmt = (
+        "Timed out after {timeout:.0f} seconds waiting for the Snap Store to "
+        "process the upload."
+    )
+
+    def __init__(self, *, timeout: float) -> None:
+        super().__init__(timeout=timeout)
+
+
 class StoreSnapChannelMapError(SnapcraftException):
     def __init__(self, *, snap_name: str) -> None:
         self._snap_name = snap_name
@@ -0,0 +1,117 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Polling of the Snap Store for the processing status of uploads."""
+
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Sequence
+
+from . import errors
+
+logger = logging.getLogger(__name__)
+
+Status = Dict[str, Any]
+
+INITIAL_DELAY = 1.0
+"""Seconds to wait before polling again for the first time."""
+
+MAX_DELAY = 30.0
+"""Upper bound for the seconds to wait between polls."""
+
+BACKOFF_FACTOR = 1.5
+"""Growth of the delay after every round of polling."""
+
+TIMEOUT = 3600.0
+"""Seconds to wait for all the uploads to be processed."""
+
+
+def _is_processed(status: Status) -> bool:
+    return status.get("processed", False)
+
+
+class StatusPoller:
+    """Poll status URLs until the uploads they track are processed.
+
+    All the pending URLs are polled in a single round. The delay between
+    rounds grows exponentially, up to a maximum, with random jitter so many
+    clients started at once do not poll the store in lockstep.
+
+    :param get_status: Fetch the status for a URL.
+    :param is_processed: Tell if a status is final, it is called with every
+        status fetched so it can also be used to report progress.
+    :param initial_delay: Seconds to wait after the first round.
+    :param max_delay: Upper bound for the seconds to wait between rounds.
+    :param backoff_factor: Growth of the delay after every round.
+    :param timeout: Seconds to wait for all the statuses to be final.
+    """
+
+    def __init__(
+        self,
+        get_status: Callable[[str], Status],
+        *,
+        is_processed: Callable[[Status], bool] = _is_processed,
+        initial_delay: float = INITIAL_DELAY,
+        max_delay: float = MAX_DELAY,
+        backoff_factor: float = BACKOFF_FACTOR,
+        timeout: float = TIMEOUT,
+    ) -> None:
+        self._get_status = get_status
+        self._is_processed = is_processed
+        self._initial_delay = initial_delay
+        self._max_delay = max_delay
+        self._backoff_factor = backoff_factor
+        self._timeout = timeout
+
+    def poll(self, status_urls: Sequence[str]) -> Dict[str, Status]:
+        """Poll the status URLs until all of them report a final status.
+
+        :returns: The final status for each URL.
+
+        :raises errors.StoreStatusTimeoutError: If the statuses are not final
+            before the timeout.
+        """
+        deadline = time.monotonic() + self._timeout
+        delay = self._initial_delay
+        statuses: Dict[str, Status] = {}
+        pending = list(dict.fromkeys(status_urls))
+
+        while True:
+            for status_url in pending:
+                status = self._get_status(status_url)
+                if self._is_processed(status):
+                    statuses[status_url] = status
+
+            pending = [url for url in pending if url not in statuses]
+            if not pending:
+                return statuses
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise errors.StoreStatusTimeoutError(timeout=self._timeout)
+
+            wait = min(self._jitter(delay), remaining)
+            logger.debug(
+                "Waiting %.1fs to poll %d pending upload statuses", wait, len(pending)
+            )
+            time.sleep(wait)
+            delay = min(delay * self._backoff_factor, self._max_delay)
+
+    @staticmethod
+    def _jitter(delay: float) -> float:
+        # wait between half and the whole delay
+        return random.uniform(delay / 2, delay)
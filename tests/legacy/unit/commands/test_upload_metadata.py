@@ -23,6 +23,7 @@ from testtools.matchers import Contains, Equals, Not
 
 import tests.legacy
 from snapcraft_legacy import storeapi
+from snapcraft_legacy.internal import errors, squashfs
 from snapcraft_legacy.storeapi.errors import StoreUploadError
 
 from . import FAKE_UNAUTHORIZED_ERROR, CommandBaseTestCase
@@ -234,6 +235,41 @@ class UploadMetadataCommandTestCase(CommandBaseTestCase):
         # icon uploaded to store is None
         self.assertIsNone(self.uploaded_icon)
 
+    def test_unsupported_compression_uses_unsquashfs(self):
+        image = squashfs.SquashFSImage(self.snap_file)
+        self.addCleanup(image.close)
+
+        def _unsquashfs(snap_path, path, destination):
+            # extract the requested file or directory, as unsquashfs would
+            paths = [path]
+            if path == "meta/gui":
+                paths = [f"{path}/{name}" for name in image.listdir(path)]
+            for file_path in paths:
+                extracted_path = os.path.join(destination, file_path)
+                os.makedirs(os.path.dirname(extracted_path), exist_ok=True)
+                with open(extracted_path, "wb") as extracted_file:
+                    extracted_file.write(image.read_file(file_path))
+
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.squashfs.SquashFSImage",
+                side_effect=errors.SquashFSUnsupportedCompressionError(
+                    path=self.snap_file, compression=5
+                ),
+            )
+        )
+        fake_unsquashfs = fixtures.MockPatch(
+            "snapcraft_legacy._store._unsquashfs", side_effect=_unsquashfs
+        )
+        self.useFixture(fake_unsquashfs)
+
+        with mock.patch("snapcraft_legacy.storeapi._status_tracker.StatusTracker"):
+            result = self.run_command(["upload-metadata", self.snap_file])
+
+        self.assertThat(result.exit_code, Equals(0))
+        self.assertThat(fake_unsquashfs.mock.call_count, Equals(2))
+        self.assert_expected_metadata_calls()
+
     def test_push_raises_deprecation_warning(self):
         fake_logger = fixtures.FakeLogger(level=logging.INFO)
         self.useFixture(fake_logger)
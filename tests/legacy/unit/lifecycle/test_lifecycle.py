@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 import logging
 import os
 import textwrap
@@ -91,6 +92,118 @@ class ExecutionTestCase(LifecycleTestBase):
             Contains("'part2' has dependencies that need to be staged: part1"),
         )
 
+    @mock.patch("snapcraft_legacy.repo.snaps.install_snaps")
+    def test_parallel_parts(self, mock_install_build_snaps):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_PARALLEL_PARTS", "y"))
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                  part2:
+                    plugin: nil
+                    after:
+                      - part1
+                  part3:
+                    plugin: nil
+                """
+            )
+        )
+
+        lifecycle.execute(steps.BUILD, project_config)
+
+        for part_name in ("part1", "part2", "part3"):
+            self.assertThat(
+                os.path.join(self.parts_dir, part_name, "state", "build"), FileExists()
+            )
+        self.assertThat(self.fake_logger.output, Contains("[part3] Pulling part3"))
+        self.assertThat(
+            self.fake_logger.output,
+            Contains("[part2] 'part2' has dependencies that need to be staged: part1"),
+        )
+
+    @mock.patch("snapcraft_legacy.repo.snaps.install_snaps")
+    def test_parallel_parts_stage_dependencies_first(self, mock_install_build_snaps):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_PARALLEL_PARTS", "y"))
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                  part2:
+                    plugin: nil
+                  part3:
+                    plugin: nil
+                    after:
+                      - part1
+                  part4:
+                    plugin: nil
+                    after:
+                      - part2
+                """
+            )
+        )
+        calls = []
+        build = pluginhandler.PluginHandler.build
+        stage = pluginhandler.PluginHandler.stage
+
+        def _fake_build(self, *args, **kwargs):
+            calls.append(("build", self.name))
+            return build(self, *args, **kwargs)
+
+        def _fake_stage(self, *args, **kwargs):
+            calls.append(("stage", self.name))
+            return stage(self, *args, **kwargs)
+
+        with mock.patch.object(
+            pluginhandler.PluginHandler, "build", _fake_build
+        ), mock.patch.object(pluginhandler.PluginHandler, "stage", _fake_stage):
+            lifecycle.execute(steps.BUILD, project_config)
+
+        # the dependencies of a wave are staged one by one before any of its
+        # parts runs the step
+        self.assertThat(
+            calls[:4],
+            Equals(
+                [
+                    ("build", "part1"),
+                    ("stage", "part1"),
+                    ("build", "part2"),
+                    ("stage", "part2"),
+                ]
+            ),
+        )
+        self.assertThat(
+            sorted(calls[4:]), Equals([("build", "part3"), ("build", "part4")])
+        )
+
+    @mock.patch("snapcraft_legacy.repo.snaps.install_snaps")
+    def test_parallel_parts_prefix_output(self, mock_install_build_snaps):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_PARALLEL_PARTS", "y"))
+        stdout = io.StringIO()
+        self.useFixture(fixtures.MonkeyPatch("sys.stdout", stdout))
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                    override-build: echo built part1
+                  part2:
+                    plugin: nil
+                    override-build: echo built part2 >&2
+                """
+            )
+        )
+
+        lifecycle.execute(steps.BUILD, project_config)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertThat(lines, Contains("[part1] built part1"))
+        self.assertThat(lines, Contains("[part2] built part2"))
+
     @mock.patch("snapcraft_legacy.repo.snaps.install_snaps")
     def test_no_exception_when_dependency_is_required_but_already_staged(
         self, mock_install_build_snaps
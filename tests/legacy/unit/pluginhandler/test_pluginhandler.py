@@ -18,8 +18,9 @@ import os
 import re
 import stat
 import tempfile
+from pathlib import Path
 from textwrap import dedent
-from unittest.mock import Mock, call, patch
+from unittest.mock import ANY, Mock, call, patch
 
 import fixtures
 import pytest
@@ -159,6 +160,32 @@ class PluginTestCase(unit.TestCase):
                 "Expected staging to allow overwriting of already-staged files",
             )
 
+    def test_migrate_files_many_files(self):
+        for index in range(100):
+            os.makedirs(f"install/{index % 10}", exist_ok=True)
+            with open(f"install/{index % 10}/{index}.pc", "w") as f:
+                f.write(str(index))
+        os.makedirs("stage")
+        fixup_func = Mock()
+
+        files, dirs = pluginhandler._migratable_filesets(["*"], "install")
+        pluginhandler._migrate_files(
+            files, dirs, "install", "stage", fixup_func=fixup_func
+        )
+
+        self.assertThat(fixup_func.call_count, Equals(100))
+        for index in range(100):
+            path = os.path.join(str(index % 10), f"{index}.pc")
+            fixup_func.assert_any_call(os.path.join("stage", path))
+            with open(os.path.join("stage", path)) as f:
+                self.assertThat(f.read(), Equals(str(index)))
+            # .pc files are copied, as they are modified when staged
+            self.assertFalse(
+                os.path.samefile(
+                    os.path.join("stage", path), os.path.join("install", path)
+                )
+            )
+
     def test_migrate_files_supports_no_follow_symlinks(self):
         os.makedirs("install")
         os.makedirs("stage")
@@ -573,6 +600,22 @@ class MigratableFilesetsTestCase(unit.TestCase):
         self.assertThat(files, Equals({"foo/bar/baz/3"}))
         self.assertThat(dirs, Equals({"foo", "foo/bar", "foo/bar/baz"}))
 
+    def test_migratable_filesets_nested_includes_with_exclude(self):
+        files, dirs = pluginhandler._migratable_filesets(
+            ["foo", "foo/bar", "-foo/bar/baz"], "install"
+        )
+        self.assertThat(files, Equals({"foo/2", "foo/bar/3"}))
+        self.assertThat(dirs, Equals({"foo", "foo/bar"}))
+
+    def test_migratable_filesets_symlinked_dir(self):
+        os.symlink("foo/bar", "install/lib")
+
+        files, dirs = pluginhandler._migratable_filesets(
+            ["lib", "lib/*", "foo/bar"], "install"
+        )
+        self.assertThat(files, Equals({"lib", "foo/bar/3", "foo/bar/baz/4"}))
+        self.assertThat(dirs, Equals({"foo", "foo/bar", "foo/bar/baz"}))
+
 
 class TestOrganize:
     scenarios = [
@@ -1321,6 +1364,57 @@ class CollisionTestCase(unit.TestCase):
         self.assertThat(raised.part_name, Equals("part4"))
         self.assertThat(raised.file_paths, Equals("    file.pc"))
 
+    def test_collisions_reuse_digests(self):
+        part7 = self.load_part("part7")
+        part8 = self.load_part("part8")
+        for part in (part7, part8):
+            os.makedirs(part.part_install_dir)
+            with open(os.path.join(part.part_install_dir, "same"), "w") as f:
+                f.write("same contents")
+            with open(os.path.join(part.part_install_dir, "different"), "w") as f:
+                f.write(f"{part.name} contents")
+
+        self.assertRaises(
+            errors.SnapcraftPartConflictError,
+            pluginhandler.check_for_collisions,
+            [part7, part8],
+        )
+
+        with patch("hashlib.sha256") as mock_sha256:
+            raised = self.assertRaises(
+                errors.SnapcraftPartConflictError,
+                pluginhandler.check_for_collisions,
+                [part7, part8],
+            )
+
+        # digests are reused for unchanged files
+        mock_sha256.assert_not_called()
+        self.assertThat(raised.file_paths, Equals("    different"))
+
+    def test_collisions_reuse_digests_after_migration(self):
+        part7 = self.load_part("part7")
+        part8 = self.load_part("part8")
+        for part in (part7, part8):
+            os.makedirs(part.part_install_dir)
+            with open(os.path.join(part.part_install_dir, "same"), "w") as f:
+                f.write("same contents")
+
+        pluginhandler.check_for_collisions([part7, part8])
+
+        # staging links the installed files, which changes their ctime
+        for part in (part7, part8):
+            stage_dir = os.path.join(self.stage_dir, part.name)
+            os.makedirs(stage_dir)
+            os.link(
+                os.path.join(part.part_install_dir, "same"),
+                os.path.join(stage_dir, "same"),
+            )
+
+        with patch("hashlib.sha256") as mock_sha256:
+            pluginhandler.check_for_collisions([part7, part8])
+
+        mock_sha256.assert_not_called()
+
     def test_collision_with_part_not_built(self):
         part_built = self.load_part(
             "part_built", part_properties={"stage": ["collision"]}
@@ -1356,6 +1450,30 @@ class StagePackagesTestCase(unit.TestCase):
             raised.message, Equals("The package 'non-existing' was not found.")
         )
 
+    def test_stage_packages_unpacked_when_fetched(self):
+        fake_repo = Mock()
+        fake_repo.fetch_stage_packages.return_value = ["fake-package=1.0"]
+        part = self.load_part(
+            "stage-test",
+            part_properties={"stage-packages": ["fake-package"]},
+            stage_packages_repo=fake_repo,
+        )
+
+        part.prepare_pull()
+
+        assert fake_repo.fetch_stage_packages.mock_calls == [
+            call(
+                package_names={"fake-package"},
+                base=ANY,
+                stage_packages_path=part.stage_packages_path,
+                target_arch=ANY,
+                install_path=Path(part.part_install_dir),
+            )
+        ]
+        # packages are unpacked as they are fetched
+        assert fake_repo.unpack_stage_packages.mock_calls == []
+        assert part.stage_packages == ["fake-package=1.0"]
+
     def test_stage_packages_offline(self):
         self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_OFFLINE", "True"))
         part = self.load_part("offline-test", plugin_name="nil")
@@ -62,6 +62,31 @@ class TestParts(ProjectLoaderBaseTest):
         self.assertThat(raised.part_name, Equals("part1"))
         self.assertThat(raised.after_part_name, Equals("inexistent-part"))
 
+    def test_get_waves(self):
+        project_config = self.make_snapcraft_project(
+            [
+                ("part2", dict(plugin="nil", after=["part1"])),
+                ("part3", dict(plugin="nil", after=["part1", "part2"])),
+                ("part4", dict(plugin="nil", after=["part1"])),
+                ("part5", dict(plugin="nil")),
+            ]
+        )
+        parts = project_config.parts
+
+        waves = parts.get_waves(parts.all_parts)
+
+        self.assertThat(
+            [[part.name for part in wave] for wave in waves],
+            Equals([["part1", "part5"], ["part2", "part4"], ["part3"]]),
+        )
+
+        waves = parts.get_waves([parts.get_part("part3"), parts.get_part("part5")])
+
+        self.assertThat(
+            [[part.name for part in wave] for wave in waves],
+            Equals([["part5"], ["part3"]]),
+        )
+
 
 class TestPartOrder:
     scenarios = [
@@ -18,14 +18,17 @@ import os
 import shutil
 import unittest
 from pathlib import Path
-from unittest.mock import call
+from unittest.mock import Mock, call
 
 import fixtures
 import pytest
 from testtools.matchers import Equals
 
 from snapcraft_legacy.internal.repo.apt_cache import AptCache
-from snapcraft_legacy.internal.repo.errors import PopulateCacheDirError
+from snapcraft_legacy.internal.repo.errors import (
+    PackageFetchError,
+    PopulateCacheDirError,
+)
 from tests.legacy import unit
 
 
@@ -170,6 +173,97 @@ class TestMockedApt(unit.TestCase):
             self.fake_apt.mock_calls, Equals([call.Cache(), call.Cache().close()])
         )
 
+    def test_fetch_archives(self):
+        self.fake_apt = self.useFixture(
+            fixtures.MockPatch("snapcraft_legacy.internal.repo.apt_cache.apt")
+        ).mock
+        self.fake_apt.apt_pkg.config.find_b.return_value = False
+        download_path = Path(self.path, "debs")
+        download_path.mkdir()
+
+        # an archive already fetched
+        Path(download_path, "fetched_1.0_all.deb").write_bytes(b"fetched")
+        fetched = Mock(candidate=Mock(version="1.0", size=7, sha256=None))
+        fetched.name = "fetched"
+        fetched.candidate.filename = "pool/f/fetched_1.0_all.deb"
+        pending = Mock(
+            candidate=Mock(
+                version="2.0",
+                size=10,
+                sha256="abcdef",
+                uri="http://archive/pool/p/pending_2.0_all.deb",
+                origins=[Mock(trusted=True)],
+            )
+        )
+        pending.name = "pending"
+        pending.candidate.filename = "pool/p/pending_2.0_all.deb"
+        self.fake_apt.Cache.return_value.get_changes.return_value = [fetched, pending]
+        # only the queue mode is configured in the host
+        self.fake_apt.apt_pkg.config.exists.side_effect = (
+            lambda key: key == "Acquire::Queue-Mode"
+        )
+        self.fake_apt.apt_pkg.config.find.return_value = "access"
+
+        fake_acquire_file = self.fake_apt.apt_pkg.AcquireFile
+        fake_acquire_file.return_value.status = fake_acquire_file.return_value.STAT_DONE
+        progress = self.fake_apt.progress.text.AcquireProgress.return_value
+
+        def run():
+            progress.done(
+                Mock(owner=Mock(destfile=str(download_path / "pending_2.0_all.deb")))
+            )
+
+        self.fake_apt.apt_pkg.Acquire.return_value.run.side_effect = run
+        fetched_callback = Mock()
+
+        with AptCache(stage_cache=Path(self.path, "cache")) as apt_cache:
+            archives = apt_cache.fetch_archives(
+                download_path, max_connections=2, fetched_callback=fetched_callback
+            )
+
+        assert archives == [
+            ("fetched", "1.0", download_path / "fetched_1.0_all.deb"),
+            ("pending", "2.0", download_path / "pending_2.0_all.deb"),
+        ]
+        assert fetched_callback.mock_calls == [call(archive) for archive in archives]
+        assert fake_acquire_file.mock_calls[0] == call(
+            self.fake_apt.apt_pkg.Acquire.return_value,
+            "http://archive/pool/p/pending_2.0_all.deb",
+            "SHA256:abcdef",
+            10,
+            "pending_2.0_all.deb",
+            destfile=str(download_path / "pending_2.0_all.deb"),
+        )
+        assert self.fake_apt.apt_pkg.config.set.mock_calls[-3:] == [
+            call("Acquire::Queue-Mode", "host"),
+            call("Acquire::QueueHost::Limit", "2"),
+            call("Acquire::Queue-Mode", "access"),
+        ]
+        self.fake_apt.apt_pkg.config.clear.assert_called_with(
+            "Acquire::QueueHost::Limit"
+        )
+
+    def test_fetch_archives_untrusted(self):
+        self.fake_apt = self.useFixture(
+            fixtures.MockPatch("snapcraft_legacy.internal.repo.apt_cache.apt")
+        ).mock
+        self.fake_apt.apt_pkg.config.find_b.return_value = False
+        package = Mock(
+            candidate=Mock(
+                version="1.0", size=1, sha256="abcdef", origins=[Mock(trusted=False)]
+            )
+        )
+        package.name = "untrusted"
+        package.candidate.filename = "pool/u/untrusted_1.0_all.deb"
+        self.fake_apt.Cache.return_value.get_changes.return_value = [package]
+
+        with AptCache(stage_cache=Path(self.path, "cache")) as apt_cache:
+            self.assertRaises(
+                PackageFetchError, apt_cache.fetch_archives, Path(self.path)
+            )
+
+        self.fake_apt.apt_pkg.Acquire.assert_not_called()
+
 
 class TestAptReadonlyHostCache(unit.TestCase):
     def test_host_is_package_valid(self):
@@ -15,7 +15,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import contextlib
+import os
 import textwrap
+import time
 from pathlib import Path
 from subprocess import CalledProcessError
 from unittest import mock
@@ -120,7 +122,11 @@ class TestPackages(unit.TestCase):
                 call()
                 .__enter__()
                 .unmark_packages({"filtered-pkg-1", "filtered-pkg-2"}),
-                call().__enter__().fetch_archives(self.debs_path),
+                call()
+                .__enter__()
+                .fetch_archives(
+                    self.debs_path, max_connections=None, fetched_callback=mock.ANY
+                ),
             ]
         )
 
@@ -156,7 +162,11 @@ class TestPackages(unit.TestCase):
                 call().__enter__(),
                 call().__enter__().mark_packages(set(package_names)),
                 call().__enter__().unmark_packages({"filtered-pkg-4"}),
-                call().__enter__().fetch_archives(self.debs_path),
+                call()
+                .__enter__()
+                .fetch_archives(
+                    self.debs_path, max_connections=None, fetched_callback=mock.ANY
+                ),
             ]
         )
 
@@ -232,7 +242,11 @@ class TestPackages(unit.TestCase):
                 call()
                 .__enter__()
                 .unmark_packages({"fake-package-dep", "other-fake-package"}),
-                call().__enter__().fetch_archives(self.debs_path),
+                call()
+                .__enter__()
+                .fetch_archives(
+                    self.debs_path, max_connections=None, fetched_callback=mock.ANY
+                ),
             ]
         )
 
@@ -241,6 +255,62 @@ class TestPackages(unit.TestCase):
             Equals(sorted(["fake-package=1.0"])),
         )
 
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    @mock.patch.object(repo._deb.Ubuntu, "_install_stage_package", return_value=None)
+    def test_fetch_stage_packages_and_unpack(
+        self, mock_install_stage_package, mock_normalize
+    ):
+        self.useFixture(
+            fixtures.EnvironmentVariable(
+                "SNAPCRAFT_STAGE_PACKAGES_DOWNLOAD_CONNECTIONS", "4"
+            )
+        )
+        stage_packages_path = Path(self.path, "stage-packages")
+        install_path = Path(self.path, "install")
+        fake_package = self.debs_path / "fake-package_1.0_all.deb"
+        fake_package.touch()
+        fake_package_dep = self.debs_path / "fake-package-dep_1.0_all.deb"
+        fake_package_dep.touch()
+        archives = [
+            ("fake-package", "1.0", fake_package),
+            ("fake-package-dep", "2.0", fake_package_dep),
+        ]
+
+        def fetch_archives(download_path, *, max_connections, fetched_callback):
+            assert max_connections == 4
+            for archive in archives:
+                fetched_callback(archive)
+                # the package is ready to unpack while fetching the next ones
+                assert (stage_packages_path / archive[2].name).exists()
+            return archives
+
+        self.fake_apt_cache.return_value.__enter__.return_value.fetch_archives.side_effect = (
+            fetch_archives
+        )
+
+        fetched_packages = repo.Ubuntu.fetch_stage_packages(
+            package_names=["fake-package"],
+            stage_packages_path=stage_packages_path,
+            base="core18",
+            target_arch="amd64",
+            install_path=install_path,
+        )
+
+        assert fetched_packages == ["fake-package-dep=2.0", "fake-package=1.0"]
+        assert sorted(p.name for p in stage_packages_path.iterdir()) == [
+            "fake-package-dep_1.0_all.deb",
+            "fake-package_1.0_all.deb",
+        ]
+        assert sorted(mock_install_stage_package.mock_calls) == [
+            call(
+                stage_packages_path / "fake-package-dep_1.0_all.deb",
+                mock.ANY,
+                mock.ANY,
+            ),
+            call(stage_packages_path / "fake-package_1.0_all.deb", mock.ANY, mock.ANY),
+        ]
+        mock_normalize.assert_called_once_with(str(install_path))
+
     def test_get_package_fetch_error(self):
         self.fake_apt_cache.return_value.__enter__.return_value.fetch_archives.side_effect = errors.PackageFetchError(
             "foo"
@@ -271,6 +341,144 @@ class TestPackages(unit.TestCase):
 
         mock_normalize.assert_not_called()
 
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    @mock.patch.object(repo._deb.Ubuntu, "_extract_deb")
+    @mock.patch.object(
+        repo._deb.Ubuntu,
+        "_extract_deb_name_version",
+        return_value="fake-package-zst=1.0",
+    )
+    @mock.patch("snapcraft_legacy.internal.repo._deb._deb_unpacker.unpack_deb")
+    def test_unpack_stage_packages(
+        self, mock_unpack_deb, mock_name_version, mock_extract_deb, mock_normalize
+    ):
+        packages_path = Path(self.path, "pkg")
+        install_path = Path(self.path, "install")
+        packages_path.mkdir()
+        install_path.mkdir()
+        Path(packages_path, "fake-package.deb").touch()
+        Path(packages_path, "fake-package-zst.deb").touch()
+
+        def unpack_deb(deb_path, install_path):
+            if deb_path.name == "fake-package-zst.deb":
+                raise repo._deb._deb_unpacker.UnsupportedDebError("zst")
+            return "fake-package=1.0"
+
+        mock_unpack_deb.side_effect = unpack_deb
+
+        repo.Ubuntu.unpack_stage_packages(
+            stage_packages_path=packages_path, install_path=install_path
+        )
+
+        # packages are unpacked natively, falling back to dpkg-deb
+        assert sorted(mock_unpack_deb.mock_calls) == [
+            call(Path(packages_path, "fake-package-zst.deb"), mock.ANY),
+            call(Path(packages_path, "fake-package.deb"), mock.ANY),
+        ]
+        assert mock_extract_deb.mock_calls == [
+            call(Path(packages_path, "fake-package-zst.deb"), mock.ANY)
+        ]
+        mock_normalize.assert_called_once_with(str(install_path))
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    @mock.patch.object(repo._deb.Ubuntu, "_unpack_stage_package")
+    def test_unpack_stage_packages_cached(self, mock_unpack, mock_normalize):
+        packages_path = Path(self.path, "pkg")
+        packages_path.mkdir()
+        Path(packages_path, "fake-package_1.0_amd64.deb").write_text("fake")
+
+        def unpack(deb_path, install_path):
+            Path(install_path, "fake").write_text("fake")
+
+        mock_unpack.side_effect = unpack
+
+        with mock.patch.object(
+            repo._deb, "_UNPACKED_CACHE_DIR", Path(self.path, "cache")
+        ):
+            for name in ("install1", "install2"):
+                install_path = Path(self.path, name)
+                install_path.mkdir()
+                repo.Ubuntu.unpack_stage_packages(
+                    stage_packages_path=packages_path, install_path=install_path
+                )
+
+        # the package is unpacked once into the cache
+        assert mock_unpack.mock_calls == [
+            call(
+                Path(packages_path, "fake-package_1.0_amd64.deb"),
+                mock.ANY,
+            )
+        ]
+        assert Path(self.path, "install1", "fake").samefile(
+            Path(self.path, "install2", "fake")
+        )
+        assert mock_normalize.mock_calls == [
+            call(str(Path(self.path, "install1"))),
+            call(str(Path(self.path, "install2"))),
+        ]
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    @mock.patch.object(repo._deb.Ubuntu, "_unpack_stage_package")
+    def test_unpack_stage_packages_cache_disabled(self, mock_unpack, mock_normalize):
+        self.useFixture(
+            fixtures.EnvironmentVariable("SNAPCRAFT_STAGE_PACKAGES_CACHE_SIZE", "0")
+        )
+        packages_path = Path(self.path, "pkg")
+        install_path = Path(self.path, "install")
+        packages_path.mkdir()
+        install_path.mkdir()
+        Path(packages_path, "fake-package_1.0_amd64.deb").touch()
+
+        with mock.patch.object(
+            repo._deb, "_UNPACKED_CACHE_DIR", Path(self.path, "cache")
+        ):
+            repo.Ubuntu.unpack_stage_packages(
+                stage_packages_path=packages_path, install_path=install_path
+            )
+
+        assert mock_unpack.mock_calls == [
+            call(Path(packages_path, "fake-package_1.0_amd64.deb"), mock.ANY)
+        ]
+        assert not Path(self.path, "cache").exists()
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    @mock.patch.object(repo._deb.Ubuntu, "_unpack_stage_package")
+    def test_unpack_stage_packages_overlapping(self, mock_unpack, mock_normalize):
+        self.useFixture(
+            fixtures.EnvironmentVariable("SNAPCRAFT_STAGE_PACKAGES_CACHE_SIZE", "0")
+        )
+        packages_path = Path(self.path, "pkg")
+        install_path = Path(self.path, "install")
+        packages_path.mkdir()
+        for name in ("a-package_1.0_amd64.deb", "b-package_1.0_amd64.deb"):
+            Path(packages_path, name).touch()
+
+        def unpack(deb_path, unpack_path):
+            if deb_path.name.startswith("b-"):
+                # finish unpacking b-package first
+                time.sleep(0.1)
+            Path(unpack_path, "usr", "lib").mkdir(parents=True)
+            Path(unpack_path, "usr", "lib", deb_path.name).touch()
+            Path(unpack_path, "usr", "bin").mkdir()
+            Path(unpack_path, "usr", "bin", "fake").write_text(deb_path.name)
+
+        mock_unpack.side_effect = unpack
+
+        repo.Ubuntu.unpack_stage_packages(
+            stage_packages_path=packages_path, install_path=install_path
+        )
+
+        # packages are installed in order, whichever is unpacked first
+        assert Path(install_path, "usr", "bin", "fake").read_text() == (
+            "b-package_1.0_amd64.deb"
+        )
+        assert sorted(os.listdir(install_path / "usr" / "lib")) == [
+            "a-package_1.0_amd64.deb",
+            "b-package_1.0_amd64.deb",
+        ]
+        # staging directories are removed
+        assert not list(Path(self.path).glob(".stage-packages-*"))
+
 
 class BuildPackagesTestCase(unit.TestCase):
     def setUp(self):
@@ -575,6 +783,14 @@ class PackageForFileTest(unit.TestCase):
     def setUp(self):
         super().setUp()
 
+        # without a dpkg database, dpkg-query is run for each file
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.repo._dpkg_index._DPKG_INFO_PATH",
+                Path(self.path, "missing"),
+            )
+        )
+
         def fake_dpkg_query(*args, **kwargs):
             # dpkg-query -S file_path
             if args[0][2].as_posix() == "/bin/bash":
@@ -625,6 +841,57 @@ class PackageForFileTest(unit.TestCase):
         self.assertThat(repo.Ubuntu.get_package_for_file(symlink), Equals("coreutils"))
 
 
+class PackageForFileIndexTest(unit.TestCase):
+    def setUp(self):
+        super().setUp()
+
+        info_path = Path(self.path, "info")
+        info_path.mkdir()
+        Path(info_path, "bash.list").write_text("/.\n/bin\n/bin/bash\n")
+        Path(info_path, "libc6:amd64.list").write_text(
+            f"/.\n/lib\n{self.path}/lib/libc.so.6\n{self.path}/lib/missing.so\n"
+        )
+        Path(self.path, "lib").mkdir()
+        Path(self.path, "lib", "libc.so.6").touch()
+
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.repo._dpkg_index._DPKG_INFO_PATH",
+                info_path,
+            )
+        )
+        self.fake_check_output = self.useFixture(
+            fixtures.MockPatch("subprocess.check_output")
+        ).mock
+
+    def test_get_package_for_file(self):
+        assert repo.Ubuntu.get_package_for_file("/bin/bash") == "bash"
+        assert repo.Ubuntu.get_package_for_file(f"{self.path}/lib/libc.so.6") == (
+            "libc6"
+        )
+        self.fake_check_output.assert_not_called()
+
+    def test_get_package_for_file_not_found(self):
+        self.assertRaises(
+            repo.errors.FileProviderNotFound,
+            repo.Ubuntu.get_package_for_file,
+            "/bin/not-found",
+        )
+        self.fake_check_output.assert_not_called()
+
+    def test_get_package_libraries(self):
+        assert repo.Ubuntu.get_package_libraries("libc6") == {
+            f"{self.path}/lib/libc.so.6"
+        }
+        self.fake_check_output.assert_not_called()
+
+    def test_get_package_libraries_not_installed(self):
+        self.fake_check_output.return_value = b""
+
+        assert repo.Ubuntu.get_package_libraries("not-installed") == set()
+        self.fake_check_output.assert_called_once_with(["dpkg", "-L", "not-installed"])
+
+
 class TestGetPackagesInBase(testtools.TestCase):
     def test_hardcoded_core18(self):
         packages = [
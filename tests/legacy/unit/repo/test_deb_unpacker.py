@@ -0,0 +1,154 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import tarfile
+
+import pytest
+
+from snapcraft_legacy.internal import xattrs
+from snapcraft_legacy.internal.repo import _deb_unpacker, errors
+
+
+def _make_tar(entries, compression):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode=f"w:{compression}") as tar:
+        for info, content in entries:
+            info.mtime = 1600000000
+            if content is None:
+                tar.addfile(info)
+            else:
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+def _get_entries(name):
+    entries = []
+    directory = tarfile.TarInfo("./usr/bin")
+    directory.type = tarfile.DIRTYPE
+    directory.mode = 0o755
+    entries.append((directory, None))
+    binary = tarfile.TarInfo("./usr/bin/fake")
+    binary.mode = 0o755
+    entries.append((binary, f"{name}\n".encode()))
+    symlink = tarfile.TarInfo("./usr/bin/fake-link")
+    symlink.type = tarfile.SYMTYPE
+    symlink.linkname = "fake"
+    entries.append((symlink, None))
+    hardlink = tarfile.TarInfo("./usr/bin/fake-hardlink")
+    hardlink.type = tarfile.LNKTYPE
+    hardlink.linkname = "./usr/bin/fake"
+    entries.append((hardlink, None))
+    return entries
+
+
+def _make_deb(path, *, compression="gz", name="fake-package", entries=None):
+    control = f"Package: {name}\nVersion: 1.0\nArchitecture: amd64\n"
+    control_info = tarfile.TarInfo("./control")
+    control_tar = _make_tar([(control_info, control.encode())], compression)
+
+    if entries is None:
+        entries = _get_entries(name)
+    data_tar = _make_tar(entries, compression)
+
+    suffix = f".{compression}" if compression else ""
+    members = [
+        ("debian-binary", b"2.0\n"),
+        (f"control.tar{suffix}", control_tar),
+        (f"data.tar{suffix}", data_tar),
+    ]
+
+    with open(path, "wb") as deb:
+        deb.write(b"!<arch>\n")
+        for member_name, content in members:
+            header = (
+                f"{member_name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(content):<10}`\n"
+            )
+            deb.write(header.encode())
+            deb.write(content)
+            if len(content) % 2:
+                deb.write(b"\n")
+
+
+@pytest.mark.parametrize("compression", ["", "gz", "xz", "bz2"])
+def test_unpack_deb(tmp_path, compression):
+    deb_path = tmp_path / "fake-package.deb"
+    install_path = tmp_path / "install"
+    _make_deb(deb_path, compression=compression)
+
+    stage_package = _deb_unpacker.unpack_deb(deb_path, install_path)
+
+    assert stage_package == "fake-package=1.0"
+    binary = install_path / "usr" / "bin" / "fake"
+    assert binary.read_text() == "fake-package\n"
+    assert os.stat(binary).st_mode & 0o777 == 0o755
+    assert os.stat(binary).st_mtime == 1600000000
+    assert xattrs.read_origin_stage_package(str(binary)) == "fake-package=1.0"
+    assert os.readlink(install_path / "usr" / "bin" / "fake-link") == "fake"
+    assert (install_path / "usr" / "bin" / "fake-hardlink").samefile(binary)
+    # no temporary files are left behind
+    assert sorted(os.listdir(install_path / "usr" / "bin")) == [
+        "fake",
+        "fake-hardlink",
+        "fake-link",
+    ]
+
+
+def test_unpack_deb_overwrites(tmp_path):
+    first_path = tmp_path / "first.deb"
+    second_path = tmp_path / "second.deb"
+    install_path = tmp_path / "install"
+    _make_deb(first_path, name="first")
+    _make_deb(second_path, name="second")
+
+    _deb_unpacker.unpack_deb(first_path, install_path)
+    _deb_unpacker.unpack_deb(second_path, install_path)
+
+    binary = install_path / "usr" / "bin" / "fake"
+    assert binary.read_text() == "second\n"
+    assert xattrs.read_origin_stage_package(str(binary)) == "second=1.0"
+
+
+def test_unpack_deb_unsupported_compression(tmp_path):
+    deb_path = tmp_path / "fake-package.deb"
+    _make_deb(deb_path)
+    deb_path.write_bytes(deb_path.read_bytes().replace(b".tar.gz ", b".tar.zst"))
+
+    with pytest.raises(_deb_unpacker.UnsupportedDebError):
+        _deb_unpacker.unpack_deb(deb_path, tmp_path / "install")
+
+    assert not (tmp_path / "install").exists()
+
+
+def test_unpack_deb_invalid(tmp_path):
+    deb_path = tmp_path / "fake-package.deb"
+    deb_path.write_bytes(b"not a deb")
+
+    with pytest.raises(errors.UnpackError):
+        _deb_unpacker.unpack_deb(deb_path, tmp_path / "install")
+
+
+def test_unpack_deb_outside_of_install_path(tmp_path):
+    deb_path = tmp_path / "fake-package.deb"
+    evil = tarfile.TarInfo("./../evil")
+    _make_deb(deb_path, entries=[(evil, b"evil\n")])
+
+    with pytest.raises(errors.UnpackError):
+        _deb_unpacker.unpack_deb(deb_path, tmp_path / "install")
+
+    assert not (tmp_path / "evil").exists()
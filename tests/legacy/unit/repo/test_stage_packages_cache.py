@@ -0,0 +1,163 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from unittest import mock
+
+import pytest
+
+from snapcraft_legacy.internal.repo._stage_packages_cache import StagePackagesCache
+
+
+def _fake_unpack(deb_path, install_path):
+    (install_path / "usr" / "lib" / "pkgconfig").mkdir(parents=True)
+    (install_path / "usr" / "lib" / "libfake.so.1").write_text(deb_path.read_text())
+    (install_path / "usr" / "lib" / "libfake.so").symlink_to("libfake.so.1")
+    (install_path / "usr" / "lib" / "pkgconfig" / "fake.pc").write_text("prefix=/usr")
+
+
+@pytest.fixture
+def unpack():
+    return mock.Mock(side_effect=_fake_unpack)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StagePackagesCache(tmp_path / "cache", max_size=1024 * 1024)
+
+
+@pytest.fixture
+def deb_path(tmp_path):
+    deb_path = tmp_path / "fake_1.0_amd64.deb"
+    deb_path.write_text("fake 1.0")
+    return deb_path
+
+
+def test_install(tmp_path, cache, unpack, deb_path):
+    normalize = mock.Mock()
+
+    for install_path in (tmp_path / "install1", tmp_path / "install2"):
+        entry_path = cache.install(
+            deb_path, install_path, unpack=unpack, normalize=normalize
+        )
+        assert entry_path == tmp_path / "cache" / "fake_1.0_amd64"
+
+    # the package is unpacked and normalized once
+    assert unpack.call_count == 1
+    assert normalize.call_count == 1
+
+    for install_path in (tmp_path / "install1", tmp_path / "install2"):
+        library = install_path / "usr" / "lib" / "libfake.so.1"
+        assert library.read_text() == "fake 1.0"
+        assert library.samefile(entry_path / "tree" / "usr" / "lib" / "libfake.so.1")
+        assert os.readlink(install_path / "usr" / "lib" / "libfake.so") == (
+            "libfake.so.1"
+        )
+        # files rewritten when normalizing the install directory are copied
+        pc_file = install_path / "usr" / "lib" / "pkgconfig" / "fake.pc"
+        assert pc_file.read_text() == "prefix=/usr"
+        assert not pc_file.samefile(
+            entry_path / "tree" / "usr" / "lib" / "pkgconfig" / "fake.pc"
+        )
+
+
+def test_install_modified_entry(tmp_path, cache, unpack, deb_path):
+    normalize = mock.Mock()
+    cache.install(deb_path, tmp_path / "install1", unpack=unpack, normalize=normalize)
+
+    # a file modified through a hardlink in an install directory
+    (tmp_path / "install1" / "usr" / "lib" / "libfake.so.1").write_text("modified")
+
+    cache.install(deb_path, tmp_path / "install2", unpack=unpack, normalize=normalize)
+
+    assert unpack.call_count == 2
+    library = tmp_path / "install2" / "usr" / "lib" / "libfake.so.1"
+    assert library.read_text() == "fake 1.0"
+
+
+def test_install_modified_entry_same_size_and_mtime(tmp_path, cache, unpack, deb_path):
+    normalize = mock.Mock()
+    cache.install(deb_path, tmp_path / "install1", unpack=unpack, normalize=normalize)
+
+    # written in place, preserving the size and modification time (cp -p)
+    library = tmp_path / "install1" / "usr" / "lib" / "libfake.so.1"
+    stat = library.stat()
+    library.write_text("FAKE 1.0")
+    os.utime(library, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    cache.install(deb_path, tmp_path / "install2", unpack=unpack, normalize=normalize)
+
+    assert unpack.call_count == 2
+    library = tmp_path / "install2" / "usr" / "lib" / "libfake.so.1"
+    assert library.read_text() == "fake 1.0"
+
+
+def test_install_different_package(tmp_path, cache, unpack, deb_path):
+    normalize = mock.Mock()
+    cache.install(deb_path, tmp_path / "install1", unpack=unpack, normalize=normalize)
+
+    # same name, version and architecture, but a different build
+    deb_path.write_text("fake 1.0 rebuilt")
+    cache.install(deb_path, tmp_path / "install2", unpack=unpack, normalize=normalize)
+
+    assert unpack.call_count == 2
+    library = tmp_path / "install2" / "usr" / "lib" / "libfake.so.1"
+    assert library.read_text() == "fake 1.0 rebuilt"
+
+
+def test_install_not_cacheable(tmp_path, cache, unpack):
+    deb_path = tmp_path / "fake.deb"
+    deb_path.write_text("fake")
+    install_path = tmp_path / "install"
+
+    entry_path = cache.install(
+        deb_path, install_path, unpack=unpack, normalize=mock.Mock()
+    )
+
+    assert entry_path is None
+    unpack.assert_called_once_with(deb_path, install_path)
+    assert not (tmp_path / "cache").exists()
+
+
+def test_prune(tmp_path, unpack):
+    cache = StagePackagesCache(tmp_path / "cache", max_size=0)
+    entries = []
+    for index, name in enumerate(["first", "second", "third"]):
+        deb_path = tmp_path / f"{name}_1.0_amd64.deb"
+        deb_path.write_text(name)
+        entry_path = cache.install(
+            deb_path, tmp_path / "install", unpack=unpack, normalize=mock.Mock()
+        )
+        os.utime(entry_path / "manifest.json", (index, index))
+        entries.append(entry_path)
+
+    # an interrupted unpack
+    (tmp_path / "cache" / ".fourth_1.0_amd64.1234-1").mkdir()
+    os.utime(tmp_path / "cache" / ".fourth_1.0_amd64.1234-1", (0, 0))
+
+    entry_size = len("first") + len("prefix=/usr") + len("libfake.so.1")
+    removed_size = cache.prune(max_size=entry_size * 2, keep=[entries[0]])
+
+    # the least recently used entry not in use is removed
+    assert removed_size == len("second") + len("prefix=/usr") + len("libfake.so.1")
+    assert sorted(os.listdir(tmp_path / "cache")) == [
+        "first_1.0_amd64",
+        "third_1.0_amd64",
+    ]
+
+    cache.prune()
+
+    assert os.listdir(tmp_path / "cache") == []
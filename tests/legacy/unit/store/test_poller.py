@@ -0,0 +1,144 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from snapcraft_legacy.storeapi import errors, poller
+from snapcraft_legacy.storeapi._status_tracker import StatusTracker
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Advance a fake monotonic clock on every sleep."""
+    sleeps = []
+    now = [0.0]
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return sleeps
+
+
+class FakeStore:
+    """Report uploads as processed after a number of polls."""
+
+    def __init__(self, polls):
+        self.polls = dict(polls)
+        self.requests = []
+
+    def get_status(self, status_url):
+        self.requests.append(status_url)
+        self.polls[status_url] -= 1
+        if self.polls[status_url] > 0:
+            return {"code": "being_processed", "processed": False}
+        return {"code": "ready_to_release", "processed": True, "url": status_url}
+
+
+def test_poll(fake_clock):
+    store = FakeStore({"https://status/1": 1})
+
+    statuses = poller.StatusPoller(store.get_status).poll(["https://status/1"])
+
+    assert statuses == {
+        "https://status/1": {
+            "code": "ready_to_release",
+            "processed": True,
+            "url": "https://status/1",
+        }
+    }
+    assert fake_clock == []
+
+
+def test_poll_many(fake_clock):
+    store = FakeStore({"https://status/1": 3, "https://status/2": 1})
+
+    statuses = poller.StatusPoller(store.get_status).poll(
+        ["https://status/1", "https://status/2"]
+    )
+
+    assert sorted(statuses) == ["https://status/1", "https://status/2"]
+    # processed uploads are not polled again
+    assert store.requests == [
+        "https://status/1",
+        "https://status/2",
+        "https://status/1",
+        "https://status/1",
+    ]
+    assert len(fake_clock) == 2
+
+
+def test_poll_backoff(fake_clock):
+    store = FakeStore({"https://status/1": 8})
+
+    poller.StatusPoller(
+        store.get_status, initial_delay=1, max_delay=10, backoff_factor=2
+    ).poll(["https://status/1"])
+
+    # jitter waits between half and the whole delay
+    for wait, delay in zip(fake_clock, [1, 2, 4, 8, 10, 10, 10]):
+        assert delay / 2 <= wait <= delay
+    assert len(fake_clock) == 7
+
+
+def test_poll_timeout(fake_clock):
+    store = FakeStore({"https://status/1": 1000})
+
+    with pytest.raises(errors.StoreStatusTimeoutError) as raised:
+        poller.StatusPoller(store.get_status, max_delay=10, timeout=60).poll(
+            ["https://status/1"]
+        )
+
+    assert str(raised.value) == (
+        "Timed out after 60 seconds waiting for the Snap Store to process the upload."
+    )
+    # the last wait does not go past the timeout
+    assert sum(fake_clock) == 60
+
+
+def test_poll_is_processed(fake_clock):
+    store = FakeStore({"https://status/1": 2})
+    seen = []
+
+    def is_processed(status):
+        seen.append(status["code"])
+        return status["processed"]
+
+    poller.StatusPoller(store.get_status, is_processed=is_processed).poll(
+        ["https://status/1"]
+    )
+
+    assert seen == ["being_processed", "ready_to_release"]
+
+
+def test_status_tracker(fake_clock):
+    responses = [
+        requests.ConnectionError(),
+        mock.Mock(json=lambda: {"code": "being_processed", "processed": False}),
+        mock.Mock(json=lambda: {"code": "ready_to_release", "processed": True}),
+    ]
+
+    with mock.patch("requests.get", side_effect=responses) as fake_get:
+        content = StatusTracker("https://status/1").track()
+
+    assert content == {"code": "ready_to_release", "processed": True}
+    assert fake_get.mock_calls == [mock.call("https://status/1")] * 3
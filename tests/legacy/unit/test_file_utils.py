@@ -160,6 +160,27 @@ class TestLinkOrCopy(unit.TestCase):
         file_utils.link_or_copy("foo/bar/baz/4", "foo2/bar/baz/4")
         self.assertTrue(os.path.isfile("foo2/bar/baz/4"))
 
+    @mock.patch("fcntl.ioctl")
+    def test_copy_reflink(self, mock_ioctl):
+        os.chmod("1", 0o751)
+
+        file_utils.copy("1", "foo/1")
+
+        mock_ioctl.assert_called_once_with(mock.ANY, 0x40049409, mock.ANY)
+        self.assertTrue(os.path.isfile("foo/1"))
+        self.assertThat(os.stat("foo/1").st_mode & 0o777, Equals(0o751))
+
+    @mock.patch("fcntl.ioctl", side_effect=OSError(95, "Operation not supported"))
+    def test_copy_reflink_not_supported(self, mock_ioctl):
+        with open("1", "w") as f:
+            f.write("contents")
+
+        file_utils.copy("1", "foo/1")
+
+        mock_ioctl.assert_called_once_with(mock.ANY, 0x40049409, mock.ANY)
+        with open("foo/1") as f:
+            self.assertThat(f.read(), Equals("contents"))
+
 
 class RequiresCommandSuccessTestCase(unit.TestCase):
     @mock.patch("subprocess.check_call")
@@ -0,0 +1,348 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import struct
+import sys
+import types
+import zlib
+from typing import NamedTuple
+from unittest import mock
+
+from testtools.matchers import Equals
+
+import tests.legacy
+from snapcraft_legacy.internal import errors, squashfs
+from tests.legacy import unit
+
+
+def _get_snap_path(name):
+    return os.path.join(os.path.dirname(tests.legacy.__file__), "data", name)
+
+
+_BLOCK_SIZE = 4096
+_NONE = 0xFFFFFFFF
+
+
+class _Link(NamedTuple):
+    target: str
+
+
+class _ImageWriter:
+    """Write small images with zlib data blocks and uncompressed metadata.
+
+    Entries of the tree are bytes for files, _Link for symbolic links and
+    dicts for directories. Blocks of zeros are written as sparse blocks and
+    files have no fragments.
+    """
+
+    def __init__(self, *, extended: bool) -> None:
+        self._extended = extended
+        self._data = bytearray()
+        self._inodes = bytearray()
+        self._directories = bytearray()
+        self._inode_count = 0
+
+    def write(self, path, tree, *, compression=1):
+        root = self._add_directory(tree)
+        inode_table_start = squashfs._SUPERBLOCK.size + len(self._data)
+        directory_table_start = inode_table_start + 2 + len(self._inodes)
+        end = directory_table_start + 2 + len(self._directories)
+        superblock = squashfs._SUPERBLOCK.pack(
+            squashfs._MAGIC,
+            self._inode_count,
+            0,
+            _BLOCK_SIZE,
+            0,
+            compression,
+            12,
+            0,
+            1,
+            4,
+            0,
+            root,
+            end,
+            end,
+            2**64 - 1,
+            inode_table_start,
+            directory_table_start,
+            2**64 - 1,
+            2**64 - 1,
+        )
+        with open(path, "wb") as image:
+            image.write(superblock)
+            image.write(self._data)
+            for block in (self._inodes, self._directories):
+                assert len(block) <= squashfs._METADATA_BLOCK_SIZE
+                image.write(struct.pack("<H", 0x8000 | len(block)))
+                image.write(block)
+
+    def _add_inode(self, inode_type, permissions, body):
+        self._inode_count += 1
+        reference = len(self._inodes)
+        self._inodes += struct.pack(
+            "<HHHHII", inode_type, permissions, 0, 0, 0, self._inode_count
+        )
+        self._inodes += body
+        return reference
+
+    def _add(self, entry):
+        if isinstance(entry, dict):
+            return self._add_directory(entry), 1
+        if isinstance(entry, _Link):
+            return self._add_symlink(entry.target), 3
+        return self._add_file(entry), 2
+
+    def _add_directory(self, tree):
+        listing = bytearray()
+        children = [(name, *self._add(entry)) for name, entry in sorted(tree.items())]
+        if children:
+            listing += struct.pack("<III", len(children) - 1, 0, 0)
+        for name, reference, entry_type in children:
+            listing += struct.pack("<HhHH", reference, 0, entry_type, len(name) - 1)
+            listing += name.encode()
+
+        offset = len(self._directories)
+        self._directories += listing
+        if self._extended:
+            body = struct.pack("<IIIIHHI", 2, len(listing) + 3, 0, 0, 0, offset, _NONE)
+            return self._add_inode(8, 0o755, body)
+        body = struct.pack("<IIHHI", 0, 2, len(listing) + 3, offset, 0)
+        return self._add_inode(1, 0o755, body)
+
+    def _add_file(self, content):
+        blocks_start = squashfs._SUPERBLOCK.size + len(self._data)
+        block_sizes = []
+        for offset in range(0, len(content), _BLOCK_SIZE):
+            block = content[offset : offset + _BLOCK_SIZE]
+            if not block.strip(b"\0"):
+                block_sizes.append(0)
+                continue
+            compressed = zlib.compress(block)
+            self._data += compressed
+            block_sizes.append(len(compressed))
+
+        sizes = struct.pack(f"<{len(block_sizes)}I", *block_sizes)
+        if self._extended:
+            body = struct.pack(
+                "<QQQIIII", blocks_start, len(content), 0, 1, _NONE, 0, _NONE
+            )
+            return self._add_inode(9, 0o644, body + sizes)
+        body = struct.pack("<IIII", blocks_start, _NONE, 0, len(content))
+        return self._add_inode(2, 0o644, body + sizes)
+
+    def _add_symlink(self, target):
+        body = struct.pack("<II", 1, len(target)) + target.encode()
+        if self._extended:
+            return self._add_inode(10, 0o777, body + struct.pack("<I", _NONE))
+        return self._add_inode(3, 0o777, body)
+
+
+def _write_image(path, tree, *, extended=False, compression=1):
+    _ImageWriter(extended=extended).write(path, tree, compression=compression)
+
+
+class SquashFSImageTestCase(unit.TestCase):
+    def test_read_file(self):
+        with squashfs.SquashFSImage(_get_snap_path("test-snap.snap")) as snap:
+            snap_yaml = snap.read_file("meta/snap.yaml")
+
+        self.assertThat(
+            snap_yaml.decode(),
+            Equals(
+                "architectures:\n"
+                "- amd64\n"
+                "description: Description of the most simple snap\n"
+                "name: basic\n"
+                "summary: Summary of the most simple snap\n"
+                "version: 0.1\n"
+            ),
+        )
+
+    def test_read_file_normalizes_path(self):
+        with squashfs.SquashFSImage(_get_snap_path("test-snap.snap")) as snap:
+            self.assertThat(
+                snap.read_file("/meta/../meta/./snap.yaml"),
+                Equals(snap.read_file("meta/snap.yaml")),
+            )
+
+    def test_read_file_missing(self):
+        with squashfs.SquashFSImage(_get_snap_path("test-snap.snap")) as snap:
+            self.assertRaises(FileNotFoundError, snap.read_file, "meta/gui/icon.png")
+            self.assertRaises(
+                NotADirectoryError, snap.read_file, "meta/snap.yaml/icon.png"
+            )
+            self.assertRaises(IsADirectoryError, snap.read_file, "meta")
+
+    def test_listdir(self):
+        with squashfs.SquashFSImage(_get_snap_path("test-snap-with-icon.snap")) as snap:
+            self.assertThat(snap.listdir(), Equals(["meta"]))
+            self.assertThat(snap.listdir("meta"), Equals(["gui", "snap.yaml"]))
+            self.assertThat(snap.listdir("meta/gui"), Equals(["icon.svg"]))
+            self.assertRaises(NotADirectoryError, snap.listdir, "meta/snap.yaml")
+
+    def test_exists(self):
+        with squashfs.SquashFSImage(_get_snap_path("test-snap-with-icon.snap")) as snap:
+            self.assertTrue(snap.exists("meta/gui/icon.svg"))
+            self.assertFalse(snap.exists("meta/gui/icon.png"))
+            self.assertFalse(snap.exists("meta/snap.yaml/icon.png"))
+
+    def test_not_a_squashfs_image(self):
+        raised = self.assertRaises(
+            errors.SquashFSError,
+            squashfs.SquashFSImage,
+            _get_snap_path("invalid.snap"),
+        )
+
+        self.assertThat(
+            str(raised),
+            Equals(
+                "Cannot read squashfs image {!r}: not a squashfs image.".format(
+                    _get_snap_path("invalid.snap")
+                )
+            ),
+        )
+
+    def test_unsupported_compression(self):
+        shutil.copy(_get_snap_path("test-snap.snap"), "test.snap")
+        with open("test.snap", "r+b") as snap_file:
+            # the compression id follows five 32 bit fields
+            snap_file.seek(20)
+            snap_file.write(struct.pack("<H", 5))
+
+        raised = self.assertRaises(
+            errors.SquashFSUnsupportedCompressionError,
+            squashfs.SquashFSImage,
+            "test.snap",
+        )
+
+        self.assertThat(
+            str(raised),
+            Equals(
+                "Cannot read squashfs image 'test.snap': "
+                "unsupported compression (id 5)."
+            ),
+        )
+
+    def test_truncated_image(self):
+        with open(_get_snap_path("test-snap.snap"), "rb") as snap_file:
+            data = snap_file.read()
+        with open("test.snap", "wb") as snap_file:
+            snap_file.write(data[:400])
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            self.assertRaises(errors.SquashFSError, snap.read_file, "meta/snap.yaml")
+
+    def test_read_file_several_blocks(self):
+        content = bytes(range(256)) * 40
+        _write_image("test.snap", {"file": content})
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            self.assertThat(snap.read_file("file"), Equals(content))
+
+    def test_read_file_sparse_block(self):
+        content = b"a" * _BLOCK_SIZE + bytes(_BLOCK_SIZE) + b"b" * 100
+        _write_image("test.snap", {"file": content, "empty": bytes(100)})
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            self.assertThat(snap.read_file("file"), Equals(content))
+            self.assertThat(snap.read_file("empty"), Equals(bytes(100)))
+
+    def test_extended_inodes(self):
+        content = b"a" * (_BLOCK_SIZE + 1)
+        _write_image(
+            "test.snap",
+            {"dir": {"file": content, "link": _Link("file")}},
+            extended=True,
+        )
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            self.assertThat(snap.listdir(), Equals(["dir"]))
+            self.assertThat(snap.listdir("dir"), Equals(["file", "link"]))
+            self.assertThat(snap.read_file("dir/file"), Equals(content))
+            self.assertThat(snap.read_file("dir/link"), Equals(content))
+
+    def test_follow_symlinks(self):
+        _write_image(
+            "test.snap",
+            {
+                "meta": {
+                    "snap.yaml": b"name: test\n",
+                    "relative": _Link("snap.yaml"),
+                    "parent": _Link("../meta/snap.yaml"),
+                    "absolute": _Link("/meta/snap.yaml"),
+                },
+                "link-to-dir": _Link("meta"),
+                "chained": _Link("meta/absolute"),
+            },
+        )
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            for path in (
+                "meta/relative",
+                "meta/parent",
+                "meta/absolute",
+                "link-to-dir/snap.yaml",
+                "chained",
+            ):
+                self.assertThat(snap.read_file(path), Equals(b"name: test\n"))
+            self.assertThat(snap.listdir("link-to-dir"), Equals(snap.listdir("meta")))
+
+    def test_follow_symlinks_missing_target(self):
+        _write_image("test.snap", {"dangling": _Link("missing")})
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            self.assertFalse(snap.exists("dangling"))
+            self.assertRaises(FileNotFoundError, snap.read_file, "dangling")
+
+    def test_follow_symlinks_loop(self):
+        _write_image(
+            "test.snap",
+            {"self": _Link("self"), "a": _Link("b"), "b": _Link("./a")},
+        )
+
+        with squashfs.SquashFSImage("test.snap") as snap:
+            for path in ("self", "a"):
+                raised = self.assertRaises(errors.SquashFSError, snap.read_file, path)
+                self.assertThat(
+                    str(raised),
+                    Equals(
+                        "Cannot read squashfs image 'test.snap': "
+                        f"too many levels of symbolic links in {path!r}."
+                    ),
+                )
+
+    def test_decompression_error(self):
+        zstandard = types.ModuleType("zstandard")
+        zstandard.ZstdError = type("ZstdError", (Exception,), {})
+        zstandard.ZstdDecompressor = mock.Mock()
+        decompress = zstandard.ZstdDecompressor.return_value.decompressobj.return_value
+        decompress.decompress.side_effect = zstandard.ZstdError("bad frame")
+        _write_image("test.snap", {"file": b"data"}, compression=6)
+
+        with mock.patch.dict(sys.modules, {"zstandard": zstandard}):
+            with squashfs.SquashFSImage("test.snap") as snap:
+                raised = self.assertRaises(errors.SquashFSError, snap.read_file, "file")
+
+        self.assertThat(
+            str(raised),
+            Equals(
+                "Cannot read squashfs image 'test.snap': "
+                "cannot decompress data (bad frame)."
+            ),
+        )
@@ -0,0 +1,123 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import subprocess
+import sys
+from pathlib import Path
+
+import craft_cli
+import pytest
+
+import snapcraft
+from snapcraft import cli, commands
+
+_COMMANDS = [cmd for group in cli.COMMAND_GROUPS for cmd in group.commands]
+
+
+@pytest.mark.parametrize("cmd", _COMMANDS, ids=lambda cmd: cmd.name)
+def test_command_descriptor(cmd):
+    command_class = cmd.load()
+
+    assert issubclass(command_class, craft_cli.BaseCommand)
+    assert command_class is getattr(commands, cmd.__name__)
+    assert command_class.name == cmd.name
+    assert cmd.help_msg == command_class.help_msg
+    assert cmd.hidden == command_class.hidden
+
+
+def test_command_descriptor_instance():
+    command = cli.LazyCommand("version", "VersionCommand")(None)
+
+    assert isinstance(command, commands.VersionCommand)
+
+
+def test_command_descriptor_isinstance():
+    command = commands.VersionCommand(None)
+
+    assert isinstance(command, cli.LazyCommand("version", "VersionCommand"))
+    assert not isinstance(command, cli.LazyCommand("whoami", "StoreWhoAmICommand"))
+
+
+def test_command_help(capsys, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["snapcraft", "version", "--help"])
+
+    cli.run()
+
+    assert "snapcraft version [options]" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "argv,registered",
+    [
+        (["build"], True),
+        (["list-extensions"], True),
+        (["lint", "test.snap"], True),
+        (["whoami"], False),
+        (["version"], False),
+    ],
+)
+def test_plugins_registered_when_needed(
+    mocker, tmp_path, monkeypatch, argv, registered
+):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["snapcraft", *argv])
+    mocker.patch("craft_cli.Dispatcher.run")
+    mock_register = mocker.patch("snapcraft.parts.plugins.register")
+
+    cli.run()
+
+    assert mock_register.called is registered
+
+
+def test_all_commands_listed():
+    assert sorted(cmd.__name__ for cmd in _COMMANDS) == sorted(commands.__all__)
+
+
+def test_commands_unknown_attribute():
+    with pytest.raises(AttributeError):
+        commands.NotACommand  # noqa: B018 pylint: disable=pointless-statement
+
+
+def test_version_does_not_import_commands(tmp_path):
+    """Cheap commands must not pay for the command implementations."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "snapcraft", "--version"],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=tmp_path,
+        env={
+            "PATH": "/usr/bin:/bin",
+            "PYTHONPATH": str(Path(snapcraft.__file__).parents[1]),
+            "XDG_STATE_HOME": str(tmp_path),
+        },
+    )
+    imported = {
+        line.rsplit("|", 1)[-1].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+    assert "snapcraft.cli" in imported
+    assert not {
+        module
+        for module in imported
+        if module.split(".")[0] in ("craft_parts", "craft_store", "snapcraft_legacy")
+        or module.startswith("snapcraft.commands.")
+    }
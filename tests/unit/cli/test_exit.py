@@ -50,6 +50,19 @@ def test_no_keyring_error(capsys, mocker):
     )
 
 
+def test_other_error_raised(mocker):
+    """Errors are raised as is when the store is not in use."""
+    mocker.patch.object(sys, "argv", ["cmd", "version"])
+    mocker.patch.dict(sys.modules, {"craft_store.errors": None})
+    error = RuntimeError("not a store error")
+    mocker.patch("snapcraft.commands.version.VersionCommand.run", side_effect=error)
+
+    with pytest.raises(RuntimeError) as raised:
+        cli.run()
+
+    assert raised.value is error
+
+
 @pytest.mark.parametrize("is_managed,report_errors", [(True, False), (False, True)])
 def test_emit_error(emitter, mocker, is_managed, report_errors):
     mocker.patch("snapcraft.utils.is_managed_mode", return_value=is_managed)
@@ -22,6 +22,7 @@ from textwrap import dedent
 from unittest.mock import Mock, call
 
 import pytest
+import yaml
 from craft_providers.bases import BuilddBaseAlias
 from craft_providers.multipass import MultipassProvider
 
@@ -30,6 +31,10 @@ from snapcraft.commands.lint import LintCommand
 from snapcraft.errors import SnapcraftError
 from snapcraft.meta.snap_yaml import SnapMetadata
 from snapcraft.projects import Lint, Project
+from snapcraft_legacy.internal.errors import SquashFSUnsupportedCompressionError
+
+_MOUNT_COMMAND = ["mount", "-t", "squashfs", "-o", "ro,nodev"]
+_SQUASHFUSE_COMMAND = ["squashfuse", "-o", "ro"]
 
 
 @pytest.fixture
@@ -122,6 +127,25 @@ def mock_report(mocker):
     return mocker.patch("snapcraft.commands.lint.linters.report")
 
 
+@pytest.fixture
+def mock_squashfs_image(mocker):
+    """Mock the squashfs image the metadata files are read from."""
+    _mock_image = mocker.patch("snapcraft.commands.lint.squashfs.SquashFSImage")
+    _mock_image.return_value.__enter__.return_value.exists.return_value = False
+    return _mock_image
+
+
+@pytest.fixture
+def mock_mount_error(fake_process, fake_snap_file):
+    """Fail to mount the snap file with the kernel and with squashfuse."""
+    fake_process.register_subprocess(
+        [*_MOUNT_COMMAND, str(fake_snap_file), fake_process.any()], returncode=1
+    )
+    fake_process.register_subprocess(
+        [*_SQUASHFUSE_COMMAND, str(fake_snap_file), fake_process.any()], returncode=1
+    )
+
+
 def test_lint_default(
     emitter,
     fake_assert_file,
@@ -355,8 +379,10 @@ def test_lint_managed_mode(
     grade,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
 ):
     """Run the linter in managed mode."""
@@ -366,9 +392,6 @@ def test_lint_managed_mode(
     fake_snap_file.touch()
 
     # register subprocess calls
-    fake_process.register_subprocess(
-        ["unsquashfs", "-force", "-dest", fake_process.any(), str(fake_snap_file)]
-    )
 
     # build snap install command
     command = ["snap", "install", str(fake_snap_file)]
@@ -379,7 +402,7 @@ def test_lint_managed_mode(
         command.append("--devmode")
     fake_process.register_subprocess(command)
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     fake_snap_metadata.confinement = confinement
     fake_snap_metadata.grade = grade
     mocker.patch(
@@ -395,15 +418,21 @@ def test_lint_managed_mode(
     mock_run_linters.assert_called_once_with(
         lint=Lint(ignore=["classic"]),
         location=Path("/snap/test/current"),
+        durations={},
     )
     mock_report.assert_called_once_with(
-        mock_run_linters.return_value, intermediate=True
+        mock_run_linters.return_value, intermediate=True, durations={}
     )
     emitter.assert_interactions(
         [
             call("progress", "Running linter.", permanent=True),
             call("debug", f"Assertion file {str(fake_assert_file)!r} does not exist."),
-            call("progress", f"Unsquashing snap file {fake_snap_file.name!r}."),
+            call(
+                "progress", f"Reading metadata from snap file {fake_snap_file.name!r}."
+            ),
+            call("progress", f"Mounting snap file {fake_snap_file.name!r}."),
+            call("debug", "Could not mount snap file with 'mount'."),
+            call("debug", "Could not mount snap file with 'squashfuse'."),
             call("progress", f"Installing snap with {shlex.join(command)!r}."),
             call("verbose", "No lint filters defined in 'snapcraft.yaml'."),
         ]
@@ -419,8 +448,10 @@ def test_lint_managed_mode_without_snapcraft_yaml(
     fake_snapcraft_project,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
 ):
     """Run the linter in managed mode without a snapcraft.yaml file."""
@@ -430,14 +461,11 @@ def test_lint_managed_mode_without_snapcraft_yaml(
     fake_snap_file.touch()
 
     # register subprocess calls
-    fake_process.register_subprocess(
-        ["unsquashfs", "-force", "-dest", fake_process.any(), str(fake_snap_file)]
-    )
     fake_process.register_subprocess(
         ["snap", "install", str(fake_snap_file), "--dangerous"]
     )
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     mocker.patch(
         "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
     )
@@ -451,15 +479,21 @@ def test_lint_managed_mode_without_snapcraft_yaml(
     mock_run_linters.assert_called_once_with(
         lint=Lint(ignore=["classic"]),
         location=Path("/snap/test/current"),
+        durations={},
     )
     mock_report.assert_called_once_with(
-        mock_run_linters.return_value, intermediate=True
+        mock_run_linters.return_value, intermediate=True, durations={}
     )
     emitter.assert_interactions(
         [
             call("progress", "Running linter.", permanent=True),
             call("debug", f"Assertion file {str(fake_assert_file)!r} does not exist."),
-            call("progress", f"Unsquashing snap file {fake_snap_file.name!r}."),
+            call(
+                "progress", f"Reading metadata from snap file {fake_snap_file.name!r}."
+            ),
+            call("progress", f"Mounting snap file {fake_snap_file.name!r}."),
+            call("debug", "Could not mount snap file with 'mount'."),
+            call("debug", "Could not mount snap file with 'squashfuse'."),
             call(
                 "progress",
                 f"Installing snap with 'snap install {str(fake_snap_file)} "
@@ -479,32 +513,47 @@ def test_lint_managed_mode_without_snapcraft_yaml(
     )
 
 
-def test_lint_managed_mode_unsquash_error(
-    capsys,
+def test_lint_managed_mode_unsupported_compression(
     emitter,
+    fake_assert_file,
     fake_process,
     fake_snap_file,
     fake_snap_metadata,
     fake_snapcraft_project,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
 ):
-    """Raise an error if the snap file cannot be installed."""
+    """Extract the metadata files with unsquashfs if the compression is unsupported."""
     mock_is_managed_mode.return_value = True
+    mock_squashfs_image.side_effect = SquashFSUnsupportedCompressionError(
+        path=str(fake_snap_file), compression=7
+    )
 
     # create a snap file
     fake_snap_file.touch()
 
     # register subprocess calls
     fake_process.register_subprocess(
-        ["unsquashfs", "-force", "-dest", fake_process.any(), str(fake_snap_file)],
-        returncode=1,
+        [
+            "unsquashfs",
+            "-force",
+            "-dest",
+            fake_process.any(min=1, max=1),
+            str(fake_snap_file),
+            "meta/snap.yaml",
+            "snap/snapcraft.yaml",
+        ]
+    )
+    fake_process.register_subprocess(
+        ["snap", "install", str(fake_snap_file), "--dangerous"]
     )
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     mocker.patch(
         "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
     )
@@ -515,11 +564,245 @@ def test_lint_managed_mode_unsquash_error(
 
     cli.run()
 
+    mock_run_linters.assert_called_once_with(
+        lint=Lint(ignore=["classic"]),
+        location=Path("/snap/test/current"),
+        durations={},
+    )
+    emitter.assert_interactions(
+        [
+            call("progress", "Reading metadata from snap file 'test-snap.snap'."),
+            call(
+                "debug",
+                f"Cannot read squashfs image {str(fake_snap_file)!r}: "
+                "unsupported compression (id 7)., using unsquashfs",
+            ),
+        ]
+    )
+
+
+def test_lint_managed_mode_unsquash_error(
+    capsys,
+    emitter,
+    fake_process,
+    fake_snap_file,
+    mock_argv,
+    mock_is_managed_mode,
+    mock_squashfs_image,
+):
+    """Raise an error if the metadata files cannot be unsquashed."""
+    mock_is_managed_mode.return_value = True
+    mock_squashfs_image.side_effect = SquashFSUnsupportedCompressionError(
+        path=str(fake_snap_file), compression=7
+    )
+
+    # create a snap file
+    fake_snap_file.touch()
+
+    # register subprocess calls
+    fake_process.register_subprocess(
+        ["unsquashfs", "-force", "-dest", fake_process.any()], returncode=1
+    )
+
+    cli.run()
+
     out, err = capsys.readouterr()
     assert not out
     assert f"could not unsquash snap file {fake_snap_file.name!r}" in err
 
 
+def test_lint_managed_mode_read_error(
+    capsys, fake_snap_file, mock_argv, mock_is_managed_mode
+):
+    """Raise an error if the snap file is not a valid squashfs image."""
+    mock_is_managed_mode.return_value = True
+
+    # create an invalid snap file
+    fake_snap_file.write_bytes(b"not a squashfs image")
+
+    cli.run()
+
+    out, err = capsys.readouterr()
+    assert not out
+    assert f"could not read snap file {fake_snap_file.name!r}" in err
+
+
+@pytest.mark.parametrize(
+    "mount_command,unmount_command",
+    [
+        pytest.param(_MOUNT_COMMAND, ["umount"], id="kernel"),
+        pytest.param(_SQUASHFUSE_COMMAND, ["fusermount", "-u"], id="squashfuse"),
+    ],
+)
+def test_lint_managed_mode_mount(
+    emitter,
+    fake_process,
+    fake_snap_file,
+    fake_snap_metadata,
+    fake_snapcraft_project,
+    mock_argv,
+    mock_is_managed_mode,
+    mock_report,
+    mock_run_linters,
+    mock_squashfs_image,
+    mocker,
+    mount_command,
+    unmount_command,
+):
+    """Lint the mounted snap without installing it."""
+    mock_is_managed_mode.return_value = True
+
+    # create a snap file
+    fake_snap_file.touch()
+
+    # register subprocess calls, only the parametrized mount command succeeds
+    for command in (_MOUNT_COMMAND, _SQUASHFUSE_COMMAND):
+        fake_process.register_subprocess(
+            [*command, str(fake_snap_file), fake_process.any(min=1, max=1)],
+            returncode=0 if command == mount_command else 1,
+        )
+    fake_process.register_subprocess([*unmount_command, fake_process.any(min=1, max=1)])
+
+    # mock data from the snap
+    mocker.patch(
+        "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
+    )
+    mocker.patch(
+        "snapcraft.commands.lint.LintCommand._load_project",
+        return_value=fake_snapcraft_project,
+    )
+
+    cli.run()
+
+    mount_dir = fake_process.calls[-2][-1]
+    assert list(fake_process.calls)[-1] == [*unmount_command, mount_dir]
+    assert not Path(mount_dir).exists()
+    assert ["snap", "install"] not in [list(c[:2]) for c in fake_process.calls]
+    mock_run_linters.assert_called_once_with(
+        lint=Lint(ignore=["classic"]),
+        location=Path(mount_dir),
+        durations={},
+    )
+    mock_report.assert_called_once_with(
+        mock_run_linters.return_value, intermediate=True, durations={}
+    )
+    emitter.assert_progress("Mounting snap file 'test-snap.snap'.")
+
+
+@pytest.mark.parametrize("still_mounted", [False, True])
+def test_lint_managed_mode_unmount_error(
+    emitter,
+    fake_process,
+    fake_snap_file,
+    fake_snap_metadata,
+    fake_snapcraft_project,
+    mock_argv,
+    mock_is_managed_mode,
+    mock_report,
+    mock_run_linters,
+    mock_squashfs_image,
+    mocker,
+    still_mounted,
+):
+    """Lazily unmount a busy snap file, never remove a mount point."""
+    mock_is_managed_mode.return_value = True
+
+    # create a snap file
+    fake_snap_file.touch()
+
+    # register subprocess calls, the snap file stays busy
+    fake_process.register_subprocess(
+        [*_MOUNT_COMMAND, str(fake_snap_file), fake_process.any(min=1, max=1)]
+    )
+    fake_process.register_subprocess(
+        ["umount", fake_process.any(min=1, max=1)], returncode=1
+    )
+    fake_process.register_subprocess(
+        ["umount", "-l", fake_process.any(min=1, max=1)],
+        returncode=1 if still_mounted else 0,
+    )
+    mocker.patch("snapcraft.commands.lint.os.path.ismount", return_value=still_mounted)
+
+    # mock data from the snap
+    mocker.patch(
+        "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
+    )
+    mocker.patch(
+        "snapcraft.commands.lint.LintCommand._load_project",
+        return_value=fake_snapcraft_project,
+    )
+
+    cli.run()
+
+    mount_dir = fake_process.calls[-3][-1]
+    assert list(fake_process.calls)[-2:] == [
+        ["umount", mount_dir],
+        ["umount", "-l", mount_dir],
+    ]
+    assert Path(mount_dir).exists() == still_mounted
+    mock_report.assert_called_once_with(
+        mock_run_linters.return_value, intermediate=True, durations={}
+    )
+    if still_mounted:
+        emitter.assert_progress(
+            f"Could not unmount snap file from {mount_dir!r}.", permanent=True
+        )
+        Path(mount_dir).rmdir()
+
+
+def test_lint_managed_mode_base_not_installed(
+    emitter,
+    fake_process,
+    fake_snap_file,
+    fake_snap_metadata,
+    fake_snapcraft_project,
+    mock_argv,
+    mock_is_managed_mode,
+    mock_report,
+    mock_run_linters,
+    mock_squashfs_image,
+    mocker,
+):
+    """Install the snap if its base is not installed."""
+    mock_is_managed_mode.return_value = True
+
+    # create a snap file
+    fake_snap_file.touch()
+
+    # register subprocess calls
+    fake_process.register_subprocess(
+        ["snap", "install", str(fake_snap_file), "--dangerous"]
+    )
+
+    # mock data from the snap
+    fake_snap_metadata.base = "test-base"
+    mocker.patch(
+        "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
+    )
+    mocker.patch(
+        "snapcraft.commands.lint.LintCommand._load_project",
+        return_value=fake_snapcraft_project,
+    )
+
+    cli.run()
+
+    mock_run_linters.assert_called_once_with(
+        lint=Lint(ignore=["classic"]),
+        location=Path("/snap/test/current"),
+        durations={},
+    )
+    emitter.assert_interactions(
+        [
+            call("progress", "Reading metadata from snap file 'test-snap.snap'."),
+            call("debug", "Base 'test-base' is not installed, not mounting snap file."),
+            call(
+                "progress",
+                f"Installing snap with 'snap install {fake_snap_file} --dangerous'.",
+            ),
+        ]
+    )
+
+
 def test_lint_managed_mode_snap_install_error(
     capsys,
     emitter,
@@ -529,8 +812,10 @@ def test_lint_managed_mode_snap_install_error(
     fake_snapcraft_project,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
 ):
     """Raise an error if the snap file cannot be installed."""
@@ -540,14 +825,11 @@ def test_lint_managed_mode_snap_install_error(
     fake_snap_file.touch()
 
     # register subprocess calls
-    fake_process.register_subprocess(
-        ["unsquashfs", "-force", "-dest", fake_process.any(), str(fake_snap_file)]
-    )
     fake_process.register_subprocess(
         ["snap", "install", str(fake_snap_file), "--dangerous"], returncode=1
     )
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     mocker.patch(
         "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
     )
@@ -572,8 +854,10 @@ def test_lint_managed_mode_assert(
     fake_snapcraft_project,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
 ):
     """Run the linter in managed mode with an assert file."""
@@ -584,13 +868,10 @@ def test_lint_managed_mode_assert(
     fake_assert_file.touch()
 
     # register subprocess calls
-    fake_process.register_subprocess(
-        ["unsquashfs", "-force", "-dest", fake_process.any(), str(fake_snap_file)]
-    )
     fake_process.register_subprocess(["snap", "ack", str(fake_assert_file)])
     fake_process.register_subprocess(["snap", "install", str(fake_snap_file)])
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     mocker.patch(
         "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
     )
@@ -604,15 +885,19 @@ def test_lint_managed_mode_assert(
     mock_run_linters.assert_called_once_with(
         lint=Lint(ignore=["classic"]),
         location=Path("/snap/test/current"),
+        durations={},
     )
     mock_report.assert_called_once_with(
-        mock_run_linters.return_value, intermediate=True
+        mock_run_linters.return_value, intermediate=True, durations={}
     )
     emitter.assert_interactions(
         [
             call("progress", "Running linter.", permanent=True),
             call("debug", f"Found assertion file {str(fake_assert_file)!r}."),
-            call("progress", "Unsquashing snap file 'test-snap.snap'."),
+            call("progress", "Reading metadata from snap file 'test-snap.snap'."),
+            call("progress", "Mounting snap file 'test-snap.snap'."),
+            call("debug", "Could not mount snap file with 'mount'."),
+            call("debug", "Could not mount snap file with 'squashfuse'."),
             call(
                 "progress",
                 f"Installing assertion file with 'snap ack {fake_assert_file}'.",
@@ -632,8 +917,10 @@ def test_lint_managed_mode_assert_error(
     fake_snapcraft_project,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
 ):
     """If the assert file fails to be installed, install the snap dangerously."""
@@ -644,9 +931,6 @@ def test_lint_managed_mode_assert_error(
     fake_assert_file.touch()
 
     # register subprocess calls
-    fake_process.register_subprocess(
-        ["unsquashfs", "-force", "-dest", fake_process.any(), str(fake_snap_file)]
-    )
     fake_process.register_subprocess(
         ["snap", "ack", str(fake_assert_file)], returncode=1
     )
@@ -654,7 +938,7 @@ def test_lint_managed_mode_assert_error(
         ["snap", "install", str(fake_snap_file), "--dangerous"]
     )
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     mocker.patch(
         "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
     )
@@ -668,15 +952,19 @@ def test_lint_managed_mode_assert_error(
     mock_run_linters.assert_called_once_with(
         lint=Lint(ignore=["classic"]),
         location=Path("/snap/test/current"),
+        durations={},
     )
     mock_report.assert_called_once_with(
-        mock_run_linters.return_value, intermediate=True
+        mock_run_linters.return_value, intermediate=True, durations={}
     )
     emitter.assert_interactions(
         [
             call("progress", "Running linter.", permanent=True),
             call("debug", f"Found assertion file {str(fake_assert_file)!r}."),
-            call("progress", "Unsquashing snap file 'test-snap.snap'."),
+            call("progress", "Reading metadata from snap file 'test-snap.snap'."),
+            call("progress", "Mounting snap file 'test-snap.snap'."),
+            call("debug", "Could not mount snap file with 'mount'."),
+            call("debug", "Could not mount snap file with 'squashfuse'."),
             call(
                 "progress",
                 f"Installing assertion file with 'snap ack {fake_assert_file}'.",
@@ -729,24 +1017,27 @@ def test_lint_managed_mode_assert_error(
 def test_lint_managed_mode_with_lint_config(
     emitter,
     expected_lint,
+    fake_process,
     fake_snap_file,
     fake_snap_metadata,
     fake_snapcraft_project,
     mock_argv,
     mock_is_managed_mode,
+    mock_mount_error,
     mock_report,
     mock_run_linters,
+    mock_squashfs_image,
     mocker,
     project_lint,
 ):
     """Run the linter in managed mode and process the lint config from the project."""
     mock_is_managed_mode.return_value = True
-    mocker.patch("subprocess.run")
+    fake_process.register_subprocess(["snap", "install", fake_process.any()])
 
     # create a snap file
     fake_snap_file.touch()
 
-    # mock data from the unsquashed snap
+    # mock data from the snap
     mocker.patch(
         "snapcraft.commands.lint.snap_yaml.read", return_value=fake_snap_metadata
     )
@@ -762,10 +1053,10 @@ def test_lint_managed_mode_with_lint_config(
 
     # lint config from project should be passed to `run_linter()`
     mock_run_linters.assert_called_once_with(
-        lint=expected_lint, location=Path("/snap/test/current")
+        lint=expected_lint, location=Path("/snap/test/current"), durations={}
     )
     mock_report.assert_called_once_with(
-        mock_run_linters.return_value, intermediate=True
+        mock_run_linters.return_value, intermediate=True, durations={}
     )
     emitter.assert_verbose("Collected lint config from 'snapcraft.yaml'.")
 
@@ -923,3 +1214,24 @@ def test_load_project_unsupported_core_error(base, tmp_path):
         LintCommand(None)._load_project(snapcraft_yaml_file=snap_file)
 
     assert str(raised.value) == "can not lint snap using a base older than core22"
+
+
+def test_extract_metadata():
+    """Read the metadata files from a snap file without extracting the payload."""
+    snap_file = (
+        Path(__file__).parents[2] / "legacy" / "data" / "test-snap.snap"
+    ).resolve()
+
+    with LintCommand(None)._extract_metadata(snap_file) as metadata_dir:
+        assert sorted(
+            str(path.relative_to(metadata_dir)) for path in metadata_dir.rglob("*")
+        ) == ["meta", "meta/snap.yaml"]
+        assert yaml.safe_load((metadata_dir / "meta" / "snap.yaml").read_text()) == {
+            "name": "basic",
+            "version": 0.1,
+            "summary": "Summary of the most simple snap",
+            "description": "Description of the most simple snap",
+            "architectures": ["amd64"],
+        }
+
+    assert not metadata_dir.exists()
@@ -1,5 +1,6 @@
 import argparse
 from textwrap import dedent
+from unittest.mock import ANY, call
 
 import pytest
 
@@ -227,6 +228,7 @@ def test_default(emitter):
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -243,6 +245,24 @@ def test_default(emitter):
     )
 
 
+@pytest.mark.usefixtures("memory_keyring")
+def test_refresh(fake_store_get_status_map):
+    cmd = commands.StoreStatusCommand(None)
+
+    cmd.run(
+        argparse.Namespace(
+            name="test-snap",
+            arch=None,
+            track=None,
+            refresh=True,
+        )
+    )
+
+    assert fake_store_get_status_map.mock_calls == [
+        call(ANY, snap_name="test-snap", refresh=True)
+    ]
+
+
 @pytest.mark.usefixtures("memory_keyring")
 def test_following(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.channel_map = [
@@ -268,6 +288,7 @@ def test_following(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -292,6 +313,7 @@ def test_no_releases(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -323,6 +345,7 @@ def test_progressive(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -365,6 +388,7 @@ def test_arch(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=["s390x"],
             track=None,
+            refresh=False,
         )
     )
 
@@ -416,6 +440,7 @@ def test_multiple_arch(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=["s390x", "arm64"],
             track=None,
+            refresh=False,
         )
     )
 
@@ -441,6 +466,7 @@ def test_track(emitter, fake_store_get_status_map):
             name="test-snap",
             arch=None,
             track=["2.0"],
+            refresh=False,
         )
     )
 
@@ -462,6 +488,7 @@ def test_multi_track(emitter, fake_store_get_status_map):
             name="test-snap",
             arch=None,
             track=["2.0", "2.1"],
+            refresh=False,
         )
     )
 
@@ -517,6 +544,7 @@ def test_arch_and_track(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=["s390x"],
             track=["2.1"],
+            refresh=False,
         )
     )
 
@@ -563,6 +591,7 @@ def test_branch(emitter, fake_store_get_status_map, channel_map_result):
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -614,6 +643,7 @@ def test_progressive_branch(emitter, fake_store_get_status_map, channel_map_resu
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -644,6 +674,7 @@ def test_progressive_unknown(emitter, fake_store_get_status_map, channel_map_res
             name="test-snap",
             arch=None,
             track=None,
+            refresh=False,
         )
     )
 
@@ -677,7 +708,7 @@ def test_progressive_unknown(emitter, fake_store_get_status_map, channel_map_res
 def test_list_tracks(emitter, command_class):
     cmd = command_class(None)
 
-    cmd.run(argparse.Namespace(name="test-snap"))
+    cmd.run(argparse.Namespace(name="test-snap", refresh=False))
 
     emitter.assert_message(
         "Name    Status    Creation-Date         Version-Pattern\n"
@@ -695,7 +726,7 @@ def test_list_tracks(emitter, command_class):
 def test_list_revisions(emitter):
     cmd = commands.StoreListRevisionsCommand(None)
 
-    cmd.run(argparse.Namespace(snap_name="test-snap", arch=None))
+    cmd.run(argparse.Namespace(snap_name="test-snap", arch=None, refresh=False))
 
     emitter.assert_message(
         dedent(
@@ -711,7 +742,7 @@ def test_list_revisions(emitter):
 def test_list_revisions_arch(emitter):
     cmd = commands.StoreListRevisionsCommand(None)
 
-    cmd.run(argparse.Namespace(snap_name="test-snap", arch="amd64"))
+    cmd.run(argparse.Namespace(snap_name="test-snap", arch="amd64", refresh=False))
 
     emitter.assert_message(
         dedent(
@@ -728,7 +759,7 @@ def test_list_revisions_no_release_information(emitter, list_revisions_result):
 
     cmd = commands.StoreListRevisionsCommand(None)
 
-    cmd.run(argparse.Namespace(snap_name="test-snap", arch=None))
+    cmd.run(argparse.Namespace(snap_name="test-snap", arch=None, refresh=False))
 
     emitter.assert_message(
         dedent(
@@ -1,11 +1,21 @@
 import argparse
+import hashlib
+import os
 import pathlib
+from unittest import mock
 from unittest.mock import ANY, call
 
 import craft_cli.errors
 import pytest
 
-from snapcraft import commands
+from snapcraft import commands, errors
+from snapcraft.store import chunked_upload
+from snapcraft_legacy.file_utils import calculate_sha3_384
+from snapcraft_legacy.internal.cache import SnapCache
+from snapcraft_legacy.internal.deltas import XDelta3Generator
+from snapcraft_legacy.internal.deltas.errors import DeltaGenerationTooBigError
+from snapcraft_legacy.internal.errors import ToolMissingError
+from snapcraft_legacy.storeapi.v2.releases import Releases, Revision
 from tests import unit
 
 ############
@@ -24,11 +34,27 @@ def fake_store_client_upload_file(mocker):
 
 
 @pytest.fixture
-def fake_store_notify_upload(mocker):
+def fake_store_push_upload(mocker):
+    def push_upload(self, *, built_at, **kwargs):
+        return f"https://dashboard.snapcraft.io/status/{built_at}"
+
+    fake_client = mocker.patch(
+        "snapcraft.store.StoreClientCLI.push_upload",
+        autospec=True,
+        side_effect=push_upload,
+    )
+    return fake_client
+
+
+@pytest.fixture(autouse=True)
+def fake_store_wait_for_uploads(mocker):
+    def wait_for_uploads(self, status_urls):
+        return {url: {"processed": True, "revision": 10} for url in status_urls}
+
     fake_client = mocker.patch(
-        "snapcraft.store.StoreClientCLI.notify_upload",
+        "snapcraft.store.StoreClientCLI.wait_for_uploads",
         autospec=True,
-        return_value=10,
+        side_effect=wait_for_uploads,
     )
     return fake_client
 
@@ -68,7 +94,7 @@ def snap_file():
 )
 def test_default(
     emitter,
-    fake_store_notify_upload,
+    fake_store_push_upload,
     fake_store_verify_upload,
     snap_file,
     command_class,
@@ -77,13 +103,13 @@ def test_default(
 
     cmd.run(
         argparse.Namespace(
-            snap_file=snap_file,
+            snap_files=[snap_file],
             channels=None,
         )
     )
 
     assert fake_store_verify_upload.mock_calls == [call(ANY, snap_name="basic")]
-    assert fake_store_notify_upload.mock_calls == [
+    assert fake_store_push_upload.mock_calls == [
         call(
             ANY,
             snap_name="basic",
@@ -98,19 +124,19 @@ def test_default(
 
 @pytest.mark.usefixtures("memory_keyring")
 def test_default_channels(
-    emitter, fake_store_notify_upload, fake_store_verify_upload, snap_file
+    emitter, fake_store_push_upload, fake_store_verify_upload, snap_file
 ):
     cmd = commands.StoreUploadCommand(None)
 
     cmd.run(
         argparse.Namespace(
-            snap_file=snap_file,
+            snap_files=[snap_file],
             channels="stable,edge",
         )
     )
 
     assert fake_store_verify_upload.mock_calls == [call(ANY, snap_name="basic")]
-    assert fake_store_notify_upload.mock_calls == [
+    assert fake_store_push_upload.mock_calls == [
         call(
             ANY,
             snap_name="basic",
@@ -131,9 +157,455 @@ def test_invalid_file():
     with pytest.raises(craft_cli.errors.ArgumentParsingError) as raised:
         cmd.run(
             argparse.Namespace(
-                snap_file="invalid.snap",
+                snap_files=["invalid.snap"],
                 channels=None,
             )
         )
 
     assert str(raised.value) == "'invalid.snap' is not a valid file"
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_chunked_upload(
+    emitter,
+    fake_store_client_upload_file,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    mocker,
+    monkeypatch,
+    snap_file,
+):
+    monkeypatch.setenv("SNAPCRAFT_STORE_CHUNKED_UPLOAD", "1")
+    fake_chunked_upload = mocker.patch(
+        "snapcraft.store.chunked_upload.upload_file", return_value="chunked-id"
+    )
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    assert fake_chunked_upload.mock_calls == [
+        call(
+            ANY,
+            storage_url="https://storage.snapcraftcontent.com",
+            filepath=pathlib.Path(snap_file),
+            show_progress=True,
+        )
+    ]
+    fake_store_client_upload_file.assert_not_called()
+    assert fake_store_push_upload.mock_calls == [
+        call(
+            ANY,
+            snap_name="basic",
+            upload_id="chunked-id",
+            built_at=None,
+            channels=None,
+            snap_file_size=4096,
+        )
+    ]
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_chunked_upload_unsupported(
+    emitter,
+    fake_store_client_upload_file,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    mocker,
+    monkeypatch,
+    snap_file,
+):
+    monkeypatch.setenv("SNAPCRAFT_STORE_CHUNKED_UPLOAD", "1")
+    mocker.patch(
+        "snapcraft.store.chunked_upload.upload_file",
+        side_effect=chunked_upload.ChunkedUploadUnsupported(),
+    )
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    assert fake_store_client_upload_file.mock_calls == [
+        call(ANY, filepath=pathlib.Path(snap_file), monitor_callback=ANY)
+    ]
+    assert fake_store_push_upload.mock_calls == [
+        call(
+            ANY,
+            snap_name="basic",
+            upload_id="2ecbfac1-3448-4e7d-85a4-7919b999f120",
+            built_at=None,
+            channels=None,
+            snap_file_size=4096,
+        )
+    ]
+    emitter.assert_debug("Chunked uploads are not supported by the storage server")
+
+
+################
+# Delta Upload #
+################
+
+
+@pytest.fixture
+def source_snap(snap_file):
+    """Cache a previously uploaded revision of the snap."""
+    source_snap_file = pathlib.Path(snap_file).parent / "test-snap-with-icon.snap"
+    snap_cache = SnapCache(project_name="basic")
+    return snap_cache.cache(snap_filename=str(source_snap_file))
+
+
+@pytest.fixture
+def fake_store_list_revisions(mocker, source_snap):
+    revision = Revision(
+        architectures=["amd64"],
+        base="core22",
+        build_url=None,
+        confinement="strict",
+        created_at="2023-01-01T00:00:00Z",
+        grade="stable",
+        revision=9,
+        sha3_384=pathlib.Path(source_snap).name,
+        size=4096,
+        status="Published",
+        version="0.1",
+    )
+    return mocker.patch(
+        "snapcraft.store.StoreClientCLI.list_revisions",
+        autospec=True,
+        return_value=Releases(releases=[], revisions=[revision]),
+    )
+
+
+@pytest.fixture
+def fake_make_delta(mocker):
+    mocker.patch(
+        "snapcraft_legacy.internal.deltas._deltas.file_utils.get_snap_tool_path",
+        return_value="xdelta3",
+    )
+
+    def make_delta(self, output_dir):
+        delta_file = pathlib.Path(output_dir, "test-snap.snap.xdelta3")
+        delta_file.write_bytes(b"delta")
+        return str(delta_file)
+
+    return mocker.patch.object(
+        XDelta3Generator, "make_delta", autospec=True, side_effect=make_delta
+    )
+
+
+def get_cached_hashes():
+    snap_cache = SnapCache(project_name="basic")
+    return os.listdir(os.path.join(snap_cache.snap_cache_root, "amd64"))
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_upload_caches_snap(
+    fake_store_push_upload, fake_store_verify_upload, snap_file, source_snap
+):
+    cmd = commands.StoreUploadCommand(None)
+
+    with mock.patch(
+        "snapcraft.store.StoreClientCLI.list_revisions",
+        side_effect=errors.SnapcraftError("no revisions"),
+    ), mock.patch.object(
+        XDelta3Generator,
+        "__init__",
+        side_effect=ToolMissingError(command_name="xdelta3"),
+    ):
+        cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    # the source revision is pruned from the cache
+    assert get_cached_hashes() == [calculate_sha3_384(snap_file)]
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_delta_upload(
+    emitter,
+    fake_make_delta,
+    fake_store_client_upload_file,
+    fake_store_list_revisions,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    snap_file,
+    source_snap,
+):
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    assert fake_make_delta.mock_calls == [call(ANY, output_dir=ANY)]
+    assert fake_store_client_upload_file.mock_calls == [
+        call(ANY, filepath=ANY, monitor_callback=ANY)
+    ]
+    delta_file = fake_store_client_upload_file.mock_calls[0].kwargs["filepath"]
+    assert delta_file.name == "test-snap.snap.xdelta3"
+    assert fake_store_push_upload.mock_calls == [
+        call(
+            ANY,
+            snap_name="basic",
+            upload_id="2ecbfac1-3448-4e7d-85a4-7919b999f120",
+            built_at=None,
+            channels=None,
+            snap_file_size=5,
+            delta_format="xdelta3",
+            delta_hashes={
+                "source_hash": pathlib.Path(source_snap).name,
+                "target_hash": calculate_sha3_384(snap_file),
+                "delta_hash": hashlib.sha3_384(b"delta").hexdigest(),
+            },
+        )
+    ]
+    assert get_cached_hashes() == [calculate_sha3_384(snap_file)]
+    emitter.assert_message("Revision 10 created for 'basic'")
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_delta_upload_no_cached_revision(
+    fake_make_delta,
+    fake_store_client_upload_file,
+    fake_store_list_revisions,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    snap_file,
+):
+    """Do not generate a delta against a revision unknown to the store."""
+    fake_store_list_revisions.return_value.revisions[0].sha3_384 = "unknown"
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    fake_make_delta.assert_not_called()
+    assert fake_store_client_upload_file.mock_calls == [
+        call(ANY, filepath=pathlib.Path(snap_file), monitor_callback=ANY)
+    ]
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_delta_upload_generation_error(
+    emitter,
+    fake_make_delta,
+    fake_store_client_upload_file,
+    fake_store_list_revisions,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    snap_file,
+):
+    fake_make_delta.side_effect = DeltaGenerationTooBigError(delta_min_percentage=10)
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    assert fake_store_client_upload_file.mock_calls == [
+        call(ANY, filepath=pathlib.Path(snap_file), monitor_callback=ANY)
+    ]
+    assert fake_store_push_upload.mock_calls == [
+        call(
+            ANY,
+            snap_name="basic",
+            upload_id="2ecbfac1-3448-4e7d-85a4-7919b999f120",
+            built_at=None,
+            channels=None,
+            snap_file_size=4096,
+        )
+    ]
+    emitter.assert_progress(
+        f"Error generating delta: {fake_make_delta.side_effect}\n"
+        "Falling back to uploading the full snap.",
+        permanent=True,
+    )
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_delta_upload_store_error(
+    emitter,
+    fake_make_delta,
+    fake_store_client_upload_file,
+    fake_store_list_revisions,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    mocker,
+    snap_file,
+):
+    mocker.patch(
+        "snapcraft.store.StoreClientCLI.get_upload_revision",
+        autospec=True,
+        side_effect=[
+            errors.StoreDeltaApplicationError("Issues while processing delta"),
+            10,
+        ],
+    )
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(argparse.Namespace(snap_files=[snap_file], channels=None))
+
+    assert len(fake_store_client_upload_file.mock_calls) == 2
+    assert fake_store_client_upload_file.mock_calls[1] == call(
+        ANY, filepath=pathlib.Path(snap_file), monitor_callback=ANY
+    )
+    assert fake_store_push_upload.mock_calls[1] == call(
+        ANY,
+        snap_name="basic",
+        upload_id="2ecbfac1-3448-4e7d-85a4-7919b999f120",
+        built_at=None,
+        channels=None,
+        snap_file_size=4096,
+    )
+    emitter.assert_progress(
+        "Issues while processing delta\nFalling back to uploading the full snap.",
+        permanent=True,
+    )
+    emitter.assert_message("Revision 10 created for 'basic'")
+
+
+################
+# Batch Upload #
+################
+
+
+@pytest.fixture
+def started_at_snap_file(snap_file):
+    return str(pathlib.Path(snap_file).parent / "test-snap-with-started-at.snap")
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_upload_many(
+    emitter,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    fake_store_wait_for_uploads,
+    snap_file,
+    started_at_snap_file,
+):
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(
+        argparse.Namespace(
+            snap_files=[snap_file, started_at_snap_file], channels="edge"
+        )
+    )
+
+    assert fake_store_verify_upload.mock_calls == [call(ANY, snap_name="basic")]
+    assert {
+        c.kwargs["built_at"]: c.kwargs["channels"]
+        for c in fake_store_push_upload.mock_calls
+    } == {None: ["edge"], "2019-05-07T19:25:53.939041Z": ["edge"]}
+    # all the statuses are polled together
+    assert fake_store_wait_for_uploads.mock_calls == [
+        call(
+            ANY,
+            [
+                "https://dashboard.snapcraft.io/status/None",
+                "https://dashboard.snapcraft.io/status/2019-05-07T19:25:53.939041Z",
+            ],
+        )
+    ]
+    emitter.assert_message(
+        "Snap file                       Name    Architecture      Revision  Released to\n"
+        "------------------------------  ------  --------------  ----------  -------------\n"
+        "test-snap.snap                  basic   amd64                   10  edge\n"
+        "test-snap-with-started-at.snap  basic   amd64                   10  edge"
+    )
+
+
+@pytest.mark.usefixtures("memory_keyring", "source_snap")
+def test_upload_many_deltas(
+    fake_make_delta,
+    fake_store_client_upload_file,
+    fake_store_list_revisions,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    snap_file,
+    started_at_snap_file,
+):
+    cmd = commands.StoreUploadCommand(None)
+
+    cmd.run(
+        argparse.Namespace(snap_files=[snap_file, started_at_snap_file], channels=None)
+    )
+
+    # no progress bars are shown for concurrent uploads
+    assert fake_store_client_upload_file.mock_calls == [
+        call(ANY, filepath=ANY, monitor_callback=None),
+        call(ANY, filepath=ANY, monitor_callback=None),
+    ]
+    assert sorted(
+        c.kwargs["delta_format"] for c in fake_store_push_upload.mock_calls
+    ) == ["xdelta3", "xdelta3"]
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_upload_many_poll_error(
+    emitter,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    fake_store_wait_for_uploads,
+    snap_file,
+    started_at_snap_file,
+):
+    def wait_for_uploads(self, status_urls):
+        return {
+            url: errors.SnapcraftError("status unavailable")
+            if url.endswith("None")
+            else {"processed": True, "revision": 11}
+            for url in status_urls
+        }
+
+    fake_store_wait_for_uploads.side_effect = wait_for_uploads
+    cmd = commands.StoreUploadCommand(None)
+
+    with pytest.raises(errors.SnapcraftError) as raised:
+        cmd.run(
+            argparse.Namespace(
+                snap_files=[snap_file, started_at_snap_file], channels=None
+            )
+        )
+
+    assert str(raised.value) == "Failed to upload 1 of 2 snaps."
+    assert raised.value.details == "- test-snap.snap: status unavailable"
+    emitter.assert_message(
+        "Snap file                       Name    Architecture    Revision    Released to\n"
+        "------------------------------  ------  --------------  ----------  -------------\n"
+        "test-snap.snap                  basic   amd64           failed\n"
+        "test-snap-with-started-at.snap  basic   amd64           11"
+    )
+
+
+@pytest.mark.usefixtures("memory_keyring")
+def test_upload_many_error(
+    emitter,
+    fake_store_push_upload,
+    fake_store_verify_upload,
+    fake_store_wait_for_uploads,
+    snap_file,
+    started_at_snap_file,
+):
+    def wait_for_uploads(self, status_urls):
+        return {
+            url: {
+                "code": "processing_error",
+                "errors": [{"message": "bad snap"}],
+                "processed": True,
+            }
+            if url.endswith("None")
+            else {"processed": True, "revision": 11}
+            for url in status_urls
+        }
+
+    fake_store_wait_for_uploads.side_effect = wait_for_uploads
+    cmd = commands.StoreUploadCommand(None)
+
+    with pytest.raises(errors.SnapcraftError) as raised:
+        cmd.run(
+            argparse.Namespace(
+                snap_files=[snap_file, started_at_snap_file], channels=None
+            )
+        )
+
+    assert str(raised.value) == "Failed to upload 1 of 2 snaps."
+    assert raised.value.details == (
+        "- test-snap.snap: Issues while processing snap:\n- bad snap"
+    )
+    emitter.assert_message(
+        "Snap file                       Name    Architecture    Revision    Released to\n"
+        "------------------------------  ------  --------------  ----------  -------------\n"
+        "test-snap.snap                  basic   amd64           failed\n"
+        "test-snap-with-started-at.snap  basic   amd64           11"
+    )
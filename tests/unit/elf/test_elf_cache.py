@@ -0,0 +1,93 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+from pathlib import Path
+
+from snapcraft import elf
+from snapcraft.elf import _elf_cache
+
+
+def test_cache_hit(emitter, mocker, new_dir):
+    shutil.copy("/bin/ls", "ls")
+    elf_file = elf.ElfFile(path=Path("ls"))
+
+    mock_extract = mocker.patch("snapcraft.elf._elf_file.ElfFile._extract_attributes")
+    cached_elf_file = elf.ElfFile(path=Path("ls"))
+
+    assert mock_extract.mock_calls == []
+    emitter.assert_debug("ELF cache hit: 'ls'")
+    assert cached_elf_file.arch_tuple == elf_file.arch_tuple
+    assert cached_elf_file.interp == elf_file.interp
+    assert cached_elf_file.soname == elf_file.soname
+    assert cached_elf_file.versions == elf_file.versions
+    assert cached_elf_file.needed.keys() == elf_file.needed.keys()
+    for name, library in cached_elf_file.needed.items():
+        assert library.versions == elf_file.needed[name].versions
+    assert cached_elf_file.execstack_set == elf_file.execstack_set
+    assert cached_elf_file.build_id == elf_file.build_id
+    assert cached_elf_file.has_debug_info == elf_file.has_debug_info
+    assert cached_elf_file.elf_type == elf_file.elf_type
+
+
+def test_cache_hit_hardlink(mocker, new_dir):
+    shutil.copy("/bin/ls", "ls")
+    os.link("ls", "ls-link")
+    elf.ElfFile(path=Path("ls"))
+
+    mock_extract = mocker.patch("snapcraft.elf._elf_file.ElfFile._extract_attributes")
+    elf.ElfFile(path=Path("ls-link"))
+
+    assert mock_extract.mock_calls == []
+
+
+def test_cache_miss_modified_file(emitter, mocker, new_dir):
+    shutil.copy("/bin/ls", "ls")
+    elf.ElfFile(path=Path("ls"))
+
+    with Path("ls").open("ab") as elf_binary:
+        elf_binary.write(b"\0")
+
+    spy_extract = mocker.spy(elf.ElfFile, "_extract_attributes")
+    elf.ElfFile(path=Path("ls"))
+
+    assert len(spy_extract.mock_calls) == 1
+    emitter.assert_debug("ELF cache miss: 'ls'")
+
+
+def test_cache_location(new_dir):
+    elf_cache = _elf_cache.get_elf_cache()
+
+    assert elf_cache is not None
+    assert _elf_cache._cache_path is not None
+    assert _elf_cache._cache_path.parent == Path(
+        _elf_cache.BaseDirectory.xdg_cache_home, "snapcraft"
+    )
+    assert _elf_cache._cache_path.exists()
+
+
+def test_cache_unavailable(mocker, new_dir):
+    mocker.patch(
+        "snapcraft.elf._elf_cache.ElfCache.__init__", side_effect=OSError("denied")
+    )
+    mocker.patch("snapcraft.elf._elf_cache._cache_path", None)
+    shutil.copy("/bin/ls", "ls")
+
+    elf_file = elf.ElfFile(path=Path("ls"))
+
+    assert _elf_cache.get_elf_cache() is None
+    assert elf_file.interp != ""
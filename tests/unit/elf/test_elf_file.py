@@ -19,7 +19,7 @@ from pathlib import Path
 import pytest
 
 from snapcraft import elf
-from snapcraft.elf import elf_utils, errors
+from snapcraft.elf import _elf_file, elf_utils, errors
 from snapcraft.elf._elf_file import _Library
 
 
@@ -201,6 +201,186 @@ class TestGetLibraries:
         assert libs == {fake_libs["moo.so.2"]}
 
 
+class TestNativeResolver:
+    """Resolve libraries without running ldd."""
+
+    def test_bin_ls_matches_ldd(self):
+        elf_file = elf.ElfFile(path=Path("/bin/ls"))
+        arch_triplet = elf_utils.get_arch_triplet()
+
+        resolver = _elf_file._NativeResolver(
+            ld_library_paths=[], arch_triplet=arch_triplet
+        )
+
+        assert resolver.resolve(elf_file) == _elf_file._ldd(Path("/bin/ls"), [])
+
+    def test_runpath_origin(self, new_dir, fake_elf):
+        lib_path = new_dir / "lib"
+        lib_path.mkdir()
+        fake_elf("lib/libfoo.so.1")
+        elf_file = fake_elf("fake_elf-shared-object")
+        elf_file.needed = {"libfoo.so.1": _elf_file._NeededLibrary(name="libfoo.so.1")}
+        elf_file.runpath = ["$ORIGIN/lib"]
+
+        resolver = _elf_file._NativeResolver(
+            ld_library_paths=[], arch_triplet="x86_64-linux-gnu"
+        )
+
+        assert resolver.resolve(elf_file) == {
+            "libfoo.so.1": str(lib_path / "libfoo.so.1")
+        }
+
+    def test_ld_library_path_before_runpath(self, new_dir, fake_elf):
+        for directory in ["first", "second"]:
+            Path(directory).mkdir()
+            fake_elf(f"{directory}/libfoo.so.1")
+        elf_file = fake_elf("fake_elf-shared-object")
+        elf_file.needed = {"libfoo.so.1": _elf_file._NeededLibrary(name="libfoo.so.1")}
+        elf_file.runpath = [str(new_dir / "second")]
+
+        resolver = _elf_file._NativeResolver(
+            ld_library_paths=[str(new_dir / "first")], arch_triplet="x86_64-linux-gnu"
+        )
+
+        assert resolver.resolve(elf_file) == {
+            "libfoo.so.1": str(new_dir / "first" / "libfoo.so.1")
+        }
+
+    def test_loader_rpath_past_runpath(self, new_dir, fake_elf):
+        for directory in ["rpath", "runpath"]:
+            Path(directory).mkdir()
+        deep = fake_elf("rpath/libdeep.so.1")
+        deep.needed = {}
+        leaf = fake_elf("runpath/libleaf.so.1")
+        leaf.needed = {"libdeep.so.1": _elf_file._NeededLibrary(name="libdeep.so.1")}
+        middle = fake_elf("rpath/libmiddle.so.1")
+        middle.needed = {"libleaf.so.1": _elf_file._NeededLibrary(name="libleaf.so.1")}
+        middle.runpath = [str(new_dir / "runpath")]
+        elf_file = fake_elf("fake_elf-shared-object")
+        elf_file.needed = {
+            "libmiddle.so.1": _elf_file._NeededLibrary(name="libmiddle.so.1")
+        }
+        elf_file.rpath = [str(new_dir / "rpath")]
+
+        resolver = _elf_file._NativeResolver(
+            ld_library_paths=[], arch_triplet="x86_64-linux-gnu"
+        )
+        for library in [deep, leaf, middle]:
+            resolver._elf_files[str(new_dir / library.path)] = library
+
+        # the RUNPATH of libmiddle does not hide the RPATH of its loader
+        # from the dependencies of libleaf
+        assert resolver.resolve(elf_file) == {
+            "libmiddle.so.1": str(new_dir / "rpath" / "libmiddle.so.1"),
+            "libleaf.so.1": str(new_dir / "runpath" / "libleaf.so.1"),
+            "libdeep.so.1": str(new_dir / "rpath" / "libdeep.so.1"),
+        }
+
+    def test_missing_library(self, new_dir, fake_elf):
+        elf_file = fake_elf("fake_elf-shared-object")
+        elf_file.needed = {
+            "libmissing.so.2": _elf_file._NeededLibrary(name="libmissing.so.2")
+        }
+
+        resolver = _elf_file._NativeResolver(
+            ld_library_paths=[], arch_triplet="x86_64-linux-gnu"
+        )
+
+        assert resolver.resolve(elf_file) == {"libmissing.so.2": "libmissing.so.2"}
+
+
+class TestResolverEngine:
+    """Selection of the library resolver engine."""
+
+    @pytest.mark.parametrize(
+        "value,engine",
+        [(None, "ldd"), ("ldd", "ldd"), ("native", "native"), ("bad", "ldd")],
+    )
+    def test_get_resolver_engine(self, monkeypatch, value, engine):
+        if value is None:
+            monkeypatch.delenv("SNAPCRAFT_ELF_RESOLVER", raising=False)
+        else:
+            monkeypatch.setenv("SNAPCRAFT_ELF_RESOLVER", value)
+
+        assert _elf_file._get_resolver_engine() == engine
+
+    def test_native_engine_does_not_run_ldd(self, mocker, monkeypatch, fake_elf):
+        monkeypatch.setenv("SNAPCRAFT_ELF_RESOLVER", "native")
+        mock_ldd = mocker.patch("snapcraft.elf._elf_file._determine_libraries")
+        elf_file = fake_elf("fake_elf-shared-object")
+
+        libraries = _elf_file._resolve_libraries(
+            elf_file=elf_file,
+            ld_library_paths=[],
+            arch_triplet="x86_64-linux-gnu",
+            soname_cache=elf.SonameCache(),
+        )
+
+        assert libraries == {"libssl.so.1.0.0": "libssl.so.1.0.0"}
+        assert mock_ldd.mock_calls == []
+
+    def test_native_engine_shares_resolver(self, mocker, monkeypatch, fake_elf):
+        monkeypatch.setenv("SNAPCRAFT_ELF_RESOLVER", "native")
+        spy_resolver = mocker.patch.object(
+            _elf_file, "_NativeResolver", wraps=_elf_file._NativeResolver
+        )
+        soname_cache = elf.SonameCache()
+
+        for name in ["fake_elf-shared-object", "fake_elf-2.26"]:
+            _elf_file._resolve_libraries(
+                elf_file=fake_elf(name),
+                ld_library_paths=[],
+                arch_triplet="x86_64-linux-gnu",
+                soname_cache=soname_cache,
+            )
+
+        assert spy_resolver.call_count == 1
+
+    def test_native_engine_falls_back_to_ldd(self, mocker, monkeypatch, fake_elf):
+        monkeypatch.setenv("SNAPCRAFT_ELF_RESOLVER", "native")
+        mock_ldd = mocker.patch(
+            "snapcraft.elf._elf_file._determine_libraries",
+            return_value={"libssl.so.1.0.0": "/lib/libssl.so.1.0.0"},
+        )
+        elf_file = fake_elf("fake_elf-shared-object")
+        elf_file.arch_tuple = None
+
+        libraries = _elf_file._resolve_libraries(
+            elf_file=elf_file,
+            ld_library_paths=[],
+            arch_triplet="x86_64-linux-gnu",
+            soname_cache=elf.SonameCache(),
+        )
+
+        assert libraries == {"libssl.so.1.0.0": "/lib/libssl.so.1.0.0"}
+        assert len(mock_ldd.mock_calls) == 1
+
+    def test_compare_engine_reports_mismatch(
+        self, emitter, mocker, monkeypatch, fake_elf
+    ):
+        monkeypatch.setenv("SNAPCRAFT_ELF_RESOLVER", "compare")
+        mocker.patch(
+            "snapcraft.elf._elf_file._determine_libraries",
+            return_value={"libssl.so.1.0.0": "/lib/libssl.so.1.0.0"},
+        )
+        elf_file = fake_elf("fake_elf-shared-object")
+
+        libraries = _elf_file._resolve_libraries(
+            elf_file=elf_file,
+            ld_library_paths=[],
+            arch_triplet="x86_64-linux-gnu",
+            soname_cache=elf.SonameCache(),
+        )
+
+        assert libraries == {"libssl.so.1.0.0": "/lib/libssl.so.1.0.0"}
+        emitter.assert_progress(
+            "Library resolution mismatch for 'fake_elf-shared-object': "
+            "'libssl.so.1.0.0' resolved to 'libssl.so.1.0.0' (native) and "
+            "'/lib/libssl.so.1.0.0' (ldd)",
+            permanent=True,
+        )
+
+
 class TestLibrary:
     """Verify the _Library class."""
 
@@ -317,6 +497,56 @@ class TestSonameCache:
         assert (arch, "notfound.so") not in soname_cache
         assert (arch, "soname2.so") in soname_cache
 
+    def test_get_soname_index(self, new_dir):
+        Path("lib/sub").mkdir(parents=True)
+        Path("lib/libfoo.so.1").touch()
+        Path("lib/sub/libfoo.so.1").touch()
+        Path("lib/libbar.so.2").touch()
+
+        soname_cache = elf.SonameCache()
+        index = soname_cache.get_soname_index(new_dir)
+
+        assert sorted(index["libfoo.so.1"]) == [
+            new_dir / "lib/libfoo.so.1",
+            new_dir / "lib/sub/libfoo.so.1",
+        ]
+        assert index["libbar.so.2"] == [new_dir / "lib/libbar.so.2"]
+
+    def test_get_soname_index_walks_once(self, mocker, new_dir):
+        spy_walk = mocker.spy(_elf_file.os, "walk")
+
+        soname_cache = elf.SonameCache()
+        soname_cache.get_soname_index(new_dir)
+        soname_cache.get_soname_index(new_dir)
+
+        assert spy_walk.mock_calls == [mocker.call(new_dir)]
+
+    def test_get_soname_index_persisted_for_snaps(self, mocker, new_dir):
+        Path("libfoo.so.1").touch()
+        mocker.patch(
+            "snapcraft.elf._elf_cache.os.path.realpath",
+            return_value="/snap/core22/123",
+        )
+
+        elf.SonameCache().get_soname_index(new_dir)
+        Path("libfoo.so.1").unlink()
+        index = elf.SonameCache().get_soname_index(new_dir)
+
+        assert index == {"libfoo.so.1": [new_dir / "libfoo.so.1"]}
+
+    @pytest.mark.parametrize("real_root", ["/snap/core22/x1", "/home/user/prime"])
+    def test_get_soname_index_not_persisted(self, mocker, new_dir, real_root):
+        Path("libfoo.so.1").touch()
+        mocker.patch(
+            "snapcraft.elf._elf_cache.os.path.realpath", return_value=real_root
+        )
+
+        elf.SonameCache().get_soname_index(new_dir)
+        Path("libfoo.so.1").unlink()
+        index = elf.SonameCache().get_soname_index(new_dir)
+
+        assert index == {}
+
     @pytest.mark.parametrize(
         "key,partial_message",
         [
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import shutil
 from pathlib import Path
 
 import pytest
@@ -96,6 +97,58 @@ class TestGetElfFiles:
         assert elf_files == []
 
 
+class TestGetElfFilesParallel:
+    """get_elf_files_from_list using a process pool."""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixture(self, mocker):
+        mocker.patch("snapcraft.elf.elf_utils._PARALLEL_SCAN_THRESHOLD", 1)
+
+    def test_same_as_serial(self, mocker, new_dir):
+        shutil.copy("/bin/ls", "ls")
+        shutil.copy("/bin/true", "true")
+        Path("non-elf").write_bytes(b"\x42\x5a\x68")
+        Path("invalid-elf").write_bytes(b"\x7fELF\x00")
+        file_list = ["true", "non-elf", "ls", "invalid-elf"]
+
+        mocker.patch("snapcraft.utils.get_parallel_build_count", return_value=1)
+        serial_files = elf_utils.get_elf_files_from_list(new_dir, file_list)
+
+        mocker.patch("snapcraft.utils.get_parallel_build_count", return_value=2)
+        parallel_files = elf_utils.get_elf_files_from_list(new_dir, file_list)
+
+        assert [e.path for e in parallel_files] == [new_dir / "ls", new_dir / "true"]
+        assert [e.path for e in parallel_files] == [e.path for e in serial_files]
+        assert [e.needed.keys() for e in parallel_files] == [
+            e.needed.keys() for e in serial_files
+        ]
+
+    def test_uses_parent_cache(self, mocker, new_dir):
+        """Workers use the cache location of the parent, not the user's."""
+        home_cache = Path.home() / ".cache" / "snapcraft" / "elf-attributes-v1.db"
+        home_cache_mtime = home_cache.stat().st_mtime if home_cache.exists() else None
+        shutil.copy("/bin/true", "true")
+        mocker.patch("snapcraft.utils.get_parallel_build_count", return_value=2)
+
+        elf_utils.get_elf_files_from_list(new_dir, ["true"])
+
+        # the cache was written to the temporary XDG cache directory
+        assert (new_dir / ".cache" / "snapcraft" / "elf-attributes-v1.db").exists()
+        assert (
+            home_cache.stat().st_mtime if home_cache.exists() else None
+        ) == home_cache_mtime
+
+    def test_single_job_does_not_use_pool(self, mocker, new_dir, fake_elf):
+        fake_elf("fake_elf-2.23")
+        mocker.patch("snapcraft.utils.get_parallel_build_count", return_value=1)
+        mock_parallel = mocker.patch("snapcraft.elf.elf_utils._scan_elf_files_parallel")
+
+        elf_files = elf_utils.get_elf_files_from_list(new_dir, ["fake_elf-2.23"])
+
+        assert [e.path for e in elf_files] == [new_dir / "fake_elf-2.23"]
+        assert mock_parallel.mock_calls == []
+
+
 class TestGetDynamicLinker:
     """find_linker functionality."""
 
@@ -13,6 +13,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
 import shutil
 from pathlib import Path
 from unittest.mock import ANY, call
@@ -200,3 +201,71 @@ def test_patcher_patch_rpath_already_set(mocker, patcher, elf_file):
             ]
         )
     ]
+
+
+def test_patcher_get_current_rpath(mocker, patcher, elf_file):
+    check_output_mock = mocker.patch("subprocess.check_output")
+    elf_file.rpath = ["/rpath"]
+    assert patcher.get_current_rpath(elf_file) == ["/rpath"]
+
+    elf_file.runpath = ["$ORIGIN/runpath"]
+    assert patcher.get_current_rpath(elf_file) == ["$ORIGIN/runpath"]
+    assert check_output_mock.mock_calls == []
+
+
+@pytest.mark.usefixtures("fake_tools")
+def test_patcher_run_patchelf_breaks_hardlink(new_dir, fake_elf):
+    elf_file = fake_elf("fake_elf-2.23")
+    os.link("fake_elf-2.23", "hardlink")
+    elf_patcher = elf.Patcher(dynamic_linker="/lib/fake-ld", root_path=new_dir)
+
+    elf_patcher.patch(elf_file=elf_file)
+
+    assert os.stat("fake_elf-2.23").st_ino != os.stat("hardlink").st_ino
+    assert Path("fake_elf-2.23").read_bytes() == b"\x7fELF"
+    assert list(new_dir.glob(".fake_elf-2.23.*")) == []
+
+
+@pytest.mark.usefixtures("fake_tools")
+def test_patcher_run_patchelf_failure_cleans_up(new_dir, fake_elf):
+    elf_file = fake_elf("fake_elf-bad-patchelf")
+    elf_patcher = elf.Patcher(dynamic_linker="/lib/fake-ld", root_path=new_dir)
+
+    with pytest.raises(errors.PatcherError):
+        elf_patcher.patch(elf_file=elf_file)
+
+    assert list(new_dir.glob(".fake_elf-bad-patchelf.*")) == []
+
+
+def test_patcher_patch_files(mocker, new_dir, fake_elf):
+    run_mock = mocker.patch("snapcraft.elf._patcher.Patcher._run_patchelf")
+    patched_elf_file = fake_elf("fake_elf-2.23")
+    static_elf_file = fake_elf("fake_elf-shared-object")
+    elf_patcher = elf.Patcher(
+        dynamic_linker="/lib/fake-ld",
+        root_path=new_dir,
+        preferred_patchelf=PATCHELF_PATH,
+    )
+
+    elf_patcher.patch_files(elf_files=[patched_elf_file, static_elf_file])
+
+    assert run_mock.mock_calls == [
+        call(
+            patchelf_args=["--set-interpreter", "/lib/fake-ld"],
+            elf_file_path=patched_elf_file.path,
+        )
+    ]
+
+
+def test_patcher_patch_files_nothing_to_do(mocker, new_dir, fake_elf):
+    run_mock = mocker.patch("snapcraft.elf._patcher.Patcher._run_patchelf")
+    elf_file = fake_elf("fake_elf-2.23")
+    elf_patcher = elf.Patcher(
+        dynamic_linker=elf_file.interp,
+        root_path=new_dir,
+        preferred_patchelf=PATCHELF_PATH,
+    )
+
+    elf_patcher.patch_files(elf_files=[elf_file])
+
+    assert run_mock.mock_calls == []
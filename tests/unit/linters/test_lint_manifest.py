@@ -0,0 +1,169 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from snapcraft.linters import _lint_manifest
+
+
+@pytest.fixture
+def payload(tmp_path):
+    root = tmp_path / "prime"
+    (root / "bin").mkdir(parents=True)
+    (root / "lib").mkdir()
+    (root / "bin" / "app").write_text("app")
+    (root / "lib" / "libfoo.so.1").write_text("foo")
+    (root / "lib" / "libfoo.so").symlink_to("libfoo.so.1")
+    return root
+
+
+def _get_manifest(files, dependencies):
+    return _lint_manifest.LintManifest(
+        fingerprint="fingerprint", files=files, dependencies=dependencies, issues={}
+    )
+
+
+def test_get_file_states(payload):
+    files = _lint_manifest.get_file_states(payload)
+
+    assert sorted(files) == ["bin/app", "lib/libfoo.so", "lib/libfoo.so.1"]
+    assert files["lib/libfoo.so"] == (0, 0, "symlink:libfoo.so.1")
+    assert files["bin/app"][0] == 3
+
+
+def test_get_file_states_reuses_digest(payload):
+    files = _lint_manifest.get_file_states(payload)
+    previous = {**files, "bin/app": (*files["bin/app"][:2], "previous")}
+
+    assert _lint_manifest.get_file_states(payload, previous)["bin/app"][2] == (
+        "previous"
+    )
+
+    # the digest is computed again if the file is modified
+    (payload / "bin" / "app").write_text("new")
+    os.utime(payload / "bin" / "app", ns=(0, 0))
+    assert _lint_manifest.get_file_states(payload, previous)["bin/app"][2] not in (
+        "previous",
+        files["bin/app"][2],
+    )
+
+
+def test_get_changed_files(payload):
+    files = _lint_manifest.get_file_states(payload)
+    manifest = _get_manifest(files, {})
+
+    (payload / "bin" / "app").write_text("new")
+    (payload / "lib" / "libfoo.so").unlink()
+    (payload / "lib" / "libbar.so").write_text("bar")
+
+    assert manifest.get_changed_files(_lint_manifest.get_file_states(payload)) == {
+        "bin/app",
+        "lib/libfoo.so",
+        "lib/libbar.so",
+    }
+
+
+def test_get_unchanged_elf_files(payload):
+    files = _lint_manifest.get_file_states(payload)
+    manifest = _get_manifest(
+        files,
+        {
+            "bin/app": [str(payload / "lib" / "libfoo.so.1")],
+            "lib/libfoo.so.1": ["/lib/libc.so.6"],
+        },
+    )
+
+    assert manifest.get_unchanged_elf_files(payload, files) == {
+        "bin/app": {payload / "lib" / "libfoo.so.1"},
+        "lib/libfoo.so.1": {Path("/lib/libc.so.6")},
+    }
+
+
+def test_get_unchanged_elf_files_dependency_changed(payload):
+    files = _lint_manifest.get_file_states(payload)
+    manifest = _get_manifest(
+        files,
+        {
+            "bin/app": [str(payload / "lib" / "libfoo.so.1")],
+            "lib/libfoo.so.1": ["/lib/libc.so.6"],
+        },
+    )
+
+    (payload / "lib" / "libfoo.so.1").write_text("new")
+
+    assert (
+        manifest.get_unchanged_elf_files(
+            payload, _lint_manifest.get_file_states(payload)
+        )
+        == {}
+    )
+
+
+def test_get_unchanged_elf_files_file_added(payload):
+    files = _lint_manifest.get_file_states(payload)
+    manifest = _get_manifest(
+        files,
+        {
+            "bin/app": [str(payload / "lib" / "libfoo.so.1")],
+            "lib/libfoo.so.1": ["/lib/libc.so.6"],
+        },
+    )
+
+    # a library added to the payload could satisfy dependencies outside of it
+    (payload / "lib" / "libc.so.6").write_text("libc")
+
+    assert manifest.get_unchanged_elf_files(
+        payload, _lint_manifest.get_file_states(payload)
+    ) == {"bin/app": {payload / "lib" / "libfoo.so.1"}}
+
+
+def test_read_write_manifest(payload):
+    files = _lint_manifest.get_file_states(payload)
+    manifest = _get_manifest(files, {"bin/app": []})
+
+    assert _lint_manifest.read_manifest(payload) is None
+
+    _lint_manifest.write_manifest(payload, manifest)
+
+    assert _lint_manifest.read_manifest(payload) == manifest
+    assert _lint_manifest.read_manifest(payload / "bin") is None
+
+
+def test_write_manifest_evicts_old_manifests(payload, monkeypatch):
+    manifest = _get_manifest(_lint_manifest.get_file_states(payload), {})
+    locations = []
+    for name in ("old", "older", "recent"):
+        location = payload.parent / name
+        location.mkdir()
+        locations.append(location)
+        _lint_manifest.write_manifest(location, manifest)
+
+    # the first one is over the maximum age, the second one over the maximum count
+    now = time.time()
+    for location, mtime in zip(locations, (0, now - 20, now - 10)):
+        os.utime(_lint_manifest._get_manifest_path(location), (mtime, mtime))
+    monkeypatch.setattr(_lint_manifest, "_MAX_MANIFESTS", 2)
+
+    _lint_manifest.write_manifest(payload, manifest)
+
+    assert _lint_manifest.read_manifest(locations[0]) is None
+    assert _lint_manifest.read_manifest(locations[1]) is None
+    assert _lint_manifest.read_manifest(locations[2]) == manifest
+    assert _lint_manifest.read_manifest(payload) == manifest
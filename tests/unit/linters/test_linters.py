@@ -14,6 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List
 from unittest.mock import MagicMock, call
@@ -22,7 +25,11 @@ import pytest
 from overrides import overrides
 
 from snapcraft import linters, projects
-from snapcraft.linters.base import Linter, LinterResult
+from snapcraft.elf import ElfFile, elf_utils
+from snapcraft.linters import _lint_manifest
+from snapcraft.linters.base import Linter, LinterContext, LinterResult
+from snapcraft.linters.classic_linter import ClassicLinter
+from snapcraft.linters.library_linter import LibraryLinter
 from snapcraft.linters.linters import _ignore_matching_filenames
 from snapcraft.meta import snap_yaml
 
@@ -94,6 +101,28 @@ class TestLinterReport:
             )
         ]
 
+    def test_linter_report_durations(self, emitter, linter_issue):
+        issues = [linter_issue(filename="foo.txt")]
+        linters.report(issues, durations={"test": 1.23456})
+        assert emitter.interactions == [
+            call("message", "Lint OK:"),
+            call("message", "- test: foo.txt: Linter message text (https://some/url)"),
+            call("verbose", "Linter timings:"),
+            call("verbose", "- test: 1.235s"),
+        ]
+
+    def test_linter_report_json_durations(self, emitter, linter_issue):
+        issues = [linter_issue(filename="foo.txt")]
+        linters.report(issues, json_output=True, durations={"test": 1.23456})
+        assert emitter.interactions == [
+            call(
+                "message",
+                '{"issues": [{"type": "lint", "name": "test", "result": "ok", '
+                '"filename": "foo.txt", "text": "Linter message text", '
+                '"url": "https://some/url"}], "timings": {"test": 1.235}}',
+            )
+        ]
+
 
 class TestLinterStatus:
     """Check report status according to issues reported."""
@@ -225,6 +254,153 @@ class TestLinterRun:
         issues = linters.run_linters(new_dir, lint=lint)
         assert issues == []
 
+    def test_run_linters_shared_context(self, mocker, new_dir):
+        """Dependencies are resolved once for all linters."""
+        elf_utils.get_elf_files.cache_clear()
+        shutil.copy("/bin/true", "elf.bin")
+        mocker.patch(
+            "snapcraft.linters.linters.LINTERS",
+            {"classic": ClassicLinter, "library": LibraryLinter},
+        )
+        mocker.patch(
+            "snapcraft.elf._elf_file._determine_libraries",
+            return_value={
+                "libc.so.6": "/snap/core22/current/lib/x86_64-linux-gnu/libc.so.6"
+            },
+        )
+        spy_load_dependencies = mocker.spy(ElfFile, "load_dependencies")
+        yaml_data = {
+            "name": "mytest",
+            "version": "1.29.3",
+            "base": "core22",
+            "summary": "Single-line elevator pitch for your amazing snap",
+            "description": "test-description",
+            "confinement": "classic",
+            "parts": {},
+        }
+
+        project = projects.Project.unmarshal(yaml_data)
+        snap_yaml.write(project, prime_dir=Path(new_dir), arch="amd64")
+
+        issues = linters.run_linters(new_dir, lint=None)
+
+        assert {issue.name for issue in issues} == {"classic"}
+        assert len(spy_load_dependencies.mock_calls) == 1
+
+    def test_run_linters_parallel(self, mocker, new_dir, tmp_path):
+        """Parallel-safe linters run concurrently, outside of the payload."""
+        threads = {}
+
+        class _ParallelLinter(_TestLinter):
+            parallel_safe = True
+
+            @overrides
+            def run(self) -> List[linters.LinterIssue]:
+                threads[self._name] = threading.get_ident()
+                assert self._context.root_path == tmp_path
+                return [
+                    linters.LinterIssue(
+                        name=self._name, result=LinterResult.OK, text="Done."
+                    )
+                ]
+
+        mocker.patch(
+            "snapcraft.linters.linters.LINTERS",
+            {"first": _ParallelLinter, "second": _ParallelLinter, "last": _TestLinter},
+        )
+        mocker.patch("snapcraft.utils.get_parallel_build_count", return_value=2)
+        yaml_data = {
+            "name": "mytest",
+            "version": "1.29.3",
+            "base": "core22",
+            "summary": "Single-line elevator pitch for your amazing snap",
+            "description": "test-description",
+            "confinement": "strict",
+            "parts": {},
+        }
+
+        project = projects.Project.unmarshal(yaml_data)
+        snap_yaml.write(project, prime_dir=tmp_path, arch="amd64")
+
+        durations = {}
+        issues = linters.run_linters(tmp_path, lint=None, durations=durations)
+
+        assert Path.cwd() == new_dir
+        assert [issue.name for issue in issues] == ["first", "second", "test"]
+        assert threading.get_ident() not in threads.values()
+        assert list(durations) == ["first", "second", "last"]
+        assert all(duration >= 0 for duration in durations.values())
+
+    def test_run_linters_incremental(self, mocker, new_dir):
+        """Only changed files are checked again on subsequent runs."""
+        elf_utils.get_elf_files.cache_clear()
+        prime_dir = new_dir / "prime"
+        prime_dir.mkdir()
+        shutil.copy("/bin/true", prime_dir / "elf.bin")
+        shutil.copy("/bin/true", prime_dir / "other.bin")
+        mocker.patch("snapcraft.linters.linters.LINTERS", {"library": LibraryLinter})
+        mocker.patch(
+            "snapcraft.elf._elf_file._determine_libraries",
+            return_value={"libfoo.so.1": "/prime/lib/x86_64-linux-gnu/libfoo.so.1"},
+        )
+        spy_load_dependencies = mocker.spy(ElfFile, "load_dependencies")
+        yaml_data = {
+            "name": "mytest",
+            "version": "1.29.3",
+            "base": "core22",
+            "summary": "Single-line elevator pitch for your amazing snap",
+            "description": "test-description",
+            "confinement": "strict",
+            "parts": {},
+        }
+
+        project = projects.Project.unmarshal(yaml_data)
+        snap_yaml.write(project, prime_dir=prime_dir, arch="amd64")
+
+        issues = linters.run_linters(prime_dir, lint=None, incremental=True)
+        assert sorted(issue.filename for issue in issues) == ["elf.bin", "other.bin"]
+        assert len(spy_load_dependencies.mock_calls) == 2
+
+        # nothing changed
+        spy_load_dependencies.reset_mock()
+        assert linters.run_linters(prime_dir, lint=None, incremental=True) == issues
+        assert spy_load_dependencies.mock_calls == []
+
+        # one file changed
+        elf_utils.get_elf_files.cache_clear()
+        with open(prime_dir / "other.bin", "ab") as file:
+            file.write(b"\0")
+
+        assert sorted(
+            linters.run_linters(prime_dir, lint=None, incremental=True), key=str
+        ) == sorted(issues, key=str)
+        assert len(spy_load_dependencies.mock_calls) == 1
+        assert (
+            spy_load_dependencies.mock_calls[0].args[0].path == prime_dir / "other.bin"
+        )
+
+    def test_run_linters_not_incremental(self, mocker, new_dir):
+        """Files are not hashed and no manifest is kept by default."""
+        mocker.patch("snapcraft.linters.linters.LINTERS", {})
+        spy_get_file_states = mocker.spy(_lint_manifest, "get_file_states")
+        spy_write_manifest = mocker.spy(_lint_manifest, "write_manifest")
+        yaml_data = {
+            "name": "mytest",
+            "version": "1.29.3",
+            "base": "core22",
+            "summary": "Single-line elevator pitch for your amazing snap",
+            "description": "test-description",
+            "confinement": "strict",
+            "parts": {},
+        }
+
+        project = projects.Project.unmarshal(yaml_data)
+        snap_yaml.write(project, prime_dir=new_dir, arch="amd64")
+
+        assert linters.run_linters(new_dir, lint=None) == []
+        spy_get_file_states.assert_not_called()
+        spy_write_manifest.assert_not_called()
+
     def test_ignore_matching_filenames(self, linter_issue):
         lint = projects.Lint(ignore=[{"test": ["foo*", "some/dir/*"]}])
         issues = [
@@ -268,3 +444,39 @@ def test_base_linter_is_file_ignored():
     assert not linter.is_file_ignored(Path("test-2-path"))
     assert not linter.is_file_ignored(Path("test-2-path"), category="test-1")
     assert linter.is_file_ignored(Path("test-2-path"), category="test-2")
+
+
+def test_context_get_dependencies_concurrently(mocker, new_dir):
+    """Dependencies of different files are resolved at the same time."""
+    mocker.patch(
+        "snapcraft.elf.elf_utils.get_arch_triplet", return_value="x86_64-linux-gnu"
+    )
+    context = LinterContext(new_dir, MagicMock(base=None))
+    slow_started = threading.Event()
+    fast_resolved = threading.Event()
+
+    def load_slow_dependencies(**kwargs):
+        slow_started.set()
+        assert fast_resolved.wait(timeout=10)
+        return {Path("/lib/libslow.so")}
+
+    slow = MagicMock(path=Path("slow.bin"))
+    slow.load_dependencies.side_effect = load_slow_dependencies
+    fast = MagicMock(path=Path("fast.bin"))
+    fast.load_dependencies.return_value = {Path("/lib/libfast.so")}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(context.get_dependencies, slow) for _ in range(2)]
+        assert slow_started.wait(timeout=10)
+        assert context.get_dependencies(fast) == {Path("/lib/libfast.so")}
+        fast_resolved.set()
+
+        for future in futures:
+            assert future.result() == {Path("/lib/libslow.so")}
+
+    # concurrent requests for the same file wait for a single resolution
+    assert slow.load_dependencies.call_count == 1
+    assert context.dependencies == {
+        Path("slow.bin"): {Path("/lib/libslow.so")},
+        Path("fast.bin"): {Path("/lib/libfast.so")},
+    }
@@ -157,10 +157,94 @@ def test_snapcraft_yaml_load(new_dir, snapcraft_yaml, filename, mocker):
                 ua_token=None,
                 build_for=None,
             ),
+            concurrent=False,
         ),
     ]
 
 
+def _multi_arch_parsed_args(**kwargs):
+    args = {
+        "parts": [],
+        "destructive_mode": False,
+        "use_lxd": False,
+        "provider": None,
+        "debug": False,
+        "ua_token": None,
+        "build_for": None,
+    }
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+@pytest.fixture
+def multi_arch_yaml(snapcraft_yaml, mocker, monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_PARALLEL_BUILDS", "3")
+    mocker.patch(
+        "snapcraft.parts.lifecycle.get_host_architecture", return_value="amd64"
+    )
+    return snapcraft_yaml(
+        base="core22",
+        architectures=[
+            {"build-on": "amd64", "build-for": build_for}
+            for build_for in ("amd64", "arm64", "armhf")
+        ],
+    )
+
+
+def test_lifecycle_run_build_plan_concurrently(
+    multi_arch_yaml, new_dir, mocker, emitter
+):
+    run_command_mock = mocker.patch("snapcraft.parts.lifecycle._run_command")
+
+    parts_lifecycle.run("pack", _multi_arch_parsed_args())
+
+    assert sorted(
+        c.kwargs["project"].get_build_for() for c in run_command_mock.mock_calls
+    ) == ["amd64", "arm64", "armhf"]
+    for mock_call in run_command_mock.mock_calls:
+        assert mock_call.kwargs["concurrent"] is True
+    emitter.assert_progress("Running 3 build plan entries, up to 3 at a time...")
+
+
+def test_lifecycle_run_build_plan_concurrently_error(multi_arch_yaml, new_dir, mocker):
+    def _fake_run_command(command_name, *, project, **kwargs):
+        if project.get_build_for() == "arm64":
+            raise errors.SnapcraftError("Failed to execute pack in instance.")
+
+    run_command_mock = mocker.patch(
+        "snapcraft.parts.lifecycle._run_command", side_effect=_fake_run_command
+    )
+
+    with pytest.raises(errors.SnapcraftError) as raised:
+        parts_lifecycle.run("pack", _multi_arch_parsed_args())
+
+    # all the entries run even if one fails
+    assert len(run_command_mock.mock_calls) == 3
+    assert str(raised.value) == "Failed to run 1 of 3 build plan entries."
+    assert raised.value.details == (
+        "- build on amd64 for arm64: Failed to execute pack in instance."
+    )
+
+
+def test_lifecycle_run_build_plan_concurrently_destructive_mode(
+    multi_arch_yaml, new_dir, mocker, emitter
+):
+    run_command_mock = mocker.patch("snapcraft.parts.lifecycle._run_command")
+
+    parts_lifecycle.run("pack", _multi_arch_parsed_args(destructive_mode=True))
+
+    assert [
+        c.kwargs["project"].get_build_for() for c in run_command_mock.mock_calls
+    ] == ["amd64", "arm64", "armhf"]
+    for mock_call in run_command_mock.mock_calls:
+        assert mock_call.kwargs["concurrent"] is False
+    emitter.assert_progress(
+        "Running build plan entries one at a time: concurrent builds are "
+        "only supported in managed build instances without interaction.",
+        permanent=True,
+    )
+
+
 @pytest.mark.parametrize(
     "cmd", ["pull", "build", "stage", "prime", "pack", "snap", "clean"]
 )
@@ -480,6 +564,7 @@ def test_lifecycle_pack_not_managed(cmd, snapcraft_yaml, new_dir, mocker):
                 use_lxd=False,
                 parts=[],
             ),
+            concurrent=False,
         )
     ]
 
@@ -635,6 +720,7 @@ def test_lifecycle_clean_part_names(snapcraft_yaml, project_vars, new_dir, mocke
                 use_lxd=False,
                 parts=["part1"],
             ),
+            concurrent=False,
         )
     ]
 
@@ -0,0 +1,305 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import threading
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import craft_store
+import pytest
+
+from snapcraft import errors
+from snapcraft.store import chunked_upload
+
+CHUNK_SIZE = 1024
+
+
+class FakeStorage:
+    """A stand-in storage server for chunked uploads.
+
+    :ivar sessions: The chunks received for each session.
+    :ivar requests: The method and path of each request.
+    :ivar failures: Chunks to fail with the status code, by index.
+    :ivar supported: Whether chunked uploads are supported.
+    :ivar session_reply: Replace the reply with the received chunks.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, object]] = {}
+        self.requests = []
+        self.failures: Dict[int, Counter] = {}
+        self.supported = True
+        self.session_reply: Optional[Dict[str, object]] = None
+        self.lock = threading.Lock()
+
+        storage = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, data=None):
+                body = json.dumps(data or {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):  # noqa: N802
+                storage.requests.append(("POST", self.path))
+                body = self._read_body()
+                if self.path == "/unscanned-upload/chunked/":
+                    if not storage.supported:
+                        return self._reply(404)
+                    session_id = uuid.uuid4().hex
+                    storage.sessions[session_id] = {
+                        "info": json.loads(body),
+                        "chunks": {},
+                    }
+                    return self._reply(
+                        201, {"session_url": f"{storage.url}/sessions/{session_id}"}
+                    )
+
+                session = storage.get_session(self.path[: -len("finish")])
+                if session is None:
+                    return self._reply(404)
+                data = b"".join(session["chunks"][i] for i in sorted(session["chunks"]))
+                if hashlib.sha3_384(data).hexdigest() != session["info"]["sha3_384"]:
+                    return self._reply(200, {"successful": False})
+                storage.uploaded = data
+                return self._reply(
+                    200, {"successful": True, "upload_id": "test-upload-id"}
+                )
+
+            def do_PUT(self):  # noqa: N802
+                storage.requests.append(("PUT", self.path))
+                path, index = self.path.rsplit("/", 1)
+                data = self._read_body()
+                with storage.lock:
+                    failures = storage.failures.get(int(index))
+                    if failures and failures["count"] != 0:
+                        failures["count"] -= 1
+                        return self._reply(failures["status"])
+                session = storage.get_session(path + "/")
+                if session is None:
+                    return self._reply(404)
+                session["chunks"][int(index)] = data
+                return self._reply(200)
+
+            def do_GET(self):  # noqa: N802
+                storage.requests.append(("GET", self.path))
+                session = storage.get_session(self.path)
+                if session is None:
+                    return self._reply(404)
+                if storage.session_reply is not None:
+                    return self._reply(200, storage.session_reply)
+                return self._reply(200, {"chunks": sorted(session["chunks"])})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.uploaded = b""
+
+    def get_session(self, path):
+        session_id = path.strip("/").split("/")[-1]
+        return self.sessions.get(session_id)
+
+    def fail(self, index, *, status=503, count=-1):
+        """Fail uploads of chunk index with status, count times or forever."""
+        self.failures[index] = Counter(status=status, count=count)
+
+    def chunk_uploads(self):
+        return [int(p.rsplit("/", 1)[1]) for m, p in self.requests if m == "PUT"]
+
+
+@pytest.fixture
+def fake_storage():
+    storage = FakeStorage()
+    thread = threading.Thread(target=storage.server.serve_forever, daemon=True)
+    thread.start()
+    yield storage
+    storage.server.shutdown()
+    storage.server.server_close()
+
+
+@pytest.fixture
+def http_client(monkeypatch):
+    # retries are handled per chunk
+    monkeypatch.setenv("CRAFT_STORE_RETRIES", "0")
+    monkeypatch.setattr(chunked_upload, "_RETRY_DELAY", 0)
+    return craft_store.HTTPClient(user_agent="snapcraft-test")
+
+
+@pytest.fixture
+def snap_file(tmp_path):
+    snap_file = tmp_path / "test-snap.snap"
+    snap_file.write_bytes(bytes(range(256)) * 18)
+    return snap_file
+
+
+def upload(http_client, fake_storage, snap_file):
+    return chunked_upload.upload_file(
+        http_client,
+        storage_url=fake_storage.url,
+        filepath=snap_file,
+        chunk_size=CHUNK_SIZE,
+        workers=2,
+    )
+
+
+def get_journal_path(snap_file):
+    digest = hashlib.sha3_384(snap_file.read_bytes()).hexdigest()
+    return chunked_upload._get_journal_path(digest)
+
+
+def test_upload_file(emitter, fake_storage, http_client, snap_file):
+    upload_id = upload(http_client, fake_storage, snap_file)
+
+    assert upload_id == "test-upload-id"
+    assert fake_storage.uploaded == snap_file.read_bytes()
+    assert sorted(fake_storage.chunk_uploads()) == [0, 1, 2, 3, 4]
+    (session,) = fake_storage.sessions.values()
+    assert session["info"] == {
+        "name": "test-snap.snap",
+        "size": 4608,
+        "sha3_384": hashlib.sha3_384(snap_file.read_bytes()).hexdigest(),
+        "chunk_size": CHUNK_SIZE,
+    }
+    assert len(session["chunks"][4]) == 512
+    assert not get_journal_path(snap_file).exists()
+
+
+def test_upload_file_empty(fake_storage, http_client, tmp_path):
+    snap_file = tmp_path / "empty.snap"
+    snap_file.touch()
+
+    assert upload(http_client, fake_storage, snap_file) == "test-upload-id"
+    assert fake_storage.chunk_uploads() == []
+
+
+def test_upload_file_retry(emitter, fake_storage, http_client, snap_file):
+    fake_storage.fail(2, count=2)
+
+    upload_id = upload(http_client, fake_storage, snap_file)
+
+    assert upload_id == "test-upload-id"
+    assert fake_storage.uploaded == snap_file.read_bytes()
+    assert Counter(fake_storage.chunk_uploads())[2] == 3
+
+
+def test_upload_file_client_error_not_retried(fake_storage, http_client, snap_file):
+    fake_storage.fail(2, status=400, count=1)
+
+    with pytest.raises(errors.SnapcraftError):
+        upload(http_client, fake_storage, snap_file)
+
+    assert Counter(fake_storage.chunk_uploads())[2] == 1
+
+
+def test_upload_file_resume(emitter, fake_storage, http_client, snap_file):
+    fake_storage.fail(3)
+
+    with pytest.raises(errors.SnapcraftError) as raised:
+        upload(http_client, fake_storage, snap_file)
+
+    assert raised.value.resolution == "Run the command again to resume the upload."
+    assert Counter(fake_storage.chunk_uploads())[3] == chunked_upload._CHUNK_RETRIES + 1
+    assert get_journal_path(snap_file).exists()
+
+    # the connection is back, only the missing chunk is uploaded
+    fake_storage.failures.clear()
+    fake_storage.requests.clear()
+
+    upload_id = upload(http_client, fake_storage, snap_file)
+
+    assert upload_id == "test-upload-id"
+    assert fake_storage.uploaded == snap_file.read_bytes()
+    assert fake_storage.chunk_uploads() == [3]
+    assert len(fake_storage.sessions) == 1
+    assert not get_journal_path(snap_file).exists()
+    emitter.assert_progress("Resuming upload of 'test-snap.snap'.", permanent=True)
+
+
+def test_upload_file_resume_expired_session(fake_storage, http_client, snap_file):
+    fake_storage.fail(3)
+    with pytest.raises(errors.SnapcraftError):
+        upload(http_client, fake_storage, snap_file)
+
+    # the server forgot about the session
+    fake_storage.sessions.clear()
+    fake_storage.failures.clear()
+    fake_storage.requests.clear()
+
+    upload_id = upload(http_client, fake_storage, snap_file)
+
+    assert upload_id == "test-upload-id"
+    assert fake_storage.uploaded == snap_file.read_bytes()
+    assert sorted(fake_storage.chunk_uploads()) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize(
+    "session_reply", [{"received": [0, 1]}, {"chunks": None}, {"chunks": ["first"]}]
+)
+def test_upload_file_resume_malformed_session(
+    fake_storage, http_client, snap_file, session_reply
+):
+    fake_storage.fail(3)
+    with pytest.raises(errors.SnapcraftError):
+        upload(http_client, fake_storage, snap_file)
+
+    fake_storage.session_reply = session_reply
+    fake_storage.failures.clear()
+    fake_storage.requests.clear()
+
+    upload_id = upload(http_client, fake_storage, snap_file)
+
+    # a new session is created
+    assert upload_id == "test-upload-id"
+    assert fake_storage.uploaded == snap_file.read_bytes()
+    assert sorted(fake_storage.chunk_uploads()) == [0, 1, 2, 3, 4]
+    assert len(fake_storage.sessions) == 2
+
+
+def test_upload_file_modified_file_not_resumed(fake_storage, http_client, snap_file):
+    fake_storage.fail(3)
+    with pytest.raises(errors.SnapcraftError):
+        upload(http_client, fake_storage, snap_file)
+
+    fake_storage.failures.clear()
+    fake_storage.requests.clear()
+    snap_file.write_bytes(snap_file.read_bytes()[::-1])
+
+    upload(http_client, fake_storage, snap_file)
+
+    assert fake_storage.uploaded == snap_file.read_bytes()
+    assert sorted(fake_storage.chunk_uploads()) == [0, 1, 2, 3, 4]
+    assert len(fake_storage.sessions) == 2
+
+
+def test_upload_file_unsupported(fake_storage, http_client, snap_file):
+    fake_storage.supported = False
+
+    with pytest.raises(chunked_upload.ChunkedUploadUnsupported):
+        upload(http_client, fake_storage, snap_file)
+
+    assert not get_journal_path(snap_file).exists()
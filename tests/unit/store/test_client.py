@@ -765,6 +765,72 @@ def test_get_channel_map(fake_client, channel_map_payload):
     ]
 
 
+def test_get_channel_map_cached(fake_client, channel_map_payload):
+    fake_client.request.return_value = FakeResponse(
+        status_code=200, content=json.dumps(channel_map_payload)
+    )
+    store_client = client.StoreClientCLI()
+
+    store_client.get_channel_map(snap_name="test-snap")
+    channel_map = store_client.get_channel_map(snap_name="test-snap")
+
+    assert isinstance(channel_map, ChannelMap)
+    assert len(fake_client.request.mock_calls) == 1
+
+
+def test_get_channel_map_refresh(fake_client, channel_map_payload):
+    fake_client.request.side_effect = [
+        FakeResponse(
+            status_code=200,
+            content=json.dumps(channel_map_payload),
+            headers={"ETag": '"1"'},
+        ),
+        FakeResponse(status_code=304, content=b""),
+    ]
+    store_client = client.StoreClientCLI()
+
+    store_client.get_channel_map(snap_name="test-snap")
+    channel_map = store_client.get_channel_map(snap_name="test-snap", refresh=True)
+
+    assert isinstance(channel_map, ChannelMap)
+    assert fake_client.request.mock_calls[1] == call(
+        "GET",
+        "https://dashboard.snapcraft.io/api/v2/snaps/test-snap/channel-map",
+        headers={"Accept": "application/json", "If-None-Match": '"1"'},
+    )
+
+
+def test_release_invalidates_cache(fake_client, channel_map_payload):
+    fake_client.request.return_value = FakeResponse(
+        status_code=200, content=json.dumps(channel_map_payload)
+    )
+    store_client = client.StoreClientCLI()
+
+    store_client.get_channel_map(snap_name="test-snap")
+    store_client.release("test-snap", revision=10, channels=["beta"])
+    store_client.get_channel_map(snap_name="test-snap")
+
+    assert [c.args[0] for c in fake_client.request.mock_calls] == [
+        "GET",
+        "POST",
+        "GET",
+    ]
+
+
+def test_logout_clears_cache(fake_client, channel_map_payload):
+    fake_client.request.return_value = FakeResponse(
+        status_code=200, content=json.dumps(channel_map_payload)
+    )
+    store_client = client.StoreClientCLI()
+
+    store_client.get_channel_map(snap_name="test-snap")
+    store_client.logout()
+    store_client.get_channel_map(snap_name="test-snap")
+
+    assert fake_client.logout.mock_calls == [call()]
+    assert len(fake_client.request.mock_calls) == 2
+
+
 #################
 # Verify Upload #
 #################
@@ -968,6 +1034,170 @@ def test_notify_upload_error(fake_client):
     ]
 
 
+@pytest.mark.usefixtures("no_wait")
+def test_notify_upload_delta(fake_client):
+    fake_client.request.side_effect = [
+        FakeResponse(
+            status_code=200, content=json.dumps({"status_details_url": "https://track"})
+        ),
+        FakeResponse(
+            status_code=200,
+            content=json.dumps({"code": "done", "processed": True, "revision": 42}),
+        ),
+    ]
+
+    revision = client.StoreClientCLI().notify_upload(
+        snap_name="foo",
+        upload_id="some-id",
+        channels=None,
+        built_at=None,
+        snap_file_size=99,
+        delta_format="xdelta3",
+        delta_hashes={
+            "source_hash": "source",
+            "target_hash": "target",
+            "delta_hash": "delta",
+        },
+    )
+
+    assert revision == 42
+    assert fake_client.request.mock_calls == [
+        call(
+            "POST",
+            "https://dashboard.snapcraft.io/dev/api/snap-push/",
+            json={
+                "name": "foo",
+                "series": "16",
+                "updown_id": "some-id",
+                "binary_filesize": 99,
+                "source_uploaded": False,
+                "delta_format": "xdelta3",
+                "source_hash": "source",
+                "target_hash": "target",
+                "delta_hash": "delta",
+            },
+            headers={"Accept": "application/json"},
+        ),
+        call("GET", "https://track"),
+    ]
+
+
+@pytest.mark.usefixtures("no_wait")
+def test_notify_upload_delta_error(fake_client):
+    fake_client.request.side_effect = [
+        FakeResponse(
+            status_code=200, content=json.dumps({"status_details_url": "https://track"})
+        ),
+        FakeResponse(
+            status_code=200,
+            content=json.dumps(
+                {
+                    "code": "processing_upload_delta_error",
+                    "processed": True,
+                    "errors": [{"message": "bad-delta"}],
+                }
+            ),
+        ),
+    ]
+
+    with pytest.raises(errors.StoreDeltaApplicationError) as raised:
+        client.StoreClientCLI().notify_upload(
+            snap_name="foo",
+            upload_id="some-id",
+            channels=None,
+            built_at=None,
+            snap_file_size=99,
+            delta_format="xdelta3",
+            delta_hashes={},
+        )
+
+    assert str(raised.value) == textwrap.dedent(
+        """\
+        Issues while processing delta:
+        - bad-delta"""
+    )
+
+
+def test_wait_for_uploads(fake_client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    fake_client.request.side_effect = [
+        FakeResponse(
+            status_code=200,
+            content=json.dumps({"code": "processing", "processed": False}),
+        ),
+        FakeResponse(
+            status_code=200,
+            content=json.dumps({"code": "done", "processed": True, "revision": 1}),
+        ),
+        FakeResponse(
+            status_code=200,
+            content=json.dumps({"code": "done", "processed": True, "revision": 2}),
+        ),
+    ]
+
+    statuses = client.StoreClientCLI().wait_for_uploads(
+        ["https://track/1", "https://track/2"]
+    )
+
+    assert statuses == {
+        "https://track/1": {"code": "done", "processed": True, "revision": 2},
+        "https://track/2": {"code": "done", "processed": True, "revision": 1},
+    }
+    assert fake_client.request.mock_calls == [
+        call("GET", "https://track/1"),
+        call("GET", "https://track/2"),
+        call("GET", "https://track/1"),
+    ]
+    # a single wait between rounds of polling
+    assert len(sleeps) == 1
+
+
+def test_wait_for_uploads_error(fake_client, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda x: x)
+    network_error = craft_store.errors.NetworkError(requests.ConnectionError())
+    fake_client.request.side_effect = [
+        network_error,
+        FakeResponse(
+            status_code=200,
+            content=json.dumps({"code": "processing", "processed": False}),
+        ),
+        FakeResponse(
+            status_code=200,
+            content=json.dumps({"code": "done", "processed": True, "revision": 2}),
+        ),
+    ]
+
+    statuses = client.StoreClientCLI().wait_for_uploads(
+        ["https://track/1", "https://track/2"]
+    )
+
+    # the failed upload is not polled again
+    assert statuses == {
+        "https://track/1": network_error,
+        "https://track/2": {"code": "done", "processed": True, "revision": 2},
+    }
+    assert len(fake_client.request.mock_calls) == 3
+
+
+def test_wait_for_uploads_timeout(fake_client, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(time, "sleep", lambda x: now.append(now.pop() + x))
+    fake_client.request.return_value = FakeResponse(
+        status_code=200,
+        content=json.dumps({"code": "processing", "processed": False}),
+    )
+
+    with pytest.raises(errors.SnapcraftError) as raised:
+        client.StoreClientCLI().wait_for_uploads(["https://track"])
+
+    assert str(raised.value) == (
+        "Timed out after 3600 seconds waiting for the Snap Store to process the "
+        "upload."
+    )
+
+
 ##################
 # List Revisions #
 ##################
@@ -1176,6 +1406,7 @@ def test_on_prem_get_channel_map(
             ANY,
             "GET",
             "https://dashboard.snapcraft.io/v1/snap/test-snap/releases",
+            headers={},
         )
     ]
 
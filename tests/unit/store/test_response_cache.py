@@ -0,0 +1,146 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+from unittest.mock import Mock, call
+
+import pytest
+
+from snapcraft.store import response_cache
+
+from .utils import FakeResponse
+
+URL = "https://dashboard.snapcraft.io/api/v2/snaps/test-snap/channel-map"
+
+
+@pytest.fixture
+def fake_request():
+    return Mock(
+        return_value=FakeResponse(
+            status_code=200,
+            content=json.dumps({"revision": 1}),
+            headers={"Last-Modified": "Wed, 01 Mar 2023 00:00:00 GMT"},
+        )
+    )
+
+
+def get_json(fake_request, url=URL, **kwargs):
+    return response_cache.get_json(
+        fake_request, url, snap_name="test-snap", kind="channel-map", **kwargs
+    )
+
+
+def test_get_json(fake_request):
+    assert get_json(fake_request) == {"revision": 1}
+    assert get_json(fake_request) == {"revision": 1}
+
+    assert fake_request.mock_calls == [call("GET", URL, headers={})]
+
+
+def test_get_json_expired_not_modified(emitter, fake_request, monkeypatch):
+    get_json(fake_request)
+    monkeypatch.setattr(response_cache, "TTL", 0)
+    fake_request.return_value = FakeResponse(status_code=304, content=b"")
+
+    assert get_json(fake_request) == {"revision": 1}
+    assert fake_request.mock_calls[1] == call(
+        "GET",
+        URL,
+        headers={"If-Modified-Since": "Wed, 01 Mar 2023 00:00:00 GMT"},
+    )
+    emitter.assert_debug("Cached channel-map for 'test-snap' is up to date")
+
+
+def test_get_json_expired_modified(fake_request, monkeypatch):
+    get_json(fake_request)
+    monkeypatch.setattr(response_cache, "TTL", 0)
+    fake_request.return_value = FakeResponse(
+        status_code=200, content=json.dumps({"revision": 2})
+    )
+
+    assert get_json(fake_request) == {"revision": 2}
+
+    # the new payload is cached
+    monkeypatch.setattr(response_cache, "TTL", 60)
+    assert get_json(fake_request) == {"revision": 2}
+    assert len(fake_request.mock_calls) == 2
+
+
+def test_get_json_other_store(fake_request):
+    get_json(fake_request)
+    get_json(fake_request, url=URL.replace("dashboard", "dashboard.staging"))
+
+    assert len(fake_request.mock_calls) == 2
+
+
+def test_get_json_corrupt_cache(fake_request):
+    get_json(fake_request)
+    cache_path = response_cache._get_cache_path(
+        URL, snap_name="test-snap", kind="channel-map"
+    )
+    cache_path.write_text("{", encoding="utf-8")
+
+    assert get_json(fake_request) == {"revision": 1}
+    assert fake_request.mock_calls[1] == call("GET", URL, headers={})
+
+
+def test_invalidate(fake_request):
+    get_json(fake_request)
+
+    response_cache.invalidate("https://dashboard.snapcraft.io", snap_name="test-snap")
+    get_json(fake_request)
+
+    assert len(fake_request.mock_calls) == 2
+
+
+def test_invalidate_all_accounts(fake_request, monkeypatch):
+    get_json(fake_request)
+    monkeypatch.setenv("SNAPCRAFT_STORE_CREDENTIALS", "exported")
+    get_json(fake_request)
+
+    response_cache.invalidate("https://dashboard.snapcraft.io", snap_name="test-snap")
+    get_json(fake_request)
+    monkeypatch.delenv("SNAPCRAFT_STORE_CREDENTIALS")
+    get_json(fake_request)
+
+    assert len(fake_request.mock_calls) == 4
+
+
+def test_get_json_exported_credentials(fake_request, monkeypatch):
+    get_json(fake_request)
+    monkeypatch.setenv("SNAPCRAFT_STORE_CREDENTIALS", "exported")
+    get_json(fake_request)
+    monkeypatch.setenv("SNAPCRAFT_STORE_CREDENTIALS", "other-exported")
+    get_json(fake_request)
+
+    # responses are not shared between accounts
+    assert len(fake_request.mock_calls) == 3
+
+    monkeypatch.setenv("SNAPCRAFT_STORE_CREDENTIALS", "exported")
+    get_json(fake_request)
+
+    assert len(fake_request.mock_calls) == 3
+
+
+def test_clear(fake_request):
+    get_json(fake_request)
+    get_json(fake_request, url=URL.replace("test-snap", "other-snap"))
+
+    response_cache.clear("https://dashboard.snapcraft.io")
+    get_json(fake_request)
+    get_json(fake_request, url=URL.replace("test-snap", "other-snap"))
+
+    assert len(fake_request.mock_calls) == 4
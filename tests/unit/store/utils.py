@@ -22,9 +22,12 @@ import requests
 class FakeResponse(requests.Response):
     """A fake requests.Response."""
 
-    def __init__(self, content, status_code):  # pylint: disable=super-init-not-called
+    def __init__(
+        self, content, status_code, headers=None
+    ):  # pylint: disable=super-init-not-called
         self._content = content
         self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
 
     @property
     def content(self):
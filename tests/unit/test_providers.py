@@ -348,6 +348,7 @@ def test_get_command_environment_passthrough(
     monkeypatch.setenv("SNAPCRAFT_BUILD_INFO", "test-build-info")
     monkeypatch.setenv("SNAPCRAFT_IMAGE_INFO", "test-image-info")
     monkeypatch.setenv("SNAPCRAFT_MAX_PARALLEL_BUILD_COUNT", "test-build-count")
+    monkeypatch.setenv("SNAPCRAFT_ELF_RESOLVER", "test-elf-resolver")
 
     # ensure other variables are not being passed
     monkeypatch.setenv("other_var", "test-other-var")
@@ -365,6 +366,7 @@ def test_get_command_environment_passthrough(
         "SNAPCRAFT_BUILD_INFO": "test-build-info",
         "SNAPCRAFT_IMAGE_INFO": "test-image-info",
         "SNAPCRAFT_MAX_PARALLEL_BUILD_COUNT": "test-build-count",
+        "SNAPCRAFT_ELF_RESOLVER": "test-elf-resolver",
     }
 
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure the time snapcraft spends importing modules at startup.
+
+Each command is run with ``python -X importtime`` and the cumulative import
+time of the top-level modules is compared against the command's budget. The
+script exits with an error if any command goes over its budget or imports a
+module it should not need.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+
+class Budget(NamedTuple):
+    """Import time budget of a cheap command.
+
+    :ivar milliseconds: The cumulative import time allowed.
+    :ivar allowed: Forbidden modules the command is allowed to import.
+    :ivar may_fail: Whether the command is expected to fail, e.g. without
+        store credentials, in which case only its imports are measured.
+    """
+
+    milliseconds: int
+    allowed: Tuple[str, ...] = ()
+    may_fail: bool = False
+
+
+# The store commands import the store client, built on the legacy store API.
+_STORE_MODULES = ("craft_store", "snapcraft.store", "snapcraft_legacy")
+
+# Cheap commands with their import time budget. The global --help lists
+# every command, so only the help of single commands qualifies.
+BUDGETS: Dict[Tuple[str, ...], Budget] = {
+    ("--version",): Budget(300),
+    ("version", "--help"): Budget(300),
+    ("whoami", "--help"): Budget(2000, allowed=_STORE_MODULES),
+    ("whoami",): Budget(2000, allowed=_STORE_MODULES, may_fail=True),
+}
+
+# Modules that cheap commands must not import.
+FORBIDDEN_MODULES = (
+    "craft_parts",
+    "craft_providers",
+    "craft_store",
+    "snapcraft.commands.lifecycle",
+    "snapcraft.parts",
+    "snapcraft.store",
+    "snapcraft_legacy",
+)
+
+_IMPORTTIME_RE = re.compile(
+    r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent>\s+)"
+    r"(?P<module>\S+)$"
+)
+
+
+class ImportTime(NamedTuple):
+    """Time spent importing a module, in microseconds."""
+
+    module: str
+    cumulative: int
+    nested: bool
+
+
+def measure(command: Sequence[str], *, may_fail: bool = False) -> List[ImportTime]:
+    """Run snapcraft with the given arguments and collect its import times."""
+    with tempfile.TemporaryDirectory() as state_dir:
+        # keep the log files away from the user's snapcraft logs
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "snapcraft", *command],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            env={**os.environ, "XDG_STATE_HOME": state_dir},
+            check=False,
+            text=True,
+        )
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            imports.append(
+                ImportTime(
+                    module=match.group("module"),
+                    cumulative=int(match.group("cumulative")),
+                    # top-level imports are indented by a single space
+                    nested=len(match.group("indent")) > 1,
+                )
+            )
+
+    if proc.returncode != 0 and not may_fail:
+        raise RuntimeError(
+            f"'snapcraft {' '.join(command)}' failed:\n{proc.stderr[-2000:]}"
+        )
+    return imports
+
+
+def _total(imports: Sequence[ImportTime]) -> int:
+    return sum(i.cumulative for i in imports if not i.nested)
+
+
+def _is_forbidden(module: str, allowed: Sequence[str]) -> bool:
+    return any(
+        module == forbidden or module.startswith(f"{forbidden}.")
+        for forbidden in FORBIDDEN_MODULES
+        if forbidden not in allowed
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of slowest top-level imports to show per command",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=3,
+        help="Number of runs per command, the fastest one is reported",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for command, budget in BUDGETS.items():
+        runs = [measure(command, may_fail=budget.may_fail) for _ in range(args.runs)]
+        imports = [i for i in min(runs, key=_total) if not i.nested]
+        total = _total(imports) // 1000
+
+        print(
+            f"snapcraft {' '.join(command)}: {total} ms "
+            f"(budget {budget.milliseconds} ms)"
+        )
+        for import_time in sorted(imports, key=lambda i: -i.cumulative)[: args.top]:
+            print(f"  {import_time.cumulative // 1000:6d} ms  {import_time.module}")
+
+        if total > budget.milliseconds:
+            print("  over budget", file=sys.stderr)
+            failed = True
+
+        forbidden = sorted(
+            {
+                i.module
+                for run in runs
+                for i in run
+                if _is_forbidden(i.module, budget.allowed)
+            }
+        )
+        if forbidden:
+            print(f"  imports {', '.join(forbidden)}", file=sys.stderr)
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())